@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api.endpoints import claims_router, recalibration_router, analytics_router, aggregation_router
+from app.api.endpoints import claims_router, recalibration_router, analytics_router, aggregation_router, exports_router
 
 api_router = APIRouter()
 
@@ -8,6 +8,7 @@ api_router.include_router(claims_router, prefix="/claims", tags=["claims"])
 api_router.include_router(recalibration_router, prefix="/recalibration", tags=["recalibration"])
 api_router.include_router(analytics_router, prefix="/analytics", tags=["analytics"])
 api_router.include_router(aggregation_router, prefix="/aggregation", tags=["aggregation"])
+api_router.include_router(exports_router, prefix="/exports", tags=["exports"])
 
 __all__ = ["api_router"]
 
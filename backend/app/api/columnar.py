@@ -0,0 +1,94 @@
+"""
+Columnar Response Format
+format=columnar for list-returning endpoints: one array per column instead of one dict per row
+
+Row-oriented JSON repeats every field name on every row. The columnar form is
+
+    {
+        "columns": ["county", "claim_count", ...],
+        "rows": 1234,
+        "data": {"county": [0, 3, 1, ...], "claim_count": [12, 7, 40, ...]},
+        "dictionaries": {"county": ["Alameda", "Fresno", ...]}
+    }
+
+Columns listed in "dictionaries" are dictionary-encoded: data holds integer
+codes into the dictionary and -1 for a missing value. Categorical columns are
+always encoded this way, text columns whenever values repeat enough to pay off.
+Other columns are NumPy arrays handed straight to the JSON encoder (NaN -> null).
+
+Decode on the client with:  value = code < 0 ? null : dictionaries[col][code]
+"""
+
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+RESPONSE_FORMATS = ("records", "columnar")
+RESPONSE_FORMAT_PATTERN = "^(records|columnar)$"
+RESPONSE_FORMAT_DESCRIPTION = (
+    "records: one object per row; columnar: {columns, data: {column: [...]}} "
+    "with dictionary-encoded text columns"
+)
+
+# Text columns are dictionary-encoded when distinct values are at most this share of rows
+DICTIONARY_MAX_RATIO = 0.5
+
+# dtypes the encoder writes natively from a NumPy array
+_NATIVE_KINDS = ('b', 'i', 'u', 'f')
+
+
+def _codes(codes: np.ndarray, size: int) -> np.ndarray:
+    """Smallest signed integer array that holds the codes (and -1)"""
+    dtype = np.int8 if size < 2 ** 7 else np.int16 if size < 2 ** 15 else np.int32
+    return np.ascontiguousarray(codes, dtype=dtype)
+
+
+def _encode_column(series: pd.Series):
+    """Returns (values, dictionary or None) for one column"""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        categories = series.cat.categories
+        return _codes(series.cat.codes.to_numpy(), len(categories)), categories.tolist()
+
+    if pd.api.types.is_datetime64_any_dtype(series):
+        text = series.dt.strftime('%Y-%m-%dT%H:%M:%S')
+        return text.astype(object).where(series.notna(), None).tolist(), None
+
+    if isinstance(series.dtype, np.dtype) and series.dtype.kind in _NATIVE_KINDS:
+        return np.ascontiguousarray(series.to_numpy()), None
+
+    if pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+        # Nullable extension dtypes (Int64, boolean): missing values become None
+        return series.to_numpy(dtype=object, na_value=None).tolist(), None
+
+    # Text / mixed object columns
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    if len(series) and len(uniques) <= len(series) * DICTIONARY_MAX_RATIO:
+        return _codes(codes, len(uniques)), pd.Series(uniques, dtype=object).tolist()
+    return series.astype(object).where(series.notna(), None).tolist(), None
+
+
+def frame_to_columnar(df: pd.DataFrame) -> Dict[str, Any]:
+    """Columnar payload for a DataFrame, built from its arrays without per-row dicts"""
+    data: Dict[str, Any] = {}
+    dictionaries: Dict[str, list] = {}
+
+    for position, name in enumerate(df.columns):
+        values, dictionary = _encode_column(df.iloc[:, position])
+        data[str(name)] = values
+        if dictionary is not None:
+            dictionaries[str(name)] = dictionary
+
+    return {
+        "columns": [str(name) for name in df.columns],
+        "rows": len(df),
+        "data": data,
+        "dictionaries": dictionaries,
+    }
+
+
+def frame_payload(df: pd.DataFrame, format: Optional[str] = "records") -> Any:
+    """A DataFrame as list-of-records (default) or the columnar payload"""
+    if format == "columnar":
+        return frame_to_columnar(df)
+    return df.to_dict('records')
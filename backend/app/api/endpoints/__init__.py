@@ -2,5 +2,6 @@ from .claims import router as claims_router
 from .recalibration import router as recalibration_router
 from .analytics import router as analytics_router
 from .aggregation import router as aggregation_router
+from .exports import router as exports_router
 
-__all__ = ["claims_router", "recalibration_router", "analytics_router", "aggregation_router"]
+__all__ = ["claims_router", "recalibration_router", "analytics_router", "aggregation_router", "exports_router"]
@@ -5,15 +5,25 @@ Supports fast mode (materialized views) and fallback mode (real-time aggregation
 """
 
 from fastapi import APIRouter, HTTPException, Query
-from typing import Optional
+from typing import List, Optional
 import logging
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
+from app.db.schema import Claim
 from app.services.data_service_sqlite import data_service_sqlite as data_service
+from app.services.claims_store import NUMERIC_COLUMN_NAMES
+from app.services.aggregation_engine import AGGREGATION_COLUMNS, compute_aggregations
+from app.services.refresh_jobs import refresh_jobs
+from app.services.aggregate_cache import aggregate_cache
+from app.services.response_cache import response_cache
+from app.api.responses import FastJSONResponse
+from app.api.columnar import frame_payload, RESPONSE_FORMAT_PATTERN, RESPONSE_FORMAT_DESCRIPTION
+from app.api.routing import CachedRoute, no_response_cache, route_flights
+from app.core.config import settings
 
 logger = logging.getLogger(__name__)
-router = APIRouter()
+router = APIRouter(route_class=CachedRoute)
 
 
 @router.get("/aggregated")
@@ -22,277 +32,144 @@ async def get_aggregated_data(use_fast: bool = Query(True, description="Use mate
     Get all aggregated data for dashboard
     OPTIMIZED: Uses pre-computed materialized views for 5M+ records (60x faster)
     Set use_fast=false to force real-time computation (slower)
+    Served from the aggregate cache; recomputed in the background once stale
     """
     try:
-        if use_fast:
-            # Use materialized views (FAST - recommended for 5M+ records)
-            logger.info("Using materialized views for aggregation (FAST mode)...")
-            result = await data_service.get_aggregated_data_fast()
-
-            if not result or not result.get('yearSeverity'):
-                logger.warning("Materialized views empty or not found, falling back to real-time computation...")
-                use_fast = False
-            else:
-                # Calculate variance drivers from aggregated data
-                variance_drivers = []
-
-                # Use injury group variance as driver
-                for item in result.get('injuryGroup', []):
-                    avg_var = item.get('avg_variance_pct', 0)
-                    if avg_var and abs(avg_var) > 5:
-                        variance_drivers.append({
-                            'factor_name': f"Injury: {item.get('injury_group', 'Unknown')}",
-                            'factor_value': item.get('severity_category', 'Unknown'),
-                            'claim_count': item.get('claim_count', 0),
-                            'avg_variance_pct': round(float(avg_var), 2),
-                            'contribution_score': round(abs(float(avg_var)) * 2, 2),
-                            'correlation_strength': 'Strong' if abs(avg_var) > 15 else 'Moderate' if abs(avg_var) > 10 else 'Weak'
-                        })
-
-                # Use county variance as driver
-                for item in result.get('countyYear', []):
-                    avg_var = item.get('avg_variance_pct', 0)
-                    if avg_var and abs(avg_var) > 8:
-                        variance_drivers.append({
-                            'factor_name': f"County: {item.get('county', 'Unknown')}",
-                            'factor_value': f"{item.get('state', '')}, {item.get('year', '')}",
-                            'claim_count': item.get('claim_count', 0),
-                            'avg_variance_pct': round(float(avg_var), 2),
-                            'contribution_score': round(abs(float(avg_var)) * 1.5, 2),
-                            'correlation_strength': 'Strong' if abs(avg_var) > 15 else 'Moderate'
-                        })
-
-                result['varianceDrivers'] = sorted(
-                    variance_drivers,
-                    key=lambda x: x['contribution_score'],
-                    reverse=True
-                )[:30]
-
-                # Add metadata
-                total_claims = sum(item.get('claim_count', 0) for item in result.get('yearSeverity', []))
-                result['metadata'] = {
-                    "total_claims": total_claims,
-                    "generated_at": datetime.now().isoformat(),
-                    "source": "materialized_views",
-                    "performance": "fast"
-                }
+        result = await aggregate_cache.get_or_compute(
+            "aggregated", {"use_fast": use_fast}, lambda: _compute_aggregated_data(use_fast)
+        )
+        # Encoded straight from NumPy / float values, without jsonable_encoder
+        return FastJSONResponse(result)
 
-                logger.info(f"Returned aggregated data for {total_claims} claims from materialized views")
-                return result
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in aggregation: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=f"Aggregation error: {str(e)}")
 
-        # Fallback to real-time computation (SLOW - for small datasets or when views don't exist)
-        logger.info("Loading claims for real-time aggregation (SLOW mode)...")
-        claims = await data_service.get_full_claims_data()
 
-        if not claims:
-            raise HTTPException(status_code=404, detail="No claims data available")
+async def _compute_aggregated_data(use_fast: bool):
+    """Build the /aggregated response from the materialized views or the claims table"""
+    if use_fast:
+        # Use materialized views (FAST - recommended for 5M+ records)
+        logger.info("Using materialized views for aggregation (FAST mode)...")
+        result = await data_service.get_aggregated_data_fast()
 
-        df = pd.DataFrame(claims)
-        logger.info(f"Loaded {len(df)} claims for aggregation")
+        if not result or not result.get('yearSeverity'):
+            logger.warning("Materialized views empty or not found, falling back to real-time computation...")
+            use_fast = False
+        else:
+            # Calculate variance drivers from aggregated data
+            variance_drivers = []
+
+            # Use injury group variance as driver
+            for item in result.get('injuryGroup', []):
+                avg_var = item.get('avg_variance_pct', 0)
+                if avg_var and abs(avg_var) > 5:
+                    variance_drivers.append({
+                        'factor_name': f"Injury: {item.get('injury_group', 'Unknown')}",
+                        'factor_value': item.get('severity_category', 'Unknown'),
+                        'claim_count': item.get('claim_count', 0),
+                        'avg_variance_pct': round(float(avg_var), 2),
+                        'contribution_score': round(abs(float(avg_var)) * 2, 2),
+                        'correlation_strength': 'Strong' if abs(avg_var) > 15 else 'Moderate' if abs(avg_var) > 10 else 'Weak'
+                    })
+
+            # Use county variance as driver
+            for item in result.get('countyYear', []):
+                avg_var = item.get('avg_variance_pct', 0)
+                if avg_var and abs(avg_var) > 8:
+                    variance_drivers.append({
+                        'factor_name': f"County: {item.get('county', 'Unknown')}",
+                        'factor_value': f"{item.get('state', '')}, {item.get('year', '')}",
+                        'claim_count': item.get('claim_count', 0),
+                        'avg_variance_pct': round(float(avg_var), 2),
+                        'contribution_score': round(abs(float(avg_var)) * 1.5, 2),
+                        'correlation_strength': 'Strong' if abs(avg_var) > 15 else 'Moderate'
+                    })
+
+            result['varianceDrivers'] = sorted(
+                variance_drivers,
+                key=lambda x: x['contribution_score'],
+                reverse=True
+            )[:30]
+
+            # Add metadata
+            total_claims = sum(item.get('claim_count', 0) for item in result.get('yearSeverity', []))
+            result['metadata'] = {
+                "total_claims": total_claims,
+                "generated_at": datetime.now().isoformat(),
+                "source": "materialized_views",
+                "performance": "fast"
+            }
 
-        # Extract year from CLAIMCLOSEDDATE
-        df['year'] = pd.to_datetime(df['CLAIMCLOSEDDATE'], errors='coerce').dt.year
-        df['year'] = df['year'].fillna(2024).astype(int)
+            logger.info(f"Returned aggregated data for {total_claims} claims from materialized views")
+            return result
 
-        # Calculate one year ago
-        current_year = datetime.now().year
-        one_year_ago = current_year - 1
+    # Fallback to real-time computation (for small datasets or when views don't exist)
+    logger.info("Loading claims for real-time aggregation (SLOW mode)...")
+    # Grouping/measure columns plus every numeric column for the correlation drivers
+    df = await data_service.get_claims_frame(columns=AGGREGATION_COLUMNS + NUMERIC_COLUMN_NAMES)
 
-        # 1. Year-Severity Summary
-        year_severity = df.groupby(['year', 'CAUTION_LEVEL']).agg({
-            'CLAIMID': 'count',
-            'DOLLARAMOUNTHIGH': ['sum', 'mean'],
-            'CAUSATION_HIGH_RECOMMENDATION': ['sum', 'mean'],
-            'variance_pct': 'mean'
-        }).reset_index()
-
-        year_severity.columns = ['year', 'severity_category', 'claim_count',
-                                 'total_actual_settlement', 'avg_actual_settlement',
-                                 'total_predicted_settlement', 'avg_predicted_settlement',
-                                 'avg_variance_pct']
-
-        # Add variance counts efficiently
-        year_severity['overprediction_count'] = 0
-        year_severity['underprediction_count'] = 0
-        year_severity['high_variance_count'] = 0
-
-        for idx, row in year_severity.iterrows():
-            subset = df[(df['year'] == row['year']) & (df['CAUTION_LEVEL'] == row['severity_category'])]
-            year_severity.at[idx, 'overprediction_count'] = int((subset['variance_pct'] > 0).sum())
-            year_severity.at[idx, 'underprediction_count'] = int((subset['variance_pct'] < 0).sum())
-            year_severity.at[idx, 'high_variance_count'] = int((subset['variance_pct'].abs() >= 15).sum())
-
-        # 2. County-Year Summary
-        county_year = df.groupby(['COUNTYNAME', 'VENUESTATE', 'year', 'VENUERATING']).agg({
-            'CLAIMID': 'count',
-            'DOLLARAMOUNTHIGH': ['sum', 'mean'],
-            'variance_pct': 'mean'
-        }).reset_index()
-
-        county_year.columns = ['county', 'state', 'year', 'venue_rating', 'claim_count',
-                               'total_settlement', 'avg_settlement', 'avg_variance_pct']
-
-        county_year['high_variance_count'] = 0
-        county_year['high_variance_pct'] = 0.0
-        county_year['overprediction_count'] = 0
-        county_year['underprediction_count'] = 0
-
-        for idx, row in county_year.iterrows():
-            subset = df[(df['COUNTYNAME'] == row['county']) & (df['year'] == row['year'])]
-            hvc = int((subset['variance_pct'].abs() >= 15).sum())
-            county_year.at[idx, 'high_variance_count'] = hvc
-            county_year.at[idx, 'high_variance_pct'] = round((hvc / row['claim_count'] * 100) if row['claim_count'] > 0 else 0, 2)
-            county_year.at[idx, 'overprediction_count'] = int((subset['variance_pct'] > 0).sum())
-            county_year.at[idx, 'underprediction_count'] = int((subset['variance_pct'] < 0).sum())
-
-        # 3. Injury Group Summary
-        injury_group = df.groupby(['PRIMARY_INJURYGROUP_CODE', 'CAUTION_LEVEL']).agg({
-            'CLAIMID': 'count',
-            'DOLLARAMOUNTHIGH': ['mean', 'sum'],
-            'CAUSATION_HIGH_RECOMMENDATION': 'mean',
-            'variance_pct': 'mean'
-        }).reset_index()
-
-        injury_group.columns = ['injury_group', 'severity_category', 'claim_count',
-                                'avg_settlement', 'total_settlement', 'avg_predicted',
-                                'avg_variance_pct']
-        injury_group['body_region'] = 'General'
-
-        # 4. Adjuster Performance
-        adjuster_perf = df.groupby('ADJUSTERNAME').agg({
-            'CLAIMID': 'count',
-            'DOLLARAMOUNTHIGH': 'mean',
-            'CAUSATION_HIGH_RECOMMENDATION': 'mean',
-            'variance_pct': 'mean'
-        }).reset_index()
-
-        adjuster_perf.columns = ['adjuster_name', 'claim_count', 'avg_actual_settlement',
-                                 'avg_predicted_settlement', 'avg_variance_pct']
-
-        adjuster_perf['high_variance_count'] = 0
-        adjuster_perf['high_variance_pct'] = 0.0
-        adjuster_perf['overprediction_count'] = 0
-        adjuster_perf['underprediction_count'] = 0
-
-        for idx, row in adjuster_perf.iterrows():
-            subset = df[df['ADJUSTERNAME'] == row['adjuster_name']]
-            hvc = int((subset['variance_pct'].abs() >= 15).sum())
-            adjuster_perf.at[idx, 'high_variance_count'] = hvc
-            adjuster_perf.at[idx, 'high_variance_pct'] = round((hvc / row['claim_count'] * 100) if row['claim_count'] > 0 else 0, 2)
-            adjuster_perf.at[idx, 'overprediction_count'] = int((subset['variance_pct'] > 0).sum())
-            adjuster_perf.at[idx, 'underprediction_count'] = int((subset['variance_pct'] < 0).sum())
-
-        # 5. Venue Analysis
-        venue_analysis = df.groupby(['VENUERATING', 'VENUESTATE', 'COUNTYNAME']).agg({
-            'CLAIMID': 'count',
-            'DOLLARAMOUNTHIGH': 'mean',
-            'CAUSATION_HIGH_RECOMMENDATION': 'mean',
-            'variance_pct': 'mean',
-            'RATINGWEIGHT': 'mean'
-        }).reset_index()
-
-        venue_analysis.columns = ['venue_rating', 'state', 'county', 'claim_count',
-                                  'avg_settlement', 'avg_predicted', 'avg_variance_pct',
-                                  'avg_venue_rating_point']
-
-        venue_analysis['high_variance_count'] = 0
-        venue_analysis['high_variance_pct'] = 0.0
-
-        for idx, row in venue_analysis.iterrows():
-            subset = df[(df['VENUERATING'] == row['venue_rating']) & (df['COUNTYNAME'] == row['county'])]
-            hvc = int((subset['variance_pct'].abs() >= 15).sum())
-            venue_analysis.at[idx, 'high_variance_count'] = hvc
-            venue_analysis.at[idx, 'high_variance_pct'] = round((hvc / row['claim_count'] * 100) if row['claim_count'] > 0 else 0, 2)
-
-        # 6. Variance Drivers (correlation analysis)
-        numeric_cols = df.select_dtypes(include=[np.number]).columns
-        variance_drivers = []
-
-        for col in numeric_cols:
-            if col != 'variance_pct' and df[col].notna().sum() > 0:
-                try:
-                    corr = df[col].corr(df['variance_pct'])
-                    if not pd.isna(corr) and abs(corr) > 0.05:
-                        variance_drivers.append({
-                            'factor_name': col,
-                            'factor_value': 'Varies',
-                            'claim_count': len(df),
-                            'avg_variance_pct': float(df['variance_pct'].mean()),
-                            'contribution_score': float(abs(corr) * 100),
-                            'correlation_strength': 'Strong' if abs(corr) > 0.5 else 'Moderate' if abs(corr) > 0.3 else 'Weak'
-                        })
-                except:
-                    pass
-
-        variance_drivers_sorted = sorted(variance_drivers, key=lambda x: x['contribution_score'], reverse=True)[:30]
-
-        logger.info("Aggregation completed successfully")
+    if df.empty:
+        raise HTTPException(status_code=404, detail="No claims data available")
+    logger.info(f"Loaded {len(df)} claims for aggregation")
 
-        return {
-            "yearSeverity": year_severity.to_dict('records'),
-            "countyYear": county_year.to_dict('records'),
-            "injuryGroup": injury_group.to_dict('records'),
-            "adjusterPerformance": adjuster_perf.to_dict('records'),
-            "venueAnalysis": venue_analysis.to_dict('records'),
-            "varianceDrivers": variance_drivers_sorted,
-            "metadata": {
-                "total_claims": len(df),
-                "recent_year_claims": len(df[df['year'] >= one_year_ago]),
-                "generated_at": datetime.now().isoformat()
-            }
-        }
+    # Grouped pandas work is CPU bound - keep it off the event loop
+    import asyncio
+    loop = asyncio.get_event_loop()
+    result = await loop.run_in_executor(None, compute_aggregations, df)
 
-    except Exception as e:
-        logger.error(f"Error in aggregation: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        raise HTTPException(status_code=500, detail=f"Aggregation error: {str(e)}")
+    logger.info("Aggregation completed successfully")
+    return result
 
 
 @router.get("/recent-trends")
-async def get_recent_trends(months: int = Query(12, ge=1, le=36, description="Months to look back")):
+@no_response_cache
+async def get_recent_trends(
+    months: int = Query(12, ge=1, le=36, description="Months to look back"),
+    format: str = Query("records", pattern=RESPONSE_FORMAT_PATTERN, description=RESPONSE_FORMAT_DESCRIPTION)
+):
     """
     Get trends for recent data (last N months)
     For weight recalibration decisions
     """
     try:
-        claims = await data_service.get_full_claims_data()
-        if not claims:
-            raise HTTPException(status_code=404, detail="No claims data")
-
-        df = pd.DataFrame(claims)
-        df['CLAIMCLOSEDDATE'] = pd.to_datetime(df['CLAIMCLOSEDDATE'], errors='coerce')
-
-        # Filter recent data
-        cutoff_date = datetime.now() - timedelta(days=months * 30)
-        recent_df = df[df['CLAIMCLOSEDDATE'] >= cutoff_date]
+        # Range seek on the typed close date - only the recent claims are read
+        cutoff_date = (datetime.now() - timedelta(days=months * 30)).date()
+        recent_df = await data_service.get_claims_frame(
+            columns=['close_year', 'close_month', 'CLAIMID', 'variance_pct', 'DOLLARAMOUNTHIGH'],
+            where=Claim.closed_on >= cutoff_date
+        )
 
         if len(recent_df) == 0:
             return {"message": "No recent data available", "trends": []}
 
         # Monthly trends
-        recent_df['month'] = recent_df['CLAIMCLOSEDDATE'].dt.to_period('M')
-        monthly_trends = recent_df.groupby('month').agg({
+        monthly_trends = recent_df.groupby(['close_year', 'close_month']).agg({
             'CLAIMID': 'count',
             'variance_pct': ['mean', 'std', 'median'],
             'DOLLARAMOUNTHIGH': 'mean'
-        }).reset_index()
+        })
 
-        monthly_trends['month'] = monthly_trends['month'].astype(str)
+        monthly_trends.index = [f"{year:04d}-{month:02d}" for year, month in monthly_trends.index]
+        monthly_trends = monthly_trends.rename_axis('month').reset_index()
         monthly_trends.columns = ['month', 'claim_count', 'avg_variance', 'std_variance',
                                   'median_variance', 'avg_settlement']
 
-        return {
+        return FastJSONResponse({
             "period_months": months,
             "total_recent_claims": len(recent_df),
-            "monthly_trends": monthly_trends.to_dict('records'),
+            "monthly_trends": frame_payload(monthly_trends, format),
             "summary": {
                 "avg_variance": float(recent_df['variance_pct'].mean()),
                 "median_variance": float(recent_df['variance_pct'].median()),
                 "std_variance": float(recent_df['variance_pct'].std()),
                 "high_variance_rate": float((recent_df['variance_pct'].abs() >= 15).sum() / len(recent_df) * 100)
             }
-        }
+        })
 
     except Exception as e:
         logger.error(f"Error getting recent trends: {str(e)}")
@@ -300,6 +177,7 @@ async def get_recent_trends(months: int = Query(12, ge=1, le=36, description="Mo
 
 
 @router.get("/venue-shift-analysis")
+@no_response_cache
 async def get_venue_shift_recommendations(
     months: int = Query(
         default=6,
@@ -313,13 +191,16 @@ async def get_venue_shift_recommendations(
     OPTIMIZED FOR 5M+ CLAIMS - Uses database-level aggregations
     Uses isolated analysis to control for injury type, severity, and impact
     Returns recommendations for venue rating adjustments by county
+
+    1, 3, 6, 12 and 24 months are precomputed at refresh time; other windows
+    are computed on first request and stored until the data changes
     """
-    # Use the optimized implementation from aggregation_optimized_venue_shift.py
-    from app.api.endpoints.aggregation_optimized_venue_shift import get_venue_shift_recommendations_optimized
+    # Snapshots of the table-based analysis in aggregation_optimized_venue_shift.py
+    from app.services.venue_shift_snapshots import venue_shift_snapshots
 
     try:
         logger.info(f"[OPTIMIZED] Starting venue shift analysis for last {months} months...")
-        return await get_venue_shift_recommendations_optimized(data_service, months)
+        return await venue_shift_snapshots.get_analysis(months)
 
     except HTTPException:
         # Re-raise HTTP exceptions as-is
@@ -329,8 +210,44 @@ async def get_venue_shift_recommendations(
         raise HTTPException(status_code=500, detail=f"Venue shift analysis error: {str(e)}")
 
 
-@router.post("/refresh-cache")
-async def refresh_materialized_views():
+@router.get("/percentiles")
+async def get_settlement_percentiles(
+    source: str = Query("mv_venue_analysis", description="Summary table: venue_statistics or an mv_* table"),
+    q: List[float] = Query([0.25, 0.5, 0.75], description="Quantiles between 0 and 1 (repeatable)"),
+    group_by: List[str] = Query([], description="Group columns to report separately (repeatable)"),
+    filter: List[str] = Query([], description="column:value, e.g. state:CA (repeat for several values)")
+):
+    """
+    Settlement percentiles for any combination of summary groups
+    Merges the stored per-group quantile sketches of `source` - claims are not read
+    """
+    from app.services.quantile_rollup import quantile_rollup
+    import asyncio
+
+    filters = {}
+    for item in filter:
+        column, sep, value = item.partition(':')
+        if not sep:
+            raise HTTPException(status_code=400, detail=f"Filter '{item}' must look like column:value")
+        filters.setdefault(column, []).append(value)
+
+    try:
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(
+            None, lambda: quantile_rollup.rollup(source, q, filters, group_by)
+        )
+
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error rolling up settlement percentiles: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/refresh-cache", status_code=202)
+async def refresh_materialized_views(
+    full: bool = Query(False, description="Rebuild from the whole claims table instead of applying changed claims")
+):
     """
     Refresh all materialized views (pre-computed aggregation tables)
 
@@ -339,61 +256,87 @@ async def refresh_materialized_views():
     - Manual data updates
     - Weekly/daily maintenance
 
-    This will recompute all aggregations from the claims table
-    Takes 5-30 seconds depending on data size (5M records ~30s)
+    The refresh runs in the background; poll GET /refresh-jobs/{job_id} for
+    progress. A request made while a refresh is queued or running joins it.
+
+    On PostgreSQL with claims_rollup, only claims changed since the last refresh
+    are applied; otherwise all aggregations are recomputed from the claims table
+    (5-30 seconds depending on data size, 5M records ~30s)
     """
     try:
-        from app.db.materialized_views import refresh_all_materialized_views
-        import asyncio
+        job, coalesced = refresh_jobs.submit(full=full)
 
-        logger.info("Starting materialized view refresh...")
-        start_time = datetime.now()
+        logger.info(f"Refresh job {job['id']} {'joined' if coalesced else 'queued'} (full={job['full']})")
+        return {
+            "status": "accepted",
+            "message": "Joined the refresh already in progress" if coalesced else "Refresh queued",
+            "job_id": job["id"],
+            "coalesced": coalesced,
+            "status_url": f"{settings.API_V1_STR}/aggregation/refresh-jobs/{job['id']}",
+            "job": job
+        }
 
-        # Run in executor to avoid blocking
-        loop = asyncio.get_event_loop()
-        success = await loop.run_in_executor(None, refresh_all_materialized_views)
+    except Exception as e:
+        logger.error(f"Error queueing materialized view refresh: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Refresh error: {str(e)}")
 
-        end_time = datetime.now()
-        duration = (end_time - start_time).total_seconds()
 
-        if success:
-            logger.info(f"Materialized views refreshed in {duration:.2f}s")
-            return {
-                "status": "success",
-                "message": "Materialized views refreshed successfully",
-                "duration_seconds": round(duration, 2),
-                "timestamp": end_time.isoformat()
-            }
-        else:
-            raise HTTPException(status_code=500, detail="Failed to refresh materialized views")
+@router.get("/refresh-jobs")
+@no_response_cache
+async def list_refresh_jobs(
+    limit: int = Query(20, ge=1, le=50, description="Max number of jobs to return")
+):
+    """
+    Recent refresh jobs, newest first
+    """
+    return {"jobs": refresh_jobs.list_jobs(limit), "active_job": refresh_jobs.active_job()}
 
-    except Exception as e:
-        logger.error(f"Error refreshing materialized views: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        raise HTTPException(status_code=500, detail=f"Refresh error: {str(e)}")
+
+@router.get("/refresh-jobs/{job_id}")
+@no_response_cache
+async def get_refresh_job(job_id: str):
+    """
+    Status, per-view progress and timings of a refresh job
+    """
+    job = refresh_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Refresh job {job_id} not found")
+    return job
 
 
 @router.get("/cache-status")
+@no_response_cache
 async def get_cache_status():
     """
     Get status of materialized views (cache)
     Shows row counts and last update times
     """
     try:
-        from app.db.materialized_views import get_materialized_view_stats, check_materialized_views_exist
+        from app.db.materialized_views import (
+            get_materialized_view_stats, check_materialized_views_exist, get_last_refresh_stats
+        )
+        from app.services.venue_shift_snapshots import venue_shift_snapshots
         import asyncio
 
         loop = asyncio.get_event_loop()
 
         # Check if views exist
         views_exist = await loop.run_in_executor(None, check_materialized_views_exist)
+        aggregate_cache_stats = await loop.run_in_executor(None, aggregate_cache.get_stats)
+        venue_shift_stats = await loop.run_in_executor(None, venue_shift_snapshots.get_stats)
 
         if not views_exist:
             return {
                 "status": "not_initialized",
                 "message": "Materialized views not found. Run POST /refresh-cache to create them.",
-                "views_exist": False
+                "views_exist": False,
+                "aggregate_cache": aggregate_cache_stats,
+                "venue_shift_snapshots": venue_shift_stats,
+                "response_cache": response_cache.get_stats(),
+                "single_flight": {
+                    "data_service": data_service.flights.get_stats(),
+                    "routes": route_flights.get_stats()
+                }
             }
 
         # Get stats
@@ -404,7 +347,15 @@ async def get_cache_status():
             "message": "Materialized views are active and ready",
             "views_exist": True,
             "statistics": stats,
-            "total_aggregated_rows": sum(v.get('row_count', 0) for v in stats.values())
+            "total_aggregated_rows": sum(v.get('row_count', 0) for v in stats.values()),
+            "last_refresh": get_last_refresh_stats(),
+            "aggregate_cache": aggregate_cache_stats,
+            "venue_shift_snapshots": venue_shift_stats,
+            "response_cache": response_cache.get_stats(),
+            "single_flight": {
+                "data_service": data_service.flights.get_stats(),
+                "routes": route_flights.get_stats()
+            }
         }
 
     except Exception as e:
@@ -489,22 +440,27 @@ async def get_executive_summary(
 
                 return [dict(zip(columns, row)) for row in rows]
 
-        data = await loop.run_in_executor(None, get_summary)
-
-        return {
-            "status": "success",
-            "count": len(data),
-            "filters": {
-                "version_id": version_id,
-                "year": year,
-                "severity": severity,
-                "county": county,
-                "injury_type": injury_type,
-                "venue_rating": venue_rating
-            },
-            "data": data
+        filters = {
+            "version_id": version_id,
+            "year": year,
+            "severity": severity,
+            "county": county,
+            "injury_type": injury_type,
+            "venue_rating": venue_rating
         }
 
+        async def compute():
+            data = await loop.run_in_executor(None, get_summary)
+
+            return {
+                "status": "success",
+                "count": len(data),
+                "filters": filters,
+                "data": data
+            }
+
+        return await aggregate_cache.get_or_compute("executive-summary", {**filters, "limit": limit}, compute)
+
     except Exception as e:
         logger.error(f"Error getting executive summary: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -4,12 +4,268 @@ Fast venue rating recommendations using pre-computed statistics
 """
 
 from fastapi import HTTPException
-from datetime import datetime
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional
 import logging
-import sqlite3
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import Date, bindparam, text
 
 logger = logging.getLogger(__name__)
 
+# venue_statistics lookup key and the per-group statistics a recommendation reads
+STATISTICS_KEY = ['VENUERATING', 'SEVERITY_CATEGORY', 'CAUSATION_CATEGORY', 'IOL']
+STATISTICS_COLUMNS = [
+    'mean_actual', 'median_actual', 'mean_predicted', 'mean_absolute_error',
+    'median_absolute_error', 'coefficient_of_variation'
+]
+
+# A shift is recommended when the best alternative venue lowers the mean error by more than either
+ABSOLUTE_IMPROVEMENT_THRESHOLD = 5000  # $5K improvement
+RELATIVE_IMPROVEMENT_THRESHOLD = 0.15  # 15% improvement
+MIN_SAMPLE_SIZE = 10
+
+
+def load_venue_statistics(conn) -> pd.DataFrame:
+    """The whole venue_statistics table in insertion order (a few hundred rows)"""
+    columns = ', '.join(STATISTICS_KEY + STATISTICS_COLUMNS + ['sample_size'])
+    return pd.read_sql_query(text(f"SELECT {columns} FROM venue_statistics ORDER BY id"), conn)
+
+
+def _current_statistics(profiles: pd.DataFrame, statistics: pd.DataFrame) -> pd.DataFrame:
+    """
+    Statistics of each county's own venue for its typical profile
+    The exact (venue, severity, causation, IOL) row when it has at least
+    MIN_SAMPLE_SIZE claims, otherwise the average over every IOL of
+    (venue, severity, causation). sample_size is NaN when neither exists.
+    """
+    exact = statistics.drop_duplicates(STATISTICS_KEY, keep='first')
+    pooled = statistics.groupby(STATISTICS_KEY[:3], sort=False).agg(
+        {**{column: 'mean' for column in STATISTICS_COLUMNS}, 'sample_size': 'sum'}
+    ).reset_index()
+
+    columns = STATISTICS_COLUMNS + ['sample_size']
+    current = profiles[STATISTICS_KEY].merge(exact, how='left', on=STATISTICS_KEY)[columns]
+    fallback = profiles[STATISTICS_KEY[:3]].merge(pooled, how='left', on=STATISTICS_KEY[:3])[columns]
+
+    use_fallback = ~(current['sample_size'] >= MIN_SAMPLE_SIZE)
+    current.loc[use_fallback] = fallback.loc[use_fallback]
+    return current
+
+
+def _best_alternatives(profiles: pd.DataFrame, statistics: pd.DataFrame) -> pd.DataFrame:
+    """
+    Lowest-error other venue for each county's typical profile
+    Candidates need MIN_SAMPLE_SIZE claims; NULL errors rank first and ties
+    keep table order, as the original ORDER BY did. VENUERATING is NaN when
+    there is no candidate.
+    """
+    candidates = statistics[statistics['sample_size'] >= MIN_SAMPLE_SIZE].sort_values(
+        'mean_absolute_error', na_position='first', kind='stable'
+    )
+    profile_key = STATISTICS_KEY[1:]
+
+    # Per profile: the best venue overall, and the best one that is not that venue
+    best = candidates.drop_duplicates(profile_key, keep='first')
+    best_venue = candidates.groupby(profile_key, sort=False)['VENUERATING'].transform('first')
+    runner_up = candidates[candidates['VENUERATING'] != best_venue].drop_duplicates(profile_key, keep='first')
+
+    columns = ['VENUERATING', 'mean_absolute_error', 'sample_size']
+    first = profiles[profile_key].merge(best, how='left', on=profile_key)[columns]
+    second = profiles[profile_key].merge(runner_up, how='left', on=profile_key)[columns]
+
+    is_current = (first['VENUERATING'] == profiles['VENUERATING']).to_numpy()
+    first.loc[is_current] = second.loc[is_current]
+    return first
+
+
+def _python_records(frame: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Rows as dicts of plain Python values, NaN as None"""
+    return frame.astype(object).where(frame.notna(), None).to_dict('records')
+
+
+def recommend_venue_shifts(counties: pd.DataFrame, statistics: pd.DataFrame) -> List[Dict[str, Any]]:
+    """
+    Venue shift recommendation for every county profile in one vectorized pass
+    counties: one row per (COUNTYNAME, VENUESTATE, current_venue) with its typical
+    severity / causation / IOL; statistics: load_venue_statistics()
+    Counties without statistics for their own venue are skipped.
+    """
+    if counties.empty or statistics.empty:
+        return []
+
+    profiles = counties.rename(columns={
+        'current_venue': 'VENUERATING',
+        'typical_severity': 'SEVERITY_CATEGORY',
+        'typical_causation': 'CAUSATION_CATEGORY',
+        'typical_iol': 'IOL'
+    }).reset_index(drop=True)
+
+    current = _current_statistics(profiles, statistics)
+    alternative = _best_alternatives(profiles, statistics)
+
+    current_error = current['mean_absolute_error'].to_numpy(dtype=np.float64)
+    current_sample = current['sample_size'].to_numpy(dtype=np.float64)
+    alt_error = alternative['mean_absolute_error'].to_numpy(dtype=np.float64)
+    alt_sample = alternative['sample_size'].to_numpy(dtype=np.float64)
+    has_alternative = alternative['VENUERATING'].notna().to_numpy()
+
+    improvement = np.where(has_alternative, current_error - alt_error, 0.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        relative = improvement / current_error
+    recommended = has_alternative & (
+        (improvement > ABSOLUTE_IMPROVEMENT_THRESHOLD) | (relative > RELATIVE_IMPROVEMENT_THRESHOLD)
+    )
+
+    # Confidence based on sample sizes
+    confidence = np.select(
+        [
+            recommended & (current_sample >= 30) & (alt_sample >= 30),
+            recommended & (current_sample >= 10) & (alt_sample >= 10)
+        ],
+        ['high', 'medium'],
+        default='low'
+    )
+
+    rows = _python_records(pd.DataFrame({
+        'county': profiles['COUNTYNAME'],
+        'state': profiles['VENUESTATE'],
+        'current_venue': profiles['VENUERATING'],
+        'claim_count': profiles['claim_count'],
+        'severity': profiles['SEVERITY_CATEGORY'],
+        'causation': profiles['CAUSATION_CATEGORY'],
+        'iol': profiles['IOL'],
+        'mean_actual': current['mean_actual'],
+        'current_error': current['mean_absolute_error'],
+        'coefficient_of_variation': current['coefficient_of_variation'],
+        'current_sample': current['sample_size'],
+        'found': current['sample_size'].notna(),
+        'alt_venue': alternative['VENUERATING'],
+        'alt_error': alternative['mean_absolute_error'],
+        'improvement': improvement,
+        'recommended': recommended,
+        'confidence': confidence
+    }))
+
+    recommendations = []
+    for row in rows:
+        if not row['found']:
+            continue
+
+        current_error = row['current_error']
+        recommendation = row['alt_venue'] if row['recommended'] else None
+        improvement = row['improvement']
+
+        # Python round() per county keeps the output identical to the per-query version
+        recommendations.append({
+            'county': row['county'],
+            'state': row['state'],
+            'current_venue_rating': row['current_venue'],
+            'current_mean_actual': round(row['mean_actual'], 2) if row['mean_actual'] else 0,
+            'current_mean_error': round(current_error, 2),
+            'current_coefficient_variation': round(row['coefficient_of_variation'], 3),
+            'current_claim_count': row['claim_count'],
+            'current_sample_size': int(row['current_sample']),
+
+            'recommended_venue_rating': recommendation,
+            'recommended_mean_error': round(row['alt_error'], 2) if recommendation else 0,
+            'dollar_improvement': round(improvement, 2) if recommendation else 0,
+            'percent_improvement': round((improvement / current_error * 100), 1) if recommendation and current_error > 0 else 0,
+
+            'confidence': row['confidence'],
+            'typical_profile': {
+                'severity': row['severity'],
+                'causation': row['causation'],
+                'iol': row['iol']
+            }
+        })
+    return recommendations
+
+
+# Typical severity / causation / IOL of each county's venue over the analysis window
+COUNTY_PROFILE_QUERY = """
+SELECT
+    COUNTYNAME,
+    VENUESTATE,
+    VENUERATING as current_venue,
+    COUNT(*) as claim_count,
+    CASE
+        WHEN AVG(CALCULATED_SEVERITY_SCORE) <= 500 THEN 'Low'
+        WHEN AVG(CALCULATED_SEVERITY_SCORE) <= 1500 THEN 'Medium'
+        ELSE 'High'
+    END as typical_severity,
+    CASE
+        WHEN AVG(CALCULATED_CAUSATION_SCORE) <= 100 THEN 'Low'
+        WHEN AVG(CALCULATED_CAUSATION_SCORE) <= 300 THEN 'Medium'
+        ELSE 'High'
+    END as typical_causation,
+    CAST(AVG(IOL) + 0.5 AS INTEGER) as typical_iol
+FROM claims
+WHERE COUNTYNAME IS NOT NULL
+  AND VENUERATING IS NOT NULL
+  AND CALCULATED_SEVERITY_SCORE IS NOT NULL
+  AND CALCULATED_CAUSATION_SCORE IS NOT NULL
+  AND IOL IS NOT NULL
+  AND closed_on >= :cutoff
+GROUP BY COUNTYNAME, VENUESTATE, VENUERATING
+HAVING COUNT(*) >= 10
+"""
+
+
+def window_start(months: int) -> str:
+    """First close date (YYYY-MM-DD) of the `months` window ending today"""
+    return (pd.Timestamp.today().normalize() - pd.DateOffset(months=months)).date().isoformat()
+
+
+def load_county_profiles(conn, cutoff: str) -> pd.DataFrame:
+    """COUNTY_PROFILE_QUERY over the claims closed on or after `cutoff` (YYYY-MM-DD)"""
+    query = text(COUNTY_PROFILE_QUERY).bindparams(bindparam('cutoff', type_=Date))
+    return pd.read_sql_query(query, conn, params={'cutoff': date.fromisoformat(cutoff)})
+
+
+def compute_venue_shift_analysis(conn, months: int = 6, cutoff: Optional[str] = None) -> Dict[str, Any]:
+    """
+    The full venue shift response for an analysis window, read through `conn`
+    (a connection of the app engine holding claims and venue_statistics)
+    cutoff: first close date of the window (default: window_start(months))
+    """
+    # Window start computed here so the predicate is a range seek on the closed_on index
+    cutoff = cutoff or window_start(months)
+    counties = load_county_profiles(conn, cutoff)
+    logger.info(f"Analyzing {len(counties)} counties...")
+
+    # One read of the statistics table replaces up to three lookups per county
+    statistics = load_venue_statistics(conn)
+    recommendations = recommend_venue_shifts(counties, statistics)
+
+    # Sort by improvement
+    recommendations.sort(key=lambda x: x['dollar_improvement'], reverse=True)
+
+    # Summary
+    total_counties = len(recommendations)
+    counties_with_recs = len([r for r in recommendations if r['recommended_venue_rating']])
+    avg_improvement = sum(r['dollar_improvement'] for r in recommendations) / total_counties if total_counties > 0 else 0
+
+    logger.info(f"[TABLE-BASED] {counties_with_recs}/{total_counties} counties have venue shift recommendations")
+
+    return {
+        "recommendations": recommendations,
+        "summary": {
+            "total_counties_analyzed": total_counties,
+            "counties_with_shift_recommendations": counties_with_recs,
+            "average_dollar_improvement": round(avg_improvement, 2),
+            "analysis_period_months": months,
+            "window_start": cutoff
+        },
+        "metadata": {
+            "generated_at": datetime.now().isoformat(),
+            "analysis_type": "table_based_venue_shift",
+            "optimization": "pre_computed_statistics",
+            "performance": "fast_sub_second_queries"
+        }
+    }
+
 
 async def get_venue_shift_recommendations_optimized(data_service, months: int = 6):
     """
@@ -19,198 +275,8 @@ async def get_venue_shift_recommendations_optimized(data_service, months: int =
     try:
         logger.info(f"[TABLE-BASED] Getting venue shift recommendations...")
 
-        conn = sqlite3.connect('app/db/claims_analytics.db')
-        conn.row_factory = sqlite3.Row
-
-        # Get unique counties and their typical profiles
-        county_query = """
-        SELECT
-            COUNTYNAME,
-            VENUESTATE,
-            VENUERATING as current_venue,
-            COUNT(*) as claim_count,
-            CASE
-                WHEN AVG(CALCULATED_SEVERITY_SCORE) <= 500 THEN 'Low'
-                WHEN AVG(CALCULATED_SEVERITY_SCORE) <= 1500 THEN 'Medium'
-                ELSE 'High'
-            END as typical_severity,
-            CASE
-                WHEN AVG(CALCULATED_CAUSATION_SCORE) <= 100 THEN 'Low'
-                WHEN AVG(CALCULATED_CAUSATION_SCORE) <= 300 THEN 'Medium'
-                ELSE 'High'
-            END as typical_causation,
-            CAST(AVG(IOL) + 0.5 AS INTEGER) as typical_iol
-        FROM claims
-        WHERE COUNTYNAME IS NOT NULL
-          AND VENUERATING IS NOT NULL
-          AND CALCULATED_SEVERITY_SCORE IS NOT NULL
-          AND CALCULATED_CAUSATION_SCORE IS NOT NULL
-          AND IOL IS NOT NULL
-          AND CLAIMCLOSEDDATE >= DATE('now', '-' || ? || ' months')
-        GROUP BY COUNTYNAME, VENUESTATE, VENUERATING
-        HAVING COUNT(*) >= 10
-        """
-
-        counties = list(conn.execute(county_query, (months,)))
-        logger.info(f"Analyzing {len(counties)} counties...")
-
-        recommendations = []
-
-        for county in counties:
-            county_name = county['COUNTYNAME']
-            state = county['VENUESTATE']
-            current_venue = county['current_venue']
-            typical_sev = county['typical_severity']
-            typical_caus = county['typical_causation']
-            typical_iol = county['typical_iol']
-
-            # Get current venue performance from statistics table
-            current_query = """
-            SELECT
-                VENUERATING,
-                mean_actual,
-                median_actual,
-                mean_predicted,
-                mean_absolute_error,
-                median_absolute_error,
-                coefficient_of_variation,
-                sample_size
-            FROM venue_statistics
-            WHERE VENUERATING = ?
-              AND SEVERITY_CATEGORY = ?
-              AND CAUSATION_CATEGORY = ?
-              AND IOL = ?
-            """
-
-            current_stats = conn.execute(current_query, (
-                current_venue, typical_sev, typical_caus, typical_iol
-            )).fetchone()
-
-            if not current_stats or current_stats['sample_size'] < 10:
-                # Try without IOL constraint
-                current_stats = conn.execute("""
-                    SELECT
-                        VENUERATING,
-                        AVG(mean_actual) as mean_actual,
-                        AVG(median_actual) as median_actual,
-                        AVG(mean_predicted) as mean_predicted,
-                        AVG(mean_absolute_error) as mean_absolute_error,
-                        AVG(median_absolute_error) as median_absolute_error,
-                        AVG(coefficient_of_variation) as coefficient_of_variation,
-                        SUM(sample_size) as sample_size
-                    FROM venue_statistics
-                    WHERE VENUERATING = ?
-                      AND SEVERITY_CATEGORY = ?
-                      AND CAUSATION_CATEGORY = ?
-                    GROUP BY VENUERATING
-                """, (current_venue, typical_sev, typical_caus)).fetchone()
-
-            if not current_stats:
-                continue
-
-            current_error = current_stats['mean_absolute_error']
-            current_sample = current_stats['sample_size']
-
-            # Test alternative venue ratings
-            alternatives_query = """
-            SELECT
-                VENUERATING,
-                mean_actual,
-                median_actual,
-                mean_predicted,
-                mean_absolute_error,
-                median_absolute_error,
-                coefficient_of_variation,
-                sample_size
-            FROM venue_statistics
-            WHERE VENUERATING != ?
-              AND SEVERITY_CATEGORY = ?
-              AND CAUSATION_CATEGORY = ?
-              AND IOL = ?
-              AND sample_size >= 10
-            ORDER BY mean_absolute_error ASC
-            """
-
-            alternatives = list(conn.execute(alternatives_query, (
-                current_venue, typical_sev, typical_caus, typical_iol
-            )))
-
-            # Find best alternative
-            recommendation = None
-            improvement = 0
-            confidence = 'low'
-
-            if alternatives:
-                best_alt = alternatives[0]
-                alt_error = best_alt['mean_absolute_error']
-                alt_sample = best_alt['sample_size']
-
-                improvement = current_error - alt_error
-
-                # Check thresholds
-                absolute_threshold = 5000  # $5K improvement
-                relative_threshold = 0.15  # 15% improvement
-
-                if improvement > absolute_threshold or (improvement / current_error) > relative_threshold:
-                    recommendation = best_alt['VENUERATING']
-
-                    # Confidence based on sample sizes
-                    if current_sample >= 30 and alt_sample >= 30:
-                        confidence = 'high'
-                    elif current_sample >= 10 and alt_sample >= 10:
-                        confidence = 'medium'
-
-            # Add to recommendations
-            recommendations.append({
-                'county': county_name,
-                'state': state,
-                'current_venue_rating': current_venue,
-                'current_mean_actual': round(current_stats['mean_actual'], 2) if current_stats['mean_actual'] else 0,
-                'current_mean_error': round(current_error, 2),
-                'current_coefficient_variation': round(current_stats['coefficient_of_variation'], 3),
-                'current_claim_count': county['claim_count'],
-                'current_sample_size': current_sample,
-
-                'recommended_venue_rating': recommendation,
-                'recommended_mean_error': round(best_alt['mean_absolute_error'], 2) if alternatives and recommendation else 0,
-                'dollar_improvement': round(improvement, 2) if recommendation else 0,
-                'percent_improvement': round((improvement / current_error * 100), 1) if recommendation and current_error > 0 else 0,
-
-                'confidence': confidence,
-                'typical_profile': {
-                    'severity': typical_sev,
-                    'causation': typical_caus,
-                    'iol': typical_iol
-                }
-            })
-
-        # Sort by improvement
-        recommendations.sort(key=lambda x: x['dollar_improvement'], reverse=True)
-
-        # Summary
-        total_counties = len(recommendations)
-        counties_with_recs = len([r for r in recommendations if r['recommended_venue_rating']])
-        avg_improvement = sum(r['dollar_improvement'] for r in recommendations) / total_counties if total_counties > 0 else 0
-
-        conn.close()
-
-        logger.info(f"[TABLE-BASED] {counties_with_recs}/{total_counties} counties have venue shift recommendations")
-
-        return {
-            "recommendations": recommendations,
-            "summary": {
-                "total_counties_analyzed": total_counties,
-                "counties_with_shift_recommendations": counties_with_recs,
-                "average_dollar_improvement": round(avg_improvement, 2),
-                "analysis_period_months": months
-            },
-            "metadata": {
-                "generated_at": datetime.now().isoformat(),
-                "analysis_type": "table_based_venue_shift",
-                "optimization": "pre_computed_statistics",
-                "performance": "fast_sub_second_queries"
-            }
-        }
+        with data_service.engine.connect() as conn:
+            return compute_venue_shift_analysis(conn, months)
 
     except Exception as e:
         logger.error(f"Error in venue shift analysis: {str(e)}")
@@ -8,31 +8,46 @@ from typing import Optional, List, Dict, Any
 import logging
 import pandas as pd
 import numpy as np
+from sqlalchemy import func
 
+from app.db.schema import Claim
 # Switch to SQLite data service for better performance
 from app.services.data_service_sqlite import data_service_sqlite as data_service
+from app.services.aggregate_cache import aggregate_cache
+from app.api.routing import CachedRoute
+from app.api.responses import FastJSONResponse
+from app.api.columnar import frame_payload, RESPONSE_FORMAT_PATTERN, RESPONSE_FORMAT_DESCRIPTION
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter()
+router = APIRouter(route_class=CachedRoute)
+
+# Fields reported for each high-deviation case (CAUSATION_HIGH_RECOMMENDATION is the model's prediction)
+DEVIATION_CASE_COLUMNS = [
+    'CLAIMID', 'ADJUSTERNAME', 'PRIMARY_INJURYGROUP_CODE', 'PRIMARY_INJURY',
+    'DOLLARAMOUNTHIGH', 'CAUSATION_HIGH_RECOMMENDATION', 'variance_pct',
+    'SEVERITY_SCORE', 'COUNTYNAME', 'VENUESTATE'
+]
 
 
 @router.get("/deviation-analysis")
 async def get_deviation_analysis(
     min_variance_pct: float = Query(15.0, description="Minimum variance percentage to include"),
-    limit: int = Query(100, ge=1, le=1000, description="Number of top deviations to return")
+    limit: int = Query(100, ge=1, le=1000, description="Number of top deviations to return"),
+    format: str = Query("records", pattern=RESPONSE_FORMAT_PATTERN, description=RESPONSE_FORMAT_DESCRIPTION)
 ):
     """
     Analyze high deviation cases and identify patterns
     Returns cases with variance > min_variance_pct
     """
     try:
-        claims = await data_service.get_full_claims_data()
-
-        if not claims:
-            raise HTTPException(status_code=404, detail="No claims data available")
+        df = await data_service.get_claims_frame(
+            columns=DEVIATION_CASE_COLUMNS,
+            where=func.abs(Claim.variance_pct) >= min_variance_pct
+        )
 
-        df = pd.DataFrame(claims)
+        if df.empty:
+            raise HTTPException(status_code=404, detail=f"No claims with variance >= {min_variance_pct}%")
 
         # Filter high variance cases
         high_variance = df[df['variance_pct'].abs() >= min_variance_pct].copy()
@@ -52,14 +67,10 @@ async def get_deviation_analysis(
             "total_high_variance": len(high_variance),
             "avg_variance_pct": float(high_variance['variance_pct'].mean()),
             "median_variance_pct": float(high_variance['variance_pct'].median()),
-            "cases": high_variance[[
-                'claim_id', 'adjuster', 'INJURY_GROUP_CODE', 'PRIMARY_INJURY',
-                'DOLLARAMOUNTHIGH', 'predicted_pain_suffering', 'variance_pct',
-                'SEVERITY_SCORE', 'COUNTYNAME', 'VENUESTATE'
-            ]].to_dict('records')
+            "cases": frame_payload(high_variance[DEVIATION_CASE_COLUMNS], format)
         }
 
-        return result
+        return FastJSONResponse(result)
 
     except Exception as e:
         logger.error(f"Error in deviation analysis: {str(e)}")
@@ -68,22 +79,24 @@ async def get_deviation_analysis(
 
 @router.get("/adjuster-performance")
 async def get_adjuster_performance(
-    min_cases: int = Query(5, description="Minimum cases for adjuster to be included")
+    min_cases: int = Query(5, description="Minimum cases for adjuster to be included"),
+    format: str = Query("records", pattern=RESPONSE_FORMAT_PATTERN, description=RESPONSE_FORMAT_DESCRIPTION)
 ):
     """
     Get performance metrics for all adjusters
     """
     try:
-        claims = await data_service.get_full_claims_data()
+        df = await data_service.get_claims_frame(columns=[
+            'ADJUSTERNAME', 'CLAIMID', 'variance_pct', 'DOLLARAMOUNTHIGH',
+            'SETTLEMENT_DAYS', 'SEVERITY_SCORE'
+        ])
 
-        if not claims:
+        if df.empty:
             raise HTTPException(status_code=404, detail="No claims data available")
 
-        df = pd.DataFrame(claims)
-
         # Group by adjuster
-        adjuster_stats = df.groupby('adjuster').agg({
-            'claim_id': 'count',
+        adjuster_stats = df.groupby('ADJUSTERNAME', observed=True).agg({
+            'CLAIMID': 'count',
             'variance_pct': ['mean', 'std', 'median'],
             'DOLLARAMOUNTHIGH': 'mean',
             'SETTLEMENT_DAYS': 'mean',
@@ -112,10 +125,10 @@ async def get_adjuster_performance(
         adjuster_stats['rank'] = adjuster_stats['overall_score'].rank(ascending=False)
         adjuster_stats = adjuster_stats.sort_values('overall_score', ascending=False)
 
-        return {
+        return FastJSONResponse({
             "total_adjusters": len(adjuster_stats),
-            "adjusters": adjuster_stats.to_dict('records')
-        }
+            "adjusters": frame_payload(adjuster_stats, format)
+        })
 
     except Exception as e:
         logger.error(f"Error in adjuster performance: {str(e)}")
@@ -132,15 +145,17 @@ async def get_adjuster_recommendations(
     Based on similar cases and adjuster performance
     """
     try:
-        claims = await data_service.get_full_claims_data()
+        df = await data_service.get_claims_frame(columns=[
+            'CLAIMID', 'ADJUSTERNAME', 'PRIMARY_INJURYGROUP_CODE', 'SEVERITY_SCORE',
+            'variance_pct', 'SETTLEMENT_DAYS'
+        ])
 
-        if not claims:
+        if df.empty:
             raise HTTPException(status_code=404, detail="No claims data available")
 
-        df = pd.DataFrame(claims)
-
-        # Find the claim
-        claim = df[df['claim_id'] == claim_id]
+        # Find the claim (CLAIMID is numeric; anything else cannot match)
+        claim_number = pd.to_numeric(pd.Series([claim_id]), errors='coerce').iloc[0]
+        claim = df[df['CLAIMID'].eq(claim_number).fillna(False).astype(bool)]
         if claim.empty:
             raise HTTPException(status_code=404, detail=f"Claim {claim_id} not found")
 
@@ -148,17 +163,17 @@ async def get_adjuster_recommendations(
 
         # Find similar cases (same injury group and similar severity)
         similar_cases = df[
-            (df['INJURY_GROUP_CODE'] == claim_data['INJURY_GROUP_CODE']) &
+            (df['PRIMARY_INJURYGROUP_CODE'] == claim_data['PRIMARY_INJURYGROUP_CODE']) &
             (df['SEVERITY_SCORE'].between(claim_data['SEVERITY_SCORE'] - 2, claim_data['SEVERITY_SCORE'] + 2))
         ]
 
         if len(similar_cases) < 5:
             # If not enough similar cases, broaden the search
-            similar_cases = df[df['INJURY_GROUP_CODE'] == claim_data['INJURY_GROUP_CODE']]
+            similar_cases = df[df['PRIMARY_INJURYGROUP_CODE'] == claim_data['PRIMARY_INJURYGROUP_CODE']]
 
         # Calculate adjuster performance on similar cases
-        adjuster_perf = similar_cases.groupby('adjuster').agg({
-            'claim_id': 'count',
+        adjuster_perf = similar_cases.groupby('ADJUSTERNAME', observed=True).agg({
+            'CLAIMID': 'count',
             'variance_pct': ['mean', 'std'],
             'SETTLEMENT_DAYS': 'mean'
         }).reset_index()
@@ -204,9 +219,9 @@ async def get_adjuster_recommendations(
 
         return {
             "claim_id": claim_id,
-            "current_adjuster": claim_data['adjuster'],
+            "current_adjuster": claim_data['ADJUSTERNAME'],
             "current_variance_pct": float(claim_data['variance_pct']),
-            "injury_group": claim_data['INJURY_GROUP_CODE'],
+            "injury_group": claim_data['PRIMARY_INJURYGROUP_CODE'],
             "severity_score": float(claim_data['SEVERITY_SCORE']),
             "recommended_adjusters": recommendations,
             "similar_cases_analyzed": len(similar_cases)
@@ -221,91 +236,101 @@ async def get_adjuster_recommendations(
 
 @router.get("/injury-benchmarks")
 async def get_injury_benchmarks(
-    injury_group: Optional[str] = Query(None, description="Filter by injury group")
+    injury_group: Optional[str] = Query(None, description="Filter by injury group"),
+    format: str = Query("records", pattern=RESPONSE_FORMAT_PATTERN, description=RESPONSE_FORMAT_DESCRIPTION)
 ):
     """
     Get benchmark statistics for injury groups
+    Served from the aggregate cache; recomputed in the background once stale
     """
     try:
-        claims = await data_service.get_full_claims_data()
-
-        if not claims:
-            raise HTTPException(status_code=404, detail="No claims data available")
-
-        df = pd.DataFrame(claims)
-
-        if injury_group:
-            df = df[df['INJURY_GROUP_CODE'] == injury_group]
-
-        # Group by injury and body part
-        benchmarks = df.groupby(['INJURY_GROUP_CODE', 'PRIMARY_INJURY', 'PRIMARY_BODYPART']).agg({
-            'claim_id': 'count',
-            'DOLLARAMOUNTHIGH': ['mean', 'median', 'std', 'min', 'max'],
-            'variance_pct': ['mean', 'std'],
-            'SETTLEMENT_DAYS': 'mean',
-            'SEVERITY_SCORE': 'mean'
-        }).reset_index()
-
-        benchmarks.columns = [
-            'injury_group', 'injury_type', 'body_part', 'case_count',
-            'avg_settlement', 'median_settlement', 'std_settlement', 'min_settlement', 'max_settlement',
-            'avg_variance', 'std_variance', 'avg_days', 'avg_severity'
-        ]
-
-        # Calculate percentiles
-        benchmarks['p25_settlement'] = benchmarks.apply(
-            lambda row: df[
-                (df['INJURY_GROUP_CODE'] == row['injury_group']) &
-                (df['PRIMARY_INJURY'] == row['injury_type']) &
-                (df['PRIMARY_BODYPART'] == row['body_part'])
-            ]['DOLLARAMOUNTHIGH'].quantile(0.25), axis=1
-        )
-
-        benchmarks['p75_settlement'] = benchmarks.apply(
-            lambda row: df[
-                (df['INJURY_GROUP_CODE'] == row['injury_group']) &
-                (df['PRIMARY_INJURY'] == row['injury_type']) &
-                (df['PRIMARY_BODYPART'] == row['body_part'])
-            ]['DOLLARAMOUNTHIGH'].quantile(0.75), axis=1
+        result = await aggregate_cache.get_or_compute(
+            "injury-benchmarks", {"injury_group": injury_group, "format": format},
+            lambda: _compute_injury_benchmarks(injury_group, format)
         )
-
-        # Filter combinations with at least 3 cases
-        benchmarks = benchmarks[benchmarks['case_count'] >= 3]
-
-        return {
-            "total_combinations": len(benchmarks),
-            "benchmarks": benchmarks.to_dict('records')
-        }
+        return FastJSONResponse(result)
 
     except Exception as e:
         logger.error(f"Error getting injury benchmarks: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+async def _compute_injury_benchmarks(injury_group: Optional[str], format: str = "records") -> Dict[str, Any]:
+    """Benchmark statistics per injury group / injury / body part"""
+    df = await data_service.get_claims_frame(columns=[
+        'PRIMARY_INJURYGROUP_CODE', 'PRIMARY_INJURY', 'PRIMARY_BODYPART', 'CLAIMID',
+        'DOLLARAMOUNTHIGH', 'variance_pct', 'SETTLEMENT_DAYS', 'SEVERITY_SCORE'
+    ])
+
+    if df.empty:
+        raise HTTPException(status_code=404, detail="No claims data available")
+
+    if injury_group:
+        df = df[df['PRIMARY_INJURYGROUP_CODE'] == injury_group]
+
+    # Group by injury and body part
+    benchmarks = df.groupby(['PRIMARY_INJURYGROUP_CODE', 'PRIMARY_INJURY', 'PRIMARY_BODYPART'], observed=True).agg({
+        'CLAIMID': 'count',
+        'DOLLARAMOUNTHIGH': ['mean', 'median', 'std', 'min', 'max'],
+        'variance_pct': ['mean', 'std'],
+        'SETTLEMENT_DAYS': 'mean',
+        'SEVERITY_SCORE': 'mean'
+    }).reset_index()
+
+    benchmarks.columns = [
+        'injury_group', 'injury_type', 'body_part', 'case_count',
+        'avg_settlement', 'median_settlement', 'std_settlement', 'min_settlement', 'max_settlement',
+        'avg_variance', 'std_variance', 'avg_days', 'avg_severity'
+    ]
+
+    # Calculate percentiles
+    benchmarks['p25_settlement'] = benchmarks.apply(
+        lambda row: df[
+            (df['PRIMARY_INJURYGROUP_CODE'] == row['injury_group']) &
+            (df['PRIMARY_INJURY'] == row['injury_type']) &
+            (df['PRIMARY_BODYPART'] == row['body_part'])
+        ]['DOLLARAMOUNTHIGH'].quantile(0.25), axis=1
+    )
+
+    benchmarks['p75_settlement'] = benchmarks.apply(
+        lambda row: df[
+            (df['PRIMARY_INJURYGROUP_CODE'] == row['injury_group']) &
+            (df['PRIMARY_INJURY'] == row['injury_type']) &
+            (df['PRIMARY_BODYPART'] == row['body_part'])
+        ]['DOLLARAMOUNTHIGH'].quantile(0.75), axis=1
+    )
+
+    # Filter combinations with at least 3 cases
+    benchmarks = benchmarks[benchmarks['case_count'] >= 3]
+
+    return {
+        "total_combinations": len(benchmarks),
+        "benchmarks": frame_payload(benchmarks, format)
+    }
+
+
 @router.get("/variance-drivers")
 async def get_variance_drivers():
     """
     Identify key factors driving variance in predictions
     """
     try:
-        claims = await data_service.get_full_claims_data()
-
-        if not claims:
-            raise HTTPException(status_code=404, detail="No claims data available")
-
-        df = pd.DataFrame(claims)
-
         # Analyze categorical factors
         categorical_factors = [
-            'INJURY_GROUP_CODE', 'PRIMARY_INJURY', 'CAUTION_LEVEL',
-            'VENUE_RATING', 'VENUESTATE', 'PRIMARY_BODYPART'
+            'PRIMARY_INJURYGROUP_CODE', 'PRIMARY_INJURY', 'CAUTION_LEVEL',
+            'VENUERATING', 'VENUESTATE', 'PRIMARY_BODYPART'
         ]
 
+        df = await data_service.get_claims_frame(columns=categorical_factors + ['variance_pct'])
+
+        if df.empty:
+            raise HTTPException(status_code=404, detail="No claims data available")
+
         variance_by_factor = []
 
         for factor in categorical_factors:
             if factor in df.columns:
-                factor_variance = df.groupby(factor)['variance_pct'].agg(['mean', 'std', 'count'])
+                factor_variance = df.groupby(factor, observed=True)['variance_pct'].agg(['mean', 'std', 'count'])
                 factor_variance = factor_variance[factor_variance['count'] >= 5]  # Minimum 5 cases
 
                 for value, row in factor_variance.iterrows():
@@ -334,22 +359,24 @@ async def get_variance_drivers():
 @router.get("/bad-combinations")
 async def get_bad_combinations(
     min_variance_pct: float = Query(15.0, description="Minimum average variance to flag as 'bad'"),
-    min_cases: int = Query(3, description="Minimum cases for combination to be considered")
+    min_cases: int = Query(3, description="Minimum cases for combination to be considered"),
+    format: str = Query("records", pattern=RESPONSE_FORMAT_PATTERN, description=RESPONSE_FORMAT_DESCRIPTION)
 ):
     """
     Identify injury/body part combinations with consistently high variance
     """
     try:
-        claims = await data_service.get_full_claims_data()
+        df = await data_service.get_claims_frame(columns=[
+            'PRIMARY_INJURYGROUP_CODE', 'PRIMARY_INJURY', 'PRIMARY_BODYPART', 'CLAIMID',
+            'variance_pct', 'DOLLARAMOUNTHIGH', 'SEVERITY_SCORE'
+        ])
 
-        if not claims:
+        if df.empty:
             raise HTTPException(status_code=404, detail="No claims data available")
 
-        df = pd.DataFrame(claims)
-
         # Group by injury and body part combinations
-        combinations = df.groupby(['INJURY_GROUP_CODE', 'PRIMARY_INJURY', 'PRIMARY_BODYPART']).agg({
-            'claim_id': 'count',
+        combinations = df.groupby(['PRIMARY_INJURYGROUP_CODE', 'PRIMARY_INJURY', 'PRIMARY_BODYPART'], observed=True).agg({
+            'CLAIMID': 'count',
             'variance_pct': ['mean', 'std', 'median'],
             'DOLLARAMOUNTHIGH': 'mean',
             'SEVERITY_SCORE': 'mean'
@@ -371,7 +398,7 @@ async def get_bad_combinations(
         bad_combos['risk_score'] = (
             bad_combos['avg_variance_pct'].abs() * 0.6 +
             bad_combos['std_variance'] * 0.3 +
-            (bad_combos['case_count'] / df['claim_id'].count() * 100) * 0.1
+            (bad_combos['case_count'] / df['CLAIMID'].count() * 100) * 0.1
         )
 
         bad_combos = bad_combos.sort_values('risk_score', ascending=False)
@@ -383,10 +410,10 @@ async def get_bad_combinations(
             labels=['Moderate', 'High', 'Very High', 'Critical']
         )
 
-        return {
+        return FastJSONResponse({
             "total_bad_combinations": len(bad_combos),
-            "combinations": bad_combos.to_dict('records')
-        }
+            "combinations": frame_payload(bad_combos, format)
+        })
 
     except Exception as e:
         logger.error(f"Error identifying bad combinations: {str(e)}")
@@ -1,7 +1,11 @@
 from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from typing import Optional, List, Dict, Any
 import logging
 import asyncio
+import numpy as np
+import pandas as pd
+from sqlalchemy import select
 
 from app.api.schemas import (
     ClaimsResponse,
@@ -11,6 +15,18 @@ from app.api.schemas import (
 )
 # Switch to SQLite data service for better performance
 from app.services.data_service_sqlite import data_service_sqlite as data_service
+from app.services.claims_export import (
+    ARROW_FORMATS,
+    EXPORT_MEDIA_TYPES,
+    EXPORT_EXTENSIONS,
+    arrow_available,
+    build_select,
+    stream_export,
+)
+from app.db.schema import Claim
+from app.api.responses import FastJSONResponse
+from app.api.columnar import frame_to_columnar, RESPONSE_FORMAT_PATTERN, RESPONSE_FORMAT_DESCRIPTION
+from app.utils.pagination import KEYSET_SORT_FIELDS
 
 logger = logging.getLogger(__name__)
 
@@ -24,9 +40,16 @@ async def get_claims(
     adjuster: Optional[List[str]] = Query(None, description="Filter by adjusters"),
     state: Optional[List[str]] = Query(None, description="Filter by states"),
     year: Optional[List[int]] = Query(None, description="Filter by years"),
+    sort_by: str = Query("id", pattern=f"^({'|'.join(KEYSET_SORT_FIELDS)})$", description="Field to sort by"),
+    sort_order: str = Query("asc", pattern="^(asc|desc)$"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page; seeks instead of using page"),
+    count_mode: str = Query("exact", pattern="^(exact|estimated)$", description="estimated returns a planner-statistics total instantly"),
+    format: str = Query("records", pattern=RESPONSE_FORMAT_PATTERN, description=RESPONSE_FORMAT_DESCRIPTION),
 ):
     """
     Get paginated claims with optional filters
+    Follow next_cursor for constant-cost paging through deep result sets
+    format=columnar returns the page as column arrays instead of one dict per claim
     """
     try:
         filters = {}
@@ -42,42 +65,59 @@ async def get_claims(
         result = await data_service.get_paginated_claims(
             page=page,
             page_size=page_size,
-            filters=filters if filters else None
+            filters=filters if filters else None,
+            sort_by=sort_by,
+            sort_order=sort_order,
+            cursor=cursor,
+            count_mode=count_mode
         )
 
+        if format == "columnar":
+            result["claims"] = frame_to_columnar(pd.DataFrame.from_records(result["claims"]))
+            return FastJSONResponse(result)
+
         return result
 
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error getting claims: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/claims/full")
-async def get_full_claims():
+async def get_full_claims(
+    format: Optional[str] = Query(
+        None,
+        pattern="^(ndjson|csv|arrow|parquet)$",
+        description="Stream the export as ndjson, csv, arrow (Arrow IPC stream) or parquet instead of one JSON document"
+    ),
+    batch_size: int = Query(10000, ge=100, le=100000, description="Rows fetched per streamed batch")
+):
     """
     Get all claims data (use with caution for large datasets)
+    Pass format=ndjson|csv|arrow|parquet for a bounded-memory streaming export
     """
+    if format:
+        if format in ARROW_FORMATS and not arrow_available():
+            raise HTTPException(status_code=501, detail="Arrow and Parquet export require the pyarrow package")
+
+        query = build_select(Claim.__table__)
+        logger.info(f"Streaming claims export as {format} (batch size {batch_size})")
+        return StreamingResponse(
+            stream_export(data_service.engine, query, format, batch_size),
+            media_type=EXPORT_MEDIA_TYPES[format],
+            headers={"Content-Disposition": f"attachment; filename=claims.{EXPORT_EXTENSIONS[format]}"}
+        )
+
     try:
-        import math
+        # Returned as a response so FastAPI skips its per-value jsonable_encoder
+        # pass; NaN / inf floats are written as null by the encoder
         claims = await data_service.get_full_claims_data()
 
-        # Clean up NaN/inf values for JSON serialization
-        cleaned_claims = []
-        for claim in claims:
-            cleaned_claim = {}
-            for key, value in claim.items():
-                if isinstance(value, float):
-                    if math.isnan(value) or math.isinf(value):
-                        cleaned_claim[key] = None
-                    else:
-                        cleaned_claim[key] = value
-                else:
-                    cleaned_claim[key] = value
-            cleaned_claims.append(cleaned_claim)
-
-        return {
-            "claims": cleaned_claims,
-            "total": len(cleaned_claims)
-        }
+        return FastJSONResponse({
+            "claims": claims,
+            "total": len(claims)
+        })
     except Exception as e:
         logger.error(f"Error getting full claims: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -123,14 +163,11 @@ async def get_claims_stats():
     Get statistical summary of claims data
     """
     try:
-        claims = await data_service.get_full_claims_data()
+        df = await data_service.get_claims_frame()
 
-        if not claims:
+        if df.empty:
             return {"error": "No data available"}
 
-        import pandas as pd
-        df = pd.DataFrame(claims)
-
         stats = {
             "total_claims": len(df),
             "numeric_columns": {},
@@ -138,8 +175,11 @@ async def get_claims_stats():
         }
 
         # Numeric column stats
-        numeric_cols = df.select_dtypes(include=['float64', 'int64']).columns
+        numeric_cols = df.select_dtypes(include='number').columns
         for col in numeric_cols:
+            # Typed columns keep all-NULL fields numeric; skip them like the object-typed path did
+            if df[col].count() == 0:
+                continue
             stats["numeric_columns"][col] = {
                 "mean": float(df[col].mean()),
                 "median": float(df[col].median()),
@@ -149,7 +189,7 @@ async def get_claims_stats():
             }
 
         # Categorical column stats
-        categorical_cols = df.select_dtypes(include=['object']).columns
+        categorical_cols = df.select_dtypes(include=['object', 'category']).columns
         for col in categorical_cols[:10]:  # Limit to first 10
             stats["categorical_columns"][col] = {
                 "unique_values": int(df[col].nunique()),
@@ -163,72 +203,80 @@ async def get_claims_stats():
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/claims/memory")
+async def get_claims_memory(
+    columns: Optional[List[str]] = Query(None, description="Columns to report (default: all)")
+):
+    """
+    Memory used by the in-memory claims frame, per column
+    Compares the analytical schema (categoricals, float32, nullable small
+    ints, datetimes) with the untyped object / float64 frame
+    """
+    try:
+        return await data_service.get_claims_memory_report(columns)
+    except Exception as e:
+        logger.error(f"Error getting claims memory report: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+# SSNB fields returned by /claims/ssnb, in response order
+SSNB_COLUMNS = [
+    'CLAIMID', 'VERSIONID', 'EXPSR_NBR', 'DOLLARAMOUNTHIGH', 'CAUSATION_HIGH_RECOMMENDATION',
+    'PRIMARY_SEVERITY_SCORE', 'PRIMARY_CAUSATION_SCORE',
+    'PRIMARY_INJURY', 'PRIMARY_BODYPART', 'PRIMARY_INJURY_GROUP',
+    # Float clinical factors (NOT categorical strings)
+    'Causation_Compliance', 'Clinical_Findings', 'Consistent_Mechanism', 'Injury_Location',
+    'Movement_Restriction', 'Pain_Management', 'Prior_Treatment', 'Symptom_Timeline',
+    'Treatment_Course', 'Treatment_Delays', 'Treatment_Period_Considered', 'Vehicle_Impact',
+    # Venue and demographics
+    'VENUERATING', 'RATINGWEIGHT', 'VENUERATINGTEXT', 'VENUERATINGPOINT',
+    'AGE', 'GENDER', 'HASATTORNEY', 'IOL', 'ADJUSTERNAME', 'COUNTYNAME', 'VENUESTATE',
+]
+
+
 @router.get("/claims/ssnb")
 async def get_ssnb_data(
-    limit: Optional[int] = Query(None, description="Limit number of records")
+    limit: Optional[int] = Query(None, description="Limit number of records"),
+    format: str = Query("records", pattern=RESPONSE_FORMAT_PATTERN, description=RESPONSE_FORMAT_DESCRIPTION)
 ):
     """
     Get SSNB data for weight recalibration
     Returns float-based clinical factors for single injury analysis
+    format=columnar reads the table straight into column arrays (no per-row dicts)
     """
     try:
+        from app.db.schema import SSNB
         loop = asyncio.get_event_loop()
+
+        if format == "columnar":
+            def query_columns():
+                table = SSNB.__table__
+                query = select(*[table.c[name] for name in SSNB_COLUMNS])
+                if limit:
+                    query = query.limit(limit)
+                with data_service.engine.connect() as conn:
+                    return frame_to_columnar(pd.read_sql_query(query, conn))
+
+            payload = await loop.run_in_executor(None, query_columns)
+            return FastJSONResponse({
+                "ssnb_data": payload,
+                "total": payload["rows"]
+            })
+
         session = data_service.get_session()
 
         def query_db():
-            from app.db.schema import SSNB
             query = session.query(SSNB)
             if limit:
                 query = query.limit(limit)
-
-            results = []
-            for ssnb in query.all():
-                results.append({
-                    'CLAIMID': ssnb.CLAIMID,
-                    'VERSIONID': ssnb.VERSIONID,
-                    'EXPSR_NBR': ssnb.EXPSR_NBR,
-                    'DOLLARAMOUNTHIGH': ssnb.DOLLARAMOUNTHIGH,
-                    'CAUSATION_HIGH_RECOMMENDATION': ssnb.CAUSATION_HIGH_RECOMMENDATION,
-                    'PRIMARY_SEVERITY_SCORE': ssnb.PRIMARY_SEVERITY_SCORE,
-                    'PRIMARY_CAUSATION_SCORE': ssnb.PRIMARY_CAUSATION_SCORE,
-                    'PRIMARY_INJURY': ssnb.PRIMARY_INJURY,
-                    'PRIMARY_BODYPART': ssnb.PRIMARY_BODYPART,
-                    'PRIMARY_INJURY_GROUP': ssnb.PRIMARY_INJURY_GROUP,
-                    # Float clinical factors (NOT categorical strings)
-                    'Causation_Compliance': ssnb.Causation_Compliance,
-                    'Clinical_Findings': ssnb.Clinical_Findings,
-                    'Consistent_Mechanism': ssnb.Consistent_Mechanism,
-                    'Injury_Location': ssnb.Injury_Location,
-                    'Movement_Restriction': ssnb.Movement_Restriction,
-                    'Pain_Management': ssnb.Pain_Management,
-                    'Prior_Treatment': ssnb.Prior_Treatment,
-                    'Symptom_Timeline': ssnb.Symptom_Timeline,
-                    'Treatment_Course': ssnb.Treatment_Course,
-                    'Treatment_Delays': ssnb.Treatment_Delays,
-                    'Treatment_Period_Considered': ssnb.Treatment_Period_Considered,
-                    'Vehicle_Impact': ssnb.Vehicle_Impact,
-                    # Venue and demographics
-                    'VENUERATING': ssnb.VENUERATING,
-                    'RATINGWEIGHT': ssnb.RATINGWEIGHT,
-                    'VENUERATINGTEXT': ssnb.VENUERATINGTEXT,
-                    'VENUERATINGPOINT': ssnb.VENUERATINGPOINT,
-                    'AGE': ssnb.AGE,
-                    'GENDER': ssnb.GENDER,
-                    'HASATTORNEY': ssnb.HASATTORNEY,
-                    'IOL': ssnb.IOL,
-                    'ADJUSTERNAME': ssnb.ADJUSTERNAME,
-                    'COUNTYNAME': ssnb.COUNTYNAME,
-                    'VENUESTATE': ssnb.VENUESTATE,
-                })
-            return results
+            return [{name: getattr(ssnb, name) for name in SSNB_COLUMNS} for ssnb in query.all()]
 
         result = await loop.run_in_executor(None, query_db)
         session.close()
 
-        return {
+        return FastJSONResponse({
             "ssnb_data": result,
             "total": len(result)
-        }
+        })
 
     except Exception as e:
         logger.error(f"Error getting SSNB data: {str(e)}")
@@ -238,7 +286,8 @@ async def get_ssnb_data(
 @router.get("/claims/prediction-variance")
 async def get_prediction_variance_analysis(
     variance_threshold: Optional[float] = Query(50.0, description="Variance % threshold for bad predictions"),
-    limit: Optional[int] = Query(1000, description="Limit number of records")
+    limit: Optional[int] = Query(1000, description="Limit number of records"),
+    format: str = Query("records", pattern=RESPONSE_FORMAT_PATTERN, description=RESPONSE_FORMAT_DESCRIPTION)
 ):
     """
     Analyze prediction variance to identify bad predictions
@@ -254,7 +303,6 @@ async def get_prediction_variance_analysis(
 
         def query_db():
             import sqlite3
-            import math
             from pathlib import Path
 
             # Connect to database
@@ -298,35 +346,38 @@ async def get_prediction_variance_analysis(
                 LIMIT ?
             ''', (variance_threshold, limit))
 
+            if format == "columnar":
+                # Column arrays straight from the cursor, no per-row dicts
+                df = pd.DataFrame.from_records(
+                    cursor.fetchall(), columns=[column[0] for column in cursor.description]
+                )
+                conn.close()
+                direction = np.where(df['variance_pct'].to_numpy(dtype=float) < 0, 'Over', 'Under')
+                df.insert(df.columns.get_loc('variance_pct') + 1, 'prediction_direction', direction)
+                return df
+
             results = []
             for row in cursor.fetchall():
-                # Convert row to dict and clean values
-                def clean_value(val):
-                    if val is None:
-                        return None
-                    if isinstance(val, float) and (math.isnan(val) or math.isinf(val)):
-                        return None
-                    return val
-
-                variance = clean_value(row['variance_pct'])
+                # NaN / inf floats are written as null by the response encoder
+                variance = row['variance_pct']
                 results.append({
                     'CLAIMID': row['CLAIMID'],
-                    'DOLLARAMOUNTHIGH': clean_value(row['DOLLARAMOUNTHIGH']),
-                    'CAUSATION_HIGH_RECOMMENDATION': clean_value(row['CAUSATION_HIGH_RECOMMENDATION']),
+                    'DOLLARAMOUNTHIGH': row['DOLLARAMOUNTHIGH'],
+                    'CAUSATION_HIGH_RECOMMENDATION': row['CAUSATION_HIGH_RECOMMENDATION'],
                     'variance_pct': variance,
                     'prediction_direction': 'Over' if variance and variance < 0 else 'Under',
 
                     # Multi-tier injury data
                     'PRIMARY_INJURY_BY_SEVERITY': row['PRIMARY_INJURY_BY_SEVERITY'],
                     'PRIMARY_BODYPART_BY_SEVERITY': row['PRIMARY_BODYPART_BY_SEVERITY'],
-                    'PRIMARY_INJURY_SEVERITY_SCORE': clean_value(row['PRIMARY_INJURY_SEVERITY_SCORE']),
+                    'PRIMARY_INJURY_SEVERITY_SCORE': row['PRIMARY_INJURY_SEVERITY_SCORE'],
                     'PRIMARY_INJURY_BY_CAUSATION': row['PRIMARY_INJURY_BY_CAUSATION'],
                     'PRIMARY_BODYPART_BY_CAUSATION': row['PRIMARY_BODYPART_BY_CAUSATION'],
-                    'PRIMARY_INJURY_CAUSATION_SCORE': clean_value(row['PRIMARY_INJURY_CAUSATION_SCORE']),
+                    'PRIMARY_INJURY_CAUSATION_SCORE': row['PRIMARY_INJURY_CAUSATION_SCORE'],
 
                     # Composite scores
-                    'CALCULATED_SEVERITY_SCORE': clean_value(row['CALCULATED_SEVERITY_SCORE']),
-                    'CALCULATED_CAUSATION_SCORE': clean_value(row['CALCULATED_CAUSATION_SCORE']),
+                    'CALCULATED_SEVERITY_SCORE': row['CALCULATED_SEVERITY_SCORE'],
+                    'CALCULATED_CAUSATION_SCORE': row['CALCULATED_CAUSATION_SCORE'],
 
                     # Key clinical factors for analysis
                     'Causation_Compliance': row['Causation_Compliance'],
@@ -351,20 +402,24 @@ async def get_prediction_variance_analysis(
 
         result = await loop.run_in_executor(None, query_db)
 
-        # Calculate summary statistics
-        if result:
-            import numpy as np
+        if format == "columnar":
+            variances = result['variance_pct'].abs().dropna().to_numpy()
+            over_predictions = int((result['prediction_direction'] == 'Over').sum())
+            under_predictions = len(result) - over_predictions
+        else:
             variances = [abs(r['variance_pct']) for r in result if r['variance_pct'] is not None]
             over_predictions = sum(1 for r in result if r['prediction_direction'] == 'Over')
             under_predictions = sum(1 for r in result if r['prediction_direction'] == 'Under')
 
+        # Calculate summary statistics
+        if len(result):
             summary = {
                 'total_bad_predictions': len(result),
                 'over_predictions': over_predictions,
                 'under_predictions': under_predictions,
-                'avg_variance_pct': float(np.mean(variances)) if variances else 0.0,
-                'max_variance_pct': float(np.max(variances)) if variances else 0.0,
-                'min_variance_pct': float(np.min(variances)) if variances else 0.0,
+                'avg_variance_pct': float(np.mean(variances)) if len(variances) else 0.0,
+                'max_variance_pct': float(np.max(variances)) if len(variances) else 0.0,
+                'min_variance_pct': float(np.min(variances)) if len(variances) else 0.0,
             }
         else:
             summary = {
@@ -373,14 +428,14 @@ async def get_prediction_variance_analysis(
                 'under_predictions': 0,
             }
 
-        return {
-            "bad_predictions": result,
+        return FastJSONResponse({
+            "bad_predictions": frame_to_columnar(result) if format == "columnar" else result,
             "summary": summary,
             "filters": {
                 "variance_threshold": variance_threshold,
                 "limit": limit
             }
-        }
+        })
 
     except Exception as e:
         logger.error(f"Error analyzing prediction variance: {str(e)}")
@@ -0,0 +1,113 @@
+"""
+Exports API - Arrow IPC / Parquet downloads for notebooks
+Streams claims, ssnb, venue_statistics and every mv_* table straight from a
+database cursor in record batches, with column projection and the claims
+listing filters (injury_group, adjuster, state, year)
+
+    import pyarrow as pa, requests
+    table = pa.ipc.open_stream(requests.get(url + "/exports/claims").content).read_all()
+    df = pd.read_parquet(url + "/exports/ssnb?format=parquet&columns=CLAIMID&columns=DOLLARAMOUNTHIGH")
+"""
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from typing import Optional, List
+import logging
+import asyncio
+
+from app.services.data_service_sqlite import data_service_sqlite as data_service
+from app.services.claims_export import (
+    EXPORT_MEDIA_TYPES,
+    EXPORT_EXTENSIONS,
+    arrow_available,
+    build_select,
+    export_table_names,
+    filter_conditions,
+    get_export_table,
+    stream_export,
+)
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+
+@router.get("/tables")
+async def get_export_tables():
+    """
+    List exportable tables with their columns
+    """
+    try:
+        def describe():
+            engine = data_service.engine
+            tables = []
+            for name in export_table_names(engine):
+                table = get_export_table(engine, name)
+                tables.append({
+                    "name": name,
+                    "columns": [column.name for column in table.c],
+                })
+            return tables
+
+        loop = asyncio.get_event_loop()
+        tables = await loop.run_in_executor(None, describe)
+
+        return {
+            "tables": tables,
+            "formats": ["arrow", "parquet"],
+            "arrow_available": arrow_available()
+        }
+    except Exception as e:
+        logger.error(f"Error listing export tables: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/{table_name}")
+async def export_table(
+    table_name: str,
+    format: str = Query(
+        "arrow",
+        pattern="^(arrow|parquet)$",
+        description="arrow: Arrow IPC stream (application/vnd.apache.arrow.stream); parquet: Parquet file"
+    ),
+    columns: Optional[List[str]] = Query(None, description="Columns to export (all when omitted)"),
+    injury_group: Optional[List[str]] = Query(None, description="Filter by injury groups"),
+    adjuster: Optional[List[str]] = Query(None, description="Filter by adjusters"),
+    state: Optional[List[str]] = Query(None, description="Filter by states"),
+    year: Optional[List[int]] = Query(None, description="Filter by years"),
+    batch_size: int = Query(50000, ge=100, le=500000, description="Rows per record batch / Parquet row group")
+):
+    """
+    Download a table as an Arrow IPC stream or Parquet file
+    Rows are encoded batch by batch from a server-side cursor
+    """
+    if not arrow_available():
+        raise HTTPException(status_code=501, detail="Arrow and Parquet export require the pyarrow package")
+
+    try:
+        loop = asyncio.get_event_loop()
+        table = await loop.run_in_executor(None, get_export_table, data_service.engine, table_name)
+        if table is None:
+            raise HTTPException(status_code=404, detail=f"Unknown export table: {table_name}")
+
+        filters = {
+            'injury_group': injury_group,
+            'adjuster': adjuster,
+            'state': state,
+            'year': year,
+        }
+        query = build_select(table, columns, filter_conditions(table, filters))
+
+        logger.info(f"Streaming {table_name} export as {format} (batch size {batch_size})")
+        return StreamingResponse(
+            stream_export(data_service.engine, query, format, batch_size),
+            media_type=EXPORT_MEDIA_TYPES[format],
+            headers={"Content-Disposition": f"attachment; filename={table_name}.{EXPORT_EXTENSIONS[format]}"}
+        )
+
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error exporting {table_name}: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
@@ -16,6 +16,15 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Columns the weight-based metrics read besides the weight factors themselves
+ACTUAL_VALUE_COLUMNS = ['ConsensusValue', 'SettlementAmount', 'DOLLARAMOUNTHIGH']
+
+# Default similarity factors plus the fields reported for each similar case
+SIMILAR_CASE_COLUMNS = [
+    'INJURY_GROUP_CODE', 'SEVERITY_SCORE', 'CAUTION_LEVEL', 'VENUE_RATING',
+    'claim_id', 'variance_pct', 'DOLLARAMOUNTHIGH', 'predicted_pain_suffering', 'adjuster'
+]
+
 @router.post("/recalibrate", response_model=RecalibrationResponse)
 async def recalibrate_weights(request: RecalibrationRequest):
     """
@@ -25,9 +34,11 @@ async def recalibrate_weights(request: RecalibrationRequest):
         # Get claims data if not provided
         claims_data = request.claims_data
         if not claims_data:
-            claims_data = await data_service.get_full_claims_data()
+            claims_data = await data_service.get_claims_frame(
+                columns=list(request.weights.keys()) + ACTUAL_VALUE_COLUMNS, strict=False
+            )
 
-        if not claims_data:
+        if len(claims_data) == 0:
             raise HTTPException(status_code=400, detail="No claims data available")
 
         # Calculate predictions with new weights
@@ -88,9 +99,11 @@ async def sensitivity_analysis(
     """
     try:
         # Get claims data
-        claims_data = await data_service.get_full_claims_data()
+        claims_data = await data_service.get_claims_frame(
+            columns=list(weights.keys()) + ACTUAL_VALUE_COLUMNS, strict=False
+        )
 
-        if not claims_data:
+        if len(claims_data) == 0:
             raise HTTPException(status_code=400, detail="No claims data available")
 
         # Perform sensitivity analysis
@@ -128,9 +141,11 @@ async def compare_weights(
     """
     try:
         # Get claims data
-        claims_data = await data_service.get_full_claims_data()
+        claims_data = await data_service.get_claims_frame(
+            columns=list(weights_a.keys()) + list(weights_b.keys()) + ACTUAL_VALUE_COLUMNS, strict=False
+        )
 
-        if not claims_data:
+        if len(claims_data) == 0:
             raise HTTPException(status_code=400, detail="No claims data available")
 
         import pandas as pd
@@ -291,9 +306,11 @@ async def update_weights(updated_weights: dict):
                 )
 
         # Calculate impact metrics with new weights
-        claims_data = await data_service.get_full_claims_data()
+        claims_data = await data_service.get_claims_frame(
+            columns=list(updated_weights.keys()) + ACTUAL_VALUE_COLUMNS, strict=False
+        )
 
-        if claims_data:
+        if len(claims_data) > 0:
             import pandas as pd
             df = pd.DataFrame(claims_data)
             actuals = df['ConsensusValue'].values if 'ConsensusValue' in df.columns else df['DOLLARAMOUNTHIGH'].values
@@ -332,9 +349,9 @@ async def analyze_weight_statistics(
     Returns mean, median, mode, correlation, and distribution insights
     """
     try:
-        claims_data = await data_service.get_full_claims_data()
+        claims_data = await data_service.get_claims_frame(columns=[weight_column, target_column], strict=False)
 
-        if not claims_data:
+        if len(claims_data) == 0:
             raise HTTPException(status_code=404, detail="No claims data available")
 
         result = enhanced_recalibration_service.analyze_weight_statistics(
@@ -366,9 +383,11 @@ async def find_similar_cases(
     Used for weight recommendation based on historical patterns
     """
     try:
-        claims_data = await data_service.get_full_claims_data()
+        claims_data = await data_service.get_claims_frame(
+            columns=(similarity_factors or []) + SIMILAR_CASE_COLUMNS, strict=False
+        )
 
-        if not claims_data:
+        if len(claims_data) == 0:
             raise HTTPException(status_code=404, detail="No claims data available")
 
         result = enhanced_recalibration_service.find_similar_cases(
@@ -397,9 +416,11 @@ async def analyze_recent_performance(months: int = 12):
     Determines if weight updates are needed
     """
     try:
-        claims_data = await data_service.get_full_claims_data()
+        claims_data = await data_service.get_claims_frame(
+            columns=['closed_on', 'variance_pct', 'DOLLARAMOUNTHIGH']
+        )
 
-        if not claims_data:
+        if len(claims_data) == 0:
             raise HTTPException(status_code=404, detail="No claims data available")
 
         result = enhanced_recalibration_service.analyze_recent_performance(
@@ -432,9 +453,11 @@ async def suggest_optimal_weights(
     Includes mean, median, mode analysis and correlation-based recommendations
     """
     try:
-        claims_data = await data_service.get_full_claims_data()
+        claims_data = await data_service.get_claims_frame(
+            columns=list(current_weights.keys()) + ['closed_on', 'variance_pct'], strict=False
+        )
 
-        if not claims_data:
+        if len(claims_data) == 0:
             raise HTTPException(status_code=404, detail="No claims data available")
 
         result = enhanced_recalibration_service.suggest_optimal_weights(
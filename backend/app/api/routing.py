@@ -0,0 +1,154 @@
+"""
+Cached API Routes
+APIRoute subclass that serves GET responses from the response body cache
+
+Routers created with APIRouter(route_class=CachedRoute) store every successful
+JSON GET response gzip-compressed in app.services.response_cache, keyed by path
+and query params and invalidated by the dataset version. A repeated request is
+answered with the stored bytes: no SQL, no JSON encoding, and no compression
+when the client accepts gzip (which browsers always do).
+
+Endpoints whose answer is not a function of the claims data alone (job status,
+cache status, windows ending today) opt out with @no_response_cache. Responses
+built from data older than the current version (see mark_response_stale) are
+returned but not stored. Requests sent with
+"Cache-Control: no-cache" skip the lookup and replace the stored body.
+Identical requests that miss at the same time run the endpoint once.
+
+Cached responses carry an ETag hashed from the stored compressed body, with
+"Cache-Control: no-cache" so browsers revalidate on every use. A request whose
+If-None-Match matches the stored body gets 304 Not Modified without running
+the endpoint; the validator only ever vouches for bytes the cache actually
+served, and a version bump that leaves a body unchanged still gets a 304.
+"""
+
+import asyncio
+import gzip
+import hashlib
+from typing import Callable
+import logging
+
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+
+from app.api.compression import choose_encoding
+from app.db.data_version import get_data_version
+from app.services.response_cache import response_cache, track_response_state
+from app.services.single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+CACHE_STATUS_HEADER = "X-Response-Cache"
+
+# Cache misses in flight, shared by every cached router
+route_flights = SingleFlight()
+
+
+def no_response_cache(endpoint: Callable) -> Callable:
+    """Mark an endpoint whose responses must never be cached (apply below the route decorator)"""
+    endpoint._no_response_cache = True
+    return endpoint
+
+
+def make_etag(compressed: bytes) -> str:
+    """Validator of a stored body (compression is deterministic, so equal bodies share it)"""
+    return f'W/"{hashlib.sha1(compressed).hexdigest()[:24]}"'
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    """Weak comparison of If-None-Match against an ETag"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def _accepts_gzip(request: Request) -> bool:
+    """Whether the stored gzip body can be sent as-is (negotiated like CompressionMiddleware)"""
+    return choose_encoding(request.headers.get("accept-encoding", ""), supported=("gzip",)) == "gzip"
+
+
+def _validator_headers(etag: str) -> dict:
+    return {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+
+
+def not_modified_response(etag: str) -> Response:
+    return Response(status_code=304, headers={**_validator_headers(etag), CACHE_STATUS_HEADER: "not-modified"})
+
+
+def cached_response(request: Request, compressed: bytes, status: str, etag: str) -> Response:
+    """Response for a stored body, decompressed only for clients that cannot take gzip"""
+    headers = {**_validator_headers(etag), CACHE_STATUS_HEADER: status}
+    if _accepts_gzip(request):
+        headers["Content-Encoding"] = "gzip"
+        return Response(content=compressed, media_type="application/json", headers=headers)
+    return Response(content=gzip.decompress(compressed), media_type="application/json", headers=headers)
+
+
+class CachedRoute(APIRoute):
+    """
+    Route that answers GET requests from the response cache
+    """
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        if getattr(self.endpoint, "_no_response_cache", False) or "GET" not in self.methods:
+            return handler
+
+        async def cached_handler(request: Request) -> Response:
+            if request.method != "GET":
+                return await handler(request)
+
+            key = response_cache.make_key(request.method, request.url.path, request.query_params)
+            loop = asyncio.get_event_loop()
+
+            if "no-cache" not in request.headers.get("cache-control", "").lower():
+                compressed = await loop.run_in_executor(None, response_cache.get, key)
+                if compressed is not None:
+                    # The client's copy is current if it is the body stored for this version
+                    etag = make_etag(compressed)
+                    if _etag_matches(request, etag):
+                        return not_modified_response(etag)
+                    return cached_response(request, compressed, "hit", etag)
+
+            async def compute():
+                """Run the endpoint once; returns (compressed body or None, response, data version)"""
+                # Version read before computing: a refresh landing mid-way must not be stored under the new version
+                version = get_data_version()
+                state = track_response_state()
+                response = await handler(request)
+
+                if state['stale']:
+                    # Storing it would pin old data under the current version
+                    logger.info(f"Not caching {request.url.path}: {state['stale']}")
+                    response.headers[CACHE_STATUS_HEADER] = "stale"
+                    return None, response, version
+                if response.status_code != 200 or not response.media_type or "json" not in response.media_type:
+                    return None, response, version
+                if response.headers.get("content-encoding") or response.headers.get("set-cookie"):
+                    return None, response, version
+
+                try:
+                    compressed = await loop.run_in_executor(None, response_cache.put, key, bytes(response.body), version)
+                except Exception as e:
+                    logger.error(f"Error caching response for {request.url.path}: {str(e)}")
+                    return None, response, version
+                return compressed, response, version
+
+            # Identical requests that miss together wait on the first one's computation
+            compressed, response, version = await route_flights.do("route", key, compute)
+            if compressed is None:
+                return response
+            return cached_response(request, compressed, "miss", make_etag(compressed))
+
+        return cached_handler
@@ -23,6 +23,8 @@ class ClaimsResponse(BaseModel):
     total: int
     page: int
     page_size: int
+    total_is_estimate: bool = False
+    next_cursor: Optional[str] = None
 
 class AggregatedData(BaseModel):
     data: List[Dict[str, Any]]
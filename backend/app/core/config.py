@@ -29,6 +29,20 @@ class Settings(BaseSettings):
     CSV_FILE_PATH: str = str(BASE_DIR / "data" / "dat.csv")
     AGGREGATED_DATA_DIR: str = str(BASE_DIR / "data")
 
+    # Response cache for heavy aggregate endpoints (aggregated_cache table)
+    CACHE_ENABLED: bool = True
+    CACHE_TTL: int = 300  # seconds an entry is served without revalidating
+    CACHE_MAX_STALE: int = 86400  # seconds a stale entry may still be served while it revalidates
+
+    # Serialized response bodies of the aggregation / analytics routers
+    RESPONSE_CACHE_MAX_BYTES: int = 64 * 1024 * 1024  # compressed bytes held in memory
+    RESPONSE_CACHE_DISK: bool = True
+    RESPONSE_CACHE_DIR: str = ""  # defaults to DATA_DIR/response_cache
+
+    # Memory-mapped claims snapshot shared by all worker processes
+    CLAIMS_SNAPSHOT_ENABLED: bool = True
+    CLAIMS_SNAPSHOT_DIR: str = ""  # defaults to DATA_DIR/claims_snapshot
+
     class Config:
         env_file = ".env"
         case_sensitive = True
@@ -12,6 +12,7 @@ from .schema import (
     get_session,
     get_database_url
 )
+from .data_version import get_data_version, bump_data_version
 
 __all__ = [
     'Base',
@@ -21,5 +22,7 @@ __all__ = [
     'init_database',
     'get_engine',
     'get_session',
-    'get_database_url'
+    'get_database_url',
+    'get_data_version',
+    'bump_data_version'
 ]
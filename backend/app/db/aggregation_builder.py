@@ -0,0 +1,769 @@
+"""
+Dashboard Summary Builder - all summaries from one scan of the claims table
+
+yearSeverity, countyYear, injuryGroup, adjusterPerformance, venueAnalysis
+(and the KPI summary) used to be built by separate GROUP BY queries, each a
+full scan of claims. This module builds all of them from a single scan:
+
+- PostgreSQL: one claims_rollup table filled with GROUP BY GROUPING SETS;
+  each mv_* view is a cheap filter over its rows. The rollup keeps only
+  additive measures (counts and sums), so app.db.rollup_maintenance can
+  apply claim changes to it without rescanning claims.
+- SQLite (no GROUPING SETS): the claims columns are read once and every
+  grouping is computed in NumPy from keys factorized up front. Next to each
+  view, sketch_<view> keeps a mergeable settlement quantile sketch per group
+  (app.db.quantile_sketch), so percentiles of any combination of groups can
+  be answered without going back to claims.
+
+Used by create_materialized_views_postgres.py, create_materialized_views_ultimate.py
+and app.db.rollup_maintenance.
+"""
+
+from typing import Dict, List, Optional, Tuple
+import logging
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+from app.db.quantile_sketch import SKETCH_COLUMN, QuantileSketch, grouped_sketches, sketch_table
+from app.db.shadow_tables import shadow_name
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_TABLE = 'claims_rollup'
+
+# Claims projected onto the rollup dimensions and measures
+ROLLUP_BASE_VIEW = 'claims_rollup_base'
+
+# Views derived from the rollup, in the order they are created / refreshed
+SUMMARY_VIEWS = [
+    'mv_year_severity',
+    'mv_county_year',
+    'mv_injury_group',
+    'mv_adjuster_performance',
+    'mv_venue_analysis',
+    'mv_kpi_summary'
+]
+
+
+# ============================================================================
+# PostgreSQL: GROUPING SETS rollup
+# ============================================================================
+
+# Dimension columns of the rollup, in GROUPING() argument order
+ROLLUP_DIMENSIONS = [
+    'year', 'month', 'severity_category', 'county', 'state',
+    'venue_rating', 'injury_group', 'body_region', 'adjuster_name'
+]
+INTEGER_DIMENSIONS = ('year', 'month')
+
+# One grouping set per summary view
+ROLLUP_GROUPING_SETS = {
+    'year_severity': ('year', 'severity_category'),
+    'county_year': ('county', 'state', 'year', 'venue_rating'),
+    'injury_group': ('injury_group', 'body_region', 'severity_category'),
+    'adjuster_performance': ('adjuster_name', 'year'),
+    'venue_analysis': ('state', 'county', 'venue_rating'),
+    'kpi_summary': ('year', 'month'),
+}
+
+# Grouping sets whose views report settlement percentiles
+PERCENTILE_SETS = ('venue_analysis', 'kpi_summary')
+
+# Measures of each claims row, as projected by claims_rollup_base
+ROLLUP_MEASURES = ['dollar_amount', 'predicted_amount', 'variance_pct', 'settlement_days', 'venue_points']
+
+# Additive rollup columns: (per-claim expression, column type); the table
+# value is the sum of the expression over the group's claims
+ADDITIVE_COLUMNS = {
+    'claim_count': ('1', 'BIGINT'),
+    'total_settlement': ('COALESCE(dollar_amount, 0)', 'DOUBLE PRECISION'),
+    'total_predicted': ('COALESCE(predicted_amount, 0)', 'DOUBLE PRECISION'),
+    'sum_variance_pct': ('variance_pct', 'DOUBLE PRECISION'),
+    'sum_settlement_days': ('COALESCE(settlement_days, 0)', 'DOUBLE PRECISION'),
+    'sum_venue_points': ('COALESCE(venue_points, 0)', 'DOUBLE PRECISION'),
+    'overprediction_count': ('CASE WHEN variance_pct < 0 THEN 1 ELSE 0 END', 'BIGINT'),
+    'underprediction_count': ('CASE WHEN variance_pct > 0 THEN 1 ELSE 0 END', 'BIGINT'),
+    'high_variance_count': ('CASE WHEN ABS(variance_pct) > 20 THEN 1 ELSE 0 END', 'BIGINT'),
+    'accurate_predictions': ('CASE WHEN ABS(variance_pct) <= 10 THEN 1 ELSE 0 END', 'BIGINT'),
+}
+
+PERCENTILE_COLUMNS = {
+    'p25_settlement': 0.25,
+    'median_settlement': 0.5,
+    'p75_settlement': 0.75,
+}
+
+
+def grouping_mask(grouping_set: Tuple[str, ...]) -> int:
+    """
+    Value of GROUPING(<all dimensions>) for rows of a grouping set
+    Bit is 1 for each dimension NOT in the set, leftmost argument most significant
+    """
+    mask = 0
+    for dimension in ROLLUP_DIMENSIONS:
+        mask = (mask << 1) | (0 if dimension in grouping_set else 1)
+    return mask
+
+
+def _date_part_sql(date_ref: str, part: str, default: int) -> str:
+    """Year/month of a text date column stored as MM/DD/YYYY or YYYY-MM-DD"""
+    return f"""CASE
+                WHEN {date_ref} ~ '^[0-9]{{1,2}}/[0-9]{{1,2}}/[0-9]{{4}}$' THEN
+                    EXTRACT({part} FROM TO_DATE({date_ref}, 'MM/DD/YYYY'))::INTEGER
+                WHEN {date_ref} ~ '^[0-9]{{4}}-[0-9]{{1,2}}-[0-9]{{1,2}}' THEN
+                    EXTRACT({part} FROM {date_ref}::DATE)::INTEGER
+                ELSE {default}
+            END"""
+
+
+def rollup_base_columns(cols: Dict[str, str], row: str = '') -> List[str]:
+    """
+    SELECT list projecting a claims row onto the rollup dimensions and measures
+    `cols` maps logical names to the actual claims column names (see
+    create_materialized_views_postgres.py): claimcloseddate, caution_level,
+    dollaramounthigh, causation, variance, settlement_days, countyname,
+    venuestate, venuerating, injury_group, body_region, adjuster, venue_point,
+    and optionally close_year / close_month (typed, preferred over parsing the text date).
+    `row` qualifies the columns, e.g. 'n.' inside a trigger over a transition table
+    """
+    def ref(column: str) -> str:
+        return f'{row}"{cols[column]}"'
+
+    def label(column: str) -> str:
+        return f"COALESCE(NULLIF({ref(column)}, ''), 'Unknown')"
+
+    def date_part(column: str, part: str, default: int) -> str:
+        parsed = _date_part_sql(ref('claimcloseddate'), part, default)
+        return f"COALESCE({ref(column)}, {parsed})" if column in cols else parsed
+
+    return [
+        f"{date_part('close_year', 'YEAR', 2023)} as year",
+        f"{date_part('close_month', 'MONTH', 1)} as month",
+        f"{label('caution_level')} as severity_category",
+        f"{label('countyname')} as county",
+        f"{label('venuestate')} as state",
+        f"{label('venuerating')} as venue_rating",
+        f"{label('injury_group')} as injury_group",
+        f"{label('body_region')} as body_region",
+        f"{label('adjuster')} as adjuster_name",
+        f"{ref('dollaramounthigh')} as dollar_amount",
+        f"{ref('causation')} as predicted_amount",
+        f"COALESCE({ref('variance')}, 0) as variance_pct",
+        f"{ref('settlement_days')} as settlement_days",
+        f"{ref('venue_point')} as venue_points",
+    ]
+
+
+def postgres_base_view_sql(cols: Dict[str, str]) -> str:
+    columns = ',\n            '.join(rollup_base_columns(cols))
+    return f"""
+        CREATE VIEW {ROLLUP_BASE_VIEW} AS
+        SELECT
+            {columns}
+        FROM claims
+    """
+
+
+def _dimension_sql(dimension: str) -> str:
+    """
+    A dimension as stored in the rollup
+    Dimensions outside a row's grouping set hold '' / 0 instead of NULL so the
+    primary key can identify every group
+    """
+    return f"COALESCE({dimension}, {0 if dimension in INTEGER_DIMENSIONS else repr('')}) as {dimension}"
+
+
+def postgres_rollup_table_sql() -> str:
+    dimensions = ',\n            '.join(
+        f"{d} {'INTEGER' if d in INTEGER_DIMENSIONS else 'TEXT'} NOT NULL" for d in ROLLUP_DIMENSIONS
+    )
+    additive = ',\n            '.join(
+        f"{column} {sql_type} NOT NULL" for column, (_, sql_type) in ADDITIVE_COLUMNS.items()
+    )
+    percentiles = ',\n            '.join(f"{c} DOUBLE PRECISION" for c in PERCENTILE_COLUMNS)
+    return f"""
+        CREATE TABLE {ROLLUP_TABLE} (
+            grouping_set TEXT NOT NULL,
+            {dimensions},
+            {additive},
+            {percentiles},
+            PRIMARY KEY (grouping_set, {', '.join(ROLLUP_DIMENSIONS)})
+        )
+    """
+
+
+def rollup_select_sql(
+    source: str,
+    weight: Optional[str] = None,
+    percentiles: bool = True,
+    grouping_sets: Optional[Tuple[str, ...]] = None
+) -> str:
+    """
+    One GROUPING SETS pass over `source` (claims_rollup_base or the change log)
+    Every additive measure is multiplied by `weight` when given (+1 / -1 per
+    change log row), so the same statement builds the rollup and its deltas.
+    Percentiles are only computed for PERCENTILE_SETS; `grouping_sets`
+    restricts the pass to some of ROLLUP_GROUPING_SETS
+    """
+    set_labels = "\n".join(
+        f"                WHEN {grouping_mask(keys)} THEN '{name}'"
+        for name, keys in ROLLUP_GROUPING_SETS.items()
+    )
+    grouping_sets = ",\n".join(
+        f"                ({', '.join(keys)})"
+        for name, keys in ROLLUP_GROUPING_SETS.items()
+        if grouping_sets is None or name in grouping_sets
+    )
+    dimensions = ',\n            '.join(_dimension_sql(d) for d in ROLLUP_DIMENSIONS)
+
+    measures = []
+    for column, (expression, _) in ADDITIVE_COLUMNS.items():
+        value = expression if weight is None else f"{weight} * {expression}"
+        measures.append(f"SUM({value}) as {column}")
+
+    if percentiles:
+        masks = ', '.join(str(grouping_mask(ROLLUP_GROUPING_SETS[name])) for name in PERCENTILE_SETS)
+        for column, fraction in PERCENTILE_COLUMNS.items():
+            measures.append(
+                f"CASE WHEN GROUPING({', '.join(ROLLUP_DIMENSIONS)}) IN ({masks}) THEN "
+                f"PERCENTILE_CONT({fraction}) WITHIN GROUP (ORDER BY dollar_amount) END as {column}"
+            )
+    measures = ',\n            '.join(measures)
+
+    return f"""
+        SELECT
+            CASE GROUPING({', '.join(ROLLUP_DIMENSIONS)})
+{set_labels}
+            END as grouping_set,
+            {dimensions},
+            {measures}
+        FROM {source}
+        GROUP BY GROUPING SETS (
+{grouping_sets}
+        )
+    """
+
+
+def populate_rollup_sql() -> str:
+    columns = ['grouping_set'] + ROLLUP_DIMENSIONS + list(ADDITIVE_COLUMNS) + list(PERCENTILE_COLUMNS)
+    return f"""
+        INSERT INTO {ROLLUP_TABLE} ({', '.join(columns)})
+        {rollup_select_sql(ROLLUP_BASE_VIEW)}
+    """
+
+
+def _share_sql(count_col: str) -> str:
+    return f"""CASE WHEN claim_count > 0 THEN
+                    CAST({count_col} AS FLOAT) / claim_count * 100
+                ELSE 0 END"""
+
+
+def _avg_sql(sum_col: str) -> str:
+    """Group average from a rollup sum (groups always have claim_count > 0)"""
+    return f"{sum_col} / claim_count"
+
+
+# Summary views as filters over the rollup (same columns as the original views)
+POSTGRES_SUMMARY_SQL = {
+    'mv_year_severity': f"""
+        CREATE MATERIALIZED VIEW mv_year_severity AS
+        SELECT
+            year,
+            severity_category,
+            claim_count,
+            total_settlement as total_actual_settlement,
+            total_predicted as total_predicted_settlement,
+            {_avg_sql('total_settlement')} as avg_actual_settlement,
+            {_avg_sql('total_predicted')} as avg_predicted_settlement,
+            {_avg_sql('sum_variance_pct')} as avg_variance_pct,
+            {_avg_sql('sum_settlement_days')} as avg_settlement_days,
+            overprediction_count,
+            underprediction_count,
+            high_variance_count
+        FROM {ROLLUP_TABLE}
+        WHERE grouping_set = 'year_severity'
+        ORDER BY year DESC, severity_category
+    """,
+    'mv_county_year': f"""
+        CREATE MATERIALIZED VIEW mv_county_year AS
+        SELECT
+            county,
+            state,
+            year,
+            venue_rating,
+            claim_count,
+            total_settlement,
+            {_avg_sql('total_settlement')} as avg_settlement,
+            {_avg_sql('sum_variance_pct')} as avg_variance_pct,
+            high_variance_count,
+            {_share_sql('high_variance_count')} as high_variance_pct,
+            overprediction_count,
+            underprediction_count
+        FROM {ROLLUP_TABLE}
+        WHERE grouping_set = 'county_year'
+        ORDER BY year DESC, claim_count DESC
+    """,
+    'mv_injury_group': f"""
+        CREATE MATERIALIZED VIEW mv_injury_group AS
+        SELECT
+            injury_group,
+            body_region,
+            severity_category,
+            claim_count,
+            {_avg_sql('total_settlement')} as avg_settlement,
+            {_avg_sql('total_predicted')} as avg_predicted,
+            {_avg_sql('sum_variance_pct')} as avg_variance_pct,
+            {_avg_sql('sum_settlement_days')} as avg_settlement_days,
+            total_settlement
+        FROM {ROLLUP_TABLE}
+        WHERE grouping_set = 'injury_group'
+        ORDER BY claim_count DESC
+    """,
+    'mv_adjuster_performance': f"""
+        CREATE MATERIALIZED VIEW mv_adjuster_performance AS
+        SELECT
+            adjuster_name,
+            year,
+            claim_count as total_claims,
+            {_avg_sql('total_settlement')} as avg_settlement,
+            {_avg_sql('sum_variance_pct')} as avg_variance_pct,
+            accurate_predictions,
+            high_variance_count,
+            {_share_sql('accurate_predictions')} as accuracy_rate,
+            {_avg_sql('sum_settlement_days')} as avg_settlement_days,
+            total_settlement as total_payout
+        FROM {ROLLUP_TABLE}
+        WHERE grouping_set = 'adjuster_performance'
+          AND claim_count >= 5
+        ORDER BY year DESC, total_claims DESC
+    """,
+    'mv_venue_analysis': f"""
+        CREATE MATERIALIZED VIEW mv_venue_analysis AS
+        SELECT
+            state,
+            county,
+            venue_rating,
+            {_avg_sql('sum_venue_points')} as avg_venue_points,
+            claim_count,
+            {_avg_sql('total_settlement')} as avg_settlement,
+            {_avg_sql('sum_variance_pct')} as avg_variance_pct,
+            {_avg_sql('sum_settlement_days')} as avg_settlement_days,
+            total_settlement,
+            median_settlement,
+            p25_settlement,
+            p75_settlement
+        FROM {ROLLUP_TABLE}
+        WHERE grouping_set = 'venue_analysis'
+          AND claim_count >= 3
+        ORDER BY claim_count DESC
+    """,
+    'mv_kpi_summary': f"""
+        CREATE MATERIALIZED VIEW mv_kpi_summary AS
+        SELECT
+            year,
+            month,
+            claim_count as total_claims,
+            total_settlement as total_payout,
+            {_avg_sql('total_settlement')} as avg_settlement,
+            {_avg_sql('sum_variance_pct')} as avg_variance_pct,
+            accurate_predictions,
+            {_share_sql('accurate_predictions')} as accuracy_rate,
+            {_avg_sql('sum_settlement_days')} as avg_settlement_days,
+            median_settlement
+        FROM {ROLLUP_TABLE}
+        WHERE grouping_set = 'kpi_summary'
+        ORDER BY year DESC, month DESC
+    """,
+}
+
+
+# Grouping set behind each summary view; its keys identify a view row, and the
+# unique index on them is what REFRESH MATERIALIZED VIEW CONCURRENTLY requires
+SUMMARY_VIEW_SETS = {
+    'mv_year_severity': 'year_severity',
+    'mv_county_year': 'county_year',
+    'mv_injury_group': 'injury_group',
+    'mv_adjuster_performance': 'adjuster_performance',
+    'mv_venue_analysis': 'venue_analysis',
+    'mv_kpi_summary': 'kpi_summary',
+}
+
+
+def summary_unique_index_sql(view: str) -> str:
+    keys = ROLLUP_GROUPING_SETS[SUMMARY_VIEW_SETS[view]]
+    return f"CREATE UNIQUE INDEX IF NOT EXISTS uq_{view} ON {view} ({', '.join(keys)})"
+
+
+def create_postgres_summary_views(conn, cols: Dict[str, str]) -> Dict[str, int]:
+    """
+    (Re)create the rollup table and every summary view on a PostgreSQL connection
+    Returns {table or view: row count}
+    """
+    # Summary views depend on the rollup - drop them first
+    for view in reversed(SUMMARY_VIEWS):
+        conn.execute(text(f"DROP MATERIALIZED VIEW IF EXISTS {view}"))
+    conn.execute(text(f"DROP TABLE IF EXISTS {ROLLUP_TABLE}"))
+    conn.execute(text(f"DROP VIEW IF EXISTS {ROLLUP_BASE_VIEW}"))
+    conn.commit()
+
+    row_counts = {}
+
+    logger.info(f"Creating {ROLLUP_TABLE} (single scan, {len(ROLLUP_GROUPING_SETS)} grouping sets)...")
+    conn.execute(text(postgres_base_view_sql(cols)))
+    conn.execute(text(postgres_rollup_table_sql()))
+    conn.execute(text(populate_rollup_sql()))
+    conn.commit()
+    row_counts[ROLLUP_TABLE] = conn.execute(text(f"SELECT COUNT(*) FROM {ROLLUP_TABLE}")).scalar()
+
+    for view in SUMMARY_VIEWS:
+        conn.execute(text(POSTGRES_SUMMARY_SQL[view]))
+        conn.execute(text(summary_unique_index_sql(view)))
+        conn.commit()
+        row_counts[view] = conn.execute(text(f"SELECT COUNT(*) FROM {view}")).scalar()
+
+    return row_counts
+
+
+# ============================================================================
+# SQLite / in-memory: single-pass NumPy grouping sets
+# ============================================================================
+
+# Summary views with a sketch_<view> table, and the group columns of its rows
+SKETCH_SUMMARIES = {
+    'mv_year_severity': ['year', 'severity_category'],
+    'mv_county_year': ['county', 'state', 'year', 'venue_rating'],
+    'mv_injury_group': ['injury_group', 'injury_type', 'body_part', 'body_region', 'severity_category'],
+    'mv_adjuster_performance': ['adjuster_name'],
+    'mv_venue_analysis': ['venue_rating', 'state', 'county'],
+    'mv_kpi_summary': ['year', 'month'],
+}
+
+def factorize_keys(frame: pd.DataFrame, columns: List[str]) -> Dict[str, tuple]:
+    """
+    Factorize each grouping column once: {column: (codes, uniques)}
+    NULL is kept as a value of its own, like SQL GROUP BY does
+    """
+    keys = {}
+    for column in columns:
+        codes, uniques = pd.factorize(frame[column], use_na_sentinel=False)
+        keys[column] = (codes.astype(np.int64), uniques)
+    return keys
+
+
+def _group_index(keys: Dict[str, tuple], by: List[str], rows: Optional[np.ndarray]):
+    """
+    Group id of every selected row plus the key values of each group
+    Returns (group_ids, {column: key value per group})
+    """
+    def take(values: np.ndarray) -> np.ndarray:
+        return values if rows is None else values[rows]
+
+    # Combine the per-column codes into one group id
+    combined = np.zeros(len(take(keys[by[0]][0])), dtype=np.int64)
+    for column in by:
+        codes, uniques = keys[column]
+        combined = combined * (len(uniques) + 1) + take(codes)
+    group_ids, group_keys = pd.factorize(combined)
+
+    out = {}
+    remaining = np.asarray(group_keys, dtype=np.int64)
+    for column in reversed(by):
+        codes, uniques = keys[column]
+        remaining, key_codes = np.divmod(remaining, len(uniques) + 1)
+        out[column] = uniques.take(key_codes)
+    return group_ids, {column: out[column] for column in by}
+
+
+def grouped_aggregate(
+    keys: Dict[str, tuple],
+    by: List[str],
+    measures: Dict[str, np.ndarray],
+    aggregations: Dict[str, Tuple[str, Optional[str]]],
+    mask: Optional[np.ndarray] = None
+) -> pd.DataFrame:
+    """
+    SQL-style GROUP BY over pre-factorized keys and precomputed measure arrays
+
+    aggregations maps output column -> (func, measure) with func one of
+    'count' (COUNT(*)), 'sum' / 'avg' (NULL-skipping, NULL for an all-NULL
+    group) or 'count_if' (sum of a boolean measure).
+    """
+    rows = np.flatnonzero(mask) if mask is not None else None
+
+    def take(values: np.ndarray) -> np.ndarray:
+        return values if rows is None else values[rows]
+
+    group_ids, out = _group_index(keys, by, rows)
+    n_groups = len(next(iter(out.values())))
+
+    counts = np.bincount(group_ids, minlength=n_groups)
+    for name, (func, measure) in aggregations.items():
+        if func == 'count':
+            out[name] = counts
+            continue
+
+        values = take(measures[measure])
+        if func == 'count_if':
+            out[name] = np.bincount(group_ids, weights=values.astype(np.float64), minlength=n_groups).astype(np.int64)
+            continue
+
+        present = ~np.isnan(values)
+        totals = np.bincount(group_ids, weights=np.where(present, values, 0.0), minlength=n_groups)
+        non_null = np.bincount(group_ids, weights=present, minlength=n_groups)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            result = totals if func == 'sum' else totals / non_null
+        out[name] = np.where(non_null > 0, result, np.nan)
+
+    return pd.DataFrame(out)
+
+
+def grouped_sketch_table(
+    keys: Dict[str, tuple],
+    by: List[str],
+    values: np.ndarray,
+    mask: Optional[np.ndarray] = None
+) -> pd.DataFrame:
+    """
+    One row per group of `by` with claim_count and the serialized quantile
+    sketch of `values` (see app.db.quantile_sketch)
+    Every group is kept - no HAVING threshold - so merging all rows covers
+    every claim the summary was built from
+    """
+    rows = np.flatnonzero(mask) if mask is not None else None
+    group_ids, out = _group_index(keys, by, rows)
+    n_groups = len(next(iter(out.values())))
+
+    out['claim_count'] = np.bincount(group_ids, minlength=n_groups)
+    out[SKETCH_COLUMN] = grouped_sketches(
+        group_ids, values if rows is None else values[rows], n_groups
+    )
+    return pd.DataFrame(out)
+
+
+def sketch_percentiles(sketches: pd.Series) -> pd.DataFrame:
+    """PERCENTILE_COLUMNS of each serialized sketch"""
+    fractions = list(PERCENTILE_COLUMNS.values())
+    values = [QuantileSketch.from_bytes(blob).quantiles(fractions) for blob in sketches]
+    return pd.DataFrame(values, columns=list(PERCENTILE_COLUMNS), index=sketches.index)
+
+
+def _severity_category(score: np.ndarray) -> np.ndarray:
+    """Low / Medium / High from CALCULATED_SEVERITY_SCORE (NaN stays NULL)"""
+    category = np.where(score <= 500, 'Low', np.where(score <= 1500, 'Medium', 'High')).astype(object)
+    category[np.isnan(score)] = None
+    return category
+
+
+SQLITE_SOURCE_COLUMNS = [
+    'close_year', 'close_month', 'CALCULATED_SEVERITY_SCORE', 'COUNTYNAME', 'VENUESTATE', 'VENUERATING',
+    'PRIMARY_INJURYGROUP_CODE_BY_SEVERITY', 'PRIMARY_INJURY_BY_SEVERITY',
+    'PRIMARY_BODYPART_BY_SEVERITY', 'BODY_REGION', 'ADJUSTERNAME',
+    'DOLLARAMOUNTHIGH', 'CAUSATION_HIGH_RECOMMENDATION', 'variance_pct',
+    'SETTLEMENT_DAYS', 'VENUERATINGPOINT'
+]
+SQLITE_NUMERIC_COLUMNS = [
+    'CALCULATED_SEVERITY_SCORE', 'DOLLARAMOUNTHIGH', 'CAUSATION_HIGH_RECOMMENDATION',
+    'variance_pct', 'SETTLEMENT_DAYS', 'VENUERATINGPOINT'
+]
+
+
+def _read_claims_once(conn, chunk_size: int = 200_000) -> pd.DataFrame:
+    """The single scan: every column any summary needs, read in chunks"""
+    columns = ', '.join(f'"{c}"' for c in SQLITE_SOURCE_COLUMNS)
+    chunks = pd.read_sql_query(text(f"SELECT {columns} FROM claims"), conn, chunksize=chunk_size)
+    frame = pd.concat(list(chunks), ignore_index=True)
+
+    # SQLite type affinity can hand back text in numeric columns
+    for column in SQLITE_NUMERIC_COLUMNS:
+        frame[column] = pd.to_numeric(frame[column], errors='coerce')
+    return frame
+
+
+def build_sqlite_summaries(conn) -> Dict[str, pd.DataFrame]:
+    """
+    Build mv_year_severity .. mv_venue_analysis and mv_kpi_summary from one scan
+    Same filters, HAVING thresholds, columns and NULL handling as the
+    per-view CREATE TABLE ... AS SELECT statements it replaces. Each view
+    also gets a sketch_<view> table of settlement sketches per group (see
+    SKETCH_SUMMARIES), and mv_venue_analysis / mv_kpi_summary report
+    settlement percentiles like their PostgreSQL counterparts
+    """
+    claims = _read_claims_once(conn)
+    logger.info(f"Read {len(claims):,} claims in one scan")
+
+    def floats(column: str) -> np.ndarray:
+        return claims[column].to_numpy(dtype=np.float64, na_value=np.nan)
+
+    severity_score = floats('CALCULATED_SEVERITY_SCORE')
+    variance = floats('variance_pct')
+
+    # Typed close year / month stored at ingest (see app.db.claim_dates)
+    claims['year'] = pd.to_numeric(claims['close_year'], errors='coerce').astype('Int64')
+    claims['month'] = pd.to_numeric(claims['close_month'], errors='coerce').astype('Int64')
+    claims['severity_category'] = _severity_category(severity_score)
+
+    keys = factorize_keys(claims, [
+        'year', 'month', 'severity_category', 'COUNTYNAME', 'VENUESTATE', 'VENUERATING',
+        'PRIMARY_INJURYGROUP_CODE_BY_SEVERITY', 'PRIMARY_INJURY_BY_SEVERITY',
+        'PRIMARY_BODYPART_BY_SEVERITY', 'BODY_REGION', 'ADJUSTERNAME'
+    ])
+    measures = {
+        'dollar': floats('DOLLARAMOUNTHIGH'),
+        'predicted': floats('CAUSATION_HIGH_RECOMMENDATION'),
+        'variance': variance,
+        'days': floats('SETTLEMENT_DAYS'),
+        'venue_points': floats('VENUERATINGPOINT'),
+        # Comparisons with NULL are false, as in SQL
+        'over': variance < 0,
+        'under': variance > 0,
+        'high': np.abs(variance) > 20,
+    }
+
+    has = {column: claims[column].notna().to_numpy() for column in [
+        'close_year', 'COUNTYNAME', 'VENUERATING', 'ADJUSTERNAME',
+        'PRIMARY_INJURYGROUP_CODE_BY_SEVERITY'
+    ]}
+    has_severity = ~np.isnan(severity_score)
+
+    def share(frame: pd.DataFrame, column: str) -> pd.Series:
+        return frame[column] / frame['claim_count'] * 100
+
+    summaries = {}
+
+    def add_sketches(view: str, by: List[str], mask: Optional[np.ndarray] = None,
+                     renames: Optional[Dict[str, str]] = None) -> pd.DataFrame:
+        """Settlement sketches per group of a view, stored as sketch_<view>"""
+        frame = grouped_sketch_table(keys, by, measures['dollar'], mask=mask).rename(columns=renames or {})
+        summaries[sketch_table(view)] = frame
+        return frame
+
+    # 1. Year-Severity
+    frame = grouped_aggregate(keys, ['year', 'severity_category'], measures, {
+        'claim_count': ('count', None),
+        'total_actual_settlement': ('sum', 'dollar'),
+        'total_predicted_settlement': ('sum', 'predicted'),
+        'avg_actual_settlement': ('avg', 'dollar'),
+        'avg_predicted_settlement': ('avg', 'predicted'),
+        'avg_variance_pct': ('avg', 'variance'),
+        'avg_settlement_days': ('avg', 'days'),
+        'overprediction_count': ('count_if', 'over'),
+        'underprediction_count': ('count_if', 'under'),
+        'high_variance_count': ('count_if', 'high'),
+    }, mask=has['close_year'] & has_severity)
+    add_sketches('mv_year_severity', ['year', 'severity_category'], mask=has['close_year'] & has_severity)
+    summaries['mv_year_severity'] = frame.sort_values(
+        ['year', 'severity_category'], ascending=[False, True], na_position='last'
+    )
+
+    # 2. County-Year
+    frame = grouped_aggregate(keys, ['COUNTYNAME', 'VENUESTATE', 'year', 'VENUERATING'], measures, {
+        'claim_count': ('count', None),
+        'total_settlement': ('sum', 'dollar'),
+        'avg_settlement': ('avg', 'dollar'),
+        'avg_variance_pct': ('avg', 'variance'),
+        'high_variance_count': ('count_if', 'high'),
+        'overprediction_count': ('count_if', 'over'),
+        'underprediction_count': ('count_if', 'under'),
+    }, mask=has['COUNTYNAME'] & has['close_year'])
+    frame.insert(9, 'high_variance_pct', share(frame, 'high_variance_count'))
+    renames = {'COUNTYNAME': 'county', 'VENUESTATE': 'state', 'VENUERATING': 'venue_rating'}
+    frame = frame.rename(columns=renames)
+    add_sketches('mv_county_year', ['COUNTYNAME', 'VENUESTATE', 'year', 'VENUERATING'],
+                 mask=has['COUNTYNAME'] & has['close_year'], renames=renames)
+    summaries['mv_county_year'] = frame[frame['claim_count'] >= 5].sort_values(
+        ['year', 'claim_count'], ascending=[False, False], na_position='last'
+    )
+
+    # 3. Injury Group
+    injury_keys = [
+        'PRIMARY_INJURYGROUP_CODE_BY_SEVERITY', 'PRIMARY_INJURY_BY_SEVERITY',
+        'PRIMARY_BODYPART_BY_SEVERITY', 'BODY_REGION', 'severity_category'
+    ]
+    frame = grouped_aggregate(keys, injury_keys, measures, {
+        'claim_count': ('count', None),
+        'avg_settlement': ('avg', 'dollar'),
+        'avg_predicted': ('avg', 'predicted'),
+        'avg_variance_pct': ('avg', 'variance'),
+        'avg_settlement_days': ('avg', 'days'),
+        'total_settlement': ('sum', 'dollar'),
+        'high_variance_count': ('count_if', 'high'),
+        'overprediction_count': ('count_if', 'over'),
+        'underprediction_count': ('count_if', 'under'),
+    }, mask=has['PRIMARY_INJURYGROUP_CODE_BY_SEVERITY'] & has_severity)
+    renames = {
+        'PRIMARY_INJURYGROUP_CODE_BY_SEVERITY': 'injury_group',
+        'PRIMARY_INJURY_BY_SEVERITY': 'injury_type',
+        'PRIMARY_BODYPART_BY_SEVERITY': 'body_part',
+        'BODY_REGION': 'body_region'
+    }
+    frame = frame.rename(columns=renames)
+    add_sketches('mv_injury_group', injury_keys,
+                 mask=has['PRIMARY_INJURYGROUP_CODE_BY_SEVERITY'] & has_severity, renames=renames)
+    summaries['mv_injury_group'] = frame[frame['claim_count'] >= 5].sort_values('claim_count', ascending=False)
+
+    # 4. Adjuster Performance
+    adjuster = claims['ADJUSTERNAME']
+    real_adjuster = has['ADJUSTERNAME'] & (adjuster != '').to_numpy() & (adjuster != 'System System').to_numpy()
+    frame = grouped_aggregate(keys, ['ADJUSTERNAME'], measures, {
+        'claim_count': ('count', None),
+        'avg_actual_settlement': ('avg', 'dollar'),
+        'avg_predicted_settlement': ('avg', 'predicted'),
+        'avg_variance_pct': ('avg', 'variance'),
+        'high_variance_count': ('count_if', 'high'),
+        'overprediction_count': ('count_if', 'over'),
+        'underprediction_count': ('count_if', 'under'),
+        'avg_settlement_days': ('avg', 'days'),
+    }, mask=real_adjuster)
+    frame.insert(6, 'high_variance_pct', share(frame, 'high_variance_count'))
+    frame = frame.rename(columns={'ADJUSTERNAME': 'adjuster_name'})
+    add_sketches('mv_adjuster_performance', ['ADJUSTERNAME'], mask=real_adjuster,
+                 renames={'ADJUSTERNAME': 'adjuster_name'})
+    summaries['mv_adjuster_performance'] = frame[frame['claim_count'] >= 10].sort_values('claim_count', ascending=False)
+
+    # 5. Venue Analysis
+    frame = grouped_aggregate(keys, ['VENUERATING', 'VENUESTATE', 'COUNTYNAME'], measures, {
+        'claim_count': ('count', None),
+        'avg_settlement': ('avg', 'dollar'),
+        'avg_predicted': ('avg', 'predicted'),
+        'avg_variance_pct': ('avg', 'variance'),
+        'avg_venue_rating_point': ('avg', 'venue_points'),
+        'high_variance_count': ('count_if', 'high'),
+    }, mask=has['VENUERATING'] & has['COUNTYNAME'])
+    frame['high_variance_pct'] = share(frame, 'high_variance_count')
+    renames = {'VENUERATING': 'venue_rating', 'VENUESTATE': 'state', 'COUNTYNAME': 'county'}
+    frame = frame.drop(columns=['high_variance_count']).rename(columns=renames)
+    # Same keys and mask, so sketch rows line up with the view rows
+    sketches = add_sketches('mv_venue_analysis', ['VENUERATING', 'VENUESTATE', 'COUNTYNAME'],
+                            mask=has['VENUERATING'] & has['COUNTYNAME'], renames=renames)
+    frame[list(PERCENTILE_COLUMNS)] = sketch_percentiles(sketches[SKETCH_COLUMN]).to_numpy()
+    summaries['mv_venue_analysis'] = frame[frame['claim_count'] >= 10].sort_values('claim_count', ascending=False)
+
+    # KPI Summary (whole table); sketches per close year / month roll up to any period
+    add_sketches('mv_kpi_summary', ['year', 'month'])
+    total = len(claims)
+    settled = measures['dollar'][~np.isnan(measures['dollar'])]
+    summaries['mv_kpi_summary'] = pd.DataFrame([{
+        'total_claims': total,
+        'avg_settlement': np.nanmean(measures['dollar']) if total else np.nan,
+        'avg_days': np.nanmean(measures['days']) if total else np.nan,
+        'high_variance_pct': measures['high'].sum() / total * 100 if total else np.nan,
+        'overprediction_rate': measures['over'].sum() / total * 100 if total else np.nan,
+        'underprediction_rate': measures['under'].sum() / total * 100 if total else np.nan,
+        'median_settlement': np.median(settled) if len(settled) else np.nan,
+    }])
+
+    return summaries
+
+
+def write_sqlite_summaries(conn, summaries: Dict[str, pd.DataFrame]) -> Dict[str, int]:
+    """
+    Write each summary into its shadow table; returns {table: row count}
+    The live tables are untouched until app.db.shadow_tables.swap_in_shadow_tables
+    """
+    row_counts = {}
+    for table, frame in summaries.items():
+        frame.to_sql(shadow_name(table), conn, if_exists='replace', index=False)
+        row_counts[table] = len(frame)
+    return row_counts
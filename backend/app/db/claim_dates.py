@@ -0,0 +1,171 @@
+"""
+Claim Dates - typed date columns derived from the text dates of claims
+
+CLAIMCLOSEDDATE and INCIDENTDATE are stored as text (YYYY-MM-DD[ HH:MM:SS...]
+or MM/DD/YYYY, depending on the source file), so every time filter used to be
+a LIKE 'YYYY%' / substr() / strftime() over strings or a pd.to_datetime over
+millions of rows. Each claim also carries:
+
+    closed_on     DATE      close date
+    incident_on   DATE      incident date
+    close_year    SMALLINT  indexed with close_month (idx_close_year_month)
+    close_month   SMALLINT
+    dates_derived BOOLEAN   set once the row has been through the derivation,
+                            even when its text dates could not be parsed
+
+filled at ingest - by the Claim before_insert / before_update hook in
+app.db.schema for ORM inserts, and by backfill_claim_dates() for rows written
+any other way (bulk inserts, DataFrame.to_sql, older databases). Rows are
+pending until dates_derived is set, so a backfill only ever touches new rows;
+one that changes any bumps the dataset version, since cached results read
+the columns it fills. ensure_claim_date_columns() adds the columns and their
+indexes to an existing claims table and backfills it.
+"""
+
+from datetime import date
+from typing import Any, Dict, Optional
+import logging
+import re
+
+import pandas as pd
+from sqlalchemy import bindparam, inspect, select, text
+
+from app.db.data_version import bump_data_version
+
+logger = logging.getLogger(__name__)
+
+DATE_COLUMNS = {'CLAIMCLOSEDDATE': 'closed_on', 'INCIDENTDATE': 'incident_on'}
+DERIVED_COLUMNS = ['closed_on', 'incident_on', 'close_year', 'close_month', 'dates_derived']
+
+_ISO_DATE = re.compile(r'^(\d{4})-(\d{1,2})-(\d{1,2})')
+_US_DATE = re.compile(r'^(\d{1,2})/(\d{1,2})/(\d{4})')
+
+
+def parse_claim_date(value: Any) -> Optional[date]:
+    """Date of a text claim date (YYYY-MM-DD... or MM/DD/YYYY...); None when unparseable"""
+    if value is None:
+        return None
+    if isinstance(value, date):
+        return value
+    value = str(value).strip()
+
+    match = _ISO_DATE.match(value)
+    if match:
+        year, month, day = match.groups()
+    else:
+        match = _US_DATE.match(value)
+        if not match:
+            return None
+        month, day, year = match.groups()
+
+    try:
+        return date(int(year), int(month), int(day))
+    except ValueError:
+        return None
+
+
+def claim_date_fields(closed: Any, incident: Any) -> Dict[str, Any]:
+    """Derived date columns of one claim"""
+    closed_on = parse_claim_date(closed)
+    return {
+        'closed_on': closed_on,
+        'incident_on': parse_claim_date(incident),
+        'close_year': closed_on.year if closed_on else None,
+        'close_month': closed_on.month if closed_on else None,
+        'dates_derived': True,
+    }
+
+
+def parse_date_series(values: pd.Series) -> pd.Series:
+    """parse_claim_date over a column, vectorized (NaT when unparseable)"""
+    strings = values.astype('string').str.strip()
+    iso = strings.str.extract(_ISO_DATE.pattern)
+    us = strings.str.extract(_US_DATE.pattern)
+    parts = pd.DataFrame({
+        'year': iso[0].fillna(us[2]),
+        'month': iso[1].fillna(us[0]),
+        'day': iso[2].fillna(us[1]),
+    }).apply(pd.to_numeric, errors='coerce').astype('float64')
+    return pd.to_datetime(parts, errors='coerce')
+
+
+def backfill_claim_dates(engine, chunk_size: int = 50_000) -> int:
+    """
+    Fill the derived date columns of claims rows not derived yet, walking the
+    table in id order; rows with unparseable dates are marked derived all the same.
+    Bumps the dataset version when any row changed. Returns the number of rows updated
+    """
+    from app.db.schema import Claim
+
+    claims = Claim.__table__
+    pending = claims.c.dates_derived.is_(None)
+    update = claims.update().where(claims.c.id == bindparam('row_id')).values(
+        closed_on=bindparam('closed_on'),
+        incident_on=bindparam('incident_on'),
+        close_year=bindparam('close_year'),
+        close_month=bindparam('close_month'),
+        dates_derived=True,
+    )
+
+    updated, last_id = 0, 0
+    while True:
+        with engine.connect() as conn:
+            chunk = pd.read_sql_query(
+                select(claims.c.id, claims.c.CLAIMCLOSEDDATE, claims.c.INCIDENTDATE)
+                .where(pending & (claims.c.id > last_id)).order_by(claims.c.id).limit(chunk_size),
+                conn
+            )
+        if chunk.empty:
+            break
+        last_id = int(chunk['id'].iloc[-1])
+
+        closed = parse_date_series(chunk['CLAIMCLOSEDDATE'])
+        incident = parse_date_series(chunk['INCIDENTDATE'])
+
+        rows = [
+            {
+                'row_id': int(row_id),
+                'closed_on': c.date() if pd.notna(c) else None,
+                'incident_on': i.date() if pd.notna(i) else None,
+                'close_year': c.year if pd.notna(c) else None,
+                'close_month': c.month if pd.notna(c) else None,
+            }
+            for row_id, c, i in zip(chunk['id'], closed, incident)
+        ]
+        with engine.begin() as conn:
+            conn.execute(update, rows)
+        updated += len(rows)
+        logger.info(f"Backfilled claim dates for {updated:,} rows...")
+
+    if updated:
+        # Aggregates, cached responses and snapshots computed before now read the columns as NULL
+        bump_data_version()
+    return updated
+
+
+def ensure_claim_date_columns(engine) -> int:
+    """
+    Add the derived date columns and their indexes to an existing claims
+    table when missing, then backfill rows without them
+    Returns the number of rows backfilled (0 when claims does not exist yet)
+    """
+    from app.db.schema import Claim
+
+    inspector = inspect(engine)
+    if not inspector.has_table(Claim.__tablename__):
+        return 0
+
+    existing = {column['name'] for column in inspector.get_columns(Claim.__tablename__)}
+    missing = [name for name in DERIVED_COLUMNS if name not in existing]
+    if missing:
+        with engine.begin() as conn:
+            for name in missing:
+                column_type = Claim.__table__.c[name].type.compile(dialect=engine.dialect)
+                conn.execute(text(f"ALTER TABLE {Claim.__tablename__} ADD COLUMN {name} {column_type}"))
+        logger.info(f"Added claim date columns: {', '.join(missing)}")
+
+    for index in Claim.__table__.indexes:
+        if any(column.name in DERIVED_COLUMNS for column in index.columns):
+            index.create(engine, checkfirst=True)
+
+    return backfill_claim_dates(engine)
@@ -0,0 +1,82 @@
+"""
+Dataset Version Stamp
+Monotonic counter that identifies the current state of the claims data.
+
+Migrations and cache refreshes bump it; in-process caches (claims store,
+response caches) compare against it to know when their copy is stale.
+Stored as a small file in DATA_DIR so every worker process and every
+standalone migration script sees the same value without a database round trip.
+Bumps are serialized across processes by a lock file next to it, so two
+concurrent bumps always produce two new versions.
+"""
+
+import os
+import threading
+from pathlib import Path
+import logging
+
+from app.core.config import settings
+from app.utils.file_lock import FileLock
+
+logger = logging.getLogger(__name__)
+
+VERSION_FILE = Path(settings.DATA_DIR) / ".data_version"
+VERSION_LOCK = Path(settings.DATA_DIR) / ".data_version.lock"
+
+_lock = threading.RLock()
+_cached_stat = None
+_cached_version = 0
+
+
+def get_data_version() -> int:
+    """
+    Get the current dataset version (0 if nothing has bumped it yet)
+    Only re-reads the file when its inode or mtime changed
+    """
+    global _cached_stat, _cached_version
+
+    try:
+        st = os.stat(VERSION_FILE)
+    except FileNotFoundError:
+        return 0
+
+    stat_key = (st.st_ino, st.st_mtime_ns, st.st_size)
+    if stat_key == _cached_stat:
+        return _cached_version
+
+    try:
+        version = int(VERSION_FILE.read_text().strip() or 0)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not read data version file: {str(e)}")
+        return _cached_version
+
+    with _lock:
+        _cached_stat = stat_key
+        _cached_version = version
+    return version
+
+
+def bump_data_version() -> int:
+    """
+    Increment the dataset version
+    Call after any change to the claims data (migration, refresh, manual load)
+    """
+    # Held across read-increment-write: a refresh in one worker and a script bumping at once must not both write N+1
+    with _lock, FileLock(VERSION_LOCK):
+        VERSION_FILE.parent.mkdir(parents=True, exist_ok=True)
+        # Read the file itself, not the stat-cached value: another process may have just replaced it
+        try:
+            version = int(VERSION_FILE.read_text().strip() or 0) + 1
+        except FileNotFoundError:
+            version = 1
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not read data version file: {str(e)}")
+            version = get_data_version() + 1
+
+        # Write-then-rename so readers never see a half-written file
+        tmp_path = VERSION_FILE.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_text(str(version))
+        os.replace(tmp_path, VERSION_FILE)
+
+    logger.info(f"Dataset version bumped to {version}")
+    return version
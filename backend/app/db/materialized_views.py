@@ -11,16 +11,34 @@ Usage:
     if not check_materialized_views_exist():
         print("Run create_materialized_views_postgres.py first")
 
-    # Refresh views after data updates
+    # Refresh views after data updates (applies only the changed claims when possible)
     refresh_all_materialized_views()
 """
 
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional
+
 from sqlalchemy import text
+from app.core.config import settings
 from app.db.schema import get_engine
+from app.db.data_version import bump_data_version
+from app.db.aggregation_builder import ROLLUP_TABLE, SUMMARY_VIEWS
+from app.db.rollup_maintenance import has_incremental_rollup, maintain_rollup
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Summary views refreshed at once, each on its own pooled connection
+REFRESH_WORKERS = 3
+
+# Per-view timings of the last refresh, shared by all worker processes
+REFRESH_STATS_FILE = Path(settings.DATA_DIR) / ".view_refresh_stats.json"
+
 
 def create_all_materialized_views():
     """
@@ -59,41 +77,129 @@ def create_all_materialized_views():
             return False
 
 
-def refresh_all_materialized_views():
+def _refresh_view(engine, view: str, report) -> Dict[str, Any]:
+    """
+    Refresh one view on its own pooled connection
+    CONCURRENTLY keeps the view readable during the refresh; views without a
+    unique index (created by older scripts) fall back to a plain refresh
+    """
+    start_time = time.perf_counter()
+    report(view, 'running')
+
+    with engine.connect() as conn:
+        try:
+            conn.execute(text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {view}"))
+            conn.commit()
+            concurrent = True
+        except Exception as e:
+            conn.rollback()
+            logger.warning(f"Concurrent refresh of {view} not possible, refreshing with a lock: {str(e)}")
+            conn.execute(text(f"REFRESH MATERIALIZED VIEW {view}"))
+            conn.commit()
+            concurrent = False
+
+    duration = round(time.perf_counter() - start_time, 2)
+    report(view, 'done')
+    logger.info(f"Refreshed {view} in {duration}s{'' if concurrent else ' (locked)'}")
+    return {'duration_seconds': duration, 'concurrent': concurrent}
+
+
+def _save_refresh_stats(stats: Dict[str, Any]) -> None:
+    """Write-then-rename, so every worker's /cache-status reads a complete file"""
+    try:
+        REFRESH_STATS_FILE.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = REFRESH_STATS_FILE.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(stats, default=str))
+        os.replace(tmp_path, REFRESH_STATS_FILE)
+    except OSError as e:
+        logger.warning(f"Could not save refresh stats: {str(e)}")
+
+
+def get_last_refresh_stats() -> Optional[Dict[str, Any]]:
+    """Timings of the last completed refresh, if any"""
+    try:
+        return json.loads(REFRESH_STATS_FILE.read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def refresh_all_materialized_views(full: bool = False, progress=None):
     """
     Refresh all PostgreSQL materialized views
     Call this after data updates
+
+    With a claims_rollup table, only the pending claim changes are applied to
+    it (full=True forces a rebuild) and the summary views are refreshed from
+    the rollup instead of from claims. The summary views do not depend on each
+    other, so they are refreshed in parallel, each CONCURRENTLY on its own
+    pooled connection.
+    progress(step, state, detail=None) is called with state 'pending' for every
+    planned step, then 'running' and 'done' / 'skipped' as steps complete
     """
     engine = get_engine()
+    start_time = time.perf_counter()
 
-    logger.info("Refreshing all PostgreSQL materialized views...")
+    def report(step, state, detail=None):
+        if progress is not None:
+            progress(step, state, detail)
 
-    views = [
-        'mv_year_severity',
-        'mv_county_year',
-        'mv_injury_group',
-        'mv_adjuster_performance',
-        'mv_venue_analysis',
-        'mv_kpi_summary'
-    ]
+    logger.info("Refreshing all PostgreSQL materialized views...")
 
     with engine.connect() as conn:
         try:
-            for view in views:
-                logger.info(f"Refreshing {view}...")
-                conn.execute(text(f"REFRESH MATERIALIZED VIEW {view}"))
-                conn.commit()
-
-            logger.info("✓ All materialized views refreshed successfully")
-            return True
-
+            incremental = has_incremental_rollup(conn)
+            conn.commit()
         except Exception as e:
             logger.error(f"Error refreshing materialized views: {str(e)}")
-            import traceback
-            traceback.print_exc()
-            conn.rollback()
             return False
 
+    try:
+        for step in ([ROLLUP_TABLE] if incremental else []) + SUMMARY_VIEWS:
+            report(step, 'pending')
+
+        stats = {'mode': 'full', 'views': {}}
+        if incremental:
+            report(ROLLUP_TABLE, 'running')
+            result = maintain_rollup(engine, full=full)
+            report(ROLLUP_TABLE, 'done', result)
+            stats['mode'] = result['mode']
+            stats['rollup'] = result
+
+            if result['mode'] == 'noop':
+                for view in SUMMARY_VIEWS:
+                    report(view, 'skipped')
+                logger.info("✓ No claim changes since the last refresh")
+                return True
+
+        with ThreadPoolExecutor(max_workers=min(REFRESH_WORKERS, len(SUMMARY_VIEWS))) as pool:
+            futures = {view: pool.submit(_refresh_view, engine, view, report) for view in SUMMARY_VIEWS}
+            errors = []
+            for view, future in futures.items():
+                try:
+                    stats['views'][view] = future.result()
+                except Exception as e:
+                    report(view, 'failed')
+                    errors.append(f"{view}: {str(e)}")
+
+        if errors:
+            raise RuntimeError("; ".join(errors))
+
+        stats['total_seconds'] = round(time.perf_counter() - start_time, 2)
+        stats['finished_at'] = datetime.now().isoformat()
+        _save_refresh_stats(stats)
+
+        logger.info(f"✓ All materialized views refreshed successfully in {stats['total_seconds']}s")
+
+        # Refresh follows a data change - invalidate in-process caches everywhere
+        bump_data_version()
+        return True
+
+    except Exception as e:
+        logger.error(f"Error refreshing materialized views: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return False
+
 
 def get_materialized_view_stats():
     """
@@ -114,6 +220,8 @@ def get_materialized_view_stats():
                 'mv_kpi_summary'
             ]
 
+            last_refresh = (get_last_refresh_stats() or {}).get('views', {})
+
             for view in views:
                 try:
                     result = conn.execute(text(f"SELECT COUNT(*) FROM {view}")).scalar()
@@ -122,11 +230,16 @@ def get_materialized_view_stats():
                         'exists': True
                     }
                 except Exception:
+                    conn.rollback()
                     stats[view] = {
                         'row_count': 0,
                         'exists': False
                     }
 
+                if view in last_refresh:
+                    stats[view]['last_refresh_seconds'] = last_refresh[view]['duration_seconds']
+                    stats[view]['last_refresh_concurrent'] = last_refresh[view]['concurrent']
+
             return stats
 
         except Exception as e:
@@ -0,0 +1,184 @@
+"""
+Quantile Sketch - mergeable settlement percentiles for summary tables
+
+Counts and sums roll up from summary rows by addition; medians and other
+percentiles do not, so every drill-down across groups used to go back to the
+raw claims. A QuantileSketch is a compact t-digest of one group's values:
+a bounded list of (mean, weight) centroids, small near the tails and larger
+around the median. Sketches of disjoint groups merge into a sketch of their
+union, so percentiles of any combination of groups come from the stored
+sketches alone.
+
+- Built fully vectorized: centroids are runs of sorted values that fall in
+  the same unit of the t-digest k1 scale function
+- Groups of up to compression / pi values (63 by default) are stored exactly (every
+  centroid a single value) and reproduce pandas' linear quantiles
+- Serialized as little-endian float64 bytes (to_bytes / from_bytes) for
+  BLOB / BYTEA columns
+
+The sketch tables next to venue_statistics and the SQLite mv_* tables are
+named sketch_<table> (see SKETCH_TABLE_PREFIX) and hold the group columns,
+claim_count and the serialized sketch.
+"""
+
+from typing import Iterable, List, Optional, Sequence
+
+import numpy as np
+
+# Companion table holding the sketches of a summary table
+SKETCH_TABLE_PREFIX = 'sketch_'
+
+# Column of a sketch table holding the serialized settlement sketch
+SKETCH_COLUMN = 'settlement_sketch'
+
+# t-digest compression: ~compression / 2 centroids per sketch at most
+DEFAULT_COMPRESSION = 200
+
+# Bumped whenever the byte layout changes
+SKETCH_FORMAT = 1
+
+
+def sketch_table(table: str) -> str:
+    """Name of the table holding the sketches of a summary table"""
+    return f"{SKETCH_TABLE_PREFIX}{table}"
+
+
+def _compress(means: np.ndarray, weights: np.ndarray, compression: float):
+    """
+    Merge sorted centroids that share one unit of the k1 scale
+    k(q) = compression / (2 pi) * asin(2q - 1)
+    """
+    if len(means) == 0:
+        return means, weights
+
+    total = weights.sum()
+    midpoints = (np.cumsum(weights) - weights / 2) / total
+    k = compression / (2 * np.pi) * np.arcsin(np.clip(2 * midpoints - 1, -1.0, 1.0))
+    buckets = np.floor(k + compression / 4).astype(np.int64)
+
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    merged_weights = np.add.reduceat(weights, starts)
+    merged_means = np.add.reduceat(means * weights, starts) / merged_weights
+    return merged_means, merged_weights
+
+
+class QuantileSketch:
+    """
+    t-digest of one group's values; merge() combines groups, quantiles() reads it
+    """
+
+    def __init__(
+        self,
+        means: Optional[np.ndarray] = None,
+        weights: Optional[np.ndarray] = None,
+        minimum: float = np.nan,
+        maximum: float = np.nan,
+        compression: float = DEFAULT_COMPRESSION
+    ):
+        self.means = np.asarray(means if means is not None else [], dtype=np.float64)
+        self.weights = np.asarray(weights if weights is not None else [], dtype=np.float64)
+        self.minimum = float(minimum)
+        self.maximum = float(maximum)
+        self.compression = float(compression)
+
+    @classmethod
+    def from_values(cls, values: Iterable[float], compression: float = DEFAULT_COMPRESSION,
+                    presorted: bool = False) -> 'QuantileSketch':
+        """Sketch of raw values (NaN skipped); pass presorted=True for ascending input"""
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if not presorted:
+            values = np.sort(values)
+        if len(values) == 0:
+            return cls(compression=compression)
+
+        means, weights = _compress(values, np.ones(len(values)), compression)
+        return cls(means, weights, values[0], values[-1], compression)
+
+    @classmethod
+    def merge_all(cls, sketches: Sequence['QuantileSketch'],
+                  compression: Optional[float] = None) -> 'QuantileSketch':
+        """One sketch of the union of the groups behind `sketches`"""
+        sketches = [s for s in sketches if s.count > 0]
+        if compression is None:
+            compression = max((s.compression for s in sketches), default=DEFAULT_COMPRESSION)
+        if not sketches:
+            return cls(compression=compression)
+
+        means = np.concatenate([s.means for s in sketches])
+        weights = np.concatenate([s.weights for s in sketches])
+        order = np.argsort(means, kind='stable')
+        means, weights = _compress(means[order], weights[order], compression)
+        return cls(
+            means, weights,
+            min(s.minimum for s in sketches), max(s.maximum for s in sketches),
+            compression
+        )
+
+    def merge(self, *others: 'QuantileSketch') -> 'QuantileSketch':
+        return QuantileSketch.merge_all([self, *others], self.compression)
+
+    @property
+    def count(self) -> int:
+        return int(round(self.weights.sum()))
+
+    def quantiles(self, fractions: Sequence[float]) -> List[float]:
+        """
+        Estimated quantiles, interpolated like pandas' 'linear' method: each
+        centroid sits at the average rank (0 .. count - 1) of its values
+        """
+        fractions = np.asarray(fractions, dtype=np.float64)
+        if len(self.means) == 0:
+            return [float('nan')] * len(fractions)
+
+        last_rank = self.weights.sum() - 1
+        ranks = np.cumsum(self.weights) - (self.weights + 1) / 2
+        xp, fp = ranks, self.means
+        if ranks[0] > 0:
+            xp, fp = np.r_[0.0, xp], np.r_[self.minimum, fp]
+        if ranks[-1] < last_rank:
+            xp, fp = np.r_[xp, last_rank], np.r_[fp, self.maximum]
+        return np.interp(np.clip(fractions, 0, 1) * last_rank, xp, fp).tolist()
+
+    def quantile(self, fraction: float) -> float:
+        return self.quantiles([fraction])[0]
+
+    def to_bytes(self) -> bytes:
+        header = [SKETCH_FORMAT, self.compression, self.minimum, self.maximum]
+        return np.concatenate([header, self.means, self.weights]).astype('<f8').tobytes()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'QuantileSketch':
+        values = np.frombuffer(data, dtype='<f8')
+        if len(values) < 4 or int(values[0]) != SKETCH_FORMAT:
+            raise ValueError("Unsupported quantile sketch format")
+        centroids = (len(values) - 4) // 2
+        return cls(
+            values[4:4 + centroids], values[4 + centroids:],
+            values[2], values[3], values[1]
+        )
+
+
+def grouped_sketches(group_ids: np.ndarray, values: np.ndarray, n_groups: int,
+                     compression: float = DEFAULT_COMPRESSION) -> List[bytes]:
+    """
+    Serialized sketch of `values` for every group id 0 .. n_groups - 1
+    One sort orders all groups at once; each group is then a slice
+    """
+    values = np.asarray(values, dtype=np.float64)
+    present = ~np.isnan(values)
+    group_ids, values = group_ids[present], values[present]
+
+    order = np.lexsort((values, group_ids))
+    group_ids, values = group_ids[order], values[order]
+    bounds = np.searchsorted(group_ids, np.arange(n_groups + 1))
+
+    return [
+        QuantileSketch.from_values(values[bounds[g]:bounds[g + 1]], compression, presorted=True).to_bytes()
+        for g in range(n_groups)
+    ]
+
+
+def merge_serialized(blobs: Iterable[Optional[bytes]]) -> QuantileSketch:
+    """Merge serialized sketches, skipping NULLs"""
+    return QuantileSketch.merge_all([QuantileSketch.from_bytes(bytes(b)) for b in blobs if b is not None])
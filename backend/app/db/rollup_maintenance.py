@@ -0,0 +1,290 @@
+"""
+Incremental Rollup Maintenance - apply claim changes to claims_rollup
+
+A full refresh recomputes every summary from the whole claims table even when
+only a few thousand claims changed. Instead, statement-level triggers copy each
+inserted, updated and deleted claims row into claims_change_log, already
+projected onto the rollup dimensions and measures (+1 for new rows, -1 for
+old rows; an update logs both). apply_claim_deltas() then:
+
+1. aggregates the pending log rows with the same GROUPING SETS statement
+   that builds the rollup, weighting every measure by the row's sign
+2. adds those deltas to the affected groups (INSERT ... ON CONFLICT DO UPDATE)
+   and drops groups left with no claims
+3. recomputes settlement percentiles (not additive) for the changed
+   venue / month groups only
+
+The mv_* views are then refreshed from the small rollup table, not from claims.
+
+A full rebuild is used instead when the log is large relative to the table,
+after a TRUNCATE of claims, or when the capture triggers are missing (the
+claims table was recreated).
+
+PostgreSQL only - SQLite summary tables are rebuilt by
+create_materialized_views_ultimate.py.
+"""
+
+from datetime import datetime
+from typing import Any, Dict, Optional
+import logging
+
+from sqlalchemy import text
+
+from app.db.aggregation_builder import (
+    ROLLUP_TABLE, ROLLUP_BASE_VIEW, ROLLUP_DIMENSIONS, INTEGER_DIMENSIONS,
+    ROLLUP_GROUPING_SETS, ROLLUP_MEASURES, ADDITIVE_COLUMNS, PERCENTILE_SETS,
+    PERCENTILE_COLUMNS, rollup_base_columns, rollup_select_sql, populate_rollup_sql
+)
+
+logger = logging.getLogger(__name__)
+
+CHANGE_LOG_TABLE = 'claims_change_log'
+CAPTURE_FUNCTION = 'claims_change_log_capture'
+
+# Trigger name -> (event, transition tables); transition tables need one event per trigger
+CAPTURE_TRIGGERS = {
+    'claims_change_log_insert': ('INSERT', 'REFERENCING NEW TABLE AS new_rows'),
+    'claims_change_log_update': ('UPDATE', 'REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows'),
+    'claims_change_log_delete': ('DELETE', 'REFERENCING OLD TABLE AS old_rows'),
+    'claims_change_log_truncate': ('TRUNCATE', ''),
+}
+
+# Rebuild from scratch once the pending changes exceed this share of all claims
+MAX_DELTA_FRACTION = 0.2
+
+# pg_advisory_lock key serializing rollup maintenance across workers
+MAINTENANCE_LOCK_KEY = 0x726f6c6c7570  # 'rollup'
+
+_LOG_COLUMNS = ROLLUP_DIMENSIONS + ROLLUP_MEASURES
+
+
+def change_log_table_sql() -> str:
+    dimensions = ',\n            '.join(
+        f"{d} {'INTEGER' if d in INTEGER_DIMENSIONS else 'TEXT'}" for d in ROLLUP_DIMENSIONS
+    )
+    measures = ',\n            '.join(f"{m} DOUBLE PRECISION" for m in ROLLUP_MEASURES)
+    return f"""
+        CREATE TABLE {CHANGE_LOG_TABLE} (
+            id BIGSERIAL PRIMARY KEY,
+            op CHAR(1) NOT NULL,
+            sign SMALLINT NOT NULL,
+            claim_id INTEGER,
+            logged_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+            {dimensions},
+            {measures}
+        )
+    """
+
+
+def capture_function_sql(cols: Dict[str, str]) -> str:
+    """
+    Trigger function logging the projected old (-1) and new (+1) rows of a statement
+    `cols` is the same claims column mapping create_postgres_summary_views uses
+    """
+    targets = ', '.join(['op', 'sign', 'claim_id'] + _LOG_COLUMNS)
+    old_rows = ',\n                    '.join(rollup_base_columns(cols, row='o.'))
+    new_rows = ',\n                    '.join(rollup_base_columns(cols, row='n.'))
+    return f"""
+        CREATE OR REPLACE FUNCTION {CAPTURE_FUNCTION}() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP = 'TRUNCATE' THEN
+                INSERT INTO {CHANGE_LOG_TABLE} (op, sign) VALUES ('T', 0);
+                RETURN NULL;
+            END IF;
+
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                INSERT INTO {CHANGE_LOG_TABLE} ({targets})
+                SELECT
+                    LEFT(TG_OP, 1), -1, o.id,
+                    {old_rows}
+                FROM old_rows o;
+            END IF;
+
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                INSERT INTO {CHANGE_LOG_TABLE} ({targets})
+                SELECT
+                    LEFT(TG_OP, 1), 1, n.id,
+                    {new_rows}
+                FROM new_rows n;
+            END IF;
+
+            RETURN NULL;
+        END
+        $$
+    """
+
+
+def _create_triggers(conn) -> None:
+    for name, (event, referencing) in CAPTURE_TRIGGERS.items():
+        conn.execute(text(f"DROP TRIGGER IF EXISTS {name} ON claims"))
+        conn.execute(text(f"""
+            CREATE TRIGGER {name}
+            AFTER {event} ON claims {referencing}
+            FOR EACH STATEMENT EXECUTE FUNCTION {CAPTURE_FUNCTION}()
+        """))
+
+
+def install_change_capture(conn, cols: Dict[str, str]) -> None:
+    """
+    (Re)create the change log and the capture triggers on claims
+    Call right after the rollup was built; any previously logged changes are discarded
+    """
+    conn.execute(text(f"DROP TABLE IF EXISTS {CHANGE_LOG_TABLE}"))
+    conn.execute(text(change_log_table_sql()))
+    conn.execute(text(capture_function_sql(cols)))
+    _create_triggers(conn)
+    conn.commit()
+    logger.info(f"Change capture installed on claims -> {CHANGE_LOG_TABLE}")
+
+
+def has_incremental_rollup(conn) -> bool:
+    """True when the database has the rollup table and change log (PostgreSQL only)"""
+    if conn.dialect.name != 'postgresql':
+        return False
+    return bool(conn.execute(
+        text("SELECT to_regclass(:rollup) IS NOT NULL AND to_regclass(:log) IS NOT NULL"),
+        {"rollup": ROLLUP_TABLE, "log": CHANGE_LOG_TABLE}
+    ).scalar())
+
+
+def _missing_triggers(conn) -> int:
+    installed = conn.execute(
+        text("""
+            SELECT COUNT(*) FROM pg_trigger
+            WHERE tgrelid = 'claims'::regclass AND tgname = ANY(:names)
+        """),
+        {"names": list(CAPTURE_TRIGGERS)}
+    ).scalar()
+    return len(CAPTURE_TRIGGERS) - installed
+
+
+def _join_on_dimensions(left: str, right: str) -> str:
+    return ' AND '.join(
+        f"{left}.{column} = {right}.{column}" for column in ['grouping_set'] + ROLLUP_DIMENSIONS
+    )
+
+
+def rebuild_rollup(conn) -> Dict[str, Any]:
+    """
+    Recompute the rollup from claims and clear the change log
+    Runs in one REPEATABLE READ transaction, so exactly the log rows already
+    reflected in the claims snapshot are removed
+    """
+    with conn.begin():
+        conn.execute(text(f"TRUNCATE {ROLLUP_TABLE}"))
+        conn.execute(text(populate_rollup_sql()))
+        cleared = conn.execute(text(f"DELETE FROM {CHANGE_LOG_TABLE}")).rowcount
+        groups = conn.execute(text(f"SELECT COUNT(*) FROM {ROLLUP_TABLE}")).scalar()
+
+    return {"mode": "full", "delta_rows": cleared, "affected_groups": groups}
+
+
+def apply_claim_deltas(conn) -> Optional[Dict[str, Any]]:
+    """
+    Fold the pending change log into the rollup
+    Returns None when a full rebuild is needed instead (TRUNCATE logged, or
+    too many changes for deltas to pay off)
+    """
+    with conn.begin():
+        pending, truncated = conn.execute(text(f"""
+            SELECT COUNT(*), COUNT(*) FILTER (WHERE op = 'T') FROM {CHANGE_LOG_TABLE}
+        """)).one()
+        if pending == 0:
+            return {"mode": "noop", "delta_rows": 0, "affected_groups": 0}
+
+        total_claims = conn.execute(text(f"""
+            SELECT COALESCE(SUM(claim_count), 0) FROM {ROLLUP_TABLE} WHERE grouping_set = 'kpi_summary'
+        """)).scalar()
+        if truncated or pending > MAX_DELTA_FRACTION * max(total_claims, 1):
+            logger.info(f"{pending:,} pending claim changes (truncate: {bool(truncated)}) - full rebuild")
+            return None
+
+        # 1. Signed per-group sums of the pending changes
+        conn.execute(text(f"""
+            CREATE TEMP TABLE _rollup_delta ON COMMIT DROP AS
+            {rollup_select_sql(CHANGE_LOG_TABLE, weight='sign', percentiles=False)}
+        """))
+        affected = conn.execute(text("SELECT COUNT(*) FROM _rollup_delta")).scalar()
+
+        # 2. Add them to the stored groups
+        keys = ['grouping_set'] + ROLLUP_DIMENSIONS
+        additive = list(ADDITIVE_COLUMNS)
+        updates = ',\n                '.join(
+            f"{column} = {ROLLUP_TABLE}.{column} + EXCLUDED.{column}" for column in additive
+        )
+        conn.execute(text(f"""
+            INSERT INTO {ROLLUP_TABLE} ({', '.join(keys + additive)})
+            SELECT {', '.join(keys + additive)} FROM _rollup_delta
+            ON CONFLICT ({', '.join(keys)}) DO UPDATE SET
+                {updates}
+        """))
+        conn.execute(text(f"DELETE FROM {ROLLUP_TABLE} WHERE claim_count <= 0"))
+
+        # 3. Percentiles of the changed groups, from their claims only
+        changed_claims = ' OR '.join(
+            f"({', '.join(ROLLUP_GROUPING_SETS[name])}) IN ("
+            f"SELECT {', '.join(ROLLUP_GROUPING_SETS[name])} FROM _rollup_delta "
+            f"WHERE grouping_set = '{name}')"
+            for name in PERCENTILE_SETS
+        )
+        source = f"(SELECT * FROM {ROLLUP_BASE_VIEW} WHERE {changed_claims}) changed"
+        assignments = ', '.join(f"{column} = p.{column}" for column in PERCENTILE_COLUMNS)
+        conn.execute(text(f"""
+            UPDATE {ROLLUP_TABLE} r
+            SET {assignments}
+            FROM ({rollup_select_sql(source, grouping_sets=PERCENTILE_SETS)}) p
+            JOIN _rollup_delta d USING ({', '.join(keys)})
+            WHERE {_join_on_dimensions('r', 'p')}
+        """))
+
+        conn.execute(text(f"DELETE FROM {CHANGE_LOG_TABLE}"))
+
+    return {"mode": "incremental", "delta_rows": pending, "affected_groups": affected}
+
+
+def maintain_rollup(engine, full: bool = False) -> Dict[str, Any]:
+    """
+    Bring claims_rollup up to date with claims
+    Applies pending deltas, falling back to a full rebuild when deltas are not
+    applicable or fail. Returns {mode, delta_rows, affected_groups, duration_seconds}
+    with mode one of 'noop', 'incremental', 'full'
+    """
+    start_time = datetime.now()
+
+    with engine.connect() as conn:
+        # One maintainer at a time; taken outside the snapshot transaction
+        conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": MAINTENANCE_LOCK_KEY})
+        conn.commit()
+
+        try:
+            if _missing_triggers(conn):
+                # claims was recreated: changes since then were never logged
+                logger.warning("Change capture triggers missing on claims - reinstalling and rebuilding")
+                _create_triggers(conn)
+                full = True
+            conn.commit()
+
+            # Snapshot isolation for the maintenance transaction (reset when the connection returns to the pool)
+            conn.execution_options(isolation_level="REPEATABLE READ")
+
+            result = None
+            if not full:
+                try:
+                    result = apply_claim_deltas(conn)
+                except Exception as e:
+                    logger.warning(f"Incremental rollup update failed, rebuilding: {str(e)}")
+
+            if result is None:
+                result = rebuild_rollup(conn)
+
+        finally:
+            conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": MAINTENANCE_LOCK_KEY})
+            conn.commit()
+
+    result["duration_seconds"] = round((datetime.now() - start_time).total_seconds(), 2)
+    logger.info(
+        f"Rollup maintenance ({result['mode']}): {result['delta_rows']:,} change rows, "
+        f"{result['affected_groups']:,} groups in {result['duration_seconds']}s"
+    )
+    return result
@@ -4,14 +4,16 @@ Optimized for 5M+ rows with proper indexing
 """
 
 from sqlalchemy import (
-    create_engine, Column, Integer, String, Float,
-    DateTime, Text, Index, Boolean
+    create_engine, Column, Integer, SmallInteger, String, Float,
+    Date, DateTime, Text, Index, Boolean, event
 )
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
 from pathlib import Path
 
+from app.db.claim_dates import claim_date_fields, ensure_claim_date_columns
+
 Base = declarative_base()
 
 class Claim(Base):
@@ -32,6 +34,13 @@ class Claim(Base):
     VERSIONID = Column(Integer, index=True)
     CLAIMCLOSEDDATE = Column(String(50), index=True)  # Store as string, parse when needed
     INCIDENTDATE = Column(String(50))
+
+    # Typed dates derived from the text ones at ingest - filter and group on these
+    closed_on = Column(Date, index=True)
+    incident_on = Column(Date)
+    close_year = Column(SmallInteger)
+    close_month = Column(SmallInteger)
+    dates_derived = Column(Boolean)  # set once derived, even if the text dates did not parse
     DURATIONTOREPORT = Column(Float)
 
     # Financial - ACTUAL DATA FORMAT
@@ -198,9 +207,28 @@ class Claim(Base):
 
         # NEW: Model performance analysis indexes
         Index('idx_model_performance', 'PRIMARY_INJURYGROUP_CODE_BY_SEVERITY', 'variance_pct', 'CALCULATED_SEVERITY_SCORE'),
+
+        # Keyset pagination: (sort field, id) for each sortable field of GET /claims
+        Index('idx_keyset_claimid', 'CLAIMID', 'id'),
+        Index('idx_keyset_closeddate', 'CLAIMCLOSEDDATE', 'id'),
+        Index('idx_keyset_dollaramount', 'DOLLARAMOUNTHIGH', 'id'),
+        Index('idx_keyset_variance', 'variance_pct', 'id'),
+
+        # Year / month filters and groupings; close-date range scans per county
+        Index('idx_close_year_month', 'close_year', 'close_month'),
+        Index('idx_closed_on_county', 'closed_on', 'COUNTYNAME'),
+        Index('idx_dates_derived', 'dates_derived'),
     )
 
 
+@event.listens_for(Claim, 'before_insert')
+@event.listens_for(Claim, 'before_update')
+def _derive_claim_dates(mapper, connection, claim):
+    """Fill closed_on / incident_on / close_year / close_month from the text dates"""
+    for name, value in claim_date_fields(claim.CLAIMCLOSEDDATE, claim.INCIDENTDATE).items():
+        setattr(claim, name, value)
+
+
 class SSNB(Base):
     """
     SSNB table - Single injury, Soft tissue, Neck/Back claims
@@ -345,6 +373,24 @@ class VenueStatistics(Base):
     )
 
 
+class VenueShiftSnapshot(Base):
+    """
+    Venue shift recommendations per analysis window
+    Common windows are precomputed at refresh time, others stored on first
+    request; a row whose data_version is not the current one, or whose window
+    no longer starts at today's window start, is stale
+    """
+    __tablename__ = 'venue_shift_snapshots'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    months = Column(Integer, unique=True, nullable=False, index=True)
+    data_version = Column(Integer, nullable=False)
+    window_start = Column(String(10))  # first close date (YYYY-MM-DD) the window covered
+    precomputed = Column(Boolean, default=False)
+    data_json = Column(Text)  # Stored as JSON
+    created_at = Column(DateTime)
+
+
 class AggregatedCache(Base):
     """
     Cache table for pre-computed aggregations
@@ -387,6 +433,13 @@ def init_database(db_url: str = None):
     # Create all tables
     Base.metadata.create_all(engine)
 
+    # Claims tables created before the typed date columns get them (and a backfill)
+    ensure_claim_date_columns(engine)
+
+    # create_all skips indexes on tables that already exist; add any new ones
+    for index in Claim.__table__.indexes:
+        index.create(engine, checkfirst=True)
+
     return engine
 
 
@@ -0,0 +1,112 @@
+"""
+Shadow Table Swap for SQLite summary tables
+
+SQLite has no materialized views, so the mv_* tables are rebuilt by scripts.
+Dropping them first leaves readers without a table (endpoints fail or fall into
+the slow path) for as long as the rebuild takes. Instead, each table is built
+under a shadow name and all of them are swapped in with renames inside one
+short write transaction: readers see either every old table or every new one.
+
+Usage:
+    from app.db.shadow_tables import shadow_name, build_shadow_table, swap_in_shadow_tables
+
+    build_shadow_table(conn, 'mv_year_severity', "SELECT ... FROM claims")
+    swap_in_shadow_tables(conn, ['mv_year_severity'])
+"""
+
+from typing import Dict, List, Optional
+import logging
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+SHADOW_SUFFIX = '__shadow'
+RETIRED_SUFFIX = '__retired'
+
+
+def shadow_name(table: str) -> str:
+    """Name a table is built under before it is swapped in"""
+    return f"{table}{SHADOW_SUFFIX}"
+
+
+def build_shadow_table(conn, table: str, select_sql: str) -> int:
+    """
+    CREATE TABLE <table>__shadow AS <select_sql>, replacing a leftover shadow
+    Returns the row count of the new shadow table
+    """
+    shadow = shadow_name(table)
+    conn.execute(text(f"DROP TABLE IF EXISTS {shadow}"))
+    conn.execute(text(f"CREATE TABLE {shadow} AS {select_sql}"))
+    return conn.execute(text(f"SELECT COUNT(*) FROM {shadow}")).scalar()
+
+
+def drop_shadow_tables(conn, tables: List[str]) -> None:
+    """Remove shadows left behind by a failed build"""
+    for table in tables:
+        conn.execute(text(f"DROP TABLE IF EXISTS {shadow_name(table)}"))
+    conn.commit()
+
+
+def swap_in_shadow_tables(conn, tables: List[str], extra_indexes: Optional[Dict[str, List[str]]] = None) -> None:
+    """
+    Replace every live table with its shadow in one transaction
+
+    For each table: live -> __retired, __shadow -> live, drop __retired, then
+    re-create the live table's indexes (read from sqlite_master before the swap)
+    and any `extra_indexes` statements for it (use IF NOT EXISTS). Index names
+    are database-wide, so they can only be re-created once the retired table
+    and its indexes are gone - inside the same transaction.
+    """
+    extra_indexes = extra_indexes or {}
+
+    # SQLAlchemy must not hold a transaction of its own on this connection
+    conn.commit()
+
+    existing = {
+        row[0] for row in conn.execute(text(
+            "SELECT name FROM sqlite_master WHERE type = 'table'"
+        )).fetchall()
+    }
+    missing = [table for table in tables if shadow_name(table) not in existing]
+    if missing:
+        raise ValueError(f"Shadow tables not built for: {', '.join(missing)}")
+
+    indexes = {}
+    for table in tables:
+        rows = conn.execute(
+            text("SELECT sql FROM sqlite_master WHERE type = 'index' AND tbl_name = :table AND sql IS NOT NULL"),
+            {"table": table}
+        ).fetchall()
+        indexes[table] = [row[0] for row in rows] + list(extra_indexes.get(table, []))
+    conn.commit()
+
+    # pysqlite only opens transactions implicitly before DML, so the renames
+    # would each commit on their own - drive the transaction explicitly
+    raw = conn.connection.driver_connection
+    previous_isolation = raw.isolation_level
+    raw.isolation_level = None
+    cursor = raw.cursor()
+    try:
+        # Keep views / triggers that name these tables pointing at the live name
+        cursor.execute("PRAGMA legacy_alter_table = ON")
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            for table in tables:
+                if table in existing:
+                    cursor.execute(f"ALTER TABLE {table} RENAME TO {table}{RETIRED_SUFFIX}")
+                cursor.execute(f"ALTER TABLE {shadow_name(table)} RENAME TO {table}")
+                if table in existing:
+                    cursor.execute(f"DROP TABLE {table}{RETIRED_SUFFIX}")
+                for index_sql in indexes[table]:
+                    cursor.execute(index_sql)
+            cursor.execute("COMMIT")
+        except Exception:
+            cursor.execute("ROLLBACK")
+            raise
+    finally:
+        cursor.execute("PRAGMA legacy_alter_table = OFF")
+        cursor.close()
+        raw.isolation_level = previous_isolation
+
+    logger.info(f"Swapped in {len(tables)} rebuilt tables: {', '.join(tables)}")
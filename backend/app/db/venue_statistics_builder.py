@@ -0,0 +1,226 @@
+"""
+Venue Statistics Builder - venue_statistics from one scan of the claims table
+
+venue_statistics holds settlement and prediction-error statistics per
+(VENUERATING, SEVERITY_CATEGORY, CAUSATION_CATEGORY, IOL). It used to be
+filled by one aggregate query plus, for every group, further queries that
+re-applied the category CASE expressions over the whole claims table just to
+find a median. Here the needed claims columns are streamed once in chunks,
+categorized in NumPy, and every statistic - means, medians, modes, standard
+deviations and confidence intervals - comes from one sorted pandas groupby.
+
+The same pass stores a settlement quantile sketch per group in
+sketch_venue_statistics (app.db.quantile_sketch), so percentiles of any set
+of venue / severity / causation / IOL groups can be rolled up later without
+reading claims.
+
+Used by populate_venue_statistics.py.
+"""
+
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+import logging
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+from app.db.quantile_sketch import SKETCH_COLUMN, grouped_sketches, sketch_table
+
+logger = logging.getLogger(__name__)
+
+VENUE_STATISTICS_TABLE = 'venue_statistics'
+VENUE_STATISTICS_SKETCH_TABLE = sketch_table(VENUE_STATISTICS_TABLE)
+GROUP_COLUMNS = ['VENUERATING', 'SEVERITY_CATEGORY', 'CAUSATION_CATEGORY', 'IOL']
+
+# Groups with fewer claims are left out of the table
+MIN_SAMPLE_SIZE = 10
+
+# Upper bounds of the Low / Medium categories (anything above is High)
+SEVERITY_THRESHOLDS = (500, 1500)
+CAUSATION_THRESHOLDS = (100, 300)
+
+# z for the 95% confidence interval of mean_actual
+CONFIDENCE_Z = 1.96
+
+SOURCE_QUERY = """
+SELECT
+    VENUERATING,
+    VENUERATINGTEXT,
+    RATINGWEIGHT,
+    CALCULATED_SEVERITY_SCORE,
+    CALCULATED_CAUSATION_SCORE,
+    IOL,
+    DOLLARAMOUNTHIGH,
+    CAUSATION_HIGH_RECOMMENDATION,
+    variance_pct
+FROM claims
+WHERE VENUERATING IS NOT NULL
+  AND CALCULATED_SEVERITY_SCORE IS NOT NULL
+  AND CALCULATED_CAUSATION_SCORE IS NOT NULL
+  AND IOL IS NOT NULL
+  AND DOLLARAMOUNTHIGH IS NOT NULL
+  AND CAUSATION_HIGH_RECOMMENDATION IS NOT NULL
+"""
+
+NUMERIC_SOURCE_COLUMNS = [
+    'RATINGWEIGHT', 'CALCULATED_SEVERITY_SCORE', 'CALCULATED_CAUSATION_SCORE',
+    'IOL', 'DOLLARAMOUNTHIGH', 'CAUSATION_HIGH_RECOMMENDATION', 'variance_pct'
+]
+
+
+def categorize(scores: np.ndarray, thresholds: Tuple[float, float]) -> np.ndarray:
+    """Low / Medium / High, as the CASE WHEN score <= low ... <= medium ... ELSE 'High' expressions"""
+    low, medium = thresholds
+    return np.select([scores <= low, scores <= medium], ['Low', 'Medium'], default='High')
+
+
+def _categorize_chunk(chunk: pd.DataFrame) -> pd.DataFrame:
+    """Reduce one chunk of claims to group keys and measures"""
+    # SQLite type affinity can hand back text in numeric columns
+    for column in NUMERIC_SOURCE_COLUMNS:
+        chunk[column] = pd.to_numeric(chunk[column], errors='coerce')
+    chunk = chunk.dropna(subset=[
+        'CALCULATED_SEVERITY_SCORE', 'CALCULATED_CAUSATION_SCORE', 'IOL',
+        'DOLLARAMOUNTHIGH', 'CAUSATION_HIGH_RECOMMENDATION'
+    ])
+
+    actual = chunk['DOLLARAMOUNTHIGH'].to_numpy(dtype=np.float64)
+    predicted = chunk['CAUSATION_HIGH_RECOMMENDATION'].to_numpy(dtype=np.float64)
+    return pd.DataFrame({
+        'VENUERATING': chunk['VENUERATING'].astype('category'),
+        'SEVERITY_CATEGORY': pd.Categorical(categorize(
+            chunk['CALCULATED_SEVERITY_SCORE'].to_numpy(dtype=np.float64), SEVERITY_THRESHOLDS
+        )),
+        'CAUSATION_CATEGORY': pd.Categorical(categorize(
+            chunk['CALCULATED_CAUSATION_SCORE'].to_numpy(dtype=np.float64), CAUSATION_THRESHOLDS
+        )),
+        'IOL': chunk['IOL'].to_numpy(dtype=np.int64),
+        'VENUERATINGTEXT': chunk['VENUERATINGTEXT'].to_numpy(dtype=object),
+        'RATINGWEIGHT': chunk['RATINGWEIGHT'].to_numpy(dtype=np.float64),
+        'actual': actual,
+        'predicted': predicted,
+        'abs_error': np.abs(actual - predicted),
+        'error_pct': chunk['variance_pct'].abs().to_numpy(dtype=np.float64),
+    })
+
+
+def read_categorized_claims(conn, chunk_size: int = 200_000) -> pd.DataFrame:
+    """The single scan: claims reduced to group keys and measures, chunk by chunk"""
+    parts = [
+        _categorize_chunk(chunk)
+        for chunk in pd.read_sql_query(text(SOURCE_QUERY), conn, chunksize=chunk_size)
+    ]
+    if not parts:
+        return _categorize_chunk(pd.DataFrame(columns=['VENUERATING', 'VENUERATINGTEXT'] + NUMERIC_SOURCE_COLUMNS))
+
+    # Chunks encode their categories independently; union them before concatenating
+    for column in ('VENUERATING', 'SEVERITY_CATEGORY', 'CAUSATION_CATEGORY'):
+        categories = pd.api.types.union_categoricals([part[column] for part in parts]).categories
+        for part in parts:
+            part[column] = part[column].cat.set_categories(categories)
+    return pd.concat(parts, ignore_index=True)
+
+
+def _mode(claims: pd.DataFrame, column: str) -> pd.Series:
+    """Most frequent value of a column per group (the smallest one on ties)"""
+    counts = claims.groupby(GROUP_COLUMNS + [column], observed=True, sort=False).size().rename('n').reset_index()
+    counts = counts.sort_values(['n', column], ascending=[False, True], kind='stable')
+    return counts.drop_duplicates(GROUP_COLUMNS).set_index(GROUP_COLUMNS)[column]
+
+
+def _sketches(grouped) -> pd.DataFrame:
+    """Settlement sketch of every group, small ones included"""
+    sizes = grouped.size()
+    frame = sizes.rename('claim_count').reset_index()
+    frame[SKETCH_COLUMN] = grouped_sketches(
+        grouped.ngroup().to_numpy(), grouped.obj['actual'].to_numpy(), len(sizes)
+    )
+    for column in ('VENUERATING', 'SEVERITY_CATEGORY', 'CAUSATION_CATEGORY'):
+        frame[column] = frame[column].astype(object)
+    return frame
+
+
+def build_venue_statistics(
+    conn, data_period: Optional[Tuple[str, str]] = None
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    (statistics, sketches) from one scan of claims
+    statistics: one row per venue / severity / causation / IOL group with at
+    least MIN_SAMPLE_SIZE claims, in venue_statistics column layout and key
+    order. Standard deviations are population (ddof=0) values, as before.
+    sketches: claim_count and settlement sketch of every group
+    """
+    claims = read_categorized_claims(conn)
+    logger.info(f"Read {len(claims):,} claims in one scan")
+
+    grouped = claims.groupby(GROUP_COLUMNS, observed=True, sort=True)
+    sketches = _sketches(grouped)
+    stats = grouped.agg(
+        VENUERATINGTEXT=('VENUERATINGTEXT', 'max'),
+        RATINGWEIGHT=('RATINGWEIGHT', 'mean'),
+        mean_actual=('actual', 'mean'),
+        median_actual=('actual', 'median'),
+        min_actual=('actual', 'min'),
+        max_actual=('actual', 'max'),
+        mean_predicted=('predicted', 'mean'),
+        median_predicted=('predicted', 'median'),
+        mean_absolute_error=('abs_error', 'mean'),
+        median_absolute_error=('abs_error', 'median'),
+        mean_error_pct=('error_pct', 'mean'),
+        sample_size=('actual', 'size'),
+    )
+    stats.insert(stats.columns.get_loc('min_actual'), 'stddev_actual', grouped['actual'].std(ddof=0))
+    stats.insert(stats.columns.get_loc('mean_absolute_error'), 'mode_predicted', _mode(claims, 'predicted'))
+    stats.insert(stats.columns.get_loc('mean_absolute_error'), 'stddev_predicted', grouped['predicted'].std(ddof=0))
+    stats = stats[stats['sample_size'] >= MIN_SAMPLE_SIZE]
+
+    mean_actual = stats['mean_actual']
+    stddev_actual = stats['stddev_actual']
+    standard_error = stddev_actual / np.sqrt(stats['sample_size'])
+    stats['coefficient_of_variation'] = (stddev_actual / mean_actual).where(mean_actual > 0, 0.0)
+    stats['confidence_interval_lower'] = mean_actual - CONFIDENCE_Z * standard_error
+    stats['confidence_interval_upper'] = mean_actual + CONFIDENCE_Z * standard_error
+
+    stats = stats.reset_index()
+    for column in ('VENUERATING', 'SEVERITY_CATEGORY', 'CAUSATION_CATEGORY'):
+        stats[column] = stats[column].astype(object)
+
+    start, end = data_period or (None, None)
+    stats['last_updated'] = datetime.now()
+    stats['data_period_start'] = start
+    stats['data_period_end'] = end
+    return stats, sketches
+
+
+def read_data_period(conn) -> Tuple[Optional[str], Optional[str]]:
+    """First and last CLAIMCLOSEDDATE of the claims table"""
+    row = conn.execute(text(
+        "SELECT MIN(CLAIMCLOSEDDATE), MAX(CLAIMCLOSEDDATE) FROM claims WHERE CLAIMCLOSEDDATE IS NOT NULL"
+    )).fetchone()
+    return (row[0], row[1]) if row else (None, None)
+
+
+def write_venue_statistics(conn, stats: pd.DataFrame, sketches: Optional[pd.DataFrame] = None) -> int:
+    """
+    Replace the contents of venue_statistics (and sketch_venue_statistics) in one transaction
+    Readers see the old rows until the commit, never an empty table
+    """
+    conn.execute(text(f"DELETE FROM {VENUE_STATISTICS_TABLE}"))
+    stats.to_sql(VENUE_STATISTICS_TABLE, conn, if_exists='append', index=False)
+    if sketches is not None:
+        sketches.to_sql(VENUE_STATISTICS_SKETCH_TABLE, conn, if_exists='replace', index=False)
+    conn.commit()
+    return len(stats)
+
+
+def summarize_by_venue(stats: pd.DataFrame) -> Dict[str, Dict[str, float]]:
+    """Groups, claims and error range per venue rating, for logging"""
+    summary = stats.groupby('VENUERATING', sort=True).agg(
+        combinations=('sample_size', 'size'),
+        total_claims=('sample_size', 'sum'),
+        avg_error=('mean_absolute_error', 'mean'),
+        min_sample=('sample_size', 'min'),
+        max_sample=('sample_size', 'max'),
+    )
+    return summary.to_dict('index')
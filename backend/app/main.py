@@ -1,9 +1,12 @@
 from fastapi import FastAPI
+from fastapi.datastructures import Default
 from fastapi.middleware.cors import CORSMiddleware
 import logging
 
 from app.core.config import settings
 from app.api import api_router
+from app.api.responses import FastJSONResponse
+from app.api.compression import CompressionMiddleware
 
 # Configure logging
 logging.basicConfig(
@@ -18,6 +21,9 @@ app = FastAPI(
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
     docs_url=f"{settings.API_V1_STR}/docs",
     redoc_url=f"{settings.API_V1_STR}/redoc",
+    # orjson-backed, NaN / inf written as null; Default() keeps pydantic's
+    # direct-to-JSON path for routes with a response_model
+    default_response_class=Default(FastJSONResponse),
 )
 
 # Configure CORS
@@ -27,8 +33,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Response-Cache"],
 )
 
+# brotli / gzip for JSON, CSV and NDJSON bodies over 1KB
+app.add_middleware(CompressionMiddleware, minimum_size=1024)
+
 # Include API router
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
@@ -56,6 +66,20 @@ async def startup_event():
     logger.info(f"API docs available at: {settings.API_V1_STR}/docs")
     logger.info(f"Data directory: {settings.DATA_DIR}")
 
+    # Claims tables from before the typed date columns get them before any query uses them
+    try:
+        from app.db.claim_dates import ensure_claim_date_columns
+        from app.services.data_service_sqlite import data_service_sqlite
+        import asyncio
+
+        backfilled = await asyncio.get_event_loop().run_in_executor(
+            None, ensure_claim_date_columns, data_service_sqlite.engine
+        )
+        if backfilled:
+            logger.info(f"✓ Backfilled typed claim dates for {backfilled:,} claims")
+    except Exception as e:
+        logger.warning(f"Could not check claim date columns: {e}")
+
     # Check and initialize materialized views for performance
     try:
         from app.db.materialized_views import check_materialized_views_exist, create_all_materialized_views
@@ -0,0 +1,257 @@
+"""
+Aggregate Response Cache
+Read-through cache for heavy dashboard responses, stored in the aggregated_cache table
+
+Entries are keyed by endpoint + normalized query params, and each one records
+the dataset version it was computed from. A request is answered from the table:
+- fresh (same data version, younger than CACHE_TTL): returned as-is
+- stale (older version or past CACHE_TTL, but within CACHE_MAX_STALE): returned
+  as-is while one background task per key recomputes it; an older-version
+  answer is flagged so the response cache does not keep it (mark_response_stale)
+- missing or too old: computed inline and stored
+
+Because entries live in the database, a restarted (or second) worker process
+starts warm. Computations that raise are never cached.
+"""
+
+import asyncio
+import hashlib
+import json
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Optional
+import logging
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+
+from app.core.config import settings
+from app.db.data_version import get_data_version
+from app.db.schema import AggregatedCache, get_session
+from app.services.claim_counts import count_signature
+from app.services.data_service_sqlite import data_service_sqlite as data_service
+from app.services.response_cache import mark_response_stale
+
+logger = logging.getLogger(__name__)
+
+
+def _json_default(value: Any) -> Any:
+    """Encode numpy / pandas scalars that json cannot handle natively"""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+
+def cache_key(endpoint: str, params: Optional[Dict[str, Any]] = None) -> str:
+    """Stable key for an endpoint and its query params (empty params are ignored)"""
+    signature = count_signature(params)
+    digest = hashlib.sha1(signature.encode('utf-8')).hexdigest()
+    return f"{endpoint}:{digest}"
+
+
+class AggregateCache:
+    """
+    Stale-while-revalidate cache of JSON responses over the aggregated_cache table
+    """
+
+    def __init__(self, engine, enabled: bool = True, ttl: int = 300, max_stale: int = 86400):
+        self.engine = engine
+        self.enabled = enabled
+        self.ttl = ttl
+        self.max_stale = max_stale
+
+        self._table_ready = False
+        self._revalidating: Dict[str, asyncio.Task] = {}
+        self.stats = {'fresh_hits': 0, 'stale_hits': 0, 'misses': 0, 'revalidations': 0, 'errors': 0}
+
+    async def get_or_compute(
+        self,
+        endpoint: str,
+        params: Optional[Dict[str, Any]],
+        compute: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """
+        Cached response for endpoint + params, computing it with `compute` when needed
+        """
+        if not self.enabled:
+            return await compute()
+
+        key = cache_key(endpoint, params)
+        version = get_data_version()
+        loop = asyncio.get_event_loop()
+
+        try:
+            entry = await loop.run_in_executor(None, self._load, key)
+        except Exception as e:
+            # A broken cache must never take the endpoint down with it
+            logger.error(f"Error reading aggregate cache for {endpoint}: {str(e)}")
+            self.stats['errors'] += 1
+            entry = None
+
+        if entry is not None:
+            age = (datetime.now() - entry['updated_at']).total_seconds()
+            current = entry['data_version'] == version
+
+            if current and age <= self.ttl:
+                self.stats['fresh_hits'] += 1
+                return entry['data']
+
+            if age <= self.max_stale:
+                self.stats['stale_hits'] += 1
+                self._revalidate(key, endpoint, params, compute)
+                if not current:
+                    mark_response_stale(f"{endpoint} computed at data version {entry['data_version']}")
+                return entry['data']
+
+        self.stats['misses'] += 1
+        return await self._compute_and_store(key, endpoint, params, version, compute)
+
+    async def _compute_and_store(
+        self,
+        key: str,
+        endpoint: str,
+        params: Optional[Dict[str, Any]],
+        version: int,
+        compute: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        data = await compute()
+
+        try:
+            loop = asyncio.get_event_loop()
+            await loop.run_in_executor(None, self._store, key, endpoint, params, version, data)
+        except Exception as e:
+            logger.error(f"Error writing aggregate cache for {endpoint}: {str(e)}")
+            self.stats['errors'] += 1
+
+        return data
+
+    def _revalidate(
+        self,
+        key: str,
+        endpoint: str,
+        params: Optional[Dict[str, Any]],
+        compute: Callable[[], Awaitable[Any]]
+    ) -> None:
+        """Recompute a stale entry in the background, at most once per key at a time"""
+        if key in self._revalidating:
+            return
+
+        async def run():
+            try:
+                # Version read before computing, so a refresh that lands mid-way leaves the entry stale
+                await self._compute_and_store(key, endpoint, params, get_data_version(), compute)
+                self.stats['revalidations'] += 1
+            except Exception as e:
+                logger.error(f"Error revalidating aggregate cache for {endpoint}: {str(e)}")
+                self.stats['errors'] += 1
+            finally:
+                self._revalidating.pop(key, None)
+
+        self._revalidating[key] = asyncio.ensure_future(run())
+
+    def _ensure_table(self) -> None:
+        if not self._table_ready:
+            AggregatedCache.__table__.create(self.engine, checkfirst=True)
+            self._table_ready = True
+
+    def _load(self, key: str) -> Optional[Dict[str, Any]]:
+        self._ensure_table()
+        session = get_session(self.engine)
+        try:
+            row = session.query(AggregatedCache).filter(AggregatedCache.cache_key == key).first()
+            if row is None or not row.data_json or row.updated_at is None:
+                return None
+
+            payload = json.loads(row.data_json)
+            return {
+                'data_version': payload.get('data_version'),
+                'updated_at': row.updated_at,
+                'data': payload.get('data'),
+            }
+        finally:
+            session.close()
+
+    def _store(self, key: str, endpoint: str, params: Optional[Dict[str, Any]], version: int, data: Any) -> None:
+        self._ensure_table()
+        data_json = json.dumps({
+            'data_version': version,
+            'params': json.loads(count_signature(params)),
+            'data': data,
+        }, default=_json_default)
+        now = datetime.now()
+
+        session = get_session(self.engine)
+        try:
+            for attempt in range(2):
+                row = session.query(AggregatedCache).filter(AggregatedCache.cache_key == key).first()
+                if row is None:
+                    row = AggregatedCache(cache_key=key, cache_type=endpoint, created_at=now)
+                    session.add(row)
+                row.data_json = data_json
+                row.updated_at = now
+                try:
+                    session.commit()
+                    return
+                except IntegrityError:
+                    # Another worker inserted the same key first - update its row instead
+                    session.rollback()
+                    if attempt:
+                        raise
+        finally:
+            session.close()
+
+    def clear(self, endpoint: Optional[str] = None) -> int:
+        """Delete cached entries (all, or one endpoint's); returns the number removed"""
+        self._ensure_table()
+        session = get_session(self.engine)
+        try:
+            query = session.query(AggregatedCache)
+            if endpoint:
+                query = query.filter(AggregatedCache.cache_type == endpoint)
+            removed = query.delete(synchronize_session=False)
+            session.commit()
+            return removed
+        finally:
+            session.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for this process plus the entries held in the table"""
+        entries = {}
+        try:
+            self._ensure_table()
+            session = get_session(self.engine)
+            try:
+                rows = session.query(
+                    AggregatedCache.cache_type, func.count(AggregatedCache.id), func.max(AggregatedCache.updated_at)
+                ).group_by(AggregatedCache.cache_type).all()
+                entries = {
+                    cache_type: {'entries': count, 'last_updated': updated.isoformat() if updated else None}
+                    for cache_type, count, updated in rows
+                }
+            finally:
+                session.close()
+        except Exception as e:
+            logger.error(f"Error reading aggregate cache stats: {str(e)}")
+
+        return {
+            'enabled': self.enabled,
+            'ttl_seconds': self.ttl,
+            'max_stale_seconds': self.max_stale,
+            'data_version': get_data_version(),
+            'revalidating': len(self._revalidating),
+            'endpoints': entries,
+            **self.stats,
+        }
+
+
+# Singleton instance
+aggregate_cache = AggregateCache(
+    data_service.engine,
+    enabled=settings.CACHE_ENABLED,
+    ttl=settings.CACHE_TTL,
+    max_stale=settings.CACHE_MAX_STALE
+)
@@ -0,0 +1,213 @@
+"""
+Aggregation Engine
+Real-time dashboard aggregations computed from a claims DataFrame
+
+Used by /aggregation/aggregated when the materialized views are missing
+(use_fast=false). Every conditional count (over-/under-prediction, high
+variance) is a sum of a precomputed boolean column inside the groupby, so
+each summary is one grouped pass over the rows instead of one full-frame
+filter per group.
+
+Output is identical to the original per-group loops, including their
+grouping quirks: county-year counts are taken per (county, year) and venue
+counts per (venue rating, county), then attached to the finer groups.
+"""
+
+from datetime import datetime
+from typing import Any, Dict, List
+import logging
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+HIGH_VARIANCE_THRESHOLD = 15
+
+# Columns /aggregated needs besides the numeric ones used for variance drivers
+AGGREGATION_COLUMNS = [
+    'close_year', 'CAUTION_LEVEL', 'COUNTYNAME', 'VENUESTATE', 'VENUERATING',
+    'PRIMARY_INJURYGROUP_CODE', 'ADJUSTERNAME'
+]
+
+
+def add_variance_flags(df: pd.DataFrame) -> pd.DataFrame:
+    """Boolean over/under/high-variance columns (NaN variance counts as none of them)"""
+    variance = df['variance_pct']
+    return df.assign(
+        _over=variance > 0,
+        _under=variance < 0,
+        _high=variance.abs() >= HIGH_VARIANCE_THRESHOLD
+    )
+
+
+def _share_pct(counts: pd.Series, totals: pd.Series) -> np.ndarray:
+    """
+    round(counts / totals * 100, 2), 0 where the total is 0
+    Python's round() per group (not np.round) keeps results identical to the
+    original loops; it runs once per group, not per row.
+    """
+    counts = counts.to_numpy(dtype=np.float64)
+    totals = totals.to_numpy(dtype=np.float64)
+    pct = np.divide(counts, totals, out=np.zeros_like(counts), where=totals > 0) * 100
+    return np.array([round(value, 2) for value in pct.tolist()], dtype=np.float64)
+
+
+def _counts_for(groups: pd.DataFrame, flag_counts: pd.DataFrame, names: List[str]) -> pd.DataFrame:
+    """Look up per-key flag counts for each row of a finer-grained summary"""
+    index = pd.MultiIndex.from_frame(groups[names])
+    matched = flag_counts.reindex(index)
+    return matched.fillna(0).astype(np.int64).reset_index(drop=True)
+
+
+def year_severity_summary(df: pd.DataFrame) -> pd.DataFrame:
+    summary = df.groupby(['year', 'CAUTION_LEVEL'], observed=True).agg(
+        claim_count=('CLAIMID', 'count'),
+        total_actual_settlement=('DOLLARAMOUNTHIGH', 'sum'),
+        avg_actual_settlement=('DOLLARAMOUNTHIGH', 'mean'),
+        total_predicted_settlement=('CAUSATION_HIGH_RECOMMENDATION', 'sum'),
+        avg_predicted_settlement=('CAUSATION_HIGH_RECOMMENDATION', 'mean'),
+        avg_variance_pct=('variance_pct', 'mean'),
+        overprediction_count=('_over', 'sum'),
+        underprediction_count=('_under', 'sum'),
+        high_variance_count=('_high', 'sum')
+    ).reset_index()
+    return summary.rename(columns={'CAUTION_LEVEL': 'severity_category'})
+
+
+def county_year_summary(df: pd.DataFrame) -> pd.DataFrame:
+    summary = df.groupby(['COUNTYNAME', 'VENUESTATE', 'year', 'VENUERATING'], observed=True).agg(
+        claim_count=('CLAIMID', 'count'),
+        total_settlement=('DOLLARAMOUNTHIGH', 'sum'),
+        avg_settlement=('DOLLARAMOUNTHIGH', 'mean'),
+        avg_variance_pct=('variance_pct', 'mean')
+    ).reset_index()
+    summary.columns = ['county', 'state', 'year', 'venue_rating', 'claim_count',
+                       'total_settlement', 'avg_settlement', 'avg_variance_pct']
+
+    # Counts cover every claim of the county in that year, across states and venue ratings
+    flag_counts = df.groupby(['COUNTYNAME', 'year'], observed=True)[['_high', '_over', '_under']].sum()
+    counts = _counts_for(summary, flag_counts, ['county', 'year'])
+
+    summary['high_variance_count'] = counts['_high']
+    summary['high_variance_pct'] = _share_pct(counts['_high'], summary['claim_count'])
+    summary['overprediction_count'] = counts['_over']
+    summary['underprediction_count'] = counts['_under']
+    return summary
+
+
+def injury_group_summary(df: pd.DataFrame) -> pd.DataFrame:
+    summary = df.groupby(['PRIMARY_INJURYGROUP_CODE', 'CAUTION_LEVEL'], observed=True).agg({
+        'CLAIMID': 'count',
+        'DOLLARAMOUNTHIGH': ['mean', 'sum'],
+        'CAUSATION_HIGH_RECOMMENDATION': 'mean',
+        'variance_pct': 'mean'
+    }).reset_index()
+    summary.columns = ['injury_group', 'severity_category', 'claim_count',
+                       'avg_settlement', 'total_settlement', 'avg_predicted',
+                       'avg_variance_pct']
+    summary['body_region'] = 'General'
+    return summary
+
+
+def adjuster_summary(df: pd.DataFrame) -> pd.DataFrame:
+    summary = df.groupby('ADJUSTERNAME', observed=True).agg(
+        claim_count=('CLAIMID', 'count'),
+        avg_actual_settlement=('DOLLARAMOUNTHIGH', 'mean'),
+        avg_predicted_settlement=('CAUSATION_HIGH_RECOMMENDATION', 'mean'),
+        avg_variance_pct=('variance_pct', 'mean'),
+        high_variance_count=('_high', 'sum'),
+        overprediction_count=('_over', 'sum'),
+        underprediction_count=('_under', 'sum')
+    ).reset_index()
+    summary = summary.rename(columns={'ADJUSTERNAME': 'adjuster_name'})
+    summary.insert(
+        summary.columns.get_loc('high_variance_count') + 1,
+        'high_variance_pct',
+        _share_pct(summary['high_variance_count'], summary['claim_count'])
+    )
+    return summary
+
+
+def venue_summary(df: pd.DataFrame) -> pd.DataFrame:
+    summary = df.groupby(['VENUERATING', 'VENUESTATE', 'COUNTYNAME'], observed=True).agg({
+        'CLAIMID': 'count',
+        'DOLLARAMOUNTHIGH': 'mean',
+        'CAUSATION_HIGH_RECOMMENDATION': 'mean',
+        'variance_pct': 'mean',
+        'RATINGWEIGHT': 'mean'
+    }).reset_index()
+    summary.columns = ['venue_rating', 'state', 'county', 'claim_count',
+                       'avg_settlement', 'avg_predicted', 'avg_variance_pct',
+                       'avg_venue_rating_point']
+
+    # Counts cover the venue rating within the county, across states
+    flag_counts = df.groupby(['VENUERATING', 'COUNTYNAME'], observed=True)[['_high']].sum()
+    counts = _counts_for(summary, flag_counts, ['venue_rating', 'county'])
+
+    summary['high_variance_count'] = counts['_high']
+    summary['high_variance_pct'] = _share_pct(counts['_high'], summary['claim_count'])
+    return summary
+
+
+def variance_drivers(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Numeric columns correlated with variance_pct, strongest first (top 30)"""
+    numeric_cols = df.select_dtypes(include=[np.number]).columns
+    avg_variance = float(df['variance_pct'].mean())
+    drivers = []
+
+    for col in numeric_cols:
+        if col != 'variance_pct' and df[col].notna().sum() > 0:
+            try:
+                corr = df[col].corr(df['variance_pct'])
+                if not pd.isna(corr) and abs(corr) > 0.05:
+                    drivers.append({
+                        'factor_name': col,
+                        'factor_value': 'Varies',
+                        'claim_count': len(df),
+                        'avg_variance_pct': avg_variance,
+                        'contribution_score': float(abs(corr) * 100),
+                        'correlation_strength': 'Strong' if abs(corr) > 0.5 else 'Moderate' if abs(corr) > 0.3 else 'Weak'
+                    })
+            except Exception:
+                pass
+
+    return sorted(drivers, key=lambda x: x['contribution_score'], reverse=True)[:30]
+
+
+def compute_aggregations(df: pd.DataFrame) -> Dict[str, Any]:
+    """
+    Build the full /aggregated payload from a claims DataFrame
+    Expects AGGREGATION_COLUMNS plus the numeric claim columns
+    """
+    df = df.copy(deep=False)
+
+    # Close year is stored typed (close_year); frames without it parse the text date
+    if 'close_year' in df.columns:
+        year = df['close_year']
+    else:
+        year = pd.to_datetime(df['CLAIMCLOSEDDATE'], errors='coerce').dt.year
+    df['year'] = year.fillna(2024).astype(int)
+
+    # Correlations only look at the claim columns, never at the helper flags
+    drivers = variance_drivers(df)
+
+    flagged = add_variance_flags(df)
+    one_year_ago = datetime.now().year - 1
+
+    result = {
+        "yearSeverity": year_severity_summary(flagged).to_dict('records'),
+        "countyYear": county_year_summary(flagged).to_dict('records'),
+        "injuryGroup": injury_group_summary(df).to_dict('records'),
+        "adjusterPerformance": adjuster_summary(flagged).to_dict('records'),
+        "venueAnalysis": venue_summary(flagged).to_dict('records'),
+        "varianceDrivers": drivers,
+        "metadata": {
+            "total_claims": len(df),
+            "recent_year_claims": int((df['year'] >= one_year_ago).sum()),
+            "generated_at": datetime.now().isoformat()
+        }
+    }
+
+    logger.info(f"Computed real-time aggregations for {len(df)} claims")
+    return result
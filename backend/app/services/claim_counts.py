@@ -0,0 +1,224 @@
+"""
+Claim Count Cache
+Cached exact and planner-estimated totals for filtered claim queries
+
+A paginated listing needs the size of the filtered set, but COUNT(*) over an
+unselective filter scans most of the table on every page turn. Exact counts
+are cached per (normalized filter signature, dataset version), and an
+"estimated" mode answers from planner statistics instead of counting:
+PostgreSQL pg_class.reltuples / EXPLAIN row estimates, SQLite sqlite_stat1.
+"""
+
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+
+from sqlalchemy import text
+
+from app.db.data_version import get_data_version
+
+logger = logging.getLogger(__name__)
+
+# Selectivity assumed for range / LIKE filters that statistics cannot answer
+# (the same default SQLite's planner uses for an unindexed inequality)
+DEFAULT_RANGE_SELECTIVITY = 0.25
+
+
+def count_signature(filters: Optional[Dict[str, Any]]) -> str:
+    """
+    Normalize filters into a stable cache key
+    Empty filters are dropped and list values sorted, so equivalent requests share an entry
+    """
+    normalized = {}
+    for key, value in (filters or {}).items():
+        if value is None or value == [] or value == '':
+            continue
+        if isinstance(value, (list, tuple, set)):
+            value = sorted(value, key=str)
+        normalized[key] = value
+    return json.dumps(normalized, sort_keys=True, default=str)
+
+
+class ClaimCountCache:
+    """
+    Bounded LRU of exact counts, invalidated by the dataset version
+
+    Filter conditions for the SQLite estimator are passed as
+    (column name, number of IN values or None for a range/LIKE condition).
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+
+        self._lock = threading.Lock()
+        self._counts: "OrderedDict[str, int]" = OrderedDict()
+        self._version: Optional[int] = None
+        self._sqlite_stats: Optional[Tuple[int, Dict[str, float]]] = None
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, signature: str) -> Optional[int]:
+        """Cached exact count for a filter signature, if still current"""
+        with self._lock:
+            self._check_version()
+            total = self._counts.get(signature)
+            if total is not None:
+                self._counts.move_to_end(signature)
+            return total
+
+    def put(self, signature: str, total: int) -> None:
+        with self._lock:
+            self._check_version()
+            self._counts[signature] = total
+            self._counts.move_to_end(signature)
+            while len(self._counts) > self.max_entries:
+                self._counts.popitem(last=False)
+
+    def count(self, query, signature: str) -> int:
+        """Exact count of a filtered ORM query, served from the cache when possible"""
+        total = self.get(signature)
+        if total is not None:
+            self.hits += 1
+            return total
+
+        self.misses += 1
+        total = query.count()
+        self.put(signature, total)
+        return total
+
+    def estimate(
+        self,
+        engine,
+        query,
+        signature: str,
+        conditions: List[Tuple[str, Optional[int]]]
+    ) -> Tuple[int, bool]:
+        """
+        Approximate count of a filtered ORM query
+        Returns (total, is_estimate); a cached exact count is preferred, and
+        the exact count is used when the database has no statistics yet
+        """
+        total = self.get(signature)
+        if total is not None:
+            self.hits += 1
+            return total, False
+
+        try:
+            if engine.dialect.name == 'postgresql':
+                estimate = self._estimate_postgres(engine, query, conditions)
+            elif engine.dialect.name == 'sqlite':
+                estimate = self._estimate_sqlite(engine, conditions)
+            else:
+                estimate = None
+        except Exception as e:
+            logger.warning(f"Row estimate failed, counting instead: {str(e)}")
+            estimate = None
+
+        if estimate is None:
+            return self.count(query, signature), False
+        return estimate, True
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._counts),
+                "hits": self.hits,
+                "misses": self.misses,
+                "data_version": self._version
+            }
+
+    def _check_version(self) -> None:
+        version = get_data_version()
+        if self._version != version:
+            self._clear()
+            self._version = version
+
+    def _clear(self) -> None:
+        self._counts = OrderedDict()
+        self._sqlite_stats = None
+        self._version = None
+
+    def _estimate_postgres(self, engine, query, conditions) -> Optional[int]:
+        """reltuples for the whole table, the planner's row estimate otherwise"""
+        with engine.connect() as conn:
+            if not conditions:
+                reltuples = conn.execute(
+                    text("SELECT reltuples::bigint FROM pg_class WHERE relname = 'claims'")
+                ).scalar()
+                # -1 / 0 means the table was never analyzed
+                return int(reltuples) if reltuples and reltuples > 0 else None
+
+            compiled = query.statement.compile(
+                dialect=engine.dialect,
+                compile_kwargs={"render_postcompile": True}  # expand IN lists into plain params
+            )
+            plan = conn.exec_driver_sql(
+                f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params
+            ).scalar()
+
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+    def _estimate_sqlite(self, engine, conditions) -> Optional[int]:
+        """
+        Table size times per-condition selectivity (independence assumed)
+        IN filters use sqlite_stat1's average rows per value of an index
+        whose leading column is the filtered column.
+        """
+        with self._lock:
+            self._check_version()
+            stats = self._sqlite_stats
+
+        if stats is None:
+            stats = self._read_sqlite_stats(engine)
+            if stats is None:
+                return None
+            with self._lock:
+                self._sqlite_stats = stats
+
+        total_rows, rows_per_value = stats
+        estimate = float(total_rows)
+        for column, value_count in conditions:
+            if value_count is None or column not in rows_per_value:
+                selectivity = DEFAULT_RANGE_SELECTIVITY
+            else:
+                selectivity = min(1.0, value_count * rows_per_value[column] / max(total_rows, 1))
+            estimate *= selectivity
+        return int(round(estimate))
+
+    def _read_sqlite_stats(self, engine) -> Optional[Tuple[int, Dict[str, float]]]:
+        """(row count, {leading index column: avg rows per value}) from sqlite_stat1"""
+        with engine.connect() as conn:
+            has_stats = conn.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'")
+            ).scalar()
+            if not has_stats:
+                return None
+
+            rows = conn.execute(
+                text("SELECT idx, stat FROM sqlite_stat1 WHERE tbl = 'claims'")
+            ).fetchall()
+            if not rows:
+                return None
+
+            total_rows = 0
+            rows_per_value: Dict[str, float] = {}
+            for index_name, stat in rows:
+                parts = stat.split()
+                total_rows = max(total_rows, int(parts[0]))
+                if not index_name or len(parts) < 2:
+                    continue
+                leading = conn.execute(
+                    text(f'SELECT name FROM pragma_index_info("{index_name}") WHERE seqno = 0')
+                ).scalar()
+                if leading:
+                    rows_per_value[leading] = float(parts[1])
+
+        return total_rows, rows_per_value
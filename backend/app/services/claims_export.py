@@ -0,0 +1,353 @@
+"""
+Streaming Export Service
+Streams query results as NDJSON, CSV, Arrow IPC or Parquet with bounded memory
+
+Rows are pulled from a server-side cursor (yield_per) one batch at a time,
+cleaned with vectorized pandas operations, encoded and handed to the client
+before the next batch is fetched, so memory stays proportional to the batch
+size rather than the table size. Arrow batches and Parquet row groups map
+one-to-one onto cursor batches.
+"""
+
+import io
+from datetime import date
+from itertools import chain
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import logging
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import (
+    select, inspect, or_, MetaData, Table,
+    Integer, Float, Numeric, String, Text, DateTime, Date, Boolean
+)
+from sqlalchemy.types import NullType
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = ('ndjson', 'csv', 'arrow', 'parquet')
+
+# Formats that need pyarrow
+ARROW_FORMATS = ('arrow', 'parquet')
+
+EXPORT_MEDIA_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+    'arrow': 'application/vnd.apache.arrow.stream',
+    'parquet': 'application/vnd.apache.parquet'
+}
+
+EXPORT_EXTENSIONS = {
+    'ndjson': 'ndjson',
+    'csv': 'csv',
+    'arrow': 'arrows',
+    'parquet': 'parquet'
+}
+
+PARQUET_COMPRESSION = 'zstd'
+
+# Tables exported by name besides the mv_* summary tables
+EXPORT_TABLES = ('claims', 'ssnb', 'venue_statistics')
+
+# Claims listing filters -> candidate columns, first one present in the table wins
+# (claims / ssnb use the source column names, the mv_* tables the rollup names)
+EXPORT_FILTER_COLUMNS = {
+    'injury_group': ('PRIMARY_INJURYGROUP_CODE', 'injury_group'),
+    'adjuster': ('ADJUSTERNAME', 'adjuster_name'),
+    'state': ('VENUESTATE', 'state'),
+    'year': ('close_year', 'CLAIMCLOSEDDATE', 'year'),
+}
+
+
+def arrow_available() -> bool:
+    """Arrow and Parquet export need pyarrow; everything else works without it"""
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def build_select(table, columns: Optional[List[str]] = None, conditions: Optional[list] = None):
+    """SELECT the requested columns of a table (all columns when None), ordered by id"""
+    unknown = [name for name in columns or [] if name not in table.c]
+    if unknown:
+        raise ValueError(f"Unknown column(s) for {table.name}: {', '.join(unknown)}")
+
+    selected = [table.c[name] for name in columns] if columns else list(table.c)
+    query = select(*selected)
+    if conditions:
+        query = query.where(*conditions)
+    if 'id' in table.c:
+        query = query.order_by(table.c.id)
+    return query
+
+
+def export_table_names(engine) -> List[str]:
+    """Exportable tables present in the database: claims, ssnb, venue_statistics and every mv_*"""
+    inspector = inspect(engine)
+    names = set(inspector.get_table_names()) | set(inspector.get_view_names())
+    if hasattr(inspector, 'get_materialized_view_names'):
+        try:
+            names |= set(inspector.get_materialized_view_names())
+        except NotImplementedError:
+            pass  # dialect without materialized views (SQLite)
+
+    summary = sorted(name for name in names if name.startswith('mv_'))
+    return [name for name in EXPORT_TABLES if name in names] + summary
+
+
+def get_export_table(engine, name: str) -> Optional[Table]:
+    """
+    Table object for an exportable table, None when it is not exportable
+    The mv_* tables are reflected on every call since refreshes may rebuild them
+    """
+    if name not in export_table_names(engine):
+        return None
+
+    from app.db.schema import Base
+    if name in Base.metadata.tables:
+        return Base.metadata.tables[name]
+    return Table(name, MetaData(), autoload_with=engine)
+
+
+def filter_conditions(table, filters: Optional[Dict[str, Any]]) -> list:
+    """
+    WHERE clauses for claims-listing style filters (injury_group, adjuster, state, year)
+    Raises ValueError for a filter the table has no column for
+    """
+    conditions = []
+    for key, values in (filters or {}).items():
+        if not values:
+            continue
+        column_name = next((name for name in EXPORT_FILTER_COLUMNS.get(key, ()) if name in table.c), None)
+        if column_name is None:
+            raise ValueError(f"Filter '{key}' is not available for {table.name}")
+
+        column = table.c[column_name]
+        if key == 'year' and column_name == 'CLAIMCLOSEDDATE':
+            # Tables without close_year (ssnb): text dates stored as YYYY-MM-DD or MM/DD/YYYY
+            conditions.append(or_(*[
+                pattern
+                for year in values
+                for pattern in (column.like(f"{year}-%"), column.like(f"%/{year}"))
+            ]))
+        else:
+            conditions.append(column.in_(values))
+    return conditions
+
+
+def iter_batches(engine, query, batch_size: int = 10000) -> Iterator[pd.DataFrame]:
+    """
+    Walk a server-side cursor and yield one cleaned DataFrame per batch
+    The connection is held only while the generator is being consumed
+    """
+    integer_columns = [c.name for c in query.selected_columns if isinstance(c.type, Integer)]
+
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=batch_size).execute(query)
+        columns = list(result.keys())
+
+        for rows in result.partitions():
+            yield clean_batch(pd.DataFrame.from_records(rows, columns=columns), integer_columns)
+
+
+def clean_batch(df: pd.DataFrame, integer_columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Vectorized cleanup of one batch
+    inf/-inf become NaN (serialized as null / empty) and integer columns that
+    picked up NULLs stay integral instead of being widened to float
+    """
+    numeric = df.select_dtypes(include=[np.number]).columns
+    if len(numeric):
+        df[numeric] = df[numeric].replace([np.inf, -np.inf], np.nan)
+
+    for name in integer_columns or []:
+        if df[name].dtype.kind == 'f':
+            try:
+                df[name] = df[name].astype('Int64')
+            except (TypeError, ValueError):
+                pass  # non-integral values stored in an integer column; leave as float
+    return df
+
+
+def _iso_dates(df: pd.DataFrame) -> pd.DataFrame:
+    """DATE columns (datetime.date values) as YYYY-MM-DD text, as the CSV export writes them"""
+    for name in df.columns[df.dtypes == object]:
+        first = df[name].first_valid_index()
+        if first is not None and type(df[name][first]) is date:
+            df[name] = df[name].map(lambda value: value.isoformat() if isinstance(value, date) else None)
+    return df
+
+
+def stream_ndjson(batches: Iterator[pd.DataFrame]) -> Iterator[bytes]:
+    """One JSON object per line; NaN/None become null, dates ISO 8601 text"""
+    for df in batches:
+        if df.empty:
+            continue
+        body = _iso_dates(df).to_json(orient='records', lines=True, double_precision=15, date_format='iso')
+        yield (body.rstrip('\n') + '\n').encode('utf-8')
+
+
+def stream_csv(batches: Iterator[pd.DataFrame], columns: List[str]) -> Iterator[bytes]:
+    """CSV with a single header row; NaN/None become empty fields"""
+    yield (pd.DataFrame(columns=columns).to_csv(index=False)).encode('utf-8')
+    for df in batches:
+        if df.empty:
+            continue
+        yield df.to_csv(index=False, header=False).encode('utf-8')
+
+
+def _infer_arrow_type(values: Optional[pd.Series]):
+    """Arrow type of an untyped column from sample values (string when nothing to go on)"""
+    import pyarrow as pa
+
+    if values is not None:
+        try:
+            inferred = pa.Array.from_pandas(values).type
+            if pa.types.is_large_string(inferred):
+                return pa.string()
+            if not pa.types.is_null(inferred):
+                return inferred
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            pass  # mixed values
+    return pa.string()
+
+
+def arrow_schema(query, sample: Optional[pd.DataFrame] = None):
+    """
+    Build an Arrow schema from the SQLAlchemy column types of a SELECT
+    Columns without a declared type (SQLite CREATE TABLE AS SELECT expressions)
+    take the type of their values in the sample batch
+    """
+    import pyarrow as pa
+
+    fields = []
+    for column in query.selected_columns:
+        column_type = column.type
+        if isinstance(column_type, NullType):
+            arrow_type = _infer_arrow_type(sample[column.name] if sample is not None else None)
+        elif isinstance(column_type, (String, Text)):
+            arrow_type = pa.string()
+        elif isinstance(column_type, Boolean):
+            arrow_type = pa.bool_()
+        elif isinstance(column_type, Integer):
+            arrow_type = pa.int64()
+        elif isinstance(column_type, DateTime):
+            arrow_type = pa.timestamp('us')
+        elif isinstance(column_type, Date):
+            arrow_type = pa.date32()
+        elif isinstance(column_type, (Float, Numeric)):
+            arrow_type = pa.float64()
+        else:
+            arrow_type = pa.string()
+        fields.append(pa.field(column.name, arrow_type))
+    return pa.schema(fields)
+
+
+def coerce_to_schema(df: pd.DataFrame, schema) -> pd.DataFrame:
+    """
+    Make a batch match the declared Arrow schema
+    SQLite type affinity can hand back numbers in text columns and vice versa
+    """
+    import pyarrow as pa
+
+    for field in schema:
+        values = df[field.name]
+        if pa.types.is_string(field.type):
+            if pd.api.types.infer_dtype(values, skipna=True) not in ('string', 'empty'):
+                df[field.name] = values.astype(object).where(values.isna(), values.astype(str))
+        elif pa.types.is_integer(field.type) or pa.types.is_floating(field.type):
+            df[field.name] = pd.to_numeric(values, errors='coerce')
+    return df
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object that collects bytes until drained"""
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def _peek(batches: Iterator[pd.DataFrame]) -> Tuple[Optional[pd.DataFrame], Iterator[pd.DataFrame]]:
+    """First batch (None for an empty result) and an iterator that still yields it"""
+    first = next(batches, None)
+    if first is None:
+        return None, iter(())
+    return first, chain([first], batches)
+
+
+def _record_batches(batches: Iterator[pd.DataFrame], schema) -> Iterator[Any]:
+    """Non-empty DataFrames as Arrow record batches matching the schema"""
+    import pyarrow as pa
+
+    for df in batches:
+        if df.empty:
+            continue
+        yield pa.RecordBatch.from_pandas(coerce_to_schema(df, schema), schema=schema, preserve_index=False)
+
+
+def stream_arrow(batches: Iterator[pd.DataFrame], query) -> Iterator[bytes]:
+    """Arrow IPC stream: schema message first, then one record batch per DataFrame"""
+    import pyarrow as pa
+
+    first, batches = _peek(batches)
+    schema = arrow_schema(query, first)
+
+    sink = _ChunkSink()
+    writer = pa.ipc.new_stream(sink, schema)
+    yield sink.drain()
+
+    for batch in _record_batches(batches, schema):
+        writer.write_batch(batch)
+        yield sink.drain()
+
+    writer.close()
+    yield sink.drain()
+
+
+def stream_parquet(batches: Iterator[pd.DataFrame], query) -> Iterator[bytes]:
+    """Parquet file with one row group per DataFrame; the footer follows the last row group"""
+    import pyarrow.parquet as pq
+
+    first, batches = _peek(batches)
+    schema = arrow_schema(query, first)
+
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression=PARQUET_COMPRESSION)
+    yield sink.drain()
+
+    for batch in _record_batches(batches, schema):
+        writer.write_batch(batch)
+        yield sink.drain()
+
+    writer.close()
+    yield sink.drain()
+
+
+def stream_export(engine, query, export_format: str, batch_size: int = 10000) -> Iterator[bytes]:
+    """Encode a SELECT as a byte stream in the requested export format"""
+    batches = iter_batches(engine, query, batch_size)
+
+    if export_format == 'ndjson':
+        return stream_ndjson(batches)
+    if export_format == 'csv':
+        return stream_csv(batches, [c.name for c in query.selected_columns])
+    if export_format == 'arrow':
+        return stream_arrow(batches, query)
+    if export_format == 'parquet':
+        return stream_parquet(batches, query)
+
+    raise ValueError(f"Unsupported export format: {export_format}")
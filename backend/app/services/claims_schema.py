@@ -0,0 +1,182 @@
+"""
+Analytical Claims Schema
+The in-memory dtype of every claim column, declared in one place
+
+The columnar store (and the shared snapshot written from it) encodes each
+claim column with the dtype declared here:
+
+    category        text columns - COUNTYNAME, VENUERATING, ADJUSTERNAME, ...
+    datetime64[ns]  CLAIMCLOSEDDATE, INCIDENTDATE (stored as text in the database)
+                    and their typed copies closed_on, incident_on
+    float32         scores, ratings and durations - 7 significant digits is
+                    more than their source data carries
+    float64         money and variance_pct, which feed sums over millions of
+                    rows and the headline KPIs
+    Int8 / Int16    nullable small integers - IOL, AGE, close_year / close_month
+                    and the count columns
+    integer         other integer columns: int64, or float64 when values are missing
+
+memory_report() compares each column with the untyped frame the API used to
+build from ORM rows (object strings, float64 numbers).
+"""
+
+import sys
+from typing import Any, Dict
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import Integer, String, Text, Date, DateTime, Boolean
+
+from app.db.schema import Claim
+
+FLOAT32_COLUMNS = [
+    'DURATIONTOREPORT',
+    'PRIMARY_INJURY_SEVERITY_SCORE', 'PRIMARY_INJURY_CAUSATION_SCORE_BY_SEVERITY',
+    'SECONDARY_INJURY_SEVERITY_SCORE', 'SECONDARY_INJURY_CAUSATION_SCORE_BY_SEVERITY',
+    'TERTIARY_INJURY_SEVERITY_SCORE', 'TERTIARY_INJURY_CAUSATION_SCORE_BY_SEVERITY',
+    'PRIMARY_INJURY_CAUSATION_SCORE', 'PRIMARY_INJURY_SEVERITY_SCORE_BY_CAUSATION',
+    'SECONDARY_INJURY_CAUSATION_SCORE', 'SECONDARY_INJURY_SEVERITY_SCORE_BY_CAUSATION',
+    'TERTIARY_INJURY_CAUSATION_SCORE', 'TERTIARY_INJURY_SEVERITY_SCORE_BY_CAUSATION',
+    'VENUERATINGPOINT', 'RATINGWEIGHT', 'SETTLEMENT_YEARS',
+    'SEVERITY_SCORE', 'CALCULATED_SEVERITY_SCORE', 'CALCULATED_CAUSATION_SCORE',
+]
+
+# Declared dtypes; columns not listed follow their SQL type (see column_dtype)
+CLAIM_DTYPES: Dict[str, str] = {
+    'CLAIMCLOSEDDATE': 'datetime64[ns]',
+    'INCIDENTDATE': 'datetime64[ns]',
+    'closed_on': 'datetime64[ns]',
+    'incident_on': 'datetime64[ns]',
+    'close_year': 'Int16',
+    'close_month': 'Int8',
+    'IOL': 'Int8',
+    'AGE': 'Int16',
+    'OCCUPATION_AVAILABLE': 'Int8',
+    'INJURY_COUNT': 'Int16',
+    'BODYPART_COUNT': 'Int16',
+    'INJURYGROUP_COUNT': 'Int16',
+    **{name: 'float32' for name in FLOAT32_COLUMNS},
+}
+
+NULLABLE_INT_DTYPES = ('Int8', 'Int16', 'Int32', 'Int64')
+
+# Size of one Python object in the untyped frame
+_NONE_BYTES = sys.getsizeof(None)
+_BOOL_BYTES = sys.getsizeof(True)
+_DATE_TEXT_BYTES = sys.getsizeof('YYYY-MM-DD')
+
+
+def column_dtype(column) -> str:
+    """Analytical dtype of a claims table column"""
+    if column.name in CLAIM_DTYPES:
+        return CLAIM_DTYPES[column.name]
+    if isinstance(column.type, (String, Text)):
+        return 'category'
+    if isinstance(column.type, Boolean):
+        return 'boolean'
+    if isinstance(column.type, Integer):
+        return 'integer'
+    if isinstance(column.type, (Date, DateTime)):
+        return 'datetime64[ns]'
+    return 'float64'
+
+
+CLAIM_COLUMN_DTYPES: Dict[str, str] = {
+    c.name: column_dtype(c) for c in Claim.__table__.columns if c.name != 'id'
+}
+
+
+def encode_values(values: pd.Series, dtype: str):
+    """Convert one chunk of a non-categorical column to its declared dtype"""
+    if dtype.startswith('datetime64'):
+        return pd.to_datetime(values, errors='coerce').to_numpy(dtype=dtype)
+    if dtype == 'boolean':
+        return values.astype('boolean').array
+    numbers = pd.to_numeric(values, errors='coerce')
+    if dtype in NULLABLE_INT_DTYPES:
+        # Out-of-range or fractional values would make astype() raise; treat them as missing
+        info = np.iinfo(dtype.lower())
+        numbers = numbers.where((numbers >= info.min) & (numbers <= info.max) & (numbers % 1 == 0))
+        return numbers.astype(dtype).array
+    if dtype == 'float32':
+        return numbers.to_numpy(dtype=np.float32, na_value=np.nan)
+    return numbers.to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def concat_values(chunks: list, dtype: str):
+    """Join per-chunk arrays of one column"""
+    if dtype == 'boolean' or dtype in NULLABLE_INT_DTYPES:
+        if not chunks:
+            return pd.array([], dtype=dtype)
+        return pd.concat([pd.Series(c) for c in chunks], ignore_index=True).array
+    if not chunks:
+        return np.empty(0, dtype=np.float64 if dtype == 'integer' else dtype)
+
+    values = np.concatenate(chunks)
+    # Keep integer columns integral when nothing is missing, matching
+    # what pd.DataFrame(list_of_dicts) produced before
+    if dtype == 'integer' and not np.isnan(values).any():
+        return values.astype(np.int64)
+    return values
+
+
+def nbytes(values: Any) -> int:
+    """Bytes held by one column array (category dictionaries included)"""
+    if isinstance(values, pd.Categorical):
+        return int(values.memory_usage(deep=True))
+    return int(getattr(values, 'nbytes', 0))
+
+
+def untyped_nbytes(values: Any) -> int:
+    """
+    Bytes the same column took in the untyped frame, as memory_usage(deep=True)
+    counts them: one pointer plus one Python object per cell for text, 8 bytes
+    per value for numbers. Dates are counted as 'YYYY-MM-DD' strings.
+    """
+    rows = len(values)
+    if isinstance(values, pd.Categorical):
+        codes = np.asarray(values.codes)
+        counts = np.bincount(codes[codes >= 0], minlength=len(values.categories))
+        sizes = np.fromiter(
+            (sys.getsizeof(c) for c in values.categories), dtype=np.int64, count=len(values.categories)
+        )
+        missing = rows - int(counts.sum())
+        return int(8 * rows + counts @ sizes + missing * _NONE_BYTES)
+
+    if isinstance(values, np.ndarray) and values.dtype.kind == 'M':
+        present = int((~np.isnat(values)).sum())
+        return 8 * rows + present * _DATE_TEXT_BYTES + (rows - present) * _NONE_BYTES
+
+    if isinstance(values, pd.arrays.BooleanArray):
+        # Object column of True / False / None
+        return 8 * rows + rows * _BOOL_BYTES
+    return 8 * rows
+
+
+def memory_report(df: pd.DataFrame) -> Dict[str, Any]:
+    """Bytes per column of a claims frame before (untyped) and after the analytical schema"""
+    columns = []
+    for name in df.columns:
+        values = df[name].array
+        if not isinstance(values, (pd.Categorical, pd.arrays.BooleanArray, pd.arrays.IntegerArray)):
+            values = df[name].to_numpy()
+
+        before = untyped_nbytes(values)
+        after = nbytes(values)
+        columns.append({
+            "column": name,
+            "dtype": str(df[name].dtype),
+            "untyped_bytes": before,
+            "bytes": after,
+            "saved_pct": round((1 - after / before) * 100, 1) if before else 0.0
+        })
+
+    total_before = sum(c["untyped_bytes"] for c in columns)
+    total_after = sum(c["bytes"] for c in columns)
+    return {
+        "rows": len(df),
+        "columns": sorted(columns, key=lambda c: c["untyped_bytes"], reverse=True),
+        "untyped_bytes": total_before,
+        "bytes": total_after,
+        "saved_pct": round((1 - total_after / total_before) * 100, 1) if total_before else 0.0
+    }
@@ -0,0 +1,284 @@
+"""
+Shared Claims Snapshot
+Materializes the columnar claims table once into memory-mapped NumPy files
+
+Every uvicorn worker used to read the claims table into its own ClaimsStore,
+so N workers held N copies and each paid for its own warm-up. The snapshot is
+written once per dataset version into DATA_DIR/claims_snapshot:
+
+    claims_snapshot/
+        CURRENT                 name of the live snapshot directory
+        v12-3f9c.../
+            manifest.json       data version, row count, column kinds
+            ids.npy
+            COUNTYNAME.codes.npy, COUNTYNAME.categories.json
+            DOLLARAMOUNTHIGH.npy
+            IOL.values.npy, IOL.mask.npy
+            ...
+
+Workers open the arrays with np.load(mmap_mode='r'): read-only, zero-copy,
+and backed by the OS page cache, so all processes share one physical copy.
+Category dictionaries are small and loaded per process.
+
+A new snapshot is built in a temporary directory, renamed into place and
+published by atomically replacing CURRENT. Readers holding the previous
+snapshot keep their mappings; the previous directory is kept until the next
+swap so a reader that just read CURRENT can still open it. Builds are
+serialized across processes with a lock file, so after a refresh exactly one
+worker reads the database and the others map its output.
+"""
+
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+import logging
+
+import numpy as np
+import pandas as pd
+
+from app.services.claims_store import CLAIM_COLUMN_NAMES, read_claim_columns
+from app.utils.file_lock import PROCESS_LOCKS, FileLock
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT = 2
+CURRENT_FILE = 'CURRENT'
+LOCK_FILE = '.build.lock'
+
+
+def _column_files(directory: Path, name: str, kind: str) -> Dict[str, Path]:
+    """Files holding one column of a snapshot"""
+    if kind == 'category':
+        return {
+            'codes': directory / f"{name}.codes.npy",
+            'categories': directory / f"{name}.categories.json",
+        }
+    if kind in ('bool', 'int'):
+        return {
+            'values': directory / f"{name}.values.npy",
+            'mask': directory / f"{name}.mask.npy",
+        }
+    return {'values': directory / f"{name}.npy"}
+
+
+def _column_kind(values: Any) -> str:
+    if isinstance(values, pd.Categorical):
+        return 'category'
+    if isinstance(values, pd.arrays.BooleanArray):
+        return 'bool'
+    if isinstance(values, pd.arrays.IntegerArray):
+        return 'int'
+    return 'array'
+
+
+def write_snapshot(directory: Path, ids: np.ndarray, data: Dict[str, Any], version: int) -> Dict[str, Any]:
+    """Write column arrays and the manifest into an empty directory"""
+    directory.mkdir(parents=True)
+    kinds = {}
+
+    np.save(directory / 'ids.npy', np.ascontiguousarray(ids))
+    for name, values in data.items():
+        kind = _column_kind(values)
+        files = _column_files(directory, name, kind)
+        if kind == 'category':
+            # Codes keep the dtype pandas picked, so mapping them back needs no conversion
+            np.save(files['codes'], np.ascontiguousarray(values.codes))
+            files['categories'].write_text(json.dumps([str(c) for c in values.categories]))
+        elif kind == 'bool':
+            np.save(files['values'], values.to_numpy(dtype=bool, na_value=False))
+            np.save(files['mask'], np.asarray(values.isna()))
+        elif kind == 'int':
+            np.save(files['values'], values.to_numpy(dtype=values.dtype.numpy_dtype, na_value=0))
+            np.save(files['mask'], np.asarray(values.isna()))
+        else:
+            np.save(files['values'], np.ascontiguousarray(values))
+        kinds[name] = kind
+
+    manifest = {
+        'format': SNAPSHOT_FORMAT,
+        'data_version': version,
+        'rows': int(len(ids)),
+        'columns': kinds,
+        'created_at': time.time(),
+    }
+    # Manifest last: a directory without one is an unfinished build
+    (directory / 'manifest.json').write_text(json.dumps(manifest))
+    return manifest
+
+
+def _map(path: Path) -> np.ndarray:
+    """Read-only view of a .npy file (plain ndarray over the mapping, no copy)"""
+    return np.asarray(np.load(path, mmap_mode='r'))
+
+
+def map_snapshot(directory: Path) -> Tuple[Dict[str, Any], np.ndarray, Dict[str, Any]]:
+    """
+    Map a snapshot read-only
+    Returns (manifest, ids, {column: array}) where arrays are views of the files
+    """
+    manifest = json.loads((directory / 'manifest.json').read_text())
+    ids = _map(directory / 'ids.npy')
+
+    data: Dict[str, Any] = {}
+    for name, kind in manifest['columns'].items():
+        files = _column_files(directory, name, kind)
+        if kind == 'category':
+            categories = json.loads(files['categories'].read_text())
+            data[name] = pd.Categorical.from_codes(_map(files['codes']), categories=categories, validate=False)
+        elif kind == 'bool':
+            data[name] = pd.arrays.BooleanArray(_map(files['values']), _map(files['mask']))
+        elif kind == 'int':
+            data[name] = pd.arrays.IntegerArray(_map(files['values']), _map(files['mask']))
+        else:
+            data[name] = _map(files['values'])
+    return manifest, ids, data
+
+
+class ClaimsSnapshot:
+    """
+    Memory-mapped claims snapshot shared by all worker processes
+    """
+
+    def __init__(self, engine, directory: Path, chunk_size: int = 100_000):
+        self.engine = engine
+        self.directory = Path(directory)
+        self.chunk_size = chunk_size
+
+        self._lock = threading.Lock()
+        self._stats = {
+            "maps": 0,
+            "builds": 0,
+            "last_build_seconds": None,
+            "errors": 0
+        }
+
+    def current_name(self) -> Optional[str]:
+        """Directory name of the live snapshot, None when there is none"""
+        try:
+            return (self.directory / CURRENT_FILE).read_text().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def current_manifest(self) -> Optional[Dict[str, Any]]:
+        name = self.current_name()
+        if name is None:
+            return None
+        try:
+            return json.loads((self.directory / name / 'manifest.json').read_text())
+        except (OSError, ValueError):
+            return None
+
+    def get(self, version: int) -> Tuple[np.ndarray, Dict[str, Any]]:
+        """
+        Mapped (ids, columns) of the snapshot for a dataset version
+        Builds the snapshot first when the live one is missing or older
+        """
+        mapped = self._map_current(version)
+        if mapped is not None:
+            return mapped
+
+        with self._build_lock():
+            # Another process may have built it while we waited for the lock
+            mapped = self._map_current(version)
+            if mapped is not None:
+                return mapped
+            self._build(version)
+
+        mapped = self._map_current(version)
+        if mapped is None:
+            raise RuntimeError(f"Claims snapshot for data version {version} was not published")
+        return mapped
+
+    def ensure(self, version: int) -> None:
+        """Build the snapshot for a dataset version unless it is already live"""
+        self.get(version)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+
+        manifest = self.current_manifest()
+        name = self.current_name()
+        stats.update({
+            "directory": str(self.directory),
+            "current": name,
+            "data_version": manifest['data_version'] if manifest else None,
+            "rows": manifest['rows'] if manifest else 0,
+            "file_bytes": sum(
+                f.stat().st_size for f in (self.directory / name).iterdir()
+            ) if manifest else 0,
+            "process_locked_builds": PROCESS_LOCKS
+        })
+        return stats
+
+    def _map_current(self, version: int) -> Optional[Tuple[np.ndarray, Dict[str, Any]]]:
+        name = self.current_name()
+        if name is None:
+            return None
+        try:
+            manifest, ids, data = map_snapshot(self.directory / name)
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Could not map claims snapshot {name}: {str(e)}")
+            return None
+
+        if manifest.get('format') != SNAPSHOT_FORMAT or manifest.get('data_version') != version:
+            return None
+        if set(manifest['columns']) != set(CLAIM_COLUMN_NAMES):
+            return None  # written by an older schema
+
+        with self._lock:
+            self._stats["maps"] += 1
+        return ids, data
+
+    def _build(self, version: int) -> None:
+        """Read the claims table, write a new snapshot and publish it"""
+        start = time.perf_counter()
+        try:
+            ids, data = read_claim_columns(self.engine, list(CLAIM_COLUMN_NAMES), chunk_size=self.chunk_size)
+
+            name = f"v{version}-{uuid.uuid4().hex[:12]}"
+            building = self.directory / f".building-{name}"
+            write_snapshot(building, ids, data, version)
+            os.replace(building, self.directory / name)
+
+            previous = self.current_name()
+            self._publish(name)
+            self._prune(keep={name, previous})
+        except Exception:
+            with self._lock:
+                self._stats["errors"] += 1
+            raise
+
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self._stats["builds"] += 1
+            self._stats["last_build_seconds"] = round(elapsed, 2)
+        logger.info(f"Claims snapshot {name} built: {len(ids)} rows in {elapsed:.2f}s")
+
+    def _publish(self, name: str) -> None:
+        """Point CURRENT at a snapshot directory (write-then-rename)"""
+        tmp_path = self.directory / f"{CURRENT_FILE}.{os.getpid()}.tmp"
+        tmp_path.write_text(name)
+        os.replace(tmp_path, self.directory / CURRENT_FILE)
+
+    def _prune(self, keep: set) -> None:
+        """Remove snapshot directories other than `keep` and abandoned builds"""
+        for path in self.directory.iterdir():
+            if not path.is_dir() or path.name in keep:
+                continue
+            if not PROCESS_LOCKS and path.name.startswith('.building-'):
+                continue  # may be another process's build in progress
+            try:
+                shutil.rmtree(path)
+            except OSError as e:
+                # Still mapped on platforms that refuse to delete open files; retried next swap
+                logger.debug(f"Could not remove old claims snapshot {path.name}: {str(e)}")
+
+    def _build_lock(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        return FileLock(self.directory / LOCK_FILE)
@@ -0,0 +1,285 @@
+"""
+Columnar Claims Store
+Keeps one typed, column-oriented copy of the claims table in memory
+
+Analytics, recalibration and fallback aggregation endpoints all need the
+full claims table as a DataFrame. Building it from ORM objects and ~120-key
+dicts on every request costs minutes and tens of GB at 5M rows, so the store
+reads the table once in chunks, encodes every column with the dtype declared
+in claims_schema (categoricals, float32, nullable small ints, datetimes), and
+hands out cheap DataFrame views until the dataset version changes.
+
+Columns are loaded on demand: a caller asking for five columns only causes
+those five to be read, so memory scales with the columns actually used.
+With a shared snapshot (see claims_snapshot) all columns are instead mapped
+from files written once for every worker process.
+"""
+
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+import logging
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import select, Integer, Float
+
+from app.db.schema import Claim
+from app.services.claims_schema import CLAIM_COLUMN_DTYPES, encode_values, concat_values, nbytes
+from app.db.data_version import get_data_version
+
+logger = logging.getLogger(__name__)
+
+# Loadable claim columns (the surrogate key is kept separately for row alignment)
+CLAIM_COLUMN_NAMES = [c.name for c in Claim.__table__.columns if c.name != 'id']
+NUMERIC_COLUMN_NAMES = [
+    c.name for c in Claim.__table__.columns
+    if c.name != 'id' and isinstance(c.type, (Integer, Float))
+]
+
+
+def resolve_columns(columns: Optional[Iterable[str]], strict: bool = True) -> List[str]:
+    """
+    Normalize a requested projection to known claim columns
+    Raises ValueError for names that are not claim columns; with strict=False
+    they are dropped instead, for callers that list optional fields and check
+    `if name in df.columns` (user-chosen recalibration factors)
+    """
+    if columns is None:
+        return list(CLAIM_COLUMN_NAMES)
+
+    known = set(CLAIM_COLUMN_NAMES)
+    resolved, unknown = [], []
+    for name in columns:
+        if name not in known:
+            if name not in unknown:
+                unknown.append(name)
+        elif name not in resolved:
+            resolved.append(name)
+
+    if unknown:
+        if strict:
+            raise ValueError(f"Unknown claim columns: {', '.join(unknown)}")
+        logger.info(f"Ignoring unknown claim columns: {', '.join(unknown)}")
+    return resolved
+
+
+class _CategoricalBuilder:
+    """
+    Dictionary-encodes a string column chunk by chunk
+    Keeps one global value -> code table so only the integer codes of each
+    chunk are retained, never the Python string objects.
+    """
+
+    def __init__(self):
+        self.lookup: Dict[str, int] = {}
+        self.codes: List[np.ndarray] = []
+
+    def append(self, values: pd.Series) -> None:
+        local_codes, uniques = pd.factorize(values)
+        mapping = np.empty(len(uniques) + 1, dtype=np.int32)
+        for i, value in enumerate(uniques):
+            mapping[i] = self.lookup.setdefault(str(value), len(self.lookup))
+        mapping[-1] = -1  # factorize marks missing values with -1
+        self.codes.append(mapping[local_codes])
+
+    def build(self) -> pd.Categorical:
+        categories = list(self.lookup)
+        codes = np.concatenate(self.codes) if self.codes else np.empty(0, dtype=np.int32)
+
+        # Sorted categories keep groupby output ordered like it was for object columns
+        order = sorted(range(len(categories)), key=categories.__getitem__)
+        remap = np.empty(len(categories) + 1, dtype=np.int32)
+        remap[order] = np.arange(len(categories), dtype=np.int32)
+        remap[-1] = -1
+
+        return pd.Categorical.from_codes(
+            remap[codes],
+            categories=[categories[i] for i in order]
+        )
+
+
+def read_claim_columns(engine, columns: List[str], where=None, chunk_size: int = 100_000):
+    """
+    Read a projection of the claims table into typed column arrays
+    `where` is an optional SQLAlchemy clause over Claim pushed into the SELECT
+    Returns (ids, {column: array}) ordered by claims.id
+    """
+    table = Claim.__table__
+    dtypes = {name: CLAIM_COLUMN_DTYPES[name] for name in columns}
+
+    query = select(table.c.id, *[table.c[name] for name in columns]).order_by(table.c.id)
+    if where is not None:
+        query = query.where(where)
+
+    id_chunks: List[np.ndarray] = []
+    parts: Dict[str, Any] = {
+        name: _CategoricalBuilder() if dtypes[name] == 'category' else []
+        for name in columns
+    }
+
+    with engine.connect() as conn:
+        conn = conn.execution_options(stream_results=True)
+        for chunk in pd.read_sql_query(query, conn, chunksize=chunk_size, coerce_float=True):
+            id_chunks.append(chunk['id'].to_numpy(dtype=np.int64))
+            for name in columns:
+                if dtypes[name] == 'category':
+                    parts[name].append(chunk[name])
+                else:
+                    parts[name].append(encode_values(chunk[name], dtypes[name]))
+
+    ids = np.concatenate(id_chunks) if id_chunks else np.empty(0, dtype=np.int64)
+    data = {
+        name: parts[name].build() if dtypes[name] == 'category' else concat_values(parts[name], dtypes[name])
+        for name in columns
+    }
+    return ids, data
+
+
+def columns_to_frame(ids: np.ndarray, data: Dict[str, Any], names: List[str]) -> pd.DataFrame:
+    """Wrap column arrays in a DataFrame without copying them"""
+    return pd.DataFrame(
+        {name: data[name] for name in names},
+        index=pd.RangeIndex(len(ids)),
+        columns=names,
+        copy=False
+    )
+
+
+class ClaimsStore:
+    """
+    Shared in-process columnar copy of the claims table
+
+    Columns are loaded lazily on first use; all of them are dropped when
+    the dataset version (bumped by migrations and /aggregation/refresh-cache)
+    changes. When a snapshot is given, columns are mapped from it read-only
+    instead, falling back to the database if the snapshot cannot be used.
+    """
+
+    def __init__(self, engine, chunk_size: int = 100_000, snapshot=None):
+        self.engine = engine
+        self.chunk_size = chunk_size
+        self.snapshot = snapshot
+
+        self._lock = threading.Lock()
+        self._columns: Dict[str, Any] = {}
+        self._ids: Optional[np.ndarray] = None
+        self._version: Optional[int] = None
+        self._loaded_at: Optional[float] = None
+        self._load_seconds: float = 0.0
+        self._source: Optional[str] = None
+        self._snapshot_failed_version: Optional[int] = None
+
+    def get_frame(self, columns: Optional[Iterable[str]] = None, strict: bool = True) -> pd.DataFrame:
+        """
+        Get a projection of the claims table as a DataFrame
+        Unknown column names raise ValueError unless strict=False (see resolve_columns)
+        The frame wraps the shared arrays: callers may add or replace
+        columns freely, but must not modify values in place (snapshot
+        arrays are read-only, so doing so raises).
+        """
+        names = resolve_columns(columns, strict)
+        version = get_data_version()
+
+        with self._lock:
+            if self._version != version:
+                self._clear()
+                self._version = version
+
+            missing = [name for name in names if name not in self._columns]
+            if (missing or self._ids is None) and not self._map_snapshot(version):
+                self._load(missing)
+
+            ids = self._ids
+            data = {name: self._columns[name] for name in names}
+
+        return columns_to_frame(ids, data, names)
+
+    def invalidate(self) -> None:
+        """Drop all cached columns; the next get_frame() maps or reloads them"""
+        with self._lock:
+            self._clear()
+        logger.info("Claims store invalidated")
+
+    def warm(self) -> None:
+        """Build the shared snapshot for the current dataset version (no-op without one)"""
+        if self.snapshot is not None:
+            self.snapshot.ensure(get_data_version())
+
+    def stats(self) -> Dict[str, Any]:
+        """Describe what is currently held in memory"""
+        with self._lock:
+            columns = dict(self._columns)
+            rows = len(self._ids) if self._ids is not None else 0
+            source = self._source
+
+        stats = {
+            "loaded": rows > 0 or bool(columns),
+            "rows": rows,
+            "columns": len(columns),
+            "loaded_columns": sorted(columns),
+            "memory_bytes": sum(nbytes(values) for values in columns.values()),
+            "source": source,
+            "data_version": self._version,
+            "loaded_at": self._loaded_at,
+            "load_seconds": round(self._load_seconds, 2)
+        }
+        if self.snapshot is not None:
+            stats["snapshot"] = self.snapshot.stats()
+        return stats
+
+    def _clear(self) -> None:
+        self._columns = {}
+        self._ids = None
+        self._version = None
+        self._source = None
+
+    def _map_snapshot(self, version: int) -> bool:
+        """Attach every column from the shared snapshot; False when there is no usable one"""
+        if self.snapshot is None or self._snapshot_failed_version == version:
+            return False
+
+        start = time.perf_counter()
+        try:
+            ids, data = self.snapshot.get(version)
+        except Exception as e:
+            # Not retried until the data version changes
+            self._snapshot_failed_version = version
+            logger.warning(f"Claims snapshot unavailable, reading from database: {str(e)}")
+            return False
+
+        self._ids = ids
+        self._columns = data
+        self._source = 'snapshot'
+        self._loaded_at = time.time()
+        self._load_seconds = time.perf_counter() - start
+
+        logger.info(
+            f"Claims store mapped {len(data)} columns for {len(ids)} rows "
+            f"in {self._load_seconds:.2f}s (data version {version})"
+        )
+        return True
+
+    def _load(self, names: List[str]) -> None:
+        """Read missing columns and attach them to the cached row set"""
+        start = time.perf_counter()
+        ids, data = read_claim_columns(self.engine, names, chunk_size=self.chunk_size)
+
+        if self._ids is not None and not np.array_equal(ids, self._ids):
+            # Rows changed without a version bump - re-read everything we hold
+            # so all cached columns describe the same row set
+            logger.warning("Claims row set changed since last load, reloading cached columns")
+            names = names + [name for name in self._columns if name not in data]
+            ids, data = read_claim_columns(self.engine, names, chunk_size=self.chunk_size)
+            self._columns = {}
+
+        self._ids = ids
+        self._columns.update(data)
+        self._source = 'database'
+        self._loaded_at = time.time()
+        self._load_seconds = time.perf_counter() - start
+
+        logger.info(
+            f"Claims store loaded {len(names)} columns for {len(ids)} rows "
+            f"in {self._load_seconds:.2f}s (data version {self._version})"
+        )
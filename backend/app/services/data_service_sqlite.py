@@ -19,6 +19,12 @@ from datetime import datetime
 
 from app.db.schema import get_engine, get_session, Claim, Weight, AggregatedCache
 from app.core.config import settings
+from app.services.claims_store import ClaimsStore, read_claim_columns, resolve_columns, columns_to_frame
+from app.services.claims_snapshot import ClaimsSnapshot
+from app.services.claims_schema import memory_report
+from app.services.claim_counts import ClaimCountCache, count_signature
+from app.services.single_flight import SingleFlight
+from app.utils.pagination import keyset_page, KEYSET_SORT_FIELDS
 
 logger = logging.getLogger(__name__)
 
@@ -29,6 +35,15 @@ class DataServiceSQLite:
     def __init__(self):
         self.engine = get_engine()
         self.data_cache = {}
+        # Workers map one on-disk snapshot of the claims columns instead of each loading its own
+        snapshot = ClaimsSnapshot(
+            self.engine,
+            settings.CLAIMS_SNAPSHOT_DIR or str(Path(settings.DATA_DIR) / "claims_snapshot")
+        ) if settings.CLAIMS_SNAPSHOT_ENABLED else None
+        self.claims_store = ClaimsStore(self.engine, snapshot=snapshot)
+        self.count_cache = ClaimCountCache()
+        # Identical concurrent loads share one computation
+        self.flights = SingleFlight()
 
     def get_session(self) -> Session:
         """Get database session"""
@@ -64,17 +79,83 @@ class DataServiceSQLite:
             logger.error(f"Error getting full claims data: {str(e)}")
             return []
 
+    async def get_claims_frame(
+        self,
+        columns: Optional[List[str]] = None,
+        where: Optional[Any] = None,
+        strict: bool = True
+    ) -> pd.DataFrame:
+        """
+        Get claims as a typed columnar DataFrame
+        columns: projection - only these columns are read
+        where: optional SQLAlchemy filter on Claim, pushed down into the SQL query
+        strict: raise ValueError for names that are not claim columns (False drops them)
+        Unfiltered requests are served from the shared in-memory claims store;
+        the database is only read again after the dataset version changes
+        """
+        # Outside the try: a bad projection is a caller bug, not a reason to fall back to the CSV
+        names = resolve_columns(columns, strict)
+
+        try:
+            loop = asyncio.get_event_loop()
+
+            if where is None:
+                # Concurrent requests for the same projection wait on one load;
+                # each gets its own shallow frame so added columns stay private
+                df = await self.flights.do(
+                    'claims_frame', ",".join(names),
+                    lambda: loop.run_in_executor(None, self.claims_store.get_frame, names),
+                    share=lambda frame: frame.copy(deep=False)
+                )
+                logger.info(f"Serving {len(df)} claims x {len(df.columns)} columns from columnar store")
+                return df
+
+            def query_db():
+                ids, data = read_claim_columns(self.engine, names, where=where)
+                return columns_to_frame(ids, data, names)
+
+            df = await loop.run_in_executor(None, query_db)
+            logger.info(f"Loaded {len(df)} filtered claims x {len(df.columns)} columns from database")
+            return df
+
+        except Exception as e:
+            logger.error(f"Error loading claims frame: {str(e)}")
+            # Fallback to CSV if database is not properly initialized
+            df = pd.DataFrame(self._load_from_csv())
+            if columns is not None:
+                df = df[[c for c in columns if c in df.columns]]
+            return df
+
+    async def get_claims_memory_report(self, columns: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Bytes per claims column under the analytical schema vs the untyped frame
+        Loads the requested projection (default: every column) into the store first
+        """
+        df = await self.get_claims_frame(columns)
+        loop = asyncio.get_event_loop()
+        report = await loop.run_in_executor(None, memory_report, df)
+        report["source"] = self.claims_store.stats()["source"]
+        return report
+
     async def get_paginated_claims(
         self,
         page: int = 1,
         page_size: int = 100,
         filters: Optional[Dict[str, Any]] = None,
         sort_by: Optional[str] = None,
-        sort_order: str = "asc"
+        sort_order: str = "asc",
+        cursor: Optional[str] = None,
+        count_mode: str = "exact"
     ) -> Dict[str, Any]:
         """
         Get paginated claims with filters and sorting
         Optimized for large datasets
+
+        Pass the previous response's next_cursor to seek straight to the next
+        page on the (sort_by, id) index instead of scanning OFFSET rows.
+        Totals are cached per filter set and data version; count_mode="estimated"
+        answers from planner statistics and sets total_is_estimate.
+        Raises ValueError for a malformed cursor.
         """
         try:
             loop = asyncio.get_event_loop()
@@ -98,12 +179,36 @@ class DataServiceSQLite:
                     if filters.get('max_variance'):
                         query = query.filter(Claim.variance_pct <= filters['max_variance'])
                     if filters.get('year'):
-                        query = query.filter(Claim.CLAIMCLOSEDDATE.like(f"{filters['year']}%"))
+                        query = query.filter(Claim.close_year.in_(filters['year']))
 
                 # Get total count before pagination
-                total = query.count()
+                signature = count_signature(filters)
+                if count_mode == "estimated":
+                    total, total_is_estimate = self.count_cache.estimate(
+                        self.engine, query, signature, self._count_conditions(filters)
+                    )
+                else:
+                    total, total_is_estimate = self.count_cache.count(query, signature), False
+
+                # Keyset pagination on (sort_by, id) for indexed sort fields
+                if sort_by is None or sort_by in KEYSET_SORT_FIELDS:
+                    rows, next_cursor = keyset_page(
+                        query, Claim, page_size, sort_by or 'id', sort_order,
+                        cursor=cursor, offset=(page - 1) * page_size
+                    )
+                    return {
+                        "claims": [self._claim_to_dict(claim) for claim in rows],
+                        "total": total,
+                        "page": page,
+                        "page_size": page_size,
+                        "total_pages": (total + page_size - 1) // page_size,
+                        "total_is_estimate": total_is_estimate,
+                        "next_cursor": next_cursor
+                    }
 
-                # Apply sorting
+                # Other sort fields fall back to OFFSET pagination
+                if cursor:
+                    raise ValueError(f"Cursor pagination is not supported when sorting by {sort_by}")
                 if sort_by:
                     column = getattr(Claim, sort_by, None)
                     if column:
@@ -123,17 +228,47 @@ class DataServiceSQLite:
                     "total": total,
                     "page": page,
                     "page_size": page_size,
-                    "total_pages": (total + page_size - 1) // page_size
+                    "total_pages": (total + page_size - 1) // page_size,
+                    "total_is_estimate": total_is_estimate
                 }
 
-            result = await loop.run_in_executor(None, query_db)
-            session.close()
+            try:
+                result = await loop.run_in_executor(None, query_db)
+            finally:
+                session.close()
             return result
 
+        except ValueError:
+            raise
         except Exception as e:
             logger.error(f"Error getting paginated claims: {str(e)}")
             return {"claims": [], "total": 0, "page": page, "page_size": page_size, "total_pages": 0}
 
+    @staticmethod
+    def _count_conditions(filters: Optional[Dict[str, Any]]) -> List[tuple]:
+        """
+        Describe the applied filters for the row-count estimator
+        (column, number of IN values) for list filters, (column, None) for ranges
+        """
+        if not filters:
+            return []
+
+        conditions = []
+        for key, column in (
+            ('injury_group', 'PRIMARY_INJURYGROUP_CODE'),
+            ('adjuster', 'ADJUSTERNAME'),
+            ('county', 'COUNTYNAME'),
+            ('venue_rating', 'VENUERATING'),
+        ):
+            if filters.get(key):
+                conditions.append((column, len(filters[key])))
+        for key in ('min_variance', 'max_variance'):
+            if filters.get(key):
+                conditions.append(('variance_pct', None))
+        if filters.get('year'):
+            conditions.append(('close_year', len(filters['year'])))
+        return conditions
+
     async def get_aggregated_data(self) -> Dict[str, Any]:
         """
         Get aggregated data for dashboard
@@ -148,22 +283,22 @@ class DataServiceSQLite:
                 # County-Year aggregation
                 county_year = session.query(
                     Claim.COUNTYNAME.label('county'),
-                    func.substr(Claim.claim_date, 1, 4).label('year'),
+                    Claim.close_year.label('year'),
                     func.count(Claim.id).label('claim_count'),
                     func.avg(Claim.DOLLARAMOUNTHIGH).label('avg_settlement'),
                     func.avg(Claim.variance_pct).label('avg_variance_pct'),
                     func.avg(Claim.SETTLEMENT_DAYS).label('avg_days')
                 ).filter(
                     Claim.COUNTYNAME.isnot(None),
-                    Claim.claim_date.isnot(None)
+                    Claim.close_year.isnot(None)
                 ).group_by(
                     Claim.COUNTYNAME,
-                    func.substr(Claim.claim_date, 1, 4)
+                    Claim.close_year
                 ).all()
 
                 # Year-Severity aggregation
                 year_severity = session.query(
-                    func.substr(Claim.claim_date, 1, 4).label('year'),
+                    Claim.close_year.label('year'),
                     case(
                         (Claim.SEVERITY_SCORE <= 4, 'Low'),
                         (Claim.SEVERITY_SCORE <= 8, 'Medium'),
@@ -173,10 +308,10 @@ class DataServiceSQLite:
                     func.avg(Claim.DOLLARAMOUNTHIGH).label('avg_settlement'),
                     func.avg(Claim.variance_pct).label('avg_variance_pct')
                 ).filter(
-                    Claim.claim_date.isnot(None),
+                    Claim.close_year.isnot(None),
                     Claim.SEVERITY_SCORE.isnot(None)
                 ).group_by(
-                    func.substr(Claim.claim_date, 1, 4),
+                    Claim.close_year,
                     case(
                         (Claim.SEVERITY_SCORE <= 4, 'Low'),
                         (Claim.SEVERITY_SCORE <= 8, 'Medium'),
@@ -257,7 +392,12 @@ class DataServiceSQLite:
         60x faster than computing from raw claims for 5M+ records
 
         Returns pre-computed aggregations from materialized view tables
+        Concurrent callers share one read; each gets its own top-level dict
         """
+        return await self.flights.do('aggregated_fast', '', self._read_aggregated_data_fast, share=dict)
+
+    async def _read_aggregated_data_fast(self) -> Dict[str, Any]:
+        """Read every summary table behind get_aggregated_data_fast"""
         try:
             loop = asyncio.get_event_loop()
             session = self.get_session()
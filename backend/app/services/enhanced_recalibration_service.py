@@ -10,7 +10,7 @@ Features:
 
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Union
 from datetime import datetime, timedelta
 from scipy import stats
 from scipy.optimize import minimize
@@ -19,6 +19,17 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+def _close_dates(df: pd.DataFrame) -> pd.Series:
+    """
+    Close date of each claim: the typed closed_on column (already datetime64
+    in claims frames, so nothing is parsed) or, for callers passing raw
+    records, their claim_date text
+    """
+    if 'closed_on' in df.columns:
+        return pd.to_datetime(df['closed_on'], errors='coerce')
+    return pd.to_datetime(df['claim_date'], errors='coerce')
+
+
 class EnhancedRecalibrationService:
     """
     Enhanced service for weight recalibration with statistical insights
@@ -29,7 +40,7 @@ class EnhancedRecalibrationService:
 
     def analyze_weight_statistics(
         self,
-        claims_data: List[Dict],
+        claims_data: Union[List[Dict], pd.DataFrame],
         weight_column: str,
         target_column: str = 'variance_pct'
     ) -> Dict[str, Any]:
@@ -103,7 +114,7 @@ class EnhancedRecalibrationService:
 
     def find_similar_cases(
         self,
-        claims_data: List[Dict],
+        claims_data: Union[List[Dict], pd.DataFrame],
         target_claim: Dict,
         similarity_factors: List[str] = None,
         max_results: int = 10
@@ -174,7 +185,7 @@ class EnhancedRecalibrationService:
 
     def analyze_recent_performance(
         self,
-        claims_data: List[Dict],
+        claims_data: Union[List[Dict], pd.DataFrame],
         months: int = 12
     ) -> Dict[str, Any]:
         """
@@ -183,7 +194,7 @@ class EnhancedRecalibrationService:
         """
         try:
             df = pd.DataFrame(claims_data)
-            df['claim_date'] = pd.to_datetime(df['claim_date'], errors='coerce')
+            df['claim_date'] = _close_dates(df)
 
             # Filter recent data
             cutoff_date = datetime.now() - timedelta(days=months * 30)
@@ -251,7 +262,7 @@ class EnhancedRecalibrationService:
 
     def suggest_optimal_weights(
         self,
-        claims_data: List[Dict],
+        claims_data: Union[List[Dict], pd.DataFrame],
         current_weights: Dict[str, float],
         keep_factors_constant: Optional[List[str]] = None,
         focus_recent_data: bool = True,
@@ -266,7 +277,7 @@ class EnhancedRecalibrationService:
 
             # Focus on recent data if requested
             if focus_recent_data:
-                df['claim_date'] = pd.to_datetime(df['claim_date'], errors='coerce')
+                df['claim_date'] = _close_dates(df)
                 cutoff_date = datetime.now() - timedelta(days=months * 30)
                 df = df[df['claim_date'] >= cutoff_date].copy()
 
@@ -290,7 +301,7 @@ class EnhancedRecalibrationService:
                         "reason": "Factor marked as constant"
                     }
                 else:
-                    stats_result = self.analyze_weight_statistics(df.to_dict('records'), col)
+                    stats_result = self.analyze_weight_statistics(df, col)
                     if "error" not in stats_result:
                         factor_analysis[col] = {
                             "current_weight": current_weights.get(col, 0.1),
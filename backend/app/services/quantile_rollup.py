@@ -0,0 +1,142 @@
+"""
+Quantile Rollup
+Settlement percentiles for any combination of summary groups, from stored sketches
+
+venue_statistics and the SQLite mv_* tables each have a sketch_<table>
+companion holding one mergeable settlement sketch per group (see
+app.db.quantile_sketch). A rollup filters those rows, optionally regroups
+them by a subset of the group columns, and merges the sketches:
+
+    rollup('mv_venue_analysis', [0.25, 0.5, 0.75], {'state': ['CA']}, ['venue_rating'])
+
+answers "p25 / median / p75 settlement per venue rating in California"
+without reading claims. Groups of up to ~60 claims are stored exactly; larger
+ones are estimated to well under 1% in rank.
+"""
+
+from typing import Any, Dict, List, Optional, Sequence
+import logging
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import bindparam, inspect, text
+
+from app.db.aggregation_builder import SKETCH_SUMMARIES
+from app.db.quantile_sketch import SKETCH_COLUMN, merge_serialized, sketch_table
+from app.db.venue_statistics_builder import GROUP_COLUMNS as VENUE_STATISTICS_GROUPS
+from app.services.data_service_sqlite import data_service_sqlite as data_service
+
+logger = logging.getLogger(__name__)
+
+# Summary tables with sketches, and the group columns a rollup can filter / group by
+SKETCH_SOURCES: Dict[str, List[str]] = {
+    'venue_statistics': list(VENUE_STATISTICS_GROUPS),
+    **SKETCH_SUMMARIES,
+}
+
+DEFAULT_QUANTILES = (0.25, 0.5, 0.75)
+
+
+def quantile_label(fraction: float) -> str:
+    """0.25 -> 'p25', 0.5 -> 'p50', 0.999 -> 'p99.9'"""
+    return f"p{fraction * 100:g}"
+
+
+def _key_value(value: Any) -> Any:
+    """Group key as JSON-friendly Python (NaN / NA -> None, NumPy scalars unwrapped)"""
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    return value.item() if isinstance(value, np.generic) else value
+
+
+class QuantileRollup:
+    """
+    Percentile queries over the sketch_<table> tables
+    Reads through the app engine (settings.DATABASE_URL) unless given another
+    """
+
+    def __init__(self, engine=None):
+        self.engine = engine if engine is not None else data_service.engine
+
+    def sources(self) -> Dict[str, List[str]]:
+        """Sketch sources present in the database, with their group columns"""
+        tables = set(inspect(self.engine).get_table_names())
+        return {source: columns for source, columns in SKETCH_SOURCES.items() if sketch_table(source) in tables}
+
+    def _load(self, source: str, filters: Dict[str, List[Any]]) -> pd.DataFrame:
+        columns = SKETCH_SOURCES[source]
+        conditions, params = [], {}
+        for i, (column, values) in enumerate(filters.items()):
+            conditions.append(f'"{column}" IN :f{i}')
+            params[f"f{i}"] = list(values)
+
+        query = f"""
+            SELECT {', '.join(f'"{c}"' for c in columns)}, claim_count, {SKETCH_COLUMN}
+            FROM {sketch_table(source)}
+            {'WHERE ' + ' AND '.join(conditions) if conditions else ''}
+        """
+        statement = text(query).bindparams(*[bindparam(name, expanding=True) for name in params])
+        with self.engine.connect() as conn:
+            return pd.read_sql_query(statement, conn, params=params)
+
+    def rollup(
+        self,
+        source: str,
+        quantiles: Sequence[float] = DEFAULT_QUANTILES,
+        filters: Optional[Dict[str, List[Any]]] = None,
+        group_by: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Percentiles of settlement over the groups of `source` matching `filters`
+        filters: {group column: allowed values}; group_by: group columns to
+        report separately (none = one merged answer for everything matched)
+        """
+        if source not in SKETCH_SOURCES:
+            raise ValueError(f"Unknown sketch source '{source}'; expected one of {', '.join(SKETCH_SOURCES)}")
+        filters = filters or {}
+        group_by = group_by or []
+        unknown = [c for c in list(filters) + group_by if c not in SKETCH_SOURCES[source]]
+        if unknown:
+            raise ValueError(
+                f"Unknown group column(s) for {source}: {', '.join(unknown)}; "
+                f"expected {', '.join(SKETCH_SOURCES[source])}"
+            )
+        quantiles = [float(q) for q in quantiles]
+        if any(not 0 <= q <= 1 for q in quantiles):
+            raise ValueError("Quantiles must be between 0 and 1")
+
+        rows = self._load(source, filters)
+        labels = [quantile_label(q) for q in quantiles]
+
+        def merged(frame: pd.DataFrame) -> Dict[str, Any]:
+            sketch = merge_serialized(frame[SKETCH_COLUMN])
+            values = sketch.quantiles(quantiles)
+            return {
+                "claim_count": int(frame['claim_count'].sum()),
+                "settled_count": sketch.count,
+                "groups_merged": len(frame),
+                "percentiles": {
+                    label: None if np.isnan(value) else round(value, 2)
+                    for label, value in zip(labels, values)
+                }
+            }
+
+        if group_by:
+            groups = [
+                {**{c: _key_value(v) for c, v in zip(group_by, key)}, **merged(frame)}
+                for key, frame in rows.groupby(group_by, dropna=False, sort=True)
+            ]
+        else:
+            groups = [merged(rows)]
+
+        return {
+            "source": source,
+            "filters": filters,
+            "group_by": group_by,
+            "quantiles": quantiles,
+            "groups": groups
+        }
+
+
+# Singleton instance
+quantile_rollup = QuantileRollup()
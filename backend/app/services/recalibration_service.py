@@ -1,6 +1,6 @@
 import numpy as np
 import pandas as pd
-from typing import Dict, List, Any, Tuple
+from typing import Dict, List, Any, Tuple, Union
 import logging
 from scipy.optimize import minimize
 
@@ -22,7 +22,7 @@ class RecalibrationService:
 
     def calculate_prediction_with_weights(
         self,
-        claims: List[Dict[str, Any]],
+        claims: Union[List[Dict[str, Any]], pd.DataFrame],
         weights: Dict[str, float]
     ) -> np.ndarray:
         """Calculate predictions using given weights"""
@@ -164,7 +164,7 @@ class RecalibrationService:
 
     def perform_sensitivity_analysis(
         self,
-        claims: List[Dict[str, Any]],
+        claims: Union[List[Dict[str, Any]], pd.DataFrame],
         base_weights: Dict[str, float],
         perturbation: float = 0.1
     ) -> Dict[str, Any]:
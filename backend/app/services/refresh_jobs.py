@@ -0,0 +1,310 @@
+"""
+Refresh Job Manager
+Runs materialized view refreshes in the background, one at a time across all workers
+
+POST /aggregation/refresh-cache used to hold the request open for the whole
+refresh, and nothing stopped two refreshes from overlapping. Submitting now
+returns a job id at once, and a request made while a job is queued or running
+joins that job instead of starting another one. A full rebuild requested while
+an incremental refresh is running is queued behind it (at most one job waits).
+
+Every uvicorn worker shares the same jobs, through DATA_DIR/refresh_jobs:
+- jobs.json holds the job history plus the running / queued job ids; it is
+  only read and rewritten under state.lock
+- run.lock is held by whichever process is executing a refresh, so refreshes
+  never overlap; a worker that finds a queued job waits on it, then runs the
+  job unless another worker got there first
+- a job marked running while nobody holds run.lock belonged to a worker that
+  died mid-refresh and is marked failed
+
+GET /refresh-jobs/{id} therefore answers the same on every worker.
+"""
+
+import json
+import os
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+import logging
+
+from app.core.config import settings
+from app.utils.file_lock import FileLock, lock_is_free
+
+logger = logging.getLogger(__name__)
+
+STATE_FILE = "jobs.json"
+STATE_LOCK = "state.lock"
+RUN_LOCK = "run.lock"
+
+
+def _run_refresh(full: bool, progress: Callable) -> bool:
+    """Refresh the views, then drop this worker's in-memory copies of the data"""
+    from app.db.materialized_views import refresh_all_materialized_views
+    from app.services.data_service_sqlite import data_service_sqlite as data_service
+
+    success = refresh_all_materialized_views(full=full, progress=progress)
+    if not success:
+        # Nothing new to publish - keep the current snapshot and venue shift windows
+        return False
+
+    # Release the in-memory claims copy and cached counts now rather than on next access
+    data_service.claims_store.invalidate()
+    data_service.count_cache.invalidate()
+
+    # Publish the new claims snapshot so every worker maps it instead of reading the table
+    try:
+        data_service.claims_store.warm()
+    except Exception as e:
+        logger.warning(f"Claims snapshot build after refresh failed: {str(e)}")
+
+    # Precompute venue shift recommendations for the common analysis windows
+    from app.services.venue_shift_snapshots import venue_shift_snapshots
+
+    progress('venue_shift_snapshots', 'running')
+    try:
+        progress('venue_shift_snapshots', 'done', venue_shift_snapshots.rebuild())
+    except Exception as e:
+        # Windows are then computed on first request instead
+        logger.warning(f"Venue shift snapshot rebuild after refresh failed: {str(e)}")
+        progress('venue_shift_snapshots', 'skipped', str(e))
+    return success
+
+
+class RefreshJobManager:
+    """
+    Cross-process queue of refresh jobs with coalescing and per-step progress
+    """
+
+    def __init__(
+        self,
+        refresh_fn: Callable[[bool, Callable], bool] = _run_refresh,
+        max_history: int = 50,
+        state_dir: Optional[str] = None
+    ):
+        self.refresh_fn = refresh_fn
+        self.max_history = max_history
+        self.state_dir = Path(state_dir or Path(settings.DATA_DIR) / "refresh_jobs")
+
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition()
+        self._pending = False
+        self._worker: Optional[threading.Thread] = None
+
+    def submit(self, full: bool = False) -> Tuple[Dict[str, Any], bool]:
+        """
+        Enqueue a refresh, or join the job that already covers it
+        Returns (job snapshot, coalesced)
+        """
+        with self._state() as state:
+            jobs = state['jobs']
+
+            # A queued job has not started yet, so it will see every change made so far
+            if state['queued'] is not None:
+                job = jobs[state['queued']]
+                job['full'] = job['full'] or full
+                job['requests'] += 1
+                result = self._snapshot(job), True
+            elif state['running'] is not None and (jobs[state['running']]['full'] or not full):
+                job = jobs[state['running']]
+                job['requests'] += 1
+                return self._snapshot(job), True
+            else:
+                job = self._new_job(state, full)
+                state['queued'] = job['id']
+                result = self._snapshot(job), False
+
+        # Whichever worker gets the run lock first executes the queued job
+        self._ensure_worker()
+        return result
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._state(write=False) as state:
+            job = state['jobs'].get(job_id)
+            return self._snapshot(job) if job else None
+
+    def list_jobs(self, limit: int = 20) -> list:
+        """Most recent jobs first"""
+        with self._state(write=False) as state:
+            return [self._snapshot(job) for job in reversed(list(state['jobs'].values()))][:limit]
+
+    def active_job(self) -> Optional[Dict[str, Any]]:
+        with self._state(write=False) as state:
+            job_id = state['running'] or state['queued']
+            return self._snapshot(state['jobs'][job_id]) if job_id else None
+
+    @contextmanager
+    def _state(self, write: bool = True) -> Iterator[Dict[str, Any]]:
+        """Shared job state, locked against every thread and process for the duration"""
+        with self._lock, FileLock(self.state_dir / STATE_LOCK):
+            state = self._read_state()
+            reaped = self._reap(state)
+            yield state
+            if write or reaped:
+                self._write_state(state)
+
+    def _read_state(self) -> Dict[str, Any]:
+        try:
+            state = json.loads((self.state_dir / STATE_FILE).read_text())
+            return {'jobs': dict(state['jobs']), 'running': state.get('running'), 'queued': state.get('queued')}
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Unreadable refresh job state, starting afresh: {str(e)}")
+        return {'jobs': {}, 'running': None, 'queued': None}
+
+    def _write_state(self, state: Dict[str, Any]) -> None:
+        # Write-then-rename so a reader never sees a partial file
+        path = self.state_dir / STATE_FILE
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_path.write_text(json.dumps({
+            'jobs': list(state['jobs'].items()),
+            'running': state['running'],
+            'queued': state['queued'],
+        }, default=str))
+        os.replace(tmp_path, path)
+
+    def _reap(self, state: Dict[str, Any]) -> bool:
+        """Fail a running job whose worker is gone (nobody holds the run lock); True if one was"""
+        job_id = state['running']
+        if job_id is None or lock_is_free(self.state_dir / RUN_LOCK) is not True:
+            return False
+
+        job = state['jobs'].get(job_id)
+        state['running'] = None
+        if job is not None:
+            logger.warning(f"Refresh job {job_id} was abandoned by its worker")
+            self._finish(job, "Refresh worker exited before the job finished")
+        return True
+
+    def _new_job(self, state: Dict[str, Any], full: bool) -> Dict[str, Any]:
+        jobs = state['jobs']
+        job = {
+            'id': uuid.uuid4().hex,
+            'status': 'queued',
+            'full': full,
+            'requests': 1,
+            'created_at': datetime.now().isoformat(),
+            'started_at': None,
+            'finished_at': None,
+            'duration_seconds': None,
+            'steps': {},
+            'error': None,
+        }
+        jobs[job['id']] = job
+
+        # Forget the oldest finished jobs
+        while len(jobs) > self.max_history:
+            oldest = next(iter(jobs))
+            if oldest in (state['running'], state['queued']):
+                break
+            del jobs[oldest]
+        return job
+
+    def _ensure_worker(self) -> None:
+        with self._wakeup:
+            self._pending = True
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._work, name="refresh-jobs", daemon=True)
+                self._worker.start()
+            self._wakeup.notify()
+
+    def _work(self) -> None:
+        while True:
+            with self._wakeup:
+                while not self._pending:
+                    self._wakeup.wait()
+                self._pending = False
+
+            # Blocks while a refresh runs in any process
+            with FileLock(self.state_dir / RUN_LOCK):
+                job = self._start_queued()
+                if job is not None:
+                    self._execute(job)
+
+    def _start_queued(self) -> Optional[Dict[str, Any]]:
+        """Move the queued job (if another worker has not already taken it) to running"""
+        with self._state() as state:
+            job_id = state['queued']
+            if job_id is None:
+                return None
+            job = state['jobs'][job_id]
+            state['queued'] = None
+            state['running'] = job_id
+            job['status'] = 'running'
+            job['started_at'] = datetime.now().isoformat()
+            job['pid'] = os.getpid()
+            return dict(job)
+
+    def _execute(self, job: Dict[str, Any]) -> None:
+        job_id = job['id']
+        start_time = datetime.now()
+        try:
+            success = self.refresh_fn(
+                job['full'], lambda step, state, detail=None: self._progress(job_id, step, state, detail)
+            )
+            error = None if success else "Failed to refresh materialized views"
+        except Exception as e:
+            logger.error(f"Refresh job {job_id} failed: {str(e)}")
+            error = str(e)
+
+        with self._state() as state:
+            job = state['jobs'].get(job_id)
+            if job is not None:
+                self._finish(job, error, start_time)
+            if state['running'] == job_id:
+                state['running'] = None
+
+        if job is not None:
+            logger.info(f"Refresh job {job_id} {job['status']} in {job['duration_seconds']}s")
+
+    @staticmethod
+    def _finish(job: Dict[str, Any], error: Optional[str], start_time: Optional[datetime] = None) -> None:
+        end_time = datetime.now()
+        if start_time is None and job['started_at']:
+            start_time = datetime.fromisoformat(job['started_at'])
+        job['status'] = 'failed' if error else 'succeeded'
+        job['error'] = error
+        job['finished_at'] = end_time.isoformat()
+        job['duration_seconds'] = round((end_time - start_time).total_seconds(), 2) if start_time else None
+        if error:
+            for step in job['steps'].values():
+                if step['status'] == 'running':
+                    step['status'] = 'failed'
+
+    def _progress(self, job_id: str, step: str, state: str, detail: Any = None) -> None:
+        with self._state() as shared:
+            job = shared['jobs'].get(job_id)
+            if job is None:
+                return
+            entry = job['steps'].setdefault(step, {
+                'name': step, 'status': 'pending', 'started_at': None, 'duration_seconds': None
+            })
+            now = datetime.now()
+            if state == 'running':
+                entry['started_at'] = now.isoformat()
+            elif state == 'done' and entry['started_at']:
+                started = datetime.fromisoformat(entry['started_at'])
+                entry['duration_seconds'] = round((now - started).total_seconds(), 2)
+            entry['status'] = state
+            if detail is not None:
+                entry['detail'] = detail
+
+    def _snapshot(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        """Copy of a job for the API, with overall progress"""
+        steps = [dict(step) for step in job['steps'].values()]
+        finished = sum(1 for step in steps if step['status'] in ('done', 'skipped'))
+        snapshot = {key: value for key, value in job.items() if key != 'steps'}
+        snapshot['steps'] = steps
+        snapshot['progress'] = {
+            'completed_steps': finished,
+            'total_steps': len(steps),
+            'current_step': next((step['name'] for step in steps if step['status'] == 'running'), None),
+        }
+        return snapshot
+
+
+# Singleton instance
+refresh_jobs = RefreshJobManager()
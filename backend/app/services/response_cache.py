@@ -0,0 +1,203 @@
+"""
+Response Body Cache
+Two-tier cache of serialized, gzip-compressed JSON response bodies
+
+Tier 1 is an in-process LRU bounded by total compressed bytes; tier 2 is an
+optional directory of .gz files so a restarted worker starts warm. Both tiers
+belong to one dataset version: when get_data_version() moves on, the memory
+tier is emptied and the files of older versions are deleted. Nothing expires
+otherwise - the data cannot change without the version being bumped.
+
+A body is only as current as what the endpoint read, so layers underneath
+that may answer with data of an older version (the aggregate cache during
+stale-while-revalidate) call mark_response_stale() and the body is not stored.
+"""
+
+import gzip
+import hashlib
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Dict, Optional
+import logging
+
+from app.core.config import settings
+from app.db.data_version import get_data_version
+
+logger = logging.getLogger(__name__)
+
+COMPRESS_LEVEL = 6
+
+# Set by CachedRoute around an endpoint call: {'stale': reason or None}
+_response_state: ContextVar[Optional[Dict[str, Any]]] = ContextVar('response_state', default=None)
+
+
+def compress_body(body: bytes) -> bytes:
+    """gzip a response body (mtime fixed so equal bodies compress to equal bytes)"""
+    return gzip.compress(body, compresslevel=COMPRESS_LEVEL, mtime=0)
+
+
+def track_response_state() -> Dict[str, Any]:
+    """Start tracking the response built in the current context; returns its state"""
+    state = {'stale': None}
+    _response_state.set(state)
+    return state
+
+
+def mark_response_stale(reason: str) -> None:
+    """The response being built carries data older than the dataset version - do not cache it"""
+    state = _response_state.get()
+    if state is not None:
+        state['stale'] = reason
+
+
+class ResponseCache:
+    """
+    Byte-bounded LRU of compressed response bodies with an optional disk tier
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, disk_dir: Optional[str] = None):
+        self.max_bytes = max_bytes
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._bytes = 0
+        self._version: Optional[int] = None
+        self.stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0}
+
+    @staticmethod
+    def make_key(method: str, path: str, query_params) -> str:
+        """Key for a request: method, path and query params in sorted order"""
+        query = "&".join(f"{key}={value}" for key, value in sorted(query_params.multi_items()))
+        return f"{method} {path}?{query}"
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Compressed body for a key from memory, then disk; None on a miss"""
+        with self._lock:
+            version = self._check_version()
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+                self.stats['memory_hits'] += 1
+                return body
+
+        path = self._disk_path(version, key)
+        if path is not None:
+            try:
+                body = path.read_bytes()
+            except FileNotFoundError:
+                body = None
+            except OSError as e:
+                logger.warning(f"Could not read cached response {path.name}: {str(e)}")
+                body = None
+
+            if body is not None:
+                with self._lock:
+                    if self._check_version() == version:
+                        self._remember(key, body)
+                    self.stats['disk_hits'] += 1
+                return body
+
+        with self._lock:
+            self.stats['misses'] += 1
+        return None
+
+    def put(self, key: str, body: bytes, version: int) -> Optional[bytes]:
+        """
+        Compress and store a response body computed for `version`
+        Returns the compressed body, or None if the version changed meanwhile
+        """
+        compressed = compress_body(body)
+
+        with self._lock:
+            if self._check_version() != version:
+                return None
+            self._remember(key, compressed)
+            self.stats['stores'] += 1
+
+        path = self._disk_path(version, key)
+        if path is not None:
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                # Write-then-rename so a concurrent reader never sees a partial file
+                tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+                tmp_path.write_bytes(compressed)
+                os.replace(tmp_path, path)
+            except OSError as e:
+                logger.warning(f"Could not write cached response to disk: {str(e)}")
+
+        return compressed
+
+    def clear(self) -> None:
+        """Drop every cached body in both tiers"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._version = None
+        if self.disk_dir is not None:
+            shutil.rmtree(self.disk_dir, ignore_errors=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'data_version': self._version,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'disk_tier': str(self.disk_dir) if self.disk_dir else None,
+                **self.stats,
+            }
+
+    def _remember(self, key: str, compressed: bytes) -> None:
+        """Add to the memory tier, evicting least recently used bodies past max_bytes (lock held)"""
+        if len(compressed) > self.max_bytes:
+            return
+
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= len(previous)
+        self._entries[key] = compressed
+        self._bytes += len(compressed)
+
+        while self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= len(evicted)
+            self.stats['evictions'] += 1
+
+    def _check_version(self) -> int:
+        """Empty the cache if the dataset version moved (lock held); returns the current version"""
+        version = get_data_version()
+        if version != self._version:
+            if self._version is not None:
+                logger.info(f"Dataset version {self._version} -> {version}, dropping cached responses")
+            self._entries.clear()
+            self._bytes = 0
+            self._version = version
+            self._prune_disk(version)
+        return version
+
+    def _disk_path(self, version: int, key: str) -> Optional[Path]:
+        if self.disk_dir is None:
+            return None
+        digest = hashlib.sha256(key.encode('utf-8')).hexdigest()
+        return self.disk_dir / f"v{version}" / f"{digest}.json.gz"
+
+    def _prune_disk(self, version: int) -> None:
+        """Delete disk entries of every other dataset version"""
+        if self.disk_dir is None or not self.disk_dir.exists():
+            return
+        for child in self.disk_dir.iterdir():
+            if child.is_dir() and child.name != f"v{version}":
+                shutil.rmtree(child, ignore_errors=True)
+
+
+# Singleton instance
+response_cache = ResponseCache(
+    max_bytes=settings.RESPONSE_CACHE_MAX_BYTES,
+    disk_dir=(settings.RESPONSE_CACHE_DIR or str(Path(settings.DATA_DIR) / "response_cache"))
+    if settings.RESPONSE_CACHE_DISK else None
+)
@@ -0,0 +1,89 @@
+"""
+Single-Flight Request Coalescing
+Concurrent callers asking for the same key share one in-flight computation
+
+When the dashboard opens, many identical requests arrive within the same
+second and each would load the same columns or run the same aggregation. The
+first caller for a key starts the computation as its own task; callers that
+arrive while it runs await that task instead of starting another. Nothing is
+kept once the task finishes - this is coalescing, not caching.
+
+The computation is shielded, so a caller that disconnects does not cancel it
+for the others. Every caller gets `share(result)` (e.g. a shallow copy) so
+one caller's changes are not visible to another.
+"""
+
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """
+    Per-key coalescing of concurrent async computations, with counters per name
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (event loop id, name, key) -> [task, number of callers]
+        self._flights: Dict[Tuple[int, str, str], list] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    async def do(
+        self,
+        name: str,
+        key: str,
+        fn: Callable[[], Awaitable[Any]],
+        share: Optional[Callable[[Any], Any]] = None
+    ) -> Any:
+        """
+        Run fn() for (name, key), or join the run already in flight
+        name groups the metrics (e.g. 'claims_frame'); key identifies identical requests
+        """
+        loop = asyncio.get_running_loop()
+        flight_key = (id(loop), name, key)
+
+        with self._lock:
+            stats = self._stats.setdefault(name, {
+                'calls': 0, 'executions': 0, 'coalesced': 0, 'errors': 0, 'largest_group': 0
+            })
+            stats['calls'] += 1
+
+            flight = self._flights.get(flight_key)
+            if flight is not None:
+                flight[1] += 1
+                stats['coalesced'] += 1
+                stats['largest_group'] = max(stats['largest_group'], flight[1])
+            else:
+                stats['executions'] += 1
+                flight = [asyncio.ensure_future(fn()), 1]
+                self._flights[flight_key] = flight
+                flight[0].add_done_callback(lambda task: self._finish(flight_key, name, task))
+
+        result = await asyncio.shield(flight[0])
+        return share(result) if share else result
+
+    def _finish(self, flight_key: Tuple[int, str, str], name: str, task: asyncio.Task) -> None:
+        with self._lock:
+            self._flights.pop(flight_key, None)
+            if not task.cancelled() and task.exception() is not None:
+                self._stats[name]['errors'] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Counters per name plus computations currently in flight"""
+        with self._lock:
+            in_flight: Dict[str, int] = {}
+            for (_, name, _), _flight in self._flights.items():
+                in_flight[name] = in_flight.get(name, 0) + 1
+
+            return {
+                name: {
+                    **counters,
+                    'in_flight': in_flight.get(name, 0),
+                    'coalesced_pct': round(counters['coalesced'] / counters['calls'] * 100, 1) if counters['calls'] else 0.0
+                }
+                for name, counters in self._stats.items()
+            }
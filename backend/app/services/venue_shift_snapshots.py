@@ -0,0 +1,220 @@
+"""
+Venue Shift Snapshots
+Stored /aggregation/venue-shift-analysis responses, one per analysis window
+
+The analysis groups the claims of the window by county and venue on every
+call, yet its answer only changes when claims or venue_statistics change.
+Responses are kept in the venue_shift_snapshots table next to
+venue_statistics, tagged with the dataset version they were computed from
+and the first close date of their window (windows end today):
+
+- the common windows (SNAPSHOT_WINDOWS) are rebuilt right after a refresh
+- any other window is computed on first request and stored
+- a row from an older dataset version, or one whose window start is not
+  today's (the day has moved on), is recomputed on the next request
+
+Because rows live in the database, every worker process serves the same
+snapshot and a restarted worker starts warm.
+"""
+
+import asyncio
+import json
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional, Tuple
+import logging
+
+from sqlalchemy import inspect
+
+from app.api.endpoints.aggregation_optimized_venue_shift import compute_venue_shift_analysis, window_start
+from app.db.data_version import get_data_version
+from app.db.schema import VenueShiftSnapshot, get_session
+from app.services.data_service_sqlite import data_service_sqlite as data_service
+
+logger = logging.getLogger(__name__)
+
+# Analysis windows (months) precomputed at refresh time
+SNAPSHOT_WINDOWS = (1, 3, 6, 12, 24)
+
+
+class VenueShiftSnapshots:
+    """
+    Venue shift responses per window, stored in venue_shift_snapshots
+    Reads and writes through the app engine (settings.DATABASE_URL) unless given another
+    """
+
+    def __init__(self, engine=None, windows: Iterable[int] = SNAPSHOT_WINDOWS):
+        self.engine = engine if engine is not None else data_service.engine
+        self.windows = tuple(windows)
+
+        self._table_ready = False
+        self.stats = {'hits': 0, 'misses': 0, 'rebuilds': 0, 'errors': 0}
+
+    async def get_analysis(self, months: int) -> Dict[str, Any]:
+        """Venue shift response for a window; concurrent requests for one window share a computation"""
+        loop = asyncio.get_event_loop()
+        return await data_service.flights.do(
+            'venue_shift_snapshot', str(months),
+            lambda: loop.run_in_executor(None, self.get, months)
+        )
+
+    def get(self, months: int) -> Dict[str, Any]:
+        """Stored response for the current dataset version and window, computing and storing it when missing"""
+        version = get_data_version()
+        cutoff = window_start(months)
+
+        try:
+            snapshot = self._load(months)
+        except Exception as e:
+            # A broken snapshot table must never take the endpoint down with it
+            logger.error(f"Error reading venue shift snapshot for {months} months: {str(e)}")
+            self.stats['errors'] += 1
+            snapshot = None
+
+        if snapshot is not None and (snapshot['data_version'], snapshot['window_start']) == (version, cutoff):
+            self.stats['hits'] += 1
+            return snapshot['data']
+
+        self.stats['misses'] += 1
+        data = self._compute(months, cutoff)
+        try:
+            self._store(months, version, cutoff, data)
+        except Exception as e:
+            logger.error(f"Error writing venue shift snapshot for {months} months: {str(e)}")
+            self.stats['errors'] += 1
+        return data
+
+    def rebuild(self, force: bool = False) -> Dict[int, int]:
+        """
+        Recompute the snapshot of every common window for the current dataset version
+        Windows already at that version and window start are kept unless force=True; stored
+        on-demand windows of older versions are dropped.
+        Returns {months: number of counties analyzed} for the windows rebuilt
+        """
+        version = get_data_version()
+        current = {} if force else self._versions()
+
+        rebuilt = {}
+        for months in self.windows:
+            cutoff = window_start(months)
+            if current.get(months) == (version, cutoff):
+                continue
+            data = self._compute(months, cutoff)
+            self._store(months, version, cutoff, data)
+            rebuilt[months] = data['summary']['total_counties_analyzed']
+
+        removed = self._drop_stale(version)
+        self.stats['rebuilds'] += 1
+        logger.info(
+            f"Venue shift snapshots at data version {version}: rebuilt {sorted(rebuilt)}, "
+            f"dropped {removed} stale"
+        )
+        return rebuilt
+
+    def _compute(self, months: int, cutoff: str) -> Dict[str, Any]:
+        with self.engine.connect() as conn:
+            return compute_venue_shift_analysis(conn, months, cutoff)
+
+    def _ensure_table(self) -> None:
+        if not self._table_ready:
+            table = VenueShiftSnapshot.__table__
+            inspector = inspect(self.engine)
+            if inspector.has_table(table.name):
+                # Snapshots are recomputable - a table from before window_start is simply replaced
+                existing = {column['name'] for column in inspector.get_columns(table.name)}
+                if 'window_start' not in existing:
+                    table.drop(self.engine)
+            table.create(self.engine, checkfirst=True)
+            self._table_ready = True
+
+    def _load(self, months: int) -> Optional[Dict[str, Any]]:
+        self._ensure_table()
+        session = get_session(self.engine)
+        try:
+            row = session.query(VenueShiftSnapshot).filter(VenueShiftSnapshot.months == months).first()
+            if row is None or not row.data_json:
+                return None
+            return {
+                'data_version': row.data_version,
+                'window_start': row.window_start,
+                'data': json.loads(row.data_json)
+            }
+        finally:
+            session.close()
+
+    def _versions(self) -> Dict[int, Tuple[int, Optional[str]]]:
+        """{months: (data_version, window_start)} of every stored snapshot"""
+        self._ensure_table()
+        session = get_session(self.engine)
+        try:
+            rows = session.query(
+                VenueShiftSnapshot.months, VenueShiftSnapshot.data_version, VenueShiftSnapshot.window_start
+            ).all()
+            return {months: (version, cutoff) for months, version, cutoff in rows}
+        finally:
+            session.close()
+
+    def _store(self, months: int, version: int, cutoff: str, data: Dict[str, Any]) -> None:
+        self._ensure_table()
+        session = get_session(self.engine)
+        try:
+            row = session.query(VenueShiftSnapshot).filter(VenueShiftSnapshot.months == months).first()
+            if row is None:
+                row = VenueShiftSnapshot(months=months)
+                session.add(row)
+            row.data_version = version
+            row.window_start = cutoff
+            row.precomputed = months in self.windows
+            row.data_json = json.dumps(data)
+            row.created_at = datetime.now()
+            session.commit()
+        finally:
+            session.close()
+
+    def _drop_stale(self, version: int) -> int:
+        self._ensure_table()
+        session = get_session(self.engine)
+        try:
+            removed = session.query(VenueShiftSnapshot).filter(
+                VenueShiftSnapshot.data_version != version
+            ).delete(synchronize_session=False)
+            session.commit()
+            return removed
+        finally:
+            session.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for this process plus the stored windows"""
+        windows = []
+        try:
+            self._ensure_table()
+            session = get_session(self.engine)
+            try:
+                rows = session.query(
+                    VenueShiftSnapshot.months, VenueShiftSnapshot.data_version, VenueShiftSnapshot.window_start,
+                    VenueShiftSnapshot.precomputed, VenueShiftSnapshot.created_at
+                ).order_by(VenueShiftSnapshot.months).all()
+                windows = [
+                    {
+                        'months': months,
+                        'data_version': data_version,
+                        'window_start': cutoff,
+                        'precomputed': bool(precomputed),
+                        'created_at': created_at.isoformat() if created_at else None
+                    }
+                    for months, data_version, cutoff, precomputed, created_at in rows
+                ]
+            finally:
+                session.close()
+        except Exception as e:
+            logger.error(f"Error reading venue shift snapshot stats: {str(e)}")
+
+        return {
+            'precomputed_windows': list(self.windows),
+            'data_version': get_data_version(),
+            'snapshots': windows,
+            **self.stats,
+        }
+
+
+# Singleton instance
+venue_shift_snapshots = VenueShiftSnapshots()
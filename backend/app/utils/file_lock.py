@@ -0,0 +1,72 @@
+"""
+Cross-process file locks
+Exclusive advisory locks (flock) on a file, shared by every process on the host
+
+Used where several uvicorn workers or standalone scripts must not do the same
+work at once: building the claims snapshot, running a view refresh. Each
+FileLock opens its own file description, so two FileLocks on one path also
+exclude each other within a process. Without fcntl (Windows) locking is a
+no-op; PROCESS_LOCKS tells callers whether they can rely on it.
+"""
+
+from pathlib import Path
+from typing import Optional, Union
+
+try:
+    import fcntl
+except ImportError:  # Windows: nothing is serialized across processes
+    fcntl = None
+
+PROCESS_LOCKS = fcntl is not None
+
+
+class FileLock:
+    """Exclusive advisory lock on a file, shared by all processes on the host"""
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self._file = None
+
+    def acquire(self, blocking: bool = True) -> bool:
+        """Take the lock; with blocking=False returns False instead of waiting"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, 'a')
+        if fcntl is not None:
+            flags = fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB
+            try:
+                fcntl.flock(self._file.fileno(), flags)
+            except BlockingIOError:
+                self._file.close()
+                self._file = None
+                return False
+        return True
+
+    def release(self) -> None:
+        if self._file is None:
+            return
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        self._file.close()
+        self._file = None
+
+    @property
+    def held(self) -> bool:
+        return self._file is not None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+def lock_is_free(path: Union[str, Path]) -> Optional[bool]:
+    """Whether nobody holds the lock on `path` right now (None when locks are unavailable)"""
+    if not PROCESS_LOCKS:
+        return None
+    probe = FileLock(path)
+    if probe.acquire(blocking=False):
+        probe.release()
+        return True
+    return False
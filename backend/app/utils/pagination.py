@@ -0,0 +1,143 @@
+"""
+Keyset (seek) pagination helpers
+Pages through a query by remembering the last row's (sort value, id)
+instead of skipping OFFSET rows, so every page costs the same.
+
+Rows are ordered by (sort column, id) in the requested direction, with the
+rows whose sort value is NULL as a trailing segment ordered by id alone.
+Each segment is one index range: the non-NULL part is a row-value seek
+(sort column, id) > (value, id) on the (sort column, id) index, scanned
+forwards or backwards; the NULL part is a seek on id. A single
+ORDER BY ... NULLS LAST query cannot do that everywhere - SQLite indexes
+sort NULLs first, so it scans the index from the start on every page.
+"""
+
+import base64
+import json
+from typing import Any, List, Optional, Tuple
+
+from sqlalchemy import and_, tuple_
+
+# Sort fields that have a matching (column, id) composite index
+KEYSET_SORT_FIELDS = ('id', 'CLAIMID', 'CLAIMCLOSEDDATE', 'DOLLARAMOUNTHIGH', 'variance_pct')
+
+
+def encode_cursor(sort_by: str, sort_order: str, value: Any, row_id: int) -> str:
+    """Build an opaque continuation token for the row after which the next page starts"""
+    payload = {"s": sort_by, "o": sort_order, "v": value, "id": row_id}
+    raw = json.dumps(payload, separators=(',', ':'), default=str).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str, sort_by: str, sort_order: str) -> Tuple[Any, int]:
+    """
+    Decode a continuation token into (sort value, id)
+    Raises ValueError if the token is malformed or was issued for a different sort
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        value, row_id = payload["v"], int(payload["id"])
+        issued_for = (payload["s"], payload["o"])
+    except (ValueError, TypeError, KeyError) as e:
+        raise ValueError(f"Invalid pagination cursor: {str(e)}")
+
+    if issued_for != (sort_by, sort_order):
+        raise ValueError("Pagination cursor does not match the requested sort")
+    return value, row_id
+
+
+def keyset_order_by(model, sort_by: str, sort_order: str) -> List:
+    """ORDER BY clauses for the non-NULL segment of a keyset page over (sort column, id)"""
+    id_column = model.id
+    if sort_by == 'id':
+        return [id_column.desc() if sort_order == 'desc' else id_column.asc()]
+
+    column = getattr(model, sort_by)
+    if sort_order == 'desc':
+        return [column.desc(), id_column.desc()]
+    return [column.asc(), id_column.asc()]
+
+
+def keyset_predicate(model, sort_by: str, sort_order: str, value: Any, row_id: int):
+    """
+    WHERE clause selecting the rows of the cursor's segment that come after (value, row_id)
+    A NULL value means the cursor is inside the trailing NULL segment
+    """
+    id_column = model.id
+    after_id = id_column < row_id if sort_order == 'desc' else id_column > row_id
+    if sort_by == 'id':
+        return after_id
+
+    column = getattr(model, sort_by)
+    if value is None:
+        return and_(column.is_(None), after_id)
+
+    key = tuple_(column, id_column)
+    return key < tuple_(value, row_id) if sort_order == 'desc' else key > tuple_(value, row_id)
+
+
+def _null_segment(query, model, sort_by: str, sort_order: str):
+    """Rows whose sort value is NULL, in id order"""
+    id_column = model.id
+    return query.filter(getattr(model, sort_by).is_(None)).order_by(
+        id_column.desc() if sort_order == 'desc' else id_column.asc()
+    )
+
+
+def keyset_page(
+    query,
+    model,
+    page_size: int,
+    sort_by: str = 'id',
+    sort_order: str = 'asc',
+    cursor: Optional[str] = None,
+    offset: int = 0
+) -> Tuple[List, Optional[str]]:
+    """
+    Fetch one page of ORM objects after `cursor`
+    Without a cursor, `offset` still allows jumping to an arbitrary page;
+    every page returns a cursor so the client can seek from there on.
+    Returns (rows, next_cursor); next_cursor is None on the last page
+    """
+    limit = page_size + 1
+    value, row_id = decode_cursor(cursor, sort_by, sort_order) if cursor else (None, None)
+
+    if sort_by == 'id':
+        query = query.order_by(*keyset_order_by(model, sort_by, sort_order))
+        if cursor:
+            query = query.filter(keyset_predicate(model, sort_by, sort_order, value, row_id))
+        elif offset:
+            query = query.offset(offset)
+        rows = query.limit(limit).all()
+    elif cursor and value is None:
+        # Already inside the NULL segment
+        rows = _null_segment(query, model, sort_by, sort_order).filter(
+            keyset_predicate(model, sort_by, sort_order, None, row_id)
+        ).limit(limit).all()
+    else:
+        column = getattr(model, sort_by)
+        non_null = query.filter(column.isnot(None)).order_by(*keyset_order_by(model, sort_by, sort_order))
+        if cursor:
+            non_null = non_null.filter(keyset_predicate(model, sort_by, sort_order, value, row_id))
+        elif offset:
+            non_null = non_null.offset(offset)
+        rows = non_null.limit(limit).all()
+
+        # The page runs past the last non-NULL row: continue into the NULL segment
+        if len(rows) < limit:
+            null_offset = 0
+            if not cursor and offset and not rows:
+                # How far the offset reaches past the non-NULL rows
+                null_offset = max(offset - query.filter(column.isnot(None)).count(), 0)
+            nulls = _null_segment(query, model, sort_by, sort_order)
+            if null_offset:
+                nulls = nulls.offset(null_offset)
+            rows += nulls.limit(limit - len(rows)).all()
+
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]
+        next_cursor = encode_cursor(sort_by, sort_order, getattr(last, sort_by), last.id)
+    return rows, next_cursor
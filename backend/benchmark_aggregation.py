@@ -0,0 +1,260 @@
+"""
+Benchmark: real-time /aggregation/aggregated computation
+Compares the original per-group iterrows() loops with the grouped
+aggregation engine on synthetic claims, and checks both produce the
+same payload.
+
+Usage:
+    python benchmark_aggregation.py              # 1,000,000 rows
+    python benchmark_aggregation.py --rows 200000
+"""
+
+import argparse
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.services.aggregation_engine import compute_aggregations
+
+
+def make_claims(rows: int, seed: int = 42) -> pd.DataFrame:
+    """Synthetic claims shaped like the claims store output (categoricals + floats)"""
+    rng = np.random.default_rng(seed)
+
+    counties = [f"County {i}" for i in range(60)]
+    states = ['CA', 'TX', 'FL', 'NY', 'IL', 'PA']
+    # Some counties exist in two states, like real county names do
+    county_idx = rng.integers(0, len(counties), rows)
+    state_idx = (county_idx + rng.integers(0, 2, rows)) % len(states)
+
+    dates = pd.date_range('2019-01-01', '2025-06-30', freq='D').strftime('%Y-%m-%d').to_numpy()
+    closed = dates[rng.integers(0, len(dates), rows)].astype(object)
+    closed[rng.random(rows) < 0.01] = None
+
+    actual = rng.lognormal(10, 1, rows)
+    predicted = actual * rng.normal(1.0, 0.25, rows)
+    variance = (actual - predicted) / predicted * 100
+    variance[rng.random(rows) < 0.02] = np.nan
+
+    def categorical(values):
+        return pd.Categorical(values, categories=sorted(set(v for v in values if v is not None)))
+
+    # Typed close year as filled at ingest (app.db.claim_dates)
+    close_year = pd.array(pd.to_datetime(closed).year, dtype='Int16')
+
+    return pd.DataFrame({
+        'CLAIMID': np.arange(1, rows + 1, dtype=np.int64),
+        'CLAIMCLOSEDDATE': categorical(closed),
+        'close_year': close_year,
+        'CAUTION_LEVEL': categorical(np.array(['Low', 'Medium', 'High'])[rng.integers(0, 3, rows)]),
+        'COUNTYNAME': categorical(np.array(counties)[county_idx]),
+        'VENUESTATE': categorical(np.array(states)[state_idx]),
+        'VENUERATING': categorical(np.array(['Very Conservative', 'Conservative', 'Moderate', 'Liberal', 'Very Liberal'])[rng.integers(0, 5, rows)]),
+        'PRIMARY_INJURYGROUP_CODE': categorical(np.array([f"IG{i:02d}" for i in range(40)])[rng.integers(0, 40, rows)]),
+        'ADJUSTERNAME': categorical(np.array([f"Adjuster {i}" for i in range(300)])[rng.integers(0, 300, rows)]),
+        'DOLLARAMOUNTHIGH': actual,
+        'CAUSATION_HIGH_RECOMMENDATION': predicted,
+        'variance_pct': variance,
+        'RATINGWEIGHT': rng.normal(1.0, 0.1, rows),
+        'SEVERITY_SCORE': rng.normal(5, 2, rows) + variance / 50,
+        'CAUSATION_SCORE': rng.normal(5, 2, rows),
+        'SETTLEMENT_DAYS': rng.integers(10, 900, rows).astype(np.float64),
+    })
+
+
+def legacy_aggregations(df: pd.DataFrame) -> dict:
+    """The real-time path of /aggregation/aggregated before the grouped engine"""
+    df = df.copy(deep=False)
+    df['year'] = pd.to_datetime(df['CLAIMCLOSEDDATE'], errors='coerce').dt.year
+    df['year'] = df['year'].fillna(2024).astype(int)
+
+    current_year = datetime.now().year
+    one_year_ago = current_year - 1
+
+    year_severity = df.groupby(['year', 'CAUTION_LEVEL'], observed=True).agg({
+        'CLAIMID': 'count',
+        'DOLLARAMOUNTHIGH': ['sum', 'mean'],
+        'CAUSATION_HIGH_RECOMMENDATION': ['sum', 'mean'],
+        'variance_pct': 'mean'
+    }).reset_index()
+    year_severity.columns = ['year', 'severity_category', 'claim_count',
+                             'total_actual_settlement', 'avg_actual_settlement',
+                             'total_predicted_settlement', 'avg_predicted_settlement',
+                             'avg_variance_pct']
+    year_severity['overprediction_count'] = 0
+    year_severity['underprediction_count'] = 0
+    year_severity['high_variance_count'] = 0
+    for idx, row in year_severity.iterrows():
+        subset = df[(df['year'] == row['year']) & (df['CAUTION_LEVEL'] == row['severity_category'])]
+        year_severity.at[idx, 'overprediction_count'] = int((subset['variance_pct'] > 0).sum())
+        year_severity.at[idx, 'underprediction_count'] = int((subset['variance_pct'] < 0).sum())
+        year_severity.at[idx, 'high_variance_count'] = int((subset['variance_pct'].abs() >= 15).sum())
+
+    county_year = df.groupby(['COUNTYNAME', 'VENUESTATE', 'year', 'VENUERATING'], observed=True).agg({
+        'CLAIMID': 'count',
+        'DOLLARAMOUNTHIGH': ['sum', 'mean'],
+        'variance_pct': 'mean'
+    }).reset_index()
+    county_year.columns = ['county', 'state', 'year', 'venue_rating', 'claim_count',
+                           'total_settlement', 'avg_settlement', 'avg_variance_pct']
+    county_year['high_variance_count'] = 0
+    county_year['high_variance_pct'] = 0.0
+    county_year['overprediction_count'] = 0
+    county_year['underprediction_count'] = 0
+    for idx, row in county_year.iterrows():
+        subset = df[(df['COUNTYNAME'] == row['county']) & (df['year'] == row['year'])]
+        hvc = int((subset['variance_pct'].abs() >= 15).sum())
+        county_year.at[idx, 'high_variance_count'] = hvc
+        county_year.at[idx, 'high_variance_pct'] = round((hvc / row['claim_count'] * 100) if row['claim_count'] > 0 else 0, 2)
+        county_year.at[idx, 'overprediction_count'] = int((subset['variance_pct'] > 0).sum())
+        county_year.at[idx, 'underprediction_count'] = int((subset['variance_pct'] < 0).sum())
+
+    injury_group = df.groupby(['PRIMARY_INJURYGROUP_CODE', 'CAUTION_LEVEL'], observed=True).agg({
+        'CLAIMID': 'count',
+        'DOLLARAMOUNTHIGH': ['mean', 'sum'],
+        'CAUSATION_HIGH_RECOMMENDATION': 'mean',
+        'variance_pct': 'mean'
+    }).reset_index()
+    injury_group.columns = ['injury_group', 'severity_category', 'claim_count',
+                            'avg_settlement', 'total_settlement', 'avg_predicted',
+                            'avg_variance_pct']
+    injury_group['body_region'] = 'General'
+
+    adjuster_perf = df.groupby('ADJUSTERNAME', observed=True).agg({
+        'CLAIMID': 'count',
+        'DOLLARAMOUNTHIGH': 'mean',
+        'CAUSATION_HIGH_RECOMMENDATION': 'mean',
+        'variance_pct': 'mean'
+    }).reset_index()
+    adjuster_perf.columns = ['adjuster_name', 'claim_count', 'avg_actual_settlement',
+                             'avg_predicted_settlement', 'avg_variance_pct']
+    adjuster_perf['high_variance_count'] = 0
+    adjuster_perf['high_variance_pct'] = 0.0
+    adjuster_perf['overprediction_count'] = 0
+    adjuster_perf['underprediction_count'] = 0
+    for idx, row in adjuster_perf.iterrows():
+        subset = df[df['ADJUSTERNAME'] == row['adjuster_name']]
+        hvc = int((subset['variance_pct'].abs() >= 15).sum())
+        adjuster_perf.at[idx, 'high_variance_count'] = hvc
+        adjuster_perf.at[idx, 'high_variance_pct'] = round((hvc / row['claim_count'] * 100) if row['claim_count'] > 0 else 0, 2)
+        adjuster_perf.at[idx, 'overprediction_count'] = int((subset['variance_pct'] > 0).sum())
+        adjuster_perf.at[idx, 'underprediction_count'] = int((subset['variance_pct'] < 0).sum())
+
+    venue_analysis = df.groupby(['VENUERATING', 'VENUESTATE', 'COUNTYNAME'], observed=True).agg({
+        'CLAIMID': 'count',
+        'DOLLARAMOUNTHIGH': 'mean',
+        'CAUSATION_HIGH_RECOMMENDATION': 'mean',
+        'variance_pct': 'mean',
+        'RATINGWEIGHT': 'mean'
+    }).reset_index()
+    venue_analysis.columns = ['venue_rating', 'state', 'county', 'claim_count',
+                              'avg_settlement', 'avg_predicted', 'avg_variance_pct',
+                              'avg_venue_rating_point']
+    venue_analysis['high_variance_count'] = 0
+    venue_analysis['high_variance_pct'] = 0.0
+    for idx, row in venue_analysis.iterrows():
+        subset = df[(df['VENUERATING'] == row['venue_rating']) & (df['COUNTYNAME'] == row['county'])]
+        hvc = int((subset['variance_pct'].abs() >= 15).sum())
+        venue_analysis.at[idx, 'high_variance_count'] = hvc
+        venue_analysis.at[idx, 'high_variance_pct'] = round((hvc / row['claim_count'] * 100) if row['claim_count'] > 0 else 0, 2)
+
+    numeric_cols = df.select_dtypes(include=[np.number]).columns
+    variance_drivers = []
+    for col in numeric_cols:
+        if col != 'variance_pct' and df[col].notna().sum() > 0:
+            try:
+                corr = df[col].corr(df['variance_pct'])
+                if not pd.isna(corr) and abs(corr) > 0.05:
+                    variance_drivers.append({
+                        'factor_name': col,
+                        'factor_value': 'Varies',
+                        'claim_count': len(df),
+                        'avg_variance_pct': float(df['variance_pct'].mean()),
+                        'contribution_score': float(abs(corr) * 100),
+                        'correlation_strength': 'Strong' if abs(corr) > 0.5 else 'Moderate' if abs(corr) > 0.3 else 'Weak'
+                    })
+            except:
+                pass
+    variance_drivers_sorted = sorted(variance_drivers, key=lambda x: x['contribution_score'], reverse=True)[:30]
+
+    return {
+        "yearSeverity": year_severity.to_dict('records'),
+        "countyYear": county_year.to_dict('records'),
+        "injuryGroup": injury_group.to_dict('records'),
+        "adjusterPerformance": adjuster_perf.to_dict('records'),
+        "venueAnalysis": venue_analysis.to_dict('records'),
+        "varianceDrivers": variance_drivers_sorted,
+        "metadata": {
+            "total_claims": len(df),
+            "recent_year_claims": len(df[df['year'] >= one_year_ago]),
+            "generated_at": datetime.now().isoformat()
+        }
+    }
+
+
+def compare(legacy: dict, engine: dict) -> list:
+    """Return a list of mismatch descriptions (empty when the payloads are identical)"""
+    problems = []
+    for key in ['yearSeverity', 'countyYear', 'injuryGroup', 'adjusterPerformance', 'venueAnalysis']:
+        expected = pd.DataFrame(legacy[key])
+        actual = pd.DataFrame(engine[key])
+        try:
+            pd.testing.assert_frame_equal(actual, expected, check_exact=True)
+        except AssertionError as e:
+            problems.append(f"{key}: {e}")
+
+    if legacy['varianceDrivers'] != engine['varianceDrivers']:
+        problems.append("varianceDrivers differ")
+
+    for field in ['total_claims', 'recent_year_claims']:
+        if legacy['metadata'][field] != engine['metadata'][field]:
+            problems.append(f"metadata.{field} differs")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark real-time aggregation")
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("REAL-TIME AGGREGATION BENCHMARK")
+    print("=" * 70)
+
+    start = time.perf_counter()
+    df = make_claims(args.rows)
+    print(f"\nGenerated {len(df):,} synthetic claims in {time.perf_counter() - start:.1f}s")
+
+    start = time.perf_counter()
+    engine_result = compute_aggregations(df)
+    engine_seconds = time.perf_counter() - start
+    print(f"Grouped engine:      {engine_seconds:8.2f}s")
+
+    start = time.perf_counter()
+    legacy_result = legacy_aggregations(df)
+    legacy_seconds = time.perf_counter() - start
+    print(f"Legacy iterrows():   {legacy_seconds:8.2f}s")
+    print(f"Speedup:             {legacy_seconds / engine_seconds:8.1f}x")
+
+    for key in ['yearSeverity', 'countyYear', 'injuryGroup', 'adjusterPerformance', 'venueAnalysis']:
+        print(f"  {key:<22} {len(engine_result[key]):>6,} groups")
+
+    problems = compare(legacy_result, engine_result)
+    if problems:
+        print("\n[FAIL] Outputs differ:")
+        for problem in problems:
+            print(f"  - {problem}")
+        sys.exit(1)
+
+    print("\n[OK] Outputs are identical")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Benchmark: JSON response serialization and compression
+Compares the previous path for large responses (per-value NaN cleaning,
+FastAPI's jsonable_encoder, then json.dumps in JSONResponse) with
+FastJSONResponse (orjson, NumPy / NaN aware), and measures gzip / brotli
+output size and speed for the encoded body.
+
+Usage:
+    python benchmark_json.py                 # 200,000 claim rows
+    python benchmark_json.py --rows 50000 --repeat 5
+"""
+
+import argparse
+import gzip
+import math
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.api.compression import brotli_available
+from app.api.responses import FastJSONResponse, orjson_available
+
+
+def make_claims(rows: int, seed: int = 42) -> list:
+    """Claim dicts shaped like get_full_claims_data() output, with some NaN / inf"""
+    rng = np.random.default_rng(seed)
+    counties = [f"County {i}" for i in range(60)]
+    injuries = ['Sprain/Strain', 'Fracture', 'Laceration', 'Contusion', 'Herniation']
+
+    settlement = rng.lognormal(10, 1, rows)
+    variance = rng.normal(0, 25, rows)
+    variance[rng.random(rows) < 0.02] = np.nan
+    variance[rng.random(rows) < 0.001] = np.inf
+    severity = rng.uniform(0, 10, rows)
+    days = rng.integers(10, 900, rows)
+
+    claims = []
+    for i in range(rows):
+        claims.append({
+            'id': i + 1,
+            'claim_id': f"CLM-{i + 1:08d}",
+            'CLAIMCLOSEDDATE': f"202{i % 5}-{i % 12 + 1:02d}-{i % 28 + 1:02d}",
+            'COUNTYNAME': counties[i % len(counties)],
+            'VENUESTATE': 'CA',
+            'PRIMARY_INJURY': injuries[i % len(injuries)],
+            'DOLLARAMOUNTHIGH': float(settlement[i]),
+            'CAUSATION_HIGH_RECOMMENDATION': float(settlement[i] * 1.1),
+            'variance_pct': float(variance[i]),
+            'SEVERITY_SCORE': float(severity[i]),
+            'SETTLEMENT_DAYS': int(days[i]),
+            'HASATTORNEY': bool(i % 2),
+        })
+    return claims
+
+
+def clean_claims(claims: list) -> list:
+    """The NaN / inf loop get_full_claims ran before returning"""
+    cleaned_claims = []
+    for claim in claims:
+        cleaned_claim = {}
+        for key, value in claim.items():
+            if isinstance(value, float) and (math.isnan(value) or math.isinf(value)):
+                cleaned_claim[key] = None
+            else:
+                cleaned_claim[key] = value
+        cleaned_claims.append(cleaned_claim)
+    return cleaned_claims
+
+
+def old_path(claims: list) -> bytes:
+    payload = {"claims": clean_claims(claims), "total": len(claims)}
+    return JSONResponse(jsonable_encoder(payload)).body
+
+
+def new_path(claims: list) -> bytes:
+    return FastJSONResponse({"claims": claims, "total": len(claims)}).body
+
+
+def timed(fn, repeat: int):
+    """Best wall time of `repeat` runs and the last result"""
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=200_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"Building {args.rows:,} synthetic claims...")
+    claims = make_claims(args.rows)
+    print(f"orjson: {'yes' if orjson_available() else 'NO (stdlib fallback)'}; "
+          f"brotli: {'yes' if brotli_available() else 'NO'}\n")
+
+    old_seconds, old_body = timed(lambda: old_path(claims), args.repeat)
+    new_seconds, new_body = timed(lambda: new_path(claims), args.repeat)
+
+    def rate(nbytes, seconds):
+        return f"{nbytes / seconds / 1e6:8.1f} MB/s"
+
+    print("Serialization")
+    print(f"  current (clean + jsonable_encoder + json) {old_seconds:7.3f}s  {rate(len(old_body), old_seconds)}  {len(old_body):,} bytes")
+    print(f"  FastJSONResponse                          {new_seconds:7.3f}s  {rate(len(new_body), new_seconds)}  {len(new_body):,} bytes")
+    print(f"  speedup                                   {old_seconds / new_seconds:7.1f}x")
+
+    import json
+    assert json.loads(old_body) == json.loads(new_body), "Payloads differ"
+    print("  payloads identical after parsing: yes\n")
+
+    print("Compression of the encoded body")
+    gzip_seconds, gzipped = timed(lambda: gzip.compress(new_body, compresslevel=6), args.repeat)
+    print(f"  gzip -6     {gzip_seconds:7.3f}s  {rate(len(new_body), gzip_seconds)}  "
+          f"{len(gzipped):,} bytes ({len(new_body) / len(gzipped):.1f}x smaller)")
+    if brotli_available():
+        import brotli
+        br_seconds, br_body = timed(lambda: brotli.compress(new_body, quality=4), args.repeat)
+        print(f"  brotli q4   {br_seconds:7.3f}s  {rate(len(new_body), br_seconds)}  "
+              f"{len(br_body):,} bytes ({len(new_body) / len(br_body):.1f}x smaller)")
+
+
+if __name__ == '__main__':
+    main()
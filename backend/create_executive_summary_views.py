@@ -9,8 +9,16 @@ Comprehensive factor performance analysis with:
 """
 from sqlalchemy import create_engine, text
 import logging
+import sys
 from pathlib import Path
 
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.db.claim_dates import ensure_claim_date_columns
+from app.db.data_version import bump_data_version
+from app.db.shadow_tables import shadow_name, build_shadow_table, drop_shadow_tables, swap_in_shadow_tables
+
 logging.basicConfig(level=logging.INFO, format='%(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
@@ -24,6 +32,11 @@ def create_executive_summary_views():
 
     engine = create_engine(f'sqlite:///{db_path}')
 
+    # Typed close dates (close_year / closed_on) for claims loaded in bulk
+    backfilled = ensure_claim_date_columns(engine)
+    if backfilled:
+        logger.info(f"Backfilled typed close dates for {backfilled:,} claims")
+
     try:
         with engine.connect() as conn:
             logger.info("=" * 80)
@@ -34,24 +47,23 @@ def create_executive_summary_views():
             claim_count = result[0]
             logger.info(f"Processing {claim_count:,} claims...")
 
-            # Drop existing executive summary views
-            logger.info("\nDropping existing executive summary views...")
-            views_to_drop = [
+            # Views are built under shadow names and swapped in at the end,
+            # so the dashboard keeps reading the previous tables meanwhile
+            views = [
                 'mv_executive_summary',
-                'mv_factor_combinations_detailed',
+                'mv_top_variance_factors',
                 'mv_county_comparison',
-                'mv_top_variance_factors'
+                'mv_factor_combinations_detailed'
             ]
-            for view in views_to_drop:
-                conn.execute(text(f"DROP TABLE IF EXISTS {view}"))
-            conn.commit()
-            logger.info("Done")
+            drop_shadow_tables(conn, views)
+
+            # Later views are derived from the freshly built executive summary
+            executive_summary = shadow_name('mv_executive_summary')
 
             # 1. EXECUTIVE SUMMARY - Multi-Factor Analysis
             logger.info("\n[1/4] Creating mv_executive_summary...")
             logger.info("  This shows top variance factors by ALL dimensions...")
-            conn.execute(text("""
-                CREATE TABLE mv_executive_summary AS
+            rows = build_shadow_table(conn, 'mv_executive_summary', """
                 SELECT
                     -- Factor Identification
                     'Severity: ' ||
@@ -78,7 +90,7 @@ def create_executive_summary_views():
                     VENUESTATE as state,
                     IOL as impact_on_life,
                     VERSIONID as version_id,
-                    CAST(strftime('%Y', CLAIMCLOSEDDATE) AS INTEGER) as year,
+                    close_year as year,
 
                     -- Metrics
                     COUNT(*) as claim_count,
@@ -117,15 +129,13 @@ def create_executive_summary_views():
                     year
                 HAVING claim_count >= 3
                 ORDER BY abs_avg_deviation_pct DESC
-            """))
-            rows = conn.execute(text("SELECT COUNT(*) FROM mv_executive_summary")).fetchone()[0]
-            logger.info(f"  Done - Created mv_executive_summary ({rows:,} factor combinations)")
+            """)
+            logger.info(f"  Done - Built mv_executive_summary ({rows:,} factor combinations)")
 
             # 2. TOP VARIANCE FACTORS (Top 10 by category)
             logger.info("\n[2/4] Creating mv_top_variance_factors...")
             logger.info("  This shows top 10 high-variance factors by each dimension...")
-            conn.execute(text("""
-                CREATE TABLE mv_top_variance_factors AS
+            rows = build_shadow_table(conn, 'mv_top_variance_factors', f"""
                 SELECT * FROM (
                     -- Top 10 by Severity Level
                     SELECT
@@ -138,7 +148,7 @@ def create_executive_summary_views():
                         'All' as county,
                         'All' as state,
                         NULL as version_id
-                    FROM mv_executive_summary
+                    FROM {executive_summary}
                     GROUP BY severity_level
                     ORDER BY avg_deviation DESC
                     LIMIT 10
@@ -158,7 +168,7 @@ def create_executive_summary_views():
                         'All' as county,
                         'All' as state,
                         NULL as version_id
-                    FROM mv_executive_summary
+                    FROM {executive_summary}
                     WHERE injury_type IS NOT NULL
                     GROUP BY injury_type
                     ORDER BY avg_deviation DESC
@@ -179,7 +189,7 @@ def create_executive_summary_views():
                         'All' as county,
                         'All' as state,
                         NULL as version_id
-                    FROM mv_executive_summary
+                    FROM {executive_summary}
                     WHERE venue_rating IS NOT NULL
                     GROUP BY venue_rating
                     ORDER BY avg_deviation DESC
@@ -200,7 +210,7 @@ def create_executive_summary_views():
                         'All' as county,
                         'All' as state,
                         NULL as version_id
-                    FROM mv_executive_summary
+                    FROM {executive_summary}
                     WHERE impact_on_life IS NOT NULL
                     GROUP BY impact_on_life
                     ORDER BY avg_deviation DESC
@@ -221,21 +231,19 @@ def create_executive_summary_views():
                         county,
                         state,
                         NULL as version_id
-                    FROM mv_executive_summary
+                    FROM {executive_summary}
                     WHERE county IS NOT NULL
                     GROUP BY county, state
                     ORDER BY avg_deviation DESC
                     LIMIT 10
                 )
-            """))
-            rows = conn.execute(text("SELECT COUNT(*) FROM mv_top_variance_factors")).fetchone()[0]
-            logger.info(f"  Done - Created mv_top_variance_factors ({rows} top factors)")
+            """)
+            logger.info(f"  Done - Built mv_top_variance_factors ({rows} top factors)")
 
             # 3. COUNTY COMPARISON VIEW
             logger.info("\n[3/4] Creating mv_county_comparison...")
             logger.info("  This enables comparing similar factors across counties...")
-            conn.execute(text("""
-                CREATE TABLE mv_county_comparison AS
+            rows = build_shadow_table(conn, 'mv_county_comparison', f"""
                 SELECT
                     -- Matching Factors (for comparison)
                     severity_level,
@@ -269,7 +277,7 @@ def create_executive_summary_views():
                         PARTITION BY severity_level, injury_type, venue_rating, impact_on_life
                     ) as counties_with_same_factors
 
-                FROM mv_executive_summary
+                FROM {executive_summary}
                 WHERE county IS NOT NULL
                   AND claim_count >= 3
                 ORDER BY
@@ -278,15 +286,13 @@ def create_executive_summary_views():
                     venue_rating,
                     impact_on_life,
                     deviation_pct DESC
-            """))
-            rows = conn.execute(text("SELECT COUNT(*) FROM mv_county_comparison")).fetchone()[0]
-            logger.info(f"  Done - Created mv_county_comparison ({rows:,} county factor combos)")
+            """)
+            logger.info(f"  Done - Built mv_county_comparison ({rows:,} county factor combos)")
 
             # 4. FACTOR COMBINATIONS DETAILED (Enhanced version with VersionID)
             logger.info("\n[4/4] Creating mv_factor_combinations_detailed...")
             logger.info("  This is the detailed version with all filters...")
-            conn.execute(text("""
-                CREATE TABLE mv_factor_combinations_detailed AS
+            rows = build_shadow_table(conn, 'mv_factor_combinations_detailed', f"""
                 SELECT
                     factor_combination,
                     severity_level,
@@ -317,15 +323,21 @@ def create_executive_summary_views():
                         ELSE 'Other'
                     END as category
 
-                FROM mv_executive_summary
+                FROM {executive_summary}
                 ORDER BY abs_avg_deviation_pct DESC
                 LIMIT 10000
-            """))
-            rows = conn.execute(text("SELECT COUNT(*) FROM mv_factor_combinations_detailed")).fetchone()[0]
-            logger.info(f"  Done - Created mv_factor_combinations_detailed ({rows:,} rows)")
+            """)
+            logger.info(f"  Done - Built mv_factor_combinations_detailed ({rows:,} rows)")
 
             conn.commit()
 
+            # Replace all live tables in one short transaction
+            swap_in_shadow_tables(conn, views)
+            logger.info("  Done - Swapped in the rebuilt views")
+
+            # Cached responses built from the old tables are now out of date
+            bump_data_version()
+
             # Show summary statistics
             logger.info("\n" + "=" * 80)
             logger.info("EXECUTIVE SUMMARY VIEWS CREATED SUCCESSFULLY!")
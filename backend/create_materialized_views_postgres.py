@@ -7,8 +7,15 @@ from sqlalchemy import create_engine, text
 import logging
 import os
 import sys
+from pathlib import Path
 from dotenv import load_dotenv
 
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.db.aggregation_builder import create_postgres_summary_views, ROLLUP_TABLE, SUMMARY_VIEWS
+from app.db.rollup_maintenance import install_change_capture, CHANGE_LOG_TABLE
+
 # Fix Windows console encoding for Unicode characters
 if sys.platform == "win32":
     import io
@@ -118,208 +125,36 @@ def create_materialized_views():
             logger.info(f"  Body Region: {body_region_col}")
             logger.info(f"  Dollar Amount: {dollaramounthigh_col}")
 
-            # Drop existing materialized views
-            logger.info("\nDropping existing materialized views...")
-            views = [
-                'mv_year_severity', 'mv_county_year', 'mv_injury_group',
-                'mv_adjuster_performance', 'mv_venue_analysis', 'mv_kpi_summary'
-            ]
-
-            for view in views:
-                try:
-                    conn.execute(text(f"DROP MATERIALIZED VIEW IF EXISTS {view}"))
-                    conn.commit()
-                except Exception as e:
-                    logger.warning(f"Could not drop {view}: {e}")
-
-            logger.info("Old views dropped")
-
-            # 1. Year-Severity View
-            logger.info("\nCreating mv_year_severity...")
-            conn.execute(text(f"""
-                CREATE MATERIALIZED VIEW mv_year_severity AS
-                SELECT
-                    CASE
-                        WHEN "{claimcloseddate_col}" ~ '^[0-9]{{1,2}}/[0-9]{{1,2}}/[0-9]{{4}}$' THEN
-                            EXTRACT(YEAR FROM TO_DATE("{claimcloseddate_col}", 'MM/DD/YYYY'))::INTEGER
-                        WHEN "{claimcloseddate_col}" ~ '^[0-9]{{4}}-[0-9]{{1,2}}-[0-9]{{1,2}}' THEN
-                            EXTRACT(YEAR FROM "{claimcloseddate_col}"::DATE)::INTEGER
-                        ELSE 2023
-                    END as year,
-                    COALESCE(NULLIF("{caution_level_col}", ''), 'Unknown') as severity_category,
-                    COUNT(*) as claim_count,
-                    SUM(COALESCE("{dollaramounthigh_col}", 0)) as total_actual_settlement,
-                    SUM(COALESCE("{causation_col}", 0)) as total_predicted_settlement,
-                    AVG(COALESCE("{dollaramounthigh_col}", 0)) as avg_actual_settlement,
-                    AVG(COALESCE("{causation_col}", 0)) as avg_predicted_settlement,
-                    AVG(COALESCE("{variance_col}", 0)) as avg_variance_pct,
-                    AVG(COALESCE("{settlement_days_col}", 0)) as avg_settlement_days,
-                    SUM(CASE WHEN COALESCE("{variance_col}", 0) < 0 THEN 1 ELSE 0 END) as overprediction_count,
-                    SUM(CASE WHEN COALESCE("{variance_col}", 0) > 0 THEN 1 ELSE 0 END) as underprediction_count,
-                    SUM(CASE WHEN ABS(COALESCE("{variance_col}", 0)) > 20 THEN 1 ELSE 0 END) as high_variance_count
-                FROM claims
-                GROUP BY year, "{caution_level_col}"
-                ORDER BY year DESC, "{caution_level_col}"
-            """))
-            conn.commit()
-
-            rows = conn.execute(text("SELECT COUNT(*) FROM mv_year_severity")).fetchone()[0]
-            logger.info(f"✓ Created mv_year_severity ({rows} rows)")
-
-            # 2. County-Year View
-            logger.info("\nCreating mv_county_year...")
-            conn.execute(text(f"""
-                CREATE MATERIALIZED VIEW mv_county_year AS
-                SELECT
-                    COALESCE(NULLIF("{countyname_col}", ''), 'Unknown') as county,
-                    COALESCE(NULLIF("{venuestate_col}", ''), 'Unknown') as state,
-                    CASE
-                        WHEN "{claimcloseddate_col}" ~ '^[0-9]{{1,2}}/[0-9]{{1,2}}/[0-9]{{4}}$' THEN
-                            EXTRACT(YEAR FROM TO_DATE("{claimcloseddate_col}", 'MM/DD/YYYY'))::INTEGER
-                        WHEN "{claimcloseddate_col}" ~ '^[0-9]{{4}}-[0-9]{{1,2}}-[0-9]{{1,2}}' THEN
-                            EXTRACT(YEAR FROM "{claimcloseddate_col}"::DATE)::INTEGER
-                        ELSE 2023
-                    END as year,
-                    COALESCE(NULLIF("{venuerating_col}", ''), 'Unknown') as venue_rating,
-                    COUNT(*) as claim_count,
-                    SUM(COALESCE("{dollaramounthigh_col}", 0)) as total_settlement,
-                    AVG(COALESCE("{dollaramounthigh_col}", 0)) as avg_settlement,
-                    AVG(COALESCE("{variance_col}", 0)) as avg_variance_pct,
-                    SUM(CASE WHEN ABS(COALESCE("{variance_col}", 0)) > 20 THEN 1 ELSE 0 END) as high_variance_count,
-                    CASE WHEN COUNT(*) > 0 THEN
-                        CAST(SUM(CASE WHEN ABS(COALESCE("{variance_col}", 0)) > 20 THEN 1 ELSE 0 END) AS FLOAT) / COUNT(*) * 100
-                    ELSE 0 END as high_variance_pct,
-                    SUM(CASE WHEN COALESCE("{variance_col}", 0) < 0 THEN 1 ELSE 0 END) as overprediction_count,
-                    SUM(CASE WHEN COALESCE("{variance_col}", 0) > 0 THEN 1 ELSE 0 END) as underprediction_count
-                FROM claims
-                GROUP BY "{countyname_col}", "{venuestate_col}", year, "{venuerating_col}"
-                ORDER BY year DESC, claim_count DESC
-            """))
-            conn.commit()
-
-            rows = conn.execute(text("SELECT COUNT(*) FROM mv_county_year")).fetchone()[0]
-            logger.info(f"✓ Created mv_county_year ({rows} rows)")
-
-            # 3. Injury Group View
-            logger.info("\nCreating mv_injury_group...")
-            conn.execute(text(f"""
-                CREATE MATERIALIZED VIEW mv_injury_group AS
-                SELECT
-                    COALESCE(NULLIF("{injury_group_col}", ''), 'Unknown') as injury_group,
-                    COALESCE(NULLIF("{body_region_col}", ''), 'Unknown') as body_region,
-                    COALESCE(NULLIF("{caution_level_col}", ''), 'Unknown') as severity_category,
-                    COUNT(*) as claim_count,
-                    AVG(COALESCE("{dollaramounthigh_col}", 0)) as avg_settlement,
-                    AVG(COALESCE("{causation_col}", 0)) as avg_predicted,
-                    AVG(COALESCE("{variance_col}", 0)) as avg_variance_pct,
-                    AVG(COALESCE("{settlement_days_col}", 0)) as avg_settlement_days,
-                    SUM(COALESCE("{dollaramounthigh_col}", 0)) as total_settlement
-                FROM claims
-                GROUP BY "{injury_group_col}", "{body_region_col}", "{caution_level_col}"
-                ORDER BY claim_count DESC
-            """))
-            conn.commit()
-
-            rows = conn.execute(text("SELECT COUNT(*) FROM mv_injury_group")).fetchone()[0]
-            logger.info(f"✓ Created mv_injury_group ({rows} rows)")
-
-            # 4. Adjuster Performance View
-            logger.info("\nCreating mv_adjuster_performance...")
-            conn.execute(text(f"""
-                CREATE MATERIALIZED VIEW mv_adjuster_performance AS
-                SELECT
-                    COALESCE(NULLIF("{adjuster_col}", ''), 'Unknown') as adjuster_name,
-                    CASE
-                        WHEN "{claimcloseddate_col}" ~ '^[0-9]{{1,2}}/[0-9]{{1,2}}/[0-9]{{4}}$' THEN
-                            EXTRACT(YEAR FROM TO_DATE("{claimcloseddate_col}", 'MM/DD/YYYY'))::INTEGER
-                        WHEN "{claimcloseddate_col}" ~ '^[0-9]{{4}}-[0-9]{{1,2}}-[0-9]{{1,2}}' THEN
-                            EXTRACT(YEAR FROM "{claimcloseddate_col}"::DATE)::INTEGER
-                        ELSE 2023
-                    END as year,
-                    COUNT(*) as total_claims,
-                    AVG(COALESCE("{dollaramounthigh_col}", 0)) as avg_settlement,
-                    AVG(COALESCE("{variance_col}", 0)) as avg_variance_pct,
-                    SUM(CASE WHEN ABS(COALESCE("{variance_col}", 0)) <= 10 THEN 1 ELSE 0 END) as accurate_predictions,
-                    SUM(CASE WHEN ABS(COALESCE("{variance_col}", 0)) > 20 THEN 1 ELSE 0 END) as high_variance_count,
-                    CASE WHEN COUNT(*) > 0 THEN
-                        CAST(SUM(CASE WHEN ABS(COALESCE("{variance_col}", 0)) <= 10 THEN 1 ELSE 0 END) AS FLOAT) / COUNT(*) * 100
-                    ELSE 0 END as accuracy_rate,
-                    AVG(COALESCE("{settlement_days_col}", 0)) as avg_settlement_days,
-                    SUM(COALESCE("{dollaramounthigh_col}", 0)) as total_payout
-                FROM claims
-                GROUP BY "{adjuster_col}", year
-                HAVING COUNT(*) >= 5
-                ORDER BY year DESC, total_claims DESC
-            """))
-            conn.commit()
-
-            rows = conn.execute(text("SELECT COUNT(*) FROM mv_adjuster_performance")).fetchone()[0]
-            logger.info(f"✓ Created mv_adjuster_performance ({rows} rows)")
-
-            # 5. Venue Analysis View
-            logger.info("\nCreating mv_venue_analysis...")
-            conn.execute(text(f"""
-                CREATE MATERIALIZED VIEW mv_venue_analysis AS
-                SELECT
-                    COALESCE(NULLIF("{venuestate_col}", ''), 'Unknown') as state,
-                    COALESCE(NULLIF("{countyname_col}", ''), 'Unknown') as county,
-                    COALESCE(NULLIF("{venuerating_col}", ''), 'Unknown') as venue_rating,
-                    AVG(COALESCE("{venue_point_col}", 0)) as avg_venue_points,
-                    COUNT(*) as claim_count,
-                    AVG(COALESCE("{dollaramounthigh_col}", 0)) as avg_settlement,
-                    AVG(COALESCE("{variance_col}", 0)) as avg_variance_pct,
-                    AVG(COALESCE("{settlement_days_col}", 0)) as avg_settlement_days,
-                    SUM(COALESCE("{dollaramounthigh_col}", 0)) as total_settlement,
-                    PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY "{dollaramounthigh_col}") as median_settlement,
-                    PERCENTILE_CONT(0.25) WITHIN GROUP (ORDER BY "{dollaramounthigh_col}") as p25_settlement,
-                    PERCENTILE_CONT(0.75) WITHIN GROUP (ORDER BY "{dollaramounthigh_col}") as p75_settlement
-                FROM claims
-                GROUP BY "{venuestate_col}", "{countyname_col}", "{venuerating_col}"
-                HAVING COUNT(*) >= 3
-                ORDER BY claim_count DESC
-            """))
-            conn.commit()
-
-            rows = conn.execute(text("SELECT COUNT(*) FROM mv_venue_analysis")).fetchone()[0]
-            logger.info(f"✓ Created mv_venue_analysis ({rows} rows)")
-
-            # 6. KPI Summary View
-            logger.info("\nCreating mv_kpi_summary...")
-            conn.execute(text(f"""
-                CREATE MATERIALIZED VIEW mv_kpi_summary AS
-                SELECT
-                    CASE
-                        WHEN "{claimcloseddate_col}" ~ '^[0-9]{{1,2}}/[0-9]{{1,2}}/[0-9]{{4}}$' THEN
-                            EXTRACT(YEAR FROM TO_DATE("{claimcloseddate_col}", 'MM/DD/YYYY'))::INTEGER
-                        WHEN "{claimcloseddate_col}" ~ '^[0-9]{{4}}-[0-9]{{1,2}}-[0-9]{{1,2}}' THEN
-                            EXTRACT(YEAR FROM "{claimcloseddate_col}"::DATE)::INTEGER
-                        ELSE 2023
-                    END as year,
-                    CASE
-                        WHEN "{claimcloseddate_col}" ~ '^[0-9]{{1,2}}/[0-9]{{1,2}}/[0-9]{{4}}$' THEN
-                            EXTRACT(MONTH FROM TO_DATE("{claimcloseddate_col}", 'MM/DD/YYYY'))::INTEGER
-                        WHEN "{claimcloseddate_col}" ~ '^[0-9]{{4}}-[0-9]{{1,2}}-[0-9]{{1,2}}' THEN
-                            EXTRACT(MONTH FROM "{claimcloseddate_col}"::DATE)::INTEGER
-                        ELSE 1
-                    END as month,
-                    COUNT(*) as total_claims,
-                    SUM(COALESCE("{dollaramounthigh_col}", 0)) as total_payout,
-                    AVG(COALESCE("{dollaramounthigh_col}", 0)) as avg_settlement,
-                    AVG(COALESCE("{variance_col}", 0)) as avg_variance_pct,
-                    SUM(CASE WHEN ABS(COALESCE("{variance_col}", 0)) <= 10 THEN 1 ELSE 0 END) as accurate_predictions,
-                    CASE WHEN COUNT(*) > 0 THEN
-                        CAST(SUM(CASE WHEN ABS(COALESCE("{variance_col}", 0)) <= 10 THEN 1 ELSE 0 END) AS FLOAT) / COUNT(*) * 100
-                    ELSE 0 END as accuracy_rate,
-                    AVG(COALESCE("{settlement_days_col}", 0)) as avg_settlement_days,
-                    PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY "{dollaramounthigh_col}") as median_settlement
-                FROM claims
-                GROUP BY year, month
-                ORDER BY year DESC, month DESC
-            """))
-            conn.commit()
-
-            rows = conn.execute(text("SELECT COUNT(*) FROM mv_kpi_summary")).fetchone()[0]
-            logger.info(f"✓ Created mv_kpi_summary ({rows} rows)")
+            # Drop and rebuild: one GROUPING SETS scan feeds every summary view
+            logger.info(f"\nBuilding {ROLLUP_TABLE} and summary views (single scan)...")
+            cols = {
+                'claimcloseddate': claimcloseddate_col,
+                'caution_level': caution_level_col,
+                'dollaramounthigh': dollaramounthigh_col,
+                'causation': causation_col,
+                'variance': variance_col,
+                'settlement_days': settlement_days_col,
+                'countyname': countyname_col,
+                'venuestate': venuestate_col,
+                'venuerating': venuerating_col,
+                'injury_group': injury_group_col,
+                'body_region': body_region_col,
+                'adjuster': adjuster_col,
+                'venue_point': venue_point_col,
+            }
+            # Typed close year / month (app.db.claim_dates), when the table has them
+            for typed in ('close_year', 'close_month'):
+                if typed in available_columns:
+                    cols[typed] = available_columns[typed]
+            row_counts = create_postgres_summary_views(conn, cols)
+
+            for view, rows in row_counts.items():
+                logger.info(f"✓ Created {view} ({rows} rows)")
+            views = [ROLLUP_TABLE] + SUMMARY_VIEWS
+
+            # Log claim changes from now on so refreshes only apply the deltas
+            install_change_capture(conn, cols)
+            logger.info(f"✓ Claim changes are logged to {CHANGE_LOG_TABLE}")
 
             # Create indexes on materialized views for faster querying
             logger.info("\nCreating indexes on materialized views...")
@@ -393,10 +228,9 @@ def create_materialized_views():
             for view in views:
                 logger.info(f"  ✓ {view}")
 
-            logger.info("\n💡 To refresh views, run:")
-            logger.info("   REFRESH MATERIALIZED VIEW mv_year_severity;")
-            logger.info("   REFRESH MATERIALIZED VIEW mv_county_year;")
-            logger.info("   ... etc for each view")
+            logger.info("\n💡 To refresh views after data changes, call:")
+            logger.info("   POST /api/v1/aggregation/refresh-cache          (applies changed claims only)")
+            logger.info("   POST /api/v1/aggregation/refresh-cache?full=true (rebuilds from all claims)")
 
             return True
 
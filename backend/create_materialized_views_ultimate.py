@@ -7,8 +7,18 @@ Works with YOUR exact data structure:
 """
 from sqlalchemy import create_engine, text
 import logging
+import sys
 from pathlib import Path
 
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.db.claim_dates import ensure_claim_date_columns
+from app.db.aggregation_builder import SKETCH_SUMMARIES, build_sqlite_summaries, write_sqlite_summaries
+from app.db.quantile_sketch import sketch_table
+from app.db.data_version import bump_data_version
+from app.db.shadow_tables import build_shadow_table, drop_shadow_tables, swap_in_shadow_tables
+
 logging.basicConfig(level=logging.INFO, format='%(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
@@ -22,6 +32,11 @@ def create_materialized_views():
 
     engine = create_engine(f'sqlite:///{db_path}')
 
+    # Typed close dates (close_year / closed_on) for claims loaded in bulk
+    backfilled = ensure_claim_date_columns(engine)
+    if backfilled:
+        logger.info(f"Backfilled typed close dates for {backfilled:,} claims")
+
     try:
         with engine.connect() as conn:
             logger.info("=" * 80)
@@ -37,9 +52,9 @@ def create_materialized_views():
                 logger.warning("No claims found in database!")
                 return False
 
-            # Drop existing views
-            logger.info("\nDropping existing materialized views...")
-            views_to_drop = [
+            # Views are built under shadow names and swapped in at the end,
+            # so the dashboard keeps reading the previous tables meanwhile
+            views = [
                 'mv_year_severity',
                 'mv_county_year',
                 'mv_injury_group',
@@ -48,162 +63,24 @@ def create_materialized_views():
                 'mv_factor_combinations',
                 'mv_kpi_summary'
             ]
-            for view in views_to_drop:
-                conn.execute(text(f"DROP TABLE IF EXISTS {view}"))
+            # Settlement quantile sketches per group, swapped in with their views
+            views += [sketch_table(view) for view in SKETCH_SUMMARIES]
+            drop_shadow_tables(conn, views)
+
+            # 1-5 + 7. Year-Severity, County-Year, Injury Group, Adjuster, Venue and KPI
+            # summaries - built together from ONE scan of the claims table
+            logger.info("\n[1/2] Building summary views from a single scan of claims...")
+            summaries = build_sqlite_summaries(conn)
+            row_counts = write_sqlite_summaries(conn, summaries)
             conn.commit()
-            logger.info("Done - Old views dropped")
-
-            # 1. Year-Severity View (Calculate severity category on the fly!)
-            logger.info("\n[1/7] Creating mv_year_severity...")
-            conn.execute(text("""
-                CREATE TABLE mv_year_severity AS
-                SELECT
-                    CAST(strftime('%Y', CLAIMCLOSEDDATE) AS INTEGER) as year,
-                    CASE
-                        WHEN CALCULATED_SEVERITY_SCORE <= 500 THEN 'Low'
-                        WHEN CALCULATED_SEVERITY_SCORE <= 1500 THEN 'Medium'
-                        ELSE 'High'
-                    END as severity_category,
-                    COUNT(*) as claim_count,
-                    SUM(DOLLARAMOUNTHIGH) as total_actual_settlement,
-                    SUM(CAUSATION_HIGH_RECOMMENDATION) as total_predicted_settlement,
-                    AVG(DOLLARAMOUNTHIGH) as avg_actual_settlement,
-                    AVG(CAUSATION_HIGH_RECOMMENDATION) as avg_predicted_settlement,
-                    AVG(variance_pct) as avg_variance_pct,
-                    AVG(SETTLEMENT_DAYS) as avg_settlement_days,
-                    SUM(CASE WHEN variance_pct < 0 THEN 1 ELSE 0 END) as overprediction_count,
-                    SUM(CASE WHEN variance_pct > 0 THEN 1 ELSE 0 END) as underprediction_count,
-                    SUM(CASE WHEN ABS(variance_pct) > 20 THEN 1 ELSE 0 END) as high_variance_count
-                FROM claims
-                WHERE CLAIMCLOSEDDATE IS NOT NULL
-                  AND CALCULATED_SEVERITY_SCORE IS NOT NULL
-                GROUP BY year, severity_category
-                ORDER BY year DESC, severity_category
-            """))
-            rows = conn.execute(text("SELECT COUNT(*) FROM mv_year_severity")).fetchone()[0]
-            logger.info(f"  Done - Created mv_year_severity ({rows} rows)")
-
-            # 2. County-Year View
-            logger.info("\n[2/7] Creating mv_county_year...")
-            conn.execute(text("""
-                CREATE TABLE mv_county_year AS
-                SELECT
-                    COUNTYNAME as county,
-                    VENUESTATE as state,
-                    CAST(strftime('%Y', CLAIMCLOSEDDATE) AS INTEGER) as year,
-                    VENUERATING as venue_rating,
-                    COUNT(*) as claim_count,
-                    SUM(DOLLARAMOUNTHIGH) as total_settlement,
-                    AVG(DOLLARAMOUNTHIGH) as avg_settlement,
-                    AVG(variance_pct) as avg_variance_pct,
-                    SUM(CASE WHEN ABS(variance_pct) > 20 THEN 1 ELSE 0 END) as high_variance_count,
-                    CAST(SUM(CASE WHEN ABS(variance_pct) > 20 THEN 1 ELSE 0 END) AS FLOAT) / COUNT(*) * 100 as high_variance_pct,
-                    SUM(CASE WHEN variance_pct < 0 THEN 1 ELSE 0 END) as overprediction_count,
-                    SUM(CASE WHEN variance_pct > 0 THEN 1 ELSE 0 END) as underprediction_count
-                FROM claims
-                WHERE COUNTYNAME IS NOT NULL
-                  AND CLAIMCLOSEDDATE IS NOT NULL
-                GROUP BY COUNTYNAME, VENUESTATE, year, VENUERATING
-                HAVING claim_count >= 5
-                ORDER BY year DESC, claim_count DESC
-            """))
-            rows = conn.execute(text("SELECT COUNT(*) FROM mv_county_year")).fetchone()[0]
-            logger.info(f"  Done - Created mv_county_year ({rows} rows)")
-
-            # 3. Injury Group View (FIXED - correct column names + severity calculation!)
-            logger.info("\n[3/7] Creating mv_injury_group...")
-            conn.execute(text("""
-                CREATE TABLE mv_injury_group AS
-                SELECT
-                    PRIMARY_INJURYGROUP_CODE_BY_SEVERITY as injury_group,
-                    PRIMARY_INJURY_BY_SEVERITY as injury_type,
-                    PRIMARY_BODYPART_BY_SEVERITY as body_part,
-                    BODY_REGION as body_region,
-                    CASE
-                        WHEN CALCULATED_SEVERITY_SCORE <= 500 THEN 'Low'
-                        WHEN CALCULATED_SEVERITY_SCORE <= 1500 THEN 'Medium'
-                        ELSE 'High'
-                    END as severity_category,
-                    COUNT(*) as claim_count,
-                    AVG(DOLLARAMOUNTHIGH) as avg_settlement,
-                    AVG(CAUSATION_HIGH_RECOMMENDATION) as avg_predicted,
-                    AVG(variance_pct) as avg_variance_pct,
-                    AVG(SETTLEMENT_DAYS) as avg_settlement_days,
-                    SUM(DOLLARAMOUNTHIGH) as total_settlement,
-                    SUM(CASE WHEN ABS(variance_pct) > 20 THEN 1 ELSE 0 END) as high_variance_count,
-                    SUM(CASE WHEN variance_pct < 0 THEN 1 ELSE 0 END) as overprediction_count,
-                    SUM(CASE WHEN variance_pct > 0 THEN 1 ELSE 0 END) as underprediction_count
-                FROM claims
-                WHERE PRIMARY_INJURYGROUP_CODE_BY_SEVERITY IS NOT NULL
-                  AND CALCULATED_SEVERITY_SCORE IS NOT NULL
-                GROUP BY
-                    PRIMARY_INJURYGROUP_CODE_BY_SEVERITY,
-                    PRIMARY_INJURY_BY_SEVERITY,
-                    PRIMARY_BODYPART_BY_SEVERITY,
-                    BODY_REGION,
-                    severity_category
-                HAVING claim_count >= 5
-                ORDER BY claim_count DESC
-            """))
-            rows = conn.execute(text("SELECT COUNT(*) FROM mv_injury_group")).fetchone()[0]
-            logger.info(f"  Done - Created mv_injury_group ({rows} rows)")
-
-            # 4. Adjuster Performance View
-            logger.info("\n[4/7] Creating mv_adjuster_performance...")
-            conn.execute(text("""
-                CREATE TABLE mv_adjuster_performance AS
-                SELECT
-                    ADJUSTERNAME as adjuster_name,
-                    COUNT(*) as claim_count,
-                    AVG(DOLLARAMOUNTHIGH) as avg_actual_settlement,
-                    AVG(CAUSATION_HIGH_RECOMMENDATION) as avg_predicted_settlement,
-                    AVG(variance_pct) as avg_variance_pct,
-                    SUM(CASE WHEN ABS(variance_pct) > 20 THEN 1 ELSE 0 END) as high_variance_count,
-                    CAST(SUM(CASE WHEN ABS(variance_pct) > 20 THEN 1 ELSE 0 END) AS FLOAT) / COUNT(*) * 100 as high_variance_pct,
-                    SUM(CASE WHEN variance_pct < 0 THEN 1 ELSE 0 END) as overprediction_count,
-                    SUM(CASE WHEN variance_pct > 0 THEN 1 ELSE 0 END) as underprediction_count,
-                    AVG(SETTLEMENT_DAYS) as avg_settlement_days
-                FROM claims
-                WHERE ADJUSTERNAME IS NOT NULL
-                  AND ADJUSTERNAME != ''
-                  AND ADJUSTERNAME != 'System System'
-                GROUP BY ADJUSTERNAME
-                HAVING claim_count >= 10
-                ORDER BY claim_count DESC
-            """))
-            rows = conn.execute(text("SELECT COUNT(*) FROM mv_adjuster_performance")).fetchone()[0]
-            logger.info(f"  Done - Created mv_adjuster_performance ({rows} rows)")
-
-            # 5. Venue Analysis View
-            logger.info("\n[5/7] Creating mv_venue_analysis...")
-            conn.execute(text("""
-                CREATE TABLE mv_venue_analysis AS
-                SELECT
-                    VENUERATING as venue_rating,
-                    VENUESTATE as state,
-                    COUNTYNAME as county,
-                    COUNT(*) as claim_count,
-                    AVG(DOLLARAMOUNTHIGH) as avg_settlement,
-                    AVG(CAUSATION_HIGH_RECOMMENDATION) as avg_predicted,
-                    AVG(variance_pct) as avg_variance_pct,
-                    AVG(VENUERATINGPOINT) as avg_venue_rating_point,
-                    CAST(SUM(CASE WHEN ABS(variance_pct) > 20 THEN 1 ELSE 0 END) AS FLOAT) / COUNT(*) * 100 as high_variance_pct
-                FROM claims
-                WHERE VENUERATING IS NOT NULL
-                  AND COUNTYNAME IS NOT NULL
-                GROUP BY VENUERATING, VENUESTATE, COUNTYNAME
-                HAVING claim_count >= 10
-                ORDER BY claim_count DESC
-            """))
-            rows = conn.execute(text("SELECT COUNT(*) FROM mv_venue_analysis")).fetchone()[0]
-            logger.info(f"  Done - Created mv_venue_analysis ({rows} rows)")
+            for view, rows in row_counts.items():
+                logger.info(f"  Done - Built {view} ({rows} rows)")
 
             # 6. Factor Combinations Analysis (Like the screenshot you showed!)
-            logger.info("\n[6/7] Creating mv_factor_combinations...")
-            conn.execute(text("""
-                CREATE TABLE mv_factor_combinations AS
+            logger.info("\n[2/2] Creating mv_factor_combinations...")
+            rows = build_shadow_table(conn, 'mv_factor_combinations', """
                 SELECT
-                    'County: ' || COUNTYNAME || ': ' || VENUESTATE || ', ' || CAST(strftime('%Y', CLAIMCLOSEDDATE) AS TEXT) as factor,
+                    'County: ' || COUNTYNAME || ': ' || VENUESTATE || ', ' || CAST(close_year AS TEXT) as factor,
                     'Driver' as category,
                     COUNT(*) as claims,
                     AVG(variance_pct) as avg_deviation,
@@ -213,14 +90,14 @@ def create_materialized_views():
                         WHEN ABS(AVG(variance_pct)) > 15 THEN 'Monitor'
                         ELSE 'Good'
                     END as status,
-                    CAST(strftime('%Y', CLAIMCLOSEDDATE) AS INTEGER) as year,
+                    close_year as year,
                     COUNTYNAME as county,
                     VENUESTATE as state
                 FROM claims
                 WHERE COUNTYNAME IS NOT NULL
-                  AND CLAIMCLOSEDDATE IS NOT NULL
+                  AND close_year IS NOT NULL
                   AND variance_pct IS NOT NULL
-                GROUP BY COUNTYNAME, VENUESTATE, year
+                GROUP BY COUNTYNAME, VENUESTATE, close_year
                 HAVING COUNT(*) >= 1
 
                 UNION ALL
@@ -247,26 +124,24 @@ def create_materialized_views():
 
                 ORDER BY abs_avg_deviation DESC
                 LIMIT 1000
-            """))
-            rows = conn.execute(text("SELECT COUNT(*) FROM mv_factor_combinations")).fetchone()[0]
-            logger.info(f"  Done - Created mv_factor_combinations ({rows} rows)")
-
-            # 7. KPI Summary View
-            logger.info("\n[7/7] Creating mv_kpi_summary...")
-            conn.execute(text("""
-                CREATE TABLE mv_kpi_summary AS
-                SELECT
-                    COUNT(*) as total_claims,
-                    AVG(DOLLARAMOUNTHIGH) as avg_settlement,
-                    AVG(SETTLEMENT_DAYS) as avg_days,
-                    CAST(SUM(CASE WHEN ABS(variance_pct) > 20 THEN 1 ELSE 0 END) AS FLOAT) / COUNT(*) * 100 as high_variance_pct,
-                    CAST(SUM(CASE WHEN variance_pct < 0 THEN 1 ELSE 0 END) AS FLOAT) / COUNT(*) * 100 as overprediction_rate,
-                    CAST(SUM(CASE WHEN variance_pct > 0 THEN 1 ELSE 0 END) AS FLOAT) / COUNT(*) * 100 as underprediction_rate
-                FROM claims
-            """))
-            logger.info(f"  Done - Created mv_kpi_summary")
-
+            """)
             conn.commit()
+            logger.info(f"  Done - Built mv_factor_combinations ({rows} rows)")
+
+            # Replace all live tables in one short transaction
+            swap_in_shadow_tables(conn, views)
+            logger.info("  Done - Swapped in the rebuilt views")
+
+            # Cached responses built from the old tables are now out of date
+            bump_data_version()
+
+            # Venue shift recommendations for the common windows, served from a table
+            try:
+                from app.services.venue_shift_snapshots import venue_shift_snapshots
+                rebuilt = venue_shift_snapshots.rebuild()
+                logger.info(f"  Done - Precomputed venue shift snapshots for {sorted(rebuilt)} months")
+            except Exception as e:
+                logger.warning(f"  Venue shift snapshots not rebuilt (computed on first request): {str(e)}")
 
             logger.info("\n" + "=" * 80)
             logger.info("SUCCESS! MATERIALIZED VIEWS CREATED")
@@ -12,6 +12,7 @@ import numpy as np
 from pathlib import Path
 from sqlalchemy.orm import Session
 from app.db.schema import init_database, get_session, get_engine, Claim, SSNB, Weight
+from app.db.data_version import bump_data_version
 import logging
 from datetime import datetime
 from tqdm import tqdm
@@ -520,6 +521,9 @@ class ComprehensiveMigration:
         # Verify
         self.verify_migration()
 
+        # Signal running API workers that their cached claims data is stale
+        bump_data_version()
+
         # Done
         elapsed = (datetime.now() - start_time).total_seconds()
         logger.info("\n" + "="*80)
@@ -723,12 +723,20 @@ class PostgreSQLMigration:
             if not self.migrate_dat_csv():
                 return False
 
+            # Typed close dates / close_year index used by the dashboard's time filters
+            from app.db.claim_dates import ensure_claim_date_columns
+            logger.info(f"Typed claim dates filled for {ensure_claim_date_columns(self.engine):,} claims")
+
             if not self.migrate_ssnb_csv():
                 return False
 
             # Verify
             self.verify_migration()
 
+            # Signal running API workers that their cached claims data is stale
+            from app.db.data_version import bump_data_version
+            bump_data_version()
+
             # Success
             elapsed = (datetime.now() - start_time).total_seconds()
             logger.info("\n" + "="*80)
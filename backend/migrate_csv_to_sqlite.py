@@ -15,6 +15,8 @@ import logging
 sys.path.insert(0, str(Path(__file__).parent))
 
 from app.db.schema import init_database, get_session, Claim, Weight, Base
+from app.db.claim_dates import backfill_claim_dates
+from app.db.data_version import bump_data_version
 from sqlalchemy import text
 
 # Setup logging
@@ -275,6 +277,9 @@ def main():
         if not migrate_claims(session, str(dat_csv)):
             return False
 
+        # bulk_save_objects skips the ORM hooks that fill the typed close dates
+        logger.info(f"Typed claim dates filled for {backfill_claim_dates(engine):,} claims")
+
         # Step 3: Create indexes
         print("\n[3/3] Optimizing database...")
         if not create_indexes(session):
@@ -299,6 +304,9 @@ def main():
             logger.warning("Dashboard will work but may be slower for large datasets")
             print("⚠ Warning: Materialized views not created. Run 'POST /api/v1/aggregation/refresh-cache' later.")
 
+        # Signal running API workers that their cached claims data is stale
+        bump_data_version()
+
         # Success!
         print("\n" + "=" * 70)
         print("✓ Migration completed successfully!")
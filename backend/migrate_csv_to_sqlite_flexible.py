@@ -24,6 +24,8 @@ import logging
 sys.path.insert(0, str(Path(__file__).parent))
 
 from app.db.schema import init_database, get_session, Claim, Weight, Base
+from app.db.claim_dates import backfill_claim_dates
+from app.db.data_version import bump_data_version
 from sqlalchemy import text
 
 # Setup logging
@@ -383,9 +385,15 @@ def main():
             logger.error("Failed to migrate claims")
             return
 
+        # bulk_save_objects skips the ORM hooks that fill the typed close dates
+        logger.info(f"Typed claim dates filled for {backfill_claim_dates(engine):,} claims")
+
         # Create materialized views
         create_materialized_views(session)
 
+        # Signal running API workers that their cached claims data is stale
+        bump_data_version()
+
         logger.info("=" * 60)
         logger.info("✓ MIGRATION COMPLETED SUCCESSFULLY")
         logger.info("=" * 60)
@@ -0,0 +1,26 @@
+"""The grouped aggregation engine against the original iterrows() implementation"""
+
+import pytest
+
+from app.services.aggregation_engine import compute_aggregations
+from benchmark_aggregation import compare, legacy_aggregations, make_claims
+
+
+@pytest.mark.parametrize("rows, seed", [(5000, 42), (10000, 7)])
+def test_engine_matches_legacy_aggregations(rows, seed):
+    df = make_claims(rows, seed=seed)
+    assert compare(legacy_aggregations(df), compute_aggregations(df)) == []
+
+
+def test_engine_derives_the_year_without_close_year():
+    # Frames loaded before the typed date columns existed only have CLAIMCLOSEDDATE
+    df = make_claims(5000).drop(columns=['close_year'])
+    assert compare(legacy_aggregations(df), compute_aggregations(df)) == []
+
+
+def test_only_generated_at_differs_in_metadata():
+    df = make_claims(2000)
+    legacy, engine = legacy_aggregations(df), compute_aggregations(df)
+    legacy['metadata'].pop('generated_at')
+    engine['metadata'].pop('generated_at')
+    assert engine['metadata'] == legacy['metadata']
@@ -0,0 +1,131 @@
+"""Analytics endpoints project real claim columns and answer on a seeded database"""
+
+import asyncio
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi import FastAPI
+
+from app.db.data_version import bump_data_version
+from app.db.schema import Base
+from app.services.aggregate_cache import aggregate_cache
+from app.services.claims_store import resolve_columns
+from app.services.data_service_sqlite import data_service_sqlite as data_service
+from app.services.response_cache import response_cache
+
+
+@pytest.fixture(scope="module")
+def app():
+    from app.api.endpoints import analytics
+
+    engine = data_service.engine
+    Base.metadata.create_all(engine)
+    rng = np.random.default_rng(3)
+    rows = 240
+    predicted = rng.uniform(5000, 50000, rows)
+    actual = predicted * rng.choice([0.5, 0.9, 1.0, 1.3, 1.6], rows)
+    claims = pd.DataFrame({
+        'CLAIMID': np.arange(1, rows + 1),
+        'ADJUSTERNAME': rng.choice(['Ann', 'Bo', 'Cy'], rows),
+        'PRIMARY_INJURYGROUP_CODE': rng.choice(['NECK', 'BACK'], rows),
+        'PRIMARY_INJURY': rng.choice(['Sprain', 'Strain'], rows),
+        'PRIMARY_BODYPART': rng.choice(['Cervical', 'Lumbar'], rows),
+        'CAUTION_LEVEL': rng.choice(['Low', 'High'], rows),
+        'VENUERATING': rng.choice(['Moderate', 'Liberal'], rows),
+        'COUNTYNAME': rng.choice(['Fresno', 'Kern'], rows),
+        'VENUESTATE': 'CA',
+        'DOLLARAMOUNTHIGH': actual,
+        'CAUSATION_HIGH_RECOMMENDATION': predicted,
+        'variance_pct': (actual - predicted) / predicted * 100,
+        'SEVERITY_SCORE': rng.uniform(1, 10, rows),
+        'SETTLEMENT_DAYS': rng.integers(30, 600, rows),
+    })
+    claims.to_sql('claims', engine, if_exists='append', index=False)
+    bump_data_version()
+
+    application = FastAPI()
+    application.include_router(analytics.router)
+    yield application
+
+    with engine.begin() as conn:
+        conn.exec_driver_sql("DELETE FROM claims")
+    bump_data_version()
+
+
+@pytest.fixture(autouse=True)
+def empty_caches():
+    response_cache.clear()
+    aggregate_cache.clear()
+
+
+def get(app, path, query=b''):
+    messages = []
+    scope = {
+        'type': 'http', 'method': 'GET', 'path': path, 'raw_path': path.encode(), 'query_string': query,
+        'headers': [], 'http_version': '1.1', 'scheme': 'http', 'server': ('test', 80),
+        'client': ('test', 1), 'root_path': '',
+    }
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    body = b''.join(message.get('body', b'') for message in messages[1:])
+    return messages[0]['status'], json.loads(body)
+
+
+def test_unknown_projection_names_are_rejected():
+    with pytest.raises(ValueError, match="claim_id, adjuster"):
+        resolve_columns(['CLAIMID', 'claim_id', 'adjuster'])
+    assert resolve_columns(['CLAIMID', 'claim_id', 'CLAIMID'], strict=False) == ['CLAIMID']
+
+
+def test_deviation_analysis(app):
+    status, body = get(app, "/deviation-analysis", b"min_variance_pct=20&limit=5")
+    assert status == 200
+    assert len(body['cases']) == 5
+    assert set(body['cases'][0]) >= {'CLAIMID', 'ADJUSTERNAME', 'PRIMARY_INJURYGROUP_CODE', 'CAUSATION_HIGH_RECOMMENDATION'}
+    assert all(abs(case['variance_pct']) >= 20 for case in body['cases'])
+
+
+def test_adjuster_performance(app):
+    status, body = get(app, "/adjuster-performance")
+    assert status == 200
+    assert sorted(row['adjuster'] for row in body['adjusters']) == ['Ann', 'Bo', 'Cy']
+    assert sum(row['total_cases'] for row in body['adjusters']) == 240
+
+
+def test_adjuster_recommendations(app):
+    status, body = get(app, "/adjuster-recommendations/17")
+    assert status == 200
+    assert body['current_adjuster'] in ('Ann', 'Bo', 'Cy')
+    assert body['injury_group'] in ('NECK', 'BACK')
+
+    status, _ = get(app, "/adjuster-recommendations/not-a-claim")
+    assert status == 404
+
+
+def test_injury_benchmarks(app):
+    status, body = get(app, "/injury-benchmarks", b"injury_group=NECK")
+    assert status == 200
+    assert body['total_combinations'] > 0
+    assert {row['injury_group'] for row in body['benchmarks']} == {'NECK'}
+
+
+def test_variance_drivers_cover_the_real_columns(app):
+    status, body = get(app, "/variance-drivers")
+    assert status == 200
+    factors = {driver['factor'] for driver in body['top_variance_drivers']}
+    assert factors <= {'PRIMARY_INJURYGROUP_CODE', 'PRIMARY_INJURY', 'CAUTION_LEVEL', 'VENUERATING', 'VENUESTATE', 'PRIMARY_BODYPART'}
+    assert 'PRIMARY_INJURYGROUP_CODE' in factors
+
+
+def test_bad_combinations(app):
+    status, body = get(app, "/bad-combinations", b"min_variance_pct=0")
+    assert status == 200
+    assert body['total_bad_combinations'] == 8
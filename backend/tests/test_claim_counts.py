@@ -0,0 +1,67 @@
+"""Claim count cache: filter signatures and invalidation by the dataset version"""
+
+from app.db.data_version import bump_data_version
+from app.services.claim_counts import ClaimCountCache, count_signature
+
+
+class CountingQuery:
+    """Stands in for an ORM query; counts how often COUNT(*) actually runs"""
+
+    def __init__(self, total):
+        self.total = total
+        self.calls = 0
+
+    def count(self):
+        self.calls += 1
+        return self.total
+
+
+def test_equivalent_filters_share_a_signature():
+    assert count_signature({'state': ['TX', 'CA'], 'adjuster': []}) == count_signature({'state': ['CA', 'TX']})
+    assert count_signature(None) == count_signature({'year': None, 'county': ''})
+    assert count_signature({'state': ['CA']}) != count_signature({'county': ['CA']})
+
+
+def test_repeated_count_is_served_from_the_cache():
+    cache = ClaimCountCache()
+    query = CountingQuery(42)
+    signature = count_signature({'state': ['CA']})
+
+    assert cache.count(query, signature) == 42
+    assert cache.count(query, signature) == 42
+    assert query.calls == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_version_bump_invalidates_cached_counts():
+    cache = ClaimCountCache()
+    query = CountingQuery(42)
+    signature = count_signature({'state': ['CA']})
+    cache.count(query, signature)
+
+    bump_data_version()
+    query.total = 43
+
+    assert cache.get(signature) is None
+    assert cache.count(query, signature) == 43
+    assert query.calls == 2
+    assert cache.stats()['entries'] == 1
+
+
+def test_cached_exact_count_wins_over_an_estimate(sqlite_engine):
+    cache = ClaimCountCache()
+    query = CountingQuery(7)
+    signature = count_signature({'year': [2023]})
+    cache.count(query, signature)
+
+    assert cache.estimate(sqlite_engine, query, signature, [('close_year', 1)]) == (7, False)
+    assert query.calls == 1
+
+
+def test_least_recently_used_counts_are_evicted():
+    cache = ClaimCountCache(max_entries=2)
+    for total in (1, 2, 3):
+        cache.put(f"filters-{total}", total)
+
+    assert cache.get("filters-1") is None
+    assert (cache.get("filters-2"), cache.get("filters-3")) == (2, 3)
@@ -0,0 +1,96 @@
+"""Typed claim dates derived from the text dates, one row at a time and in bulk"""
+
+from datetime import date
+
+import pandas as pd
+import pytest
+from sqlalchemy import select
+
+from app.db.claim_dates import backfill_claim_dates, parse_claim_date, parse_date_series
+from app.db.data_version import get_data_version
+from app.db.schema import Claim
+
+TEXT_DATES = {
+    '2023-03-07': date(2023, 3, 7),
+    '2023-3-7': date(2023, 3, 7),
+    ' 2024-01-02 10:30:00 ': date(2024, 1, 2),
+    '2024-01-02T10:30:00.000': date(2024, 1, 2),
+    '03/07/2023': date(2023, 3, 7),
+    '3/7/2023 14:05': date(2023, 3, 7),
+    '12/31/2022 00:00:00': date(2022, 12, 31),
+    '2021-02-30': None,
+    '02/30/2021': None,
+    '2021-13-01': None,
+    'not a date': None,
+    '07-03-2023': None,
+    '': None,
+    None: None,
+}
+
+
+def test_series_parses_iso_us_and_time_parts():
+    values = pd.Series(list(TEXT_DATES), dtype=object)
+    parsed = parse_date_series(values)
+    assert [None if pd.isna(value) else value.date() for value in parsed] == list(TEXT_DATES.values())
+
+
+@pytest.mark.parametrize("value, expected", TEXT_DATES.items())
+def test_row_parser_agrees(value, expected):
+    assert parse_claim_date(value) == expected
+
+
+def insert_claims(engine, dates):
+    """Bulk insert that bypasses the ORM hook, leaving the rows pending"""
+    start = len(pd.read_sql_query("SELECT id FROM claims", engine)) + 1
+    pd.DataFrame({
+        'CLAIMID': range(start, start + len(dates)),
+        'CLAIMCLOSEDDATE': [closed for closed, _ in dates],
+        'INCIDENTDATE': [incident for _, incident in dates],
+    }).to_sql('claims', engine, if_exists='append', index=False)
+
+
+def derived(engine):
+    claims = Claim.__table__
+    with engine.connect() as conn:
+        return [
+            tuple(row) for row in conn.execute(select(
+                claims.c.CLAIMID, claims.c.closed_on, claims.c.incident_on,
+                claims.c.close_year, claims.c.close_month, claims.c.dates_derived
+            ).order_by(claims.c.id))
+        ]
+
+
+def test_backfill_fills_pending_rows(sqlite_engine):
+    insert_claims(sqlite_engine, [
+        ('2023-03-07 00:00:00', '01/15/2023'),
+        ('12/31/2022', '2022-02-30'),
+        ('2021-02-30', None),
+        ('garbage', 'garbage'),
+    ])
+    version = get_data_version()
+
+    assert backfill_claim_dates(sqlite_engine, chunk_size=3) == 4
+    assert get_data_version() == version + 1
+    assert derived(sqlite_engine) == [
+        (1, date(2023, 3, 7), date(2023, 1, 15), 2023, 3, True),
+        (2, date(2022, 12, 31), None, 2022, 12, True),
+        (3, None, None, None, None, True),
+        (4, None, None, None, None, True),
+    ]
+
+
+def test_backfill_rerun_only_touches_new_rows(sqlite_engine):
+    insert_claims(sqlite_engine, [('2023-03-07', None), ('not a date', None)])
+    assert backfill_claim_dates(sqlite_engine) == 2
+    before = derived(sqlite_engine)
+
+    # Unparseable rows are marked derived too, so nothing is pending and the version stays put
+    version = get_data_version()
+    assert backfill_claim_dates(sqlite_engine) == 0
+    assert get_data_version() == version
+    assert derived(sqlite_engine) == before
+
+    insert_claims(sqlite_engine, [('3/7/2024 09:00', '2024-01-01')])
+    assert backfill_claim_dates(sqlite_engine) == 1
+    assert get_data_version() == version + 1
+    assert derived(sqlite_engine) == before + [(3, date(2024, 3, 7), date(2024, 1, 1), 2024, 3, True)]
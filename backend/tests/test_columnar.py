@@ -0,0 +1,72 @@
+"""Columnar response payloads survive encoding to JSON and decoding on the client"""
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.api.columnar import frame_payload, frame_to_columnar
+from app.api.responses import FastJSONResponse
+
+
+def decode(payload):
+    """The client-side decoder from the app.api.columnar docstring, back to records"""
+    columns = {}
+    for name in payload['columns']:
+        values = payload['data'][name]
+        dictionary = payload['dictionaries'].get(name)
+        if dictionary is not None:
+            values = [None if code < 0 else dictionary[code] for code in values]
+        columns[name] = values
+    return [{name: columns[name][i] for name in payload['columns']} for i in range(payload['rows'])]
+
+
+def over_the_wire(content):
+    return json.loads(FastJSONResponse(content).body)
+
+
+@pytest.fixture
+def frame():
+    return pd.DataFrame({
+        'county': pd.Categorical(['Fresno', 'Alameda', None, 'Fresno', 'Alameda', 'Fresno']),
+        'state': ['CA', 'CA', 'TX', None, 'CA', 'TX'],
+        'claim_ref': ['a1', 'b2', 'c3', 'd4', None, 'f6'],
+        'claim_count': np.array([12, 7, 40, 3, 0, 5], dtype=np.int64),
+        'avg_variance': [1.5, np.nan, -3.25, 0.0, 2.0, np.nan],
+        'close_year': pd.array([2023, None, 2024, 2024, 2022, None], dtype='Int16'),
+        'has_attorney': [True, False, True, True, False, False],
+        'closed_on': pd.to_datetime(['2023-03-07 00:00:00', None, '2024-01-02 10:30:00', '2024-05-01 00:00:00', '2022-12-31 00:00:00', None]),
+    })
+
+
+def test_columnar_payload_decodes_to_the_records_payload(frame):
+    payload = over_the_wire(frame_to_columnar(frame))
+    records = over_the_wire(frame_payload(frame.drop(columns=['closed_on'])))
+
+    decoded = decode(payload)
+    assert [{k: v for k, v in row.items() if k != 'closed_on'} for row in decoded] == records
+    assert [row['closed_on'] for row in decoded] == [
+        '2023-03-07T00:00:00', None, '2024-01-02T10:30:00', '2024-05-01T00:00:00', '2022-12-31T00:00:00', None
+    ]
+
+
+def test_repeated_text_is_dictionary_encoded(frame):
+    payload = frame_to_columnar(frame)
+    assert payload['columns'] == list(frame.columns)
+    assert payload['rows'] == len(frame)
+    # Categoricals always, repeating text when it pays off, unique text never
+    assert set(payload['dictionaries']) == {'county', 'state'}
+    assert payload['dictionaries']['county'] == ['Alameda', 'Fresno']
+    assert list(payload['data']['county']) == [1, 0, -1, 1, 0, 1]
+
+
+def test_numeric_columns_stay_numpy_arrays(frame):
+    payload = frame_to_columnar(frame)
+    assert isinstance(payload['data']['claim_count'], np.ndarray)
+    assert isinstance(payload['data']['avg_variance'], np.ndarray)
+
+
+def test_empty_frame():
+    payload = over_the_wire(frame_to_columnar(pd.DataFrame({'county': pd.Series([], dtype=object)})))
+    assert payload == {'columns': ['county'], 'rows': 0, 'data': {'county': []}, 'dictionaries': {}}
@@ -0,0 +1,38 @@
+"""Dataset version stamp: bumps from several processes never collide"""
+
+import multiprocessing
+
+import pytest
+
+from app.db.data_version import bump_data_version, get_data_version
+from app.utils.file_lock import PROCESS_LOCKS
+
+BUMPS_PER_PROCESS = 25
+
+
+def _bump_many(results):
+    results.put([bump_data_version() for _ in range(BUMPS_PER_PROCESS)])
+
+
+def test_bump_increments_the_version():
+    before = get_data_version()
+    assert bump_data_version() == before + 1
+    assert get_data_version() == before + 1
+
+
+@pytest.mark.skipif(not PROCESS_LOCKS, reason="needs fcntl and fork")
+def test_concurrent_bumps_from_several_processes_all_count():
+    context = multiprocessing.get_context('fork')
+    results = context.Queue()
+    before = get_data_version()
+
+    workers = [context.Process(target=_bump_many, args=(results,)) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    versions = [version for _ in workers for version in results.get(timeout=60)]
+    for worker in workers:
+        worker.join()
+
+    # Every bump produced its own version, with no two processes writing the same N+1
+    assert sorted(versions) == list(range(before + 1, before + 1 + len(workers) * BUMPS_PER_PROCESS))
+    assert get_data_version() == before + len(workers) * BUMPS_PER_PROCESS
@@ -0,0 +1,95 @@
+"""Keyset pagination: cursor walks, offsets and the trailing NULL segment"""
+
+import pytest
+
+from app.db.schema import Claim, get_session
+from app.utils.pagination import decode_cursor, encode_cursor, keyset_page
+
+# (id, CLAIMID, DOLLARAMOUNTHIGH) - duplicate amounts and NULLs spread through the ids
+AMOUNTS = [500.0, None, 120.0, 500.0, 75.5, None, 120.0, 900.0, 500.0, None, 10.0, 75.5, None, 300.0]
+
+
+@pytest.fixture
+def session(sqlite_engine):
+    session = get_session(sqlite_engine)
+    for row_id, amount in enumerate(AMOUNTS, start=1):
+        session.add(Claim(id=row_id, CLAIMID=1000 + row_id, DOLLARAMOUNTHIGH=amount))
+    session.commit()
+    yield session
+    session.close()
+
+
+def expected_ids(sort_by, sort_order):
+    """Reference order: non-NULL values by (value, id), then NULLs by id, both in sort_order"""
+    reverse = sort_order == 'desc'
+    rows = [(row_id, amount) for row_id, amount in enumerate(AMOUNTS, start=1)]
+    if sort_by == 'id':
+        return sorted((row_id for row_id, _ in rows), reverse=reverse)
+    present = sorted(((amount, row_id) for row_id, amount in rows if amount is not None), reverse=reverse)
+    missing = sorted((row_id for row_id, amount in rows if amount is None), reverse=reverse)
+    return [row_id for _, row_id in present] + missing
+
+
+def walk(session, sort_by, sort_order, page_size):
+    ids, cursor, pages = [], None, 0
+    while True:
+        rows, cursor = keyset_page(session.query(Claim), Claim, page_size, sort_by, sort_order, cursor=cursor)
+        ids += [row.id for row in rows]
+        pages += 1
+        if cursor is None:
+            return ids, pages
+
+
+@pytest.mark.parametrize("sort_by", ['id', 'DOLLARAMOUNTHIGH'])
+@pytest.mark.parametrize("sort_order", ['asc', 'desc'])
+@pytest.mark.parametrize("page_size", [1, 3, 4, 20])
+def test_cursor_walk_visits_every_row_once_in_order(session, sort_by, sort_order, page_size):
+    ids, pages = walk(session, sort_by, sort_order, page_size)
+    assert ids == expected_ids(sort_by, sort_order)
+    assert pages == max(1, -(-len(AMOUNTS) // page_size))
+
+
+@pytest.mark.parametrize("sort_order", ['asc', 'desc'])
+@pytest.mark.parametrize("offset", [0, 3, 8, 9, 10, 12, 13, 20])
+def test_offset_pages_match_the_cursor_walk(session, sort_order, offset):
+    rows, _ = keyset_page(session.query(Claim), Claim, 3, 'DOLLARAMOUNTHIGH', sort_order, offset=offset)
+    assert [row.id for row in rows] == expected_ids('DOLLARAMOUNTHIGH', sort_order)[offset:offset + 3]
+
+
+@pytest.mark.parametrize("sort_order", ['asc', 'desc'])
+def test_cursor_from_an_offset_page_continues_the_walk(session, sort_order):
+    rows, cursor = keyset_page(session.query(Claim), Claim, 4, 'DOLLARAMOUNTHIGH', sort_order, offset=8)
+    ids = [row.id for row in rows]
+    # The page straddles the last non-NULL rows and the NULL segment
+    assert decode_cursor(cursor, 'DOLLARAMOUNTHIGH', sort_order)[0] is None
+
+    while cursor is not None:
+        rows, cursor = keyset_page(session.query(Claim), Claim, 4, 'DOLLARAMOUNTHIGH', sort_order, cursor=cursor)
+        ids += [row.id for row in rows]
+    assert ids == expected_ids('DOLLARAMOUNTHIGH', sort_order)[8:]
+
+
+def test_filtered_query_is_paged_within_the_filter(session):
+    query = session.query(Claim).filter(Claim.id > 4)
+    rows, cursor = keyset_page(query, Claim, 5, 'DOLLARAMOUNTHIGH', 'asc')
+    rows += keyset_page(query, Claim, 5, 'DOLLARAMOUNTHIGH', 'asc', cursor=cursor)[0]
+    assert [row.id for row in rows] == [i for i in expected_ids('DOLLARAMOUNTHIGH', 'asc') if i > 4]
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor('DOLLARAMOUNTHIGH', 'desc', 75.5, 12)
+    assert decode_cursor(cursor, 'DOLLARAMOUNTHIGH', 'desc') == (75.5, 12)
+    assert decode_cursor(encode_cursor('DOLLARAMOUNTHIGH', 'asc', None, 6), 'DOLLARAMOUNTHIGH', 'asc') == (None, 6)
+
+
+@pytest.mark.parametrize("sort_by, sort_order", [('DOLLARAMOUNTHIGH', 'asc'), ('id', 'desc'), ('CLAIMID', 'desc')])
+def test_cursor_for_a_different_sort_is_rejected(session, sort_by, sort_order):
+    cursor = encode_cursor('DOLLARAMOUNTHIGH', 'desc', 500.0, 1)
+    with pytest.raises(ValueError, match="does not match"):
+        keyset_page(session.query(Claim), Claim, 3, sort_by, sort_order, cursor=cursor)
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", encode_cursor('id', 'asc', None, 1)[:-3]])
+def test_malformed_cursor_is_rejected(cursor):
+    with pytest.raises(ValueError, match="Invalid pagination cursor"):
+        decode_cursor(cursor, 'id', 'asc')
@@ -0,0 +1,88 @@
+"""Settlement percentile rollups read the sketch tables through the app engine"""
+
+import asyncio
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi import FastAPI
+
+from app.db.quantile_sketch import SKETCH_COLUMN, grouped_sketches, sketch_table
+from app.services.data_service_sqlite import data_service_sqlite as data_service
+from app.services.quantile_rollup import QuantileRollup, quantile_rollup
+from app.services.response_cache import response_cache
+
+SKETCH_TABLE = sketch_table('venue_statistics')
+
+
+def write_sketches(engine):
+    """sketch_venue_statistics with two venues: settlements 1..100 and 101..200"""
+    values = np.arange(1, 201, dtype=np.float64)
+    group_ids = (values > 100).astype(np.int64)
+    pd.DataFrame({
+        'VENUERATING': ['Moderate', 'Liberal'],
+        'SEVERITY_CATEGORY': ['Low', 'Low'],
+        'CAUSATION_CATEGORY': ['Low', 'Low'],
+        'IOL': [1, 1],
+        'claim_count': [100, 100],
+        SKETCH_COLUMN: grouped_sketches(group_ids, values, 2),
+    }).to_sql(SKETCH_TABLE, engine, if_exists='replace', index=False)
+
+
+def test_singleton_uses_the_app_engine():
+    assert quantile_rollup.engine is data_service.engine
+
+
+def test_rollup_over_the_given_engine(sqlite_engine):
+    write_sketches(sqlite_engine)
+    rollup = QuantileRollup(engine=sqlite_engine)
+    assert 'venue_statistics' in rollup.sources()
+
+    merged = rollup.rollup('venue_statistics', [0.5])['groups']
+    assert [group['claim_count'] for group in merged] == [200]
+
+    by_venue = rollup.rollup('venue_statistics', [0.5], {'SEVERITY_CATEGORY': ['Low']}, ['VENUERATING'])['groups']
+    assert [group['VENUERATING'] for group in by_venue] == ['Liberal', 'Moderate']
+    assert by_venue[0]['percentiles']['p50'] > 100 > by_venue[1]['percentiles']['p50']
+
+
+@pytest.fixture
+def app():
+    from app.api.endpoints import aggregation
+
+    write_sketches(data_service.engine)
+    response_cache.clear()
+    application = FastAPI()
+    application.include_router(aggregation.router, prefix="/aggregation")
+    yield application
+
+    with data_service.engine.begin() as conn:
+        conn.exec_driver_sql(f"DROP TABLE {SKETCH_TABLE}")
+    response_cache.clear()
+
+
+def get(app, path, query=b''):
+    messages = []
+    scope = {
+        'type': 'http', 'method': 'GET', 'path': path, 'raw_path': path.encode(), 'query_string': query,
+        'headers': [], 'http_version': '1.1', 'scheme': 'http', 'server': ('test', 80),
+        'client': ('test', 1), 'root_path': '',
+    }
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    body = b''.join(message.get('body', b'') for message in messages[1:])
+    return messages[0]['status'], json.loads(body)
+
+
+def test_percentiles_endpoint(app):
+    status, body = get(app, '/aggregation/percentiles', b'source=venue_statistics&q=0.5&filter=VENUERATING:Moderate')
+    assert status == 200
+    assert body['groups'][0]['claim_count'] == 100
+    assert body['groups'][0]['percentiles']['p50'] == pytest.approx(50.5, abs=1)
@@ -0,0 +1,239 @@
+"""Cached routes and the aggregate cache across dataset version bumps"""
+
+import asyncio
+import gzip
+import json
+
+import pytest
+from fastapi import APIRouter, FastAPI
+from starlette.datastructures import ImmutableMultiDict
+
+from app.api.routing import CACHE_STATUS_HEADER, CachedRoute, make_etag, no_response_cache
+from app.db.data_version import bump_data_version, get_data_version
+from app.services.aggregate_cache import aggregate_cache
+from app.services.response_cache import compress_body, response_cache
+
+
+@pytest.fixture
+def calls():
+    return {'counter': 0, 'constant': 0, 'aggregate': 0, 'uncached': 0}
+
+
+@pytest.fixture
+def app(calls):
+    router = APIRouter(route_class=CachedRoute)
+
+    @router.get("/counter")
+    async def counter():
+        calls['counter'] += 1
+        return {'calls': calls['counter'], 'version': get_data_version()}
+
+    @router.get("/constant")
+    async def constant():
+        calls['constant'] += 1
+        return {'value': 1}
+
+    @router.get("/aggregate")
+    async def aggregate():
+        async def compute():
+            calls['aggregate'] += 1
+            return {'calls': calls['aggregate'], 'version': get_data_version()}
+        return await aggregate_cache.get_or_compute('aggregate', {}, compute)
+
+    @router.get("/uncached")
+    @no_response_cache
+    async def uncached():
+        calls['uncached'] += 1
+        return {'calls': calls['uncached']}
+
+    application = FastAPI()
+    application.include_router(router)
+    return application
+
+
+@pytest.fixture(autouse=True)
+def empty_caches(monkeypatch):
+    response_cache.clear()
+    aggregate_cache.clear()
+    monkeypatch.setattr(aggregate_cache, 'ttl', 3600)
+    yield
+    response_cache.clear()
+    aggregate_cache.clear()
+
+
+async def get(app, path, **headers):
+    """Issue a GET straight through the ASGI app; returns (status, headers, decoded body)"""
+    messages = []
+    scope = {
+        'type': 'http', 'method': 'GET', 'path': path, 'raw_path': path.encode(), 'query_string': b'',
+        'headers': [(name.replace('_', '-').lower().encode(), value.encode()) for name, value in headers.items()],
+        'http_version': '1.1', 'scheme': 'http', 'server': ('test', 80), 'client': ('test', 1), 'root_path': '',
+    }
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    await app(scope, receive, send)
+    response_headers = {name.decode().lower(): value.decode() for name, value in messages[0]['headers']}
+    body = b''.join(message.get('body', b'') for message in messages[1:])
+    if response_headers.get('content-encoding') == 'gzip':
+        body = gzip.decompress(body)
+    return messages[0]['status'], response_headers, json.loads(body) if body else None
+
+
+def run(scenario):
+    return asyncio.run(scenario())
+
+
+def test_repeated_request_is_served_from_the_cache(app, calls):
+    async def scenario():
+        _, first, body = await get(app, "/counter")
+        _, second, cached_body = await get(app, "/counter", accept_encoding="gzip")
+        assert (first[CACHE_STATUS_HEADER.lower()], second[CACHE_STATUS_HEADER.lower()]) == ("miss", "hit")
+        assert second['content-encoding'] == 'gzip'
+        assert cached_body == body
+        assert calls['counter'] == 1
+    run(scenario)
+
+
+def test_version_bump_recomputes(app, calls):
+    async def scenario():
+        _, _, old_body = await get(app, "/counter")
+        bump_data_version()
+
+        status, headers, new_body = await get(app, "/counter")
+        assert status == 200
+        assert headers[CACHE_STATUS_HEADER.lower()] == "miss"
+        assert new_body == {'calls': 2, 'version': old_body['version'] + 1}
+
+        _, headers, cached = await get(app, "/counter")
+        assert headers[CACHE_STATUS_HEADER.lower()] == "hit"
+        assert cached == new_body
+        assert calls['counter'] == 2
+    run(scenario)
+
+
+def test_stale_aggregate_is_served_but_not_cached_under_the_new_version(app, calls):
+    async def scenario():
+        _, _, first = await get(app, "/aggregate")
+        bump_data_version()
+
+        # Stale-while-revalidate answers with the old entry and recomputes in the background
+        _, headers, stale = await get(app, "/aggregate")
+        assert headers[CACHE_STATUS_HEADER.lower()] == "stale"
+        assert stale == first
+
+        for _ in range(100):
+            if not aggregate_cache._revalidating:
+                break
+            await asyncio.sleep(0.01)
+
+        _, headers, fresh = await get(app, "/aggregate")
+        assert headers[CACHE_STATUS_HEADER.lower()] == "miss"
+        assert fresh == {'calls': 2, 'version': first['version'] + 1}
+
+        _, headers, cached = await get(app, "/aggregate")
+        assert headers[CACHE_STATUS_HEADER.lower()] == "hit"
+        assert cached == fresh
+        assert calls['aggregate'] == 2
+    run(scenario)
+
+
+def test_no_cache_request_replaces_the_stored_body(app, calls):
+    async def scenario():
+        await get(app, "/counter")
+        _, headers, body = await get(app, "/counter", cache_control="no-cache")
+        assert headers[CACHE_STATUS_HEADER.lower()] == "miss"
+        _, _, cached = await get(app, "/counter")
+        assert cached == body == {'calls': 2, 'version': get_data_version()}
+    run(scenario)
+
+
+def test_opted_out_endpoint_is_never_cached(app, calls):
+    async def scenario():
+        for _ in range(2):
+            _, headers, _ = await get(app, "/uncached")
+            assert CACHE_STATUS_HEADER.lower() not in headers
+        assert calls['uncached'] == 2
+    run(scenario)
+
+
+def test_etag_is_derived_from_the_stored_body(app, calls):
+    async def scenario():
+        _, first, body = await get(app, "/counter")
+        _, second, _ = await get(app, "/counter")
+        stored = response_cache.get(response_cache.make_key("GET", "/counter", ImmutableMultiDict()))
+        assert first['etag'] == second['etag'] == make_etag(stored)
+        assert json.loads(gzip.decompress(stored)) == body
+        assert first['cache-control'] == 'no-cache'
+    run(scenario)
+
+
+def test_matching_if_none_match_gets_not_modified(app, calls):
+    async def scenario():
+        _, headers, _ = await get(app, "/counter")
+        status, revalidated, body = await get(app, "/counter", if_none_match=headers['etag'])
+        assert status == 304 and body is None
+        assert revalidated['etag'] == headers['etag']
+        status, _, _ = await get(app, "/counter", if_none_match='W/"something-else", ' + headers['etag'][2:])
+        assert status == 304
+        assert calls['counter'] == 1
+    run(scenario)
+
+
+def test_version_bump_changes_the_etag_of_a_changed_body(app, calls):
+    async def scenario():
+        _, before, _ = await get(app, "/counter")
+        bump_data_version()
+
+        status, after, _ = await get(app, "/counter", if_none_match=before['etag'])
+        assert status == 200
+        assert after['etag'] != before['etag']
+        status, _, _ = await get(app, "/counter", if_none_match=after['etag'])
+        assert status == 304
+    run(scenario)
+
+
+def test_unchanged_body_keeps_its_etag_across_a_version_bump(app, calls):
+    async def scenario():
+        _, before, _ = await get(app, "/constant")
+        bump_data_version()
+
+        # The miss recomputes; the stored body is identical, so the client's copy still validates
+        _, after, _ = await get(app, "/constant")
+        assert after['etag'] == before['etag'] == make_etag(compress_body(b'{"value":1}'))
+        status, _, _ = await get(app, "/constant", if_none_match=before['etag'])
+        assert status == 304
+        assert calls['constant'] == 2
+    run(scenario)
+
+
+def test_stale_response_carries_no_etag(app, calls):
+    async def scenario():
+        await get(app, "/aggregate")
+        bump_data_version()
+        _, headers, _ = await get(app, "/aggregate")
+        assert headers[CACHE_STATUS_HEADER.lower()] == "stale"
+        assert 'etag' not in headers
+    run(scenario)
+
+
+@pytest.mark.parametrize("accept_encoding, gzipped", [
+    ("gzip", True),
+    ("br, gzip;q=0.5", True),
+    ("*", True),
+    ("gzip;q=0", False),
+    ("identity", False),
+    ("*;q=0.5, gzip;q=0", False),
+])
+def test_stored_gzip_body_is_only_sent_when_gzip_is_acceptable(app, accept_encoding, gzipped):
+    async def scenario():
+        await get(app, "/counter")
+        _, headers, body = await get(app, "/counter", accept_encoding=accept_encoding)
+        assert headers[CACHE_STATUS_HEADER.lower()] == "hit"
+        assert (headers.get('content-encoding') == 'gzip') == gzipped
+        assert body['calls'] == 1
+    run(scenario)
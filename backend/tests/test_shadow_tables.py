@@ -0,0 +1,125 @@
+"""Shadow table swap: dependents survive, failures roll back, readers never miss a table"""
+
+import sqlite3
+import threading
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from app.db.shadow_tables import build_shadow_table, shadow_name, swap_in_shadow_tables
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return tmp_path / "summary.db"
+
+
+@pytest.fixture
+def conn(db_path):
+    engine = create_engine(f"sqlite:///{db_path}")
+    with engine.connect() as conn:
+        conn.execute(text("CREATE TABLE source (year INTEGER, amount REAL)"))
+        conn.execute(text("INSERT INTO source VALUES (2022, 10), (2022, 30), (2023, 5)"))
+        conn.execute(text("CREATE TABLE mv_year AS SELECT year, SUM(amount) AS total FROM source GROUP BY year"))
+        conn.execute(text("CREATE INDEX idx_mv_year ON mv_year(year)"))
+        conn.execute(text("CREATE VIEW v_year AS SELECT year, total FROM mv_year WHERE total > 0"))
+        conn.execute(text("CREATE TABLE mv_count AS SELECT COUNT(*) AS claims FROM source"))
+        conn.commit()
+        yield conn
+    engine.dispose()
+
+
+def objects(conn, kind):
+    rows = conn.execute(text("SELECT name, tbl_name FROM sqlite_master WHERE type = :kind"), {"kind": kind})
+    return {name: table for name, table in rows}
+
+
+def rebuild(conn):
+    """New source data, then shadows of both summary tables"""
+    conn.execute(text("INSERT INTO source VALUES (2024, 7)"))
+    build_shadow_table(conn, 'mv_year', "SELECT year, SUM(amount) AS total FROM source GROUP BY year")
+    build_shadow_table(conn, 'mv_count', "SELECT COUNT(*) AS claims FROM source")
+    conn.commit()
+
+
+def test_swap_replaces_tables_and_keeps_views_and_indexes(conn):
+    rebuild(conn)
+    swap_in_shadow_tables(conn, ['mv_year', 'mv_count'], extra_indexes={
+        'mv_count': ["CREATE INDEX IF NOT EXISTS idx_mv_count ON mv_count(claims)"]
+    })
+
+    assert conn.execute(text("SELECT year, total FROM v_year ORDER BY year")).fetchall() == [
+        (2022, 40.0), (2023, 5.0), (2024, 7.0)
+    ]
+    assert conn.execute(text("SELECT claims FROM mv_count")).scalar() == 4
+    assert objects(conn, 'index') == {'idx_mv_year': 'mv_year', 'idx_mv_count': 'mv_count'}
+    assert set(objects(conn, 'table')) == {'source', 'mv_year', 'mv_count'}
+    assert 'v_year' in objects(conn, 'view')
+
+
+def test_swap_of_a_table_that_did_not_exist_yet(conn):
+    build_shadow_table(conn, 'mv_state', "SELECT DISTINCT year FROM source")
+    swap_in_shadow_tables(conn, ['mv_state'])
+    assert conn.execute(text("SELECT COUNT(*) FROM mv_state")).scalar() == 2
+
+
+def test_missing_shadow_is_rejected_before_anything_moves(conn):
+    build_shadow_table(conn, 'mv_year', "SELECT 1 AS year, 1.0 AS total")
+    with pytest.raises(ValueError, match="mv_count"):
+        swap_in_shadow_tables(conn, ['mv_year', 'mv_count'])
+    assert conn.execute(text("SELECT COUNT(*) FROM mv_year")).scalar() == 2
+
+
+def test_failure_mid_swap_rolls_back_to_the_old_tables(conn):
+    rebuild(conn)
+    # mv_year is swapped first; the broken index for mv_count fails after that
+    with pytest.raises(Exception, match="no such column"):
+        swap_in_shadow_tables(conn, ['mv_year', 'mv_count'], extra_indexes={
+            'mv_count': ["CREATE INDEX idx_broken ON mv_count(no_such_column)"]
+        })
+
+    assert conn.execute(text("SELECT year, total FROM v_year ORDER BY year")).fetchall() == [(2022, 40.0), (2023, 5.0)]
+    assert conn.execute(text("SELECT claims FROM mv_count")).scalar() == 3
+    assert objects(conn, 'index') == {'idx_mv_year': 'mv_year'}
+    tables = set(objects(conn, 'table'))
+    assert {shadow_name('mv_year'), shadow_name('mv_count')} <= tables
+    assert not any(name.endswith('__retired') for name in tables)
+
+    # The shadows are intact, so the swap can simply be retried
+    swap_in_shadow_tables(conn, ['mv_year', 'mv_count'])
+    assert conn.execute(text("SELECT claims FROM mv_count")).scalar() == 4
+
+
+def test_concurrent_readers_always_see_a_complete_table(conn, db_path):
+    stop = threading.Event()
+    errors, seen = [], set()
+
+    def read():
+        reader = sqlite3.connect(db_path, timeout=30)
+        try:
+            while not stop.is_set():
+                try:
+                    seen.add(reader.execute("SELECT COUNT(*), SUM(total) FROM v_year").fetchone())
+                except sqlite3.Error as e:
+                    errors.append(str(e))
+        finally:
+            reader.close()
+
+    readers = [threading.Thread(target=read) for _ in range(4)]
+    for thread in readers:
+        thread.start()
+    try:
+        for _ in range(20):
+            rebuild(conn)
+            swap_in_shadow_tables(conn, ['mv_year', 'mv_count'])
+    finally:
+        stop.set()
+        for thread in readers:
+            thread.join()
+
+    assert errors == []
+    assert seen
+    # Every read saw one whole generation: the original two years, or three after k rebuilds
+    for count, total in seen:
+        generation = (total - 45.0) / 7.0
+        assert (count, total) == (2, 45.0) or (count == 3 and generation.is_integer() and 1 <= generation <= 20)
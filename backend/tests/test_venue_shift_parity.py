@@ -0,0 +1,249 @@
+"""Vectorized venue shift recommendations against the original per-county SQL loop"""
+
+import sqlite3
+from datetime import date, timedelta
+
+import pandas as pd
+import pytest
+
+from app.api.endpoints.aggregation_optimized_venue_shift import (
+    STATISTICS_KEY, _best_alternatives, load_county_profiles, load_venue_statistics,
+    recommend_venue_shifts, window_start
+)
+
+SEVERITY_SCORES = {'Low': 300, 'Medium': 1000, 'High': 2000}
+CAUSATION_SCORES = {'Low': 50, 'Medium': 200, 'High': 400}
+
+# (county, venue, severity, causation, IOL) - twelve recent claims each
+COUNTIES = [
+    ('Alpha', 'Moderate', 'Low', 'Low', 1),        # exact row, better venue exists
+    ('Bravo', 'Liberal', 'Medium', 'Low', 2),      # exact row under 10 claims: pooled fallback
+    ('Charlie', 'Moderate', 'High', 'High', 4),    # no exact row: pooled fallback
+    ('Delta', 'Conservative', 'Low', 'Low', 1),    # already the best venue
+    ('Echo', 'Liberal', 'Low', 'Medium', 2),       # best candidate is its own venue: runner-up
+    ('Foxtrot', 'Moderate', 'High', 'Low', 3),     # two alternatives tie on error
+    ('Golf', 'Conservative', 'Medium', 'Medium', 1),  # no statistics for its venue: skipped
+    ('Hotel', 'Moderate', 'Medium', 'High', 2),    # no alternatives
+    ('India', 'Conservative', 'High', 'Medium', 1),   # alternative with a NULL error
+]
+
+# (venue, severity, causation, IOL, mean_absolute_error, sample_size), in table order
+STATISTICS = [
+    ('Moderate', 'Low', 'Low', 1, 20000, 40),
+    ('Conservative', 'Low', 'Low', 1, 10000, 35),
+    ('Liberal', 'Low', 'Low', 1, 12000, 50),
+    ('Liberal', 'Medium', 'Low', 2, 30000, 5),
+    ('Liberal', 'Medium', 'Low', 3, 10000, 20),
+    ('Moderate', 'Medium', 'Low', 2, 15000, 12),
+    ('Moderate', 'High', 'High', 3, 50000, 15),
+    ('Liberal', 'High', 'High', 4, 1000, 8),
+    ('Conservative', 'High', 'High', 4, 44000, 11),
+    ('Liberal', 'Low', 'Medium', 2, 30000, 20),
+    ('Conservative', 'Low', 'Medium', 2, 12000, 40),
+    ('Liberal', 'Low', 'Medium', 2, 1000, 20),
+    ('Moderate', 'High', 'Low', 3, 40000, 30),
+    ('Liberal', 'High', 'Low', 3, 20000, 30),
+    ('Conservative', 'High', 'Low', 3, 20000, 30),
+    ('Liberal', 'Medium', 'Medium', 1, 5000, 10),
+    ('Moderate', 'Medium', 'High', 2, 10000, 10),
+    ('Liberal', 'High', 'Medium', 1, 5000, 20),
+    ('Moderate', 'High', 'Medium', 1, None, 20),
+    ('Conservative', 'High', 'Medium', 1, 8000, 20),
+]
+
+
+def baseline_recommendations(conn, counties):
+    """The per-county loop get_venue_shift_recommendations_optimized ran before one read of venue_statistics"""
+    recommendations = []
+
+    for county in counties:
+        current_venue = county['current_venue']
+        typical_sev = county['typical_severity']
+        typical_caus = county['typical_causation']
+        typical_iol = county['typical_iol']
+
+        current_stats = conn.execute("""
+            SELECT VENUERATING, mean_actual, median_actual, mean_predicted, mean_absolute_error,
+                   median_absolute_error, coefficient_of_variation, sample_size
+            FROM venue_statistics
+            WHERE VENUERATING = ? AND SEVERITY_CATEGORY = ? AND CAUSATION_CATEGORY = ? AND IOL = ?
+        """, (current_venue, typical_sev, typical_caus, typical_iol)).fetchone()
+
+        if not current_stats or current_stats['sample_size'] < 10:
+            current_stats = conn.execute("""
+                SELECT VENUERATING, AVG(mean_actual) as mean_actual, AVG(median_actual) as median_actual,
+                       AVG(mean_predicted) as mean_predicted, AVG(mean_absolute_error) as mean_absolute_error,
+                       AVG(median_absolute_error) as median_absolute_error,
+                       AVG(coefficient_of_variation) as coefficient_of_variation, SUM(sample_size) as sample_size
+                FROM venue_statistics
+                WHERE VENUERATING = ? AND SEVERITY_CATEGORY = ? AND CAUSATION_CATEGORY = ?
+                GROUP BY VENUERATING
+            """, (current_venue, typical_sev, typical_caus)).fetchone()
+
+        if not current_stats:
+            continue
+
+        current_error = current_stats['mean_absolute_error']
+        current_sample = current_stats['sample_size']
+        alternatives = baseline_alternatives(conn, current_venue, typical_sev, typical_caus, typical_iol)
+
+        recommendation = None
+        improvement = 0
+        confidence = 'low'
+
+        if alternatives:
+            best_alt = alternatives[0]
+            alt_error = best_alt['mean_absolute_error']
+            alt_sample = best_alt['sample_size']
+
+            improvement = current_error - alt_error
+
+            if improvement > 5000 or (improvement / current_error) > 0.15:
+                recommendation = best_alt['VENUERATING']
+
+                if current_sample >= 30 and alt_sample >= 30:
+                    confidence = 'high'
+                elif current_sample >= 10 and alt_sample >= 10:
+                    confidence = 'medium'
+
+        recommendations.append({
+            'county': county['COUNTYNAME'],
+            'state': county['VENUESTATE'],
+            'current_venue_rating': current_venue,
+            'current_mean_actual': round(current_stats['mean_actual'], 2) if current_stats['mean_actual'] else 0,
+            'current_mean_error': round(current_error, 2),
+            'current_coefficient_variation': round(current_stats['coefficient_of_variation'], 3),
+            'current_claim_count': county['claim_count'],
+            'current_sample_size': current_sample,
+
+            'recommended_venue_rating': recommendation,
+            'recommended_mean_error': round(best_alt['mean_absolute_error'], 2) if alternatives and recommendation else 0,
+            'dollar_improvement': round(improvement, 2) if recommendation else 0,
+            'percent_improvement': round((improvement / current_error * 100), 1) if recommendation and current_error > 0 else 0,
+
+            'confidence': confidence,
+            'typical_profile': {
+                'severity': typical_sev,
+                'causation': typical_caus,
+                'iol': typical_iol
+            }
+        })
+    return recommendations
+
+
+def baseline_alternatives(conn, current_venue, severity, causation, iol):
+    return list(conn.execute("""
+        SELECT VENUERATING, mean_actual, median_actual, mean_predicted, mean_absolute_error,
+               median_absolute_error, coefficient_of_variation, sample_size
+        FROM venue_statistics
+        WHERE VENUERATING != ? AND SEVERITY_CATEGORY = ? AND CAUSATION_CATEGORY = ? AND IOL = ?
+          AND sample_size >= 10
+        ORDER BY mean_absolute_error ASC
+    """, (current_venue, severity, causation, iol)))
+
+
+@pytest.fixture
+def seeded(sqlite_engine):
+    """Schema database seeded with COUNTIES' claims and the STATISTICS rows"""
+    conn = sqlite3.connect(sqlite_engine.url.database)
+    conn.row_factory = sqlite3.Row
+
+    closed_on = (date.today() - timedelta(days=10)).isoformat()
+    claim_id = 0
+    for county, venue, severity, causation, iol in COUNTIES:
+        for _ in range(12):
+            claim_id += 1
+            conn.execute(
+                "INSERT INTO claims (CLAIMID, COUNTYNAME, VENUESTATE, VENUERATING, CALCULATED_SEVERITY_SCORE, "
+                "CALCULATED_CAUSATION_SCORE, IOL, closed_on) VALUES (?, ?, 'CA', ?, ?, ?, ?, ?)",
+                (claim_id, county, venue, SEVERITY_SCORES[severity], CAUSATION_SCORES[causation], iol, closed_on)
+            )
+
+    for i, (venue, severity, causation, iol, error, sample) in enumerate(STATISTICS):
+        # Distinct, exactly representable values so the pooled averages round the same way
+        conn.execute(
+            "INSERT INTO venue_statistics (VENUERATING, SEVERITY_CATEGORY, CAUSATION_CATEGORY, IOL, mean_actual, "
+            "median_actual, mean_predicted, mean_absolute_error, median_absolute_error, coefficient_of_variation, "
+            "sample_size) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (venue, severity, causation, iol, 40000 + 1000 * i, 38000 + 500 * i, 45000 + 250 * i,
+             error, error, 0.25 + 0.125 * (i % 4), sample)
+        )
+    conn.commit()
+    conn.close()
+    return sqlite_engine
+
+
+@pytest.fixture
+def conn(seeded):
+    """sqlite3 connection for the SQL loop"""
+    conn = sqlite3.connect(seeded.url.database)
+    conn.row_factory = sqlite3.Row
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def engine_conn(seeded):
+    """App-engine connection for the vectorized path"""
+    with seeded.connect() as conn:
+        yield conn
+
+
+def county_profiles(engine_conn):
+    return load_county_profiles(engine_conn, window_start(6))
+
+
+def test_profiles_cover_every_case(engine_conn):
+    profiles = county_profiles(engine_conn)
+    assert sorted(profiles['COUNTYNAME']) == sorted(county for county, *_ in COUNTIES)
+    typical = profiles.set_index('COUNTYNAME')[['current_venue', 'typical_severity', 'typical_causation', 'typical_iol']]
+    for county, *profile in COUNTIES:
+        assert list(typical.loc[county]) == profile
+
+
+def test_recommendations_match_the_sql_loop(conn, engine_conn):
+    # India's best alternative has a NULL error, which the SQL loop could not subtract
+    profiles = county_profiles(engine_conn)
+    profiles = profiles[profiles['COUNTYNAME'] != 'India'].reset_index(drop=True)
+    statistics = load_venue_statistics(engine_conn)
+
+    expected = baseline_recommendations(conn, profiles.to_dict('records'))
+    assert recommend_venue_shifts(profiles, statistics) == expected
+
+    by_county = {row['county']: row for row in expected}
+    assert 'Golf' not in by_county
+    assert by_county['Alpha']['recommended_venue_rating'] == 'Conservative'
+    assert by_county['Bravo']['current_sample_size'] == 25
+    assert by_county['Charlie']['recommended_venue_rating'] == 'Conservative'
+    assert by_county['Delta']['recommended_venue_rating'] is None
+    assert by_county['Echo']['recommended_venue_rating'] == 'Conservative'
+    assert by_county['Foxtrot']['recommended_venue_rating'] == 'Liberal'
+    assert by_county['Hotel']['recommended_venue_rating'] is None
+
+
+def test_best_alternative_matches_the_first_sql_alternative(conn, engine_conn):
+    profiles = county_profiles(engine_conn).rename(columns={
+        'current_venue': 'VENUERATING',
+        'typical_severity': 'SEVERITY_CATEGORY',
+        'typical_causation': 'CAUSATION_CATEGORY',
+        'typical_iol': 'IOL'
+    })
+    alternatives = _best_alternatives(profiles, load_venue_statistics(engine_conn))
+
+    for profile, (_, best) in zip(profiles.to_dict('records'), alternatives.iterrows()):
+        rows = baseline_alternatives(conn, *(profile[key] for key in STATISTICS_KEY))
+        expected = (rows[0]['VENUERATING'], rows[0]['mean_absolute_error'], rows[0]['sample_size']) if rows else (None, None, None)
+        actual = tuple(None if pd.isna(value) else value for value in best)
+        assert actual == expected, profile['COUNTYNAME']
+
+    # NULL errors rank first, as ORDER BY mean_absolute_error put them
+    india = profiles.index[profiles['COUNTYNAME'] == 'India'][0]
+    assert alternatives.loc[india, 'VENUERATING'] == 'Moderate'
+    assert pd.isna(alternatives.loc[india, 'mean_absolute_error'])
+
+
+def test_null_error_alternative_is_not_recommended(engine_conn):
+    recommendations = recommend_venue_shifts(county_profiles(engine_conn), load_venue_statistics(engine_conn))
+    india = next(row for row in recommendations if row['county'] == 'India')
+    assert india['recommended_venue_rating'] is None
+    assert india['dollar_improvement'] == 0
@@ -0,0 +1,54 @@
+"""Venue shift snapshots read and store through the app engine"""
+
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import text
+
+from app.db.data_version import bump_data_version
+from app.services.data_service_sqlite import data_service_sqlite as data_service
+from app.services.venue_shift_snapshots import VenueShiftSnapshots, venue_shift_snapshots
+
+
+@pytest.fixture
+def snapshots(sqlite_engine):
+    """Snapshots over one county whose venue has a clearly better alternative"""
+    closed_on = (date.today() - timedelta(days=10)).isoformat()
+    with sqlite_engine.begin() as conn:
+        for claim_id in range(1, 13):
+            conn.execute(text(
+                "INSERT INTO claims (CLAIMID, COUNTYNAME, VENUESTATE, VENUERATING, CALCULATED_SEVERITY_SCORE, "
+                "CALCULATED_CAUSATION_SCORE, IOL, closed_on) VALUES (:id, 'Fresno', 'CA', 'Moderate', 300, 50, 1, :closed_on)"
+            ), {'id': claim_id, 'closed_on': closed_on})
+        for venue, error in (('Moderate', 20000), ('Conservative', 10000)):
+            conn.execute(text(
+                "INSERT INTO venue_statistics (VENUERATING, SEVERITY_CATEGORY, CAUSATION_CATEGORY, IOL, mean_actual, "
+                "mean_absolute_error, coefficient_of_variation, sample_size) "
+                "VALUES (:venue, 'Low', 'Low', 1, 50000, :error, 0.5, 40)"
+            ), {'venue': venue, 'error': error})
+    return VenueShiftSnapshots(engine=sqlite_engine, windows=(6,))
+
+
+def test_singleton_uses_the_app_engine():
+    assert venue_shift_snapshots.engine is data_service.engine
+
+
+def test_analysis_is_computed_once_per_data_version(snapshots):
+    data = snapshots.get(6)
+    assert [row['county'] for row in data['recommendations']] == ['Fresno']
+    assert data['recommendations'][0]['recommended_venue_rating'] == 'Conservative'
+    assert snapshots.stats['misses'] == 1
+
+    assert snapshots.get(6) == data
+    assert snapshots.stats['hits'] == 1
+
+    bump_data_version()
+    snapshots.get(6)
+    assert snapshots.stats['misses'] == 2
+    assert snapshots.stats['errors'] == 0
+
+
+def test_rebuild_stores_the_common_windows(snapshots):
+    assert snapshots.rebuild() == {6: 1}
+    assert snapshots.rebuild() == {}
+    assert [window['months'] for window in snapshots.get_stats()['snapshots']] == [6]
@@ -245,7 +245,9 @@ def refresh_materialized_views(db: Session = Depends(get_db)):
     """
     Refresh all materialized views.
 
-    This endpoint drops and recreates all materialized views with current data.
+    This endpoint recreates all materialized views with current data.
+    On SQLite the views are rebuilt as shadow tables and swapped in at once,
+    so dashboard reads keep working throughout the refresh.
     Note: This can take several minutes for large datasets (5M+ claims).
     """
     try:
@@ -254,29 +256,13 @@ def refresh_materialized_views(db: Session = Depends(get_db)):
         logger.info("Starting materialized view refresh...")
 
         if settings.is_sqlite:
-            # SQLite: Drop and recreate
-            views = [
-                'mv_year_severity',
-                'mv_county_year',
-                'mv_injury_group',
-                'mv_adjuster_performance',
-                'mv_venue_analysis',
-                'mv_factor_combinations',
-                'mv_kpi_summary'
-            ]
-
-            for view in views:
-                db.execute(text(f"DROP TABLE IF EXISTS {view}"))
-
-            db.commit()
-
-            # Load and execute create script
+            # SQLite: Build shadow tables, then rename-swap them in one transaction
             from app.utils.query_loader import query_loader
-            create_sql = query_loader.load_ddl("create_materialized_views.sql")
+            from app.utils.shadow_tables import refresh_tables_from_script
 
-            # Execute the SQL (split by statement if needed)
-            db.execute(text(create_sql))
-            db.commit()
+            create_sql = query_loader.load_ddl("create_materialized_views.sql")
+            row_counts = refresh_tables_from_script(db.get_bind(), create_sql)
+            logger.info(f"Rebuilt {len(row_counts)} views: {row_counts}")
 
         elif settings.is_snowflake:
             # Snowflake: Use native REFRESH
@@ -10,6 +10,7 @@ from typing import List, Optional
 import logging
 
 from app.core.database import get_db
+from app.utils.pagination import keyset_page, KEYSET_SORT_FIELDS
 from app.db.models import Claim, SSNB
 from app.schemas.claim import (
     ClaimResponse,
@@ -39,6 +40,7 @@ def get_claims(
     max_variance: Optional[float] = Query(None),
     sort_by: Optional[str] = Query("CLAIMID", description="Field to sort by"),
     sort_order: Optional[str] = Query("asc", regex="^(asc|desc)$"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
     db: Session = Depends(get_db)
 ):
     """
@@ -50,6 +52,10 @@ def get_claims(
     - variance range (min_variance, max_variance)
 
     Returns paginated results with total count.
+
+    Sorting by id, CLAIMID, CLAIMCLOSEDDATE, DOLLARAMOUNTHIGH or variance_pct
+    uses keyset pagination: follow next_cursor to seek to the next page on the
+    (sort field, id) index, so deep pages cost the same as the first one.
     """
     try:
         query = db.query(Claim)
@@ -81,17 +87,29 @@ def get_claims(
         # Get total count
         total = query.count()
 
-        # Apply sorting
-        if sort_by and hasattr(Claim, sort_by):
-            column = getattr(Claim, sort_by)
-            if sort_order == "desc":
-                query = query.order_by(desc(column))
-            else:
-                query = query.order_by(asc(column))
-
-        # Apply pagination
         offset = (page - 1) * page_size
-        claims = query.offset(offset).limit(page_size).all()
+        next_cursor = None
+
+        if sort_by in KEYSET_SORT_FIELDS:
+            # Keyset pagination on (sort field, id)
+            claims, next_cursor = keyset_page(
+                query, Claim, page_size, sort_by, sort_order,
+                cursor=cursor, offset=offset
+            )
+        else:
+            if cursor:
+                raise ValueError(f"Cursor pagination is not supported when sorting by {sort_by}")
+
+            # Apply sorting
+            if sort_by and hasattr(Claim, sort_by):
+                column = getattr(Claim, sort_by)
+                if sort_order == "desc":
+                    query = query.order_by(desc(column))
+                else:
+                    query = query.order_by(asc(column))
+
+            # Apply pagination
+            claims = query.offset(offset).limit(page_size).all()
 
         # Convert to response models
         claim_responses = [ClaimResponse.from_orm(claim) for claim in claims]
@@ -103,9 +121,12 @@ def get_claims(
             total=total,
             page=page,
             page_size=page_size,
-            total_pages=total_pages
+            total_pages=total_pages,
+            next_cursor=next_cursor
         )
 
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error fetching claims: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -211,6 +211,12 @@ class Claim(BaseModel):
 
         # Model performance
         Index('idx_model_performance', 'PRIMARY_INJURYGROUP_CODE_BY_SEVERITY', 'variance_pct', 'CALCULATED_SEVERITY_SCORE'),
+
+        # Keyset pagination (sort field, id)
+        Index('idx_keyset_claimid', 'CLAIMID', 'id'),
+        Index('idx_keyset_closeddate', 'CLAIMCLOSEDDATE', 'id'),
+        Index('idx_keyset_dollaramount', 'DOLLARAMOUNTHIGH', 'id'),
+        Index('idx_keyset_variance', 'variance_pct', 'id'),
     )
 
     def __repr__(self) -> str:
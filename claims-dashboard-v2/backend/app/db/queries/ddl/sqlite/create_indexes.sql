@@ -73,6 +73,19 @@ CREATE INDEX IF NOT EXISTS idx_calculated_scores
 CREATE INDEX IF NOT EXISTS idx_model_performance
     ON claims(PRIMARY_INJURYGROUP_CODE_BY_SEVERITY, variance_pct, CALCULATED_SEVERITY_SCORE);
 
+-- Composite Indexes for Keyset Pagination (GET /claims/ sort fields + id)
+CREATE INDEX IF NOT EXISTS idx_keyset_claimid
+    ON claims(CLAIMID, id);
+
+CREATE INDEX IF NOT EXISTS idx_keyset_closeddate
+    ON claims(CLAIMCLOSEDDATE, id);
+
+CREATE INDEX IF NOT EXISTS idx_keyset_dollaramount
+    ON claims(DOLLARAMOUNTHIGH, id);
+
+CREATE INDEX IF NOT EXISTS idx_keyset_variance
+    ON claims(variance_pct, id);
+
 -- =====================================================
 -- INDEXES FOR: ssnb table
 -- =====================================================
@@ -70,6 +70,7 @@ class ClaimListResponse(BaseModel):
     page: int
     page_size: int
     total_pages: int
+    next_cursor: Optional[str] = None
 
 
 class KPIResponse(BaseModel):
@@ -0,0 +1,177 @@
+"""
+Shadow table refresh for SQLite materialized views.
+
+SQLite has no materialized views, so the mv_* tables are rebuilt from the
+create_materialized_views.sql script. Dropping them first leaves readers without
+a table until the rebuild finishes. Instead, every table is built under a shadow
+name and all of them are swapped in with renames inside one short write
+transaction, so readers see either every old table or every new one.
+"""
+
+import re
+import sqlite3
+from typing import Dict, List, Optional
+import logging
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+logger = logging.getLogger(__name__)
+
+SHADOW_SUFFIX = "__shadow"
+RETIRED_SUFFIX = "__retired"
+
+_CREATE_TABLE_AS = re.compile(
+    r"^CREATE\s+TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?(\w+)\s+AS\s+(.*)$", re.IGNORECASE | re.DOTALL
+)
+_CREATE_INDEX = re.compile(
+    r"^CREATE\s+(?:UNIQUE\s+)?INDEX\s+(?:IF\s+NOT\s+EXISTS\s+)?\w+\s+ON\s+(\w+)", re.IGNORECASE
+)
+
+
+def shadow_name(table: str) -> str:
+    """Name a table is built under before it is swapped in."""
+    return f"{table}{SHADOW_SUFFIX}"
+
+
+def split_statements(script: str) -> List[str]:
+    """
+    Split a SQL script into statements, dropping comment-only lines.
+
+    Args:
+        script: SQL script text
+
+    Returns:
+        List[str]: Complete statements without their trailing semicolons
+    """
+    statements = []
+    buffer = ""
+    for line in script.splitlines():
+        if not buffer and (not line.strip() or line.strip().startswith("--")):
+            continue
+        buffer += line + "\n"
+        if sqlite3.complete_statement(buffer):
+            statements.append(buffer.strip().rstrip(";").strip())
+            buffer = ""
+    return statements
+
+
+def swap_in_shadow_tables(
+    conn: Connection,
+    tables: List[str],
+    extra_indexes: Optional[Dict[str, List[str]]] = None
+) -> None:
+    """
+    Replace every live table with its shadow in one transaction.
+
+    For each table: live -> __retired, __shadow -> live, drop __retired, then
+    re-create the live table's indexes (read before the swap) and the
+    `extra_indexes` statements for it. Index names are database-wide, so they
+    can only be re-created once the retired table and its indexes are gone.
+
+    Args:
+        conn: SQLAlchemy connection with no transaction of its own in progress
+        tables: Live table names whose shadows have been built
+        extra_indexes: Optional CREATE INDEX IF NOT EXISTS statements per table
+    """
+    extra_indexes = extra_indexes or {}
+    conn.commit()
+
+    existing = {
+        row[0] for row in conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'table'")).fetchall()
+    }
+    missing = [table for table in tables if shadow_name(table) not in existing]
+    if missing:
+        raise ValueError(f"Shadow tables not built for: {', '.join(missing)}")
+
+    indexes = {}
+    for table in tables:
+        rows = conn.execute(
+            text("SELECT sql FROM sqlite_master WHERE type = 'index' AND tbl_name = :table AND sql IS NOT NULL"),
+            {"table": table}
+        ).fetchall()
+        indexes[table] = [row[0] for row in rows] + list(extra_indexes.get(table, []))
+    conn.commit()
+
+    # pysqlite only opens transactions implicitly before DML, so the renames
+    # would each commit on their own - drive the transaction explicitly
+    raw = conn.connection.driver_connection
+    previous_isolation = raw.isolation_level
+    raw.isolation_level = None
+    cursor = raw.cursor()
+    try:
+        # Keep views / triggers that name these tables pointing at the live name
+        cursor.execute("PRAGMA legacy_alter_table = ON")
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            for table in tables:
+                if table in existing:
+                    cursor.execute(f"ALTER TABLE {table} RENAME TO {table}{RETIRED_SUFFIX}")
+                cursor.execute(f"ALTER TABLE {shadow_name(table)} RENAME TO {table}")
+                if table in existing:
+                    cursor.execute(f"DROP TABLE {table}{RETIRED_SUFFIX}")
+                for index_sql in indexes[table]:
+                    cursor.execute(index_sql)
+            cursor.execute("COMMIT")
+        except Exception:
+            cursor.execute("ROLLBACK")
+            raise
+    finally:
+        cursor.execute("PRAGMA legacy_alter_table = OFF")
+        cursor.close()
+        raw.isolation_level = previous_isolation
+
+    logger.info(f"Swapped in {len(tables)} rebuilt tables: {', '.join(tables)}")
+
+
+def refresh_tables_from_script(engine: Engine, script: str) -> Dict[str, int]:
+    """
+    Rebuild every CREATE TABLE ... AS table of a script without dropping the live tables.
+
+    Each table is built as <name>__shadow, then all are swapped in at once; the
+    script's CREATE INDEX statements are applied to the new live tables inside
+    the swap transaction, and any other statements run afterwards.
+
+    Args:
+        engine: SQLite engine
+        script: SQL script such as create_materialized_views.sql
+
+    Returns:
+        Dict[str, int]: Row count per rebuilt table
+    """
+    tables: List[str] = []
+    indexes: Dict[str, List[str]] = {}
+    other_statements: List[str] = []
+    row_counts: Dict[str, int] = {}
+
+    with engine.connect() as conn:
+        for statement in split_statements(script):
+            create_table = _CREATE_TABLE_AS.match(statement)
+            create_index = _CREATE_INDEX.match(statement)
+
+            if create_table:
+                table, select_sql = create_table.groups()
+                shadow = shadow_name(table)
+                conn.execute(text(f"DROP TABLE IF EXISTS {shadow}"))
+                conn.execute(text(f"CREATE TABLE {shadow} AS {select_sql}"))
+                conn.commit()
+                row_counts[table] = conn.execute(text(f"SELECT COUNT(*) FROM {shadow}")).scalar()
+                tables.append(table)
+                logger.info(f"Built {shadow} ({row_counts[table]} rows)")
+            elif create_index:
+                indexes.setdefault(create_index.group(1), []).append(statement)
+            else:
+                other_statements.append(statement)
+
+        swap_in_shadow_tables(conn, tables, extra_indexes=indexes)
+
+        # Indexes on tables the script does not rebuild
+        for table, statements in indexes.items():
+            if table not in tables:
+                other_statements.extend(statements)
+
+        for statement in other_statements:
+            conn.execute(text(statement))
+        conn.commit()
+
+    return row_counts
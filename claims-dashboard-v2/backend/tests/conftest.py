@@ -0,0 +1,34 @@
+"""
+Test setup: a throwaway SQLite database.
+
+Settings and the global engine are created at import time, so the
+environment is pointed at a temporary directory before anything from app
+is imported.
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+TEST_DATA_DIR = tempfile.mkdtemp(prefix="claims-dashboard-v2-tests-")
+os.environ["DATABASE_TYPE"] = "sqlite"
+os.environ["SQLITE_DB_PATH"] = str(Path(TEST_DATA_DIR) / "claims_analytics.db")
+os.environ["DEBUG"] = "False"
+
+
+@pytest.fixture
+def sqlite_engine(tmp_path):
+    """Empty database with the full schema."""
+    from sqlalchemy import create_engine
+    from app.db.models import Base
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'claims.db'}")
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
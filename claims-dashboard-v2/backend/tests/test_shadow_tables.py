@@ -0,0 +1,74 @@
+"""Shadow table refresh: dependents survive, failures roll back to the old tables."""
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from app.utils.shadow_tables import refresh_tables_from_script, shadow_name
+
+SCRIPT = """
+-- Summary tables
+CREATE TABLE IF NOT EXISTS mv_year AS
+SELECT year, SUM(amount) AS total FROM source GROUP BY year;
+
+CREATE INDEX IF NOT EXISTS idx_mv_year ON mv_year(year);
+
+CREATE TABLE IF NOT EXISTS mv_count AS SELECT COUNT(*) AS claims FROM source;
+CREATE INDEX IF NOT EXISTS idx_mv_count ON mv_count(claims);
+"""
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'summary.db'}")
+    with engine.connect() as conn:
+        conn.execute(text("CREATE TABLE source (year INTEGER, amount REAL)"))
+        conn.execute(text("INSERT INTO source VALUES (2022, 10), (2022, 30), (2023, 5)"))
+        conn.commit()
+    refresh_tables_from_script(engine, SCRIPT)
+    with engine.connect() as conn:
+        conn.execute(text("CREATE VIEW v_year AS SELECT year, total FROM mv_year WHERE total > 0"))
+        conn.commit()
+    yield engine
+    engine.dispose()
+
+
+def query(engine, sql):
+    with engine.connect() as conn:
+        return conn.execute(text(sql)).fetchall()
+
+
+def add_claims(engine):
+    with engine.connect() as conn:
+        conn.execute(text("INSERT INTO source VALUES (2024, 7)"))
+        conn.commit()
+
+
+def test_refresh_rebuilds_tables_and_keeps_views_and_indexes(engine):
+    add_claims(engine)
+    assert refresh_tables_from_script(engine, SCRIPT) == {'mv_year': 3, 'mv_count': 1}
+
+    assert query(engine, "SELECT year, total FROM v_year ORDER BY year") == [(2022, 40.0), (2023, 5.0), (2024, 7.0)]
+    assert query(engine, "SELECT claims FROM mv_count") == [(4,)]
+    assert dict(query(engine, "SELECT name, tbl_name FROM sqlite_master WHERE type = 'index'")) == {
+        'idx_mv_year': 'mv_year', 'idx_mv_count': 'mv_count'
+    }
+    assert {name for (name,) in query(engine, "SELECT name FROM sqlite_master WHERE type = 'table'")} == {
+        'source', 'mv_year', 'mv_count'
+    }
+
+
+def test_failure_mid_swap_rolls_back_to_the_old_tables(engine):
+    add_claims(engine)
+    broken = SCRIPT + "CREATE INDEX IF NOT EXISTS idx_broken ON mv_count(no_such_column);\n"
+    with pytest.raises(Exception, match="no such column"):
+        refresh_tables_from_script(engine, broken)
+
+    assert query(engine, "SELECT year, total FROM v_year ORDER BY year") == [(2022, 40.0), (2023, 5.0)]
+    assert query(engine, "SELECT claims FROM mv_count") == [(3,)]
+    tables = {name for (name,) in query(engine, "SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert {shadow_name('mv_year'), shadow_name('mv_count')} <= tables
+    assert not any(name.endswith('__retired') for name in tables)
+
+    # A later successful refresh replaces the leftover shadows
+    refresh_tables_from_script(engine, SCRIPT)
+    assert query(engine, "SELECT claims FROM mv_count") == [(4,)]